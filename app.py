@@ -1,27 +1,69 @@
-import json
 import copy
 import streamlit as st
 from pathlib import Path
 from datetime import datetime
 import re
-import sys, os, tempfile
+import sys, os
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
-try:
-    from generate_faction_pdf import generate_faction_pdf as _gen_faction_pdf
-    _PDF_AVAILABLE = True
-except ImportError:
-    _PDF_AVAILABLE = False
 import math
 import base64
-
-from armybuilder import ArmyBuilderApplication, APP_URL, GAME_COLORS, GAME_CONFIG
+import urllib.parse
+import zlib
+
+from armybuilder import ArmyBuilderApplication, GAME_COLORS, GAME_CONFIG, SESSION_FOOTPRINTS
+from armybuilder.export_jobs import EXPORT_JOBS, PDF_AVAILABLE, content_hash
+from armybuilder.exporters import export_json
+from armybuilder.labels import UnitLabels
+from armybuilder.lazy import loaded_modules
+from armybuilder.profiling import PROFILER, span
+from armybuilder.requirements import RequirementEvaluator, UpgradeDependencyGraph, requirements_met
+from armybuilder.weapon_counts import WeaponCountAllocator
+from armybuilder.assets import cover_data_uri
+from armybuilder.builder import mobility_mount
+from armybuilder.combat import NUMPY_AVAILABLE
+from armybuilder.army_view import army_page, army_sections, section_header
+from armybuilder.config import ARMY_LIST_PAGE_SIZE, EXPORT_POLL_SECONDS, MAX_IMPORTED_UNITS
+from repositories.json_codec import CODEC
 
 st.set_page_config(page_title="OPR ArmyBuilder FR", layout="wide", initial_sidebar_state="auto")
 application = ArmyBuilderApplication(Path(__file__).resolve().parent, st.session_state)
 application.initialize()
+# Empreinte mémoire de la session (hors catalogue partagé), agrégée par processus ; échantillonnée
+try:
+    from streamlit.runtime.scriptrunner import get_script_run_ctx as _get_ctx
+except ImportError:  # Streamlit trop ancien : pas d'identifiant de session
+    _get_ctx = lambda: None
+_run_ctx = _get_ctx()
+if _run_ctx is not None:
+    application.session.sample_footprint(_run_ctx.session_id)
+
+def session_catalog():
+    """Version du catalogue figée au moment du choix de la faction (sinon la version courante)."""
+    return st.session_state.get("catalog_version") or application.catalog.current_version()
+
+def unit_labels(unit):
+    """Libellés précalculés de l'unité pour la version de catalogue de la session."""
+    _labels = application.catalog.labels(st.session_state.get("game", ""), st.session_state.get("faction", ""), session_catalog())
+    return _labels.for_unit(unit) if _labels is not None else UnitLabels(unit)
+
+# Fragments : une interaction dans un fragment ne relance que ce fragment (Streamlit ≥ 1.33).
+fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None) or (lambda func: func)
+
+def rerun_fragment():
+    """Relance seulement le fragment courant (toute l'app si non supporté)."""
+    try:
+        st.rerun(scope="fragment")
+    except TypeError:
+        st.rerun()
+
+def invalidate_army():
+    """La liste d'armée a changé : points, liste, exports et titre sont à recalculer → rerun complet."""
+    st.rerun()
+
 _acc_color = GAME_COLORS.get(st.session_state.get("game",""), "#2980b9")
 
-st.markdown(f"""<style>
+with span("app.css"):
+    st.markdown(f"""<style>
 :root {{--acc: {_acc_color};}}
 #MainMenu {{visibility: hidden;}} footer {{visibility: hidden;}} header {{background: transparent;}}
 
@@ -99,314 +141,41 @@ button[kind="primary"] {{background: var(--acc) !important; color: white !import
 }}
 </style>""", unsafe_allow_html=True)
 
-@st.cache_data
-def export_faction_html(data):
-    """Génère un HTML complet de la fiche de faction (toutes unités, règles, sorts)."""
-    def esc(t):
-        if t is None: return ""
-        return str(t).replace("&","&amp;").replace("<","&lt;").replace(">","&gt;").replace('"',"&quot;")
-
-    faction = data.get("faction","Faction")
-    game    = data.get("game","")
-    version = data.get("version","")
-    desc    = data.get("description","")
-    history = data.get("history","")
-
-    def fmt_r(r):
-        s = str(r) if r is not None else "-"
-        return s if s in ("Mêlée","-") else f'{s}"'
-
-    def weapon_rows(weapons):
-        if not weapons: return ""
-        bw = weapons if isinstance(weapons, list) else [weapons]
-        rows = ""
-        for w in bw:
-            if not isinstance(w, dict): continue
-            cnt  = w.get("count","")
-            cn   = f"{cnt}x " if cnt and cnt > 1 else ""
-            rng  = fmt_r(w.get("range"))
-            att  = w.get("attacks","-")
-            pa   = w.get("armor_piercing",0) or "-"
-            sr   = ", ".join(w.get("special_rules",[])) or "-"
-            rows += (f"<tr><td class='wn'><b>{esc(cn+w.get('name',''))}</b></td>"
-                     f"<td>{esc(rng)}</td><td>A{att}</td><td>{pa}</td>"
-                     f"<td class='ws'>{esc(sr)}</td></tr>\n")
-        return rows
-
-    def unit_card(u):
-        name   = esc(u["name"])
-        cost   = u.get("base_cost","?")
-        size   = u.get("size",1)
-        qual   = u.get("quality","?")
-        defe   = u.get("defense","?")
-        cor    = u.get("coriace","")
-        sr     = ", ".join(u.get("special_rules",[]))
-        named  = u.get("unit_detail") == "named_hero" or "Unique" in u.get("special_rules",[])
-        star   = "★ " if named else ""
-        cor_s  = f" | Coriace {cor}" if cor else ""
-        html   = f"""<div class='uc'>
-<div class='uh'><span><b>{star}{name} [{size}]</b></span><span class='uc-cost'>{cost} pts</span></div>
-<div class='us'>Qual {qual}+&nbsp;|&nbsp;Déf {defe}+{esc(cor_s)}</div>"""
-        if sr: html += f"<div class='ur'>{esc(sr)}</div>"
-        # Armes de base
-        wr = weapon_rows(u.get("weapon",[]))
-        if wr:
-            html += """<table class='wt'><thead><tr>
-<th>Arme</th><th>Portée</th><th>Att</th><th>PA</th><th>Règles spé.</th>
-</tr></thead><tbody>""" + wr + "</tbody></table>"
-        # Options
-        for g in u.get("upgrade_groups",[]):
-            gtype = g.get("type","")
-            desc_g = esc(g.get("description",""))
-            req   = g.get("requires",[])
-            req_s = f" <i>[{esc(', '.join(req))}]</i>" if req else ""
-            html += f"<div class='og'><b>{desc_g}</b>{req_s}</div>"
-            for o in g.get("options",[]):
-                oname = esc(o.get("name",""))
-                ocost = o.get("cost",0)
-                cost_s = f"+{ocost} pts" if ocost > 0 else "Gratuit"
-                # Pour les montures, lire les SR depuis o["mount"] si présent
-                _mdata = o.get("mount",{})
-                if _mdata and gtype == "mount":
-                    _msr = list(_mdata.get("special_rules",[]))
-                    _mws = _mdata.get("weapon",[])
-                    if isinstance(_mws,dict): _mws=[_mws]
-                    _mw_parts=[]
-                    for _mw in _mws:
-                        if isinstance(_mw,dict) and _mw.get('name'):
-                            _mp=f"{_mw['name']} (A{_mw.get('attacks','?')}"
-                            if _mw.get('armor_piercing'): _mp+=f", PA({_mw['armor_piercing']})"
-                            _msr2=', '.join(_mw.get('special_rules',[]))
-                            if _msr2: _mp+=f", {_msr2}"
-                            _mp+=")"; _mw_parts.append(esc(_mp))
-                    _mcor=_mdata.get('coriace_bonus',0)
-                    _mcor_s=[f"Coriace (+{_mcor})"] if _mcor else []
-                    osr = ", ".join(_mw_parts + _mcor_s + [esc(r) for r in _msr])
-                else:
-                    osr   = ", ".join(o.get("special_rules",[]))
-                ow    = o.get("weapon") if gtype != "mount" else None
-                det   = ""
-                if ow:
-                    ws = ow if isinstance(ow,list) else [ow]
-                    parts = []
-                    for w in ws:
-                        if isinstance(w,dict):
-                            rng = fmt_r(w.get("range"))
-                            att = w.get("attacks","?")
-                            pa  = w.get("armor_piercing",0) or 0
-                            sr2 = ", ".join(w.get("special_rules",[])) or ""
-                            # Ne pas répéter le nom de l'arme si identique à oname
-                            _wname = w.get('name','')
-                            _inner = f"{rng}, A{att}"
-                            if pa: _inner += f", PA({pa})"
-                            if sr2: _inner += f", {sr2}"
-                            p = f"{_wname} ({_inner})" if _wname != o.get('name','') else f"({_inner})"
-                            parts.append(esc(p))
-                    det = ", ".join(parts)
-                elif osr:
-                    det = esc(osr)
-                # det peut déjà contenir des parenthèses (profil arme) ou non (montures/SR)
-                label = oname if not det else (
-                    f"{oname} {det}" if det.startswith("(") else f"{oname} ({det})")
-                html += (f"<div class='ol'>{label}"
-                         f"<span class='oc'>{esc(cost_s)}</span></div>")
-        html += "</div>"
-        return html
-
-    # Groupes d'unités
-    CATS = [
-        ("Héros",                              ["hero"]),
-        ("Unités de base",                    ["unit"]),
-        ("Véhicules légers / Petits monstres", ["light_vehicle"]),
-        ("Véhicules / Monstres",               ["vehicle"]),
-        ("Titans",                             ["titan"]),
-        ("Personnages nommés",                 ["named_hero"]),
-    ]
-
-    # Règles spéciales — catégorisation
-    rules = data.get("faction_special_rules",[])
-    spells = data.get("spells",{})
-
-    # Détecter la règle d'armée (première, ou celle marquée army_rule)
-    army_rules = []
-    aura_rules = []
-    other_rules = []
-    for r in rules:
-        n = r.get("name","").lower()
-        if r.get("army_rule") or (len(rules) > 0 and rules.index(r) == 0 and r.get("army_rule") is not False and "aura" not in n):
-            # Heuristique : première règle non-aura = règle d'armée
-            if not army_rules and "aura" not in n:
-                army_rules.append(r)
-                continue
-        if "aura" in n:
-            aura_rules.append(r)
-        else:
-            other_rules.append(r)
-
-    def rules_section(title, rule_list, color="#1a1a2e"):
-        """Retourne un bloc sous-titre + règles pour insertion dans la zone column-count."""
-        if not rule_list: return ""
-        items = ""
-        for r in rule_list:
-            items += (f"<div class='ri-blk'>"
-                      f"<b>{esc(r.get('name',''))}</b> : {esc(r.get('description',''))}"
-                      f"</div>")
-        return (f"<div class='rs-hdr' style='border-color:{color};color:{color};'>"
-                f"{esc(title)}</div>{items}")
-
-    spells_html = ""
-    if spells:
-        items = ""
-        for sname, sdata in spells.items():
-            sdesc = sdata.get("description",sdata) if isinstance(sdata,dict) else sdata
-            items += f"<div class='ri-blk'><b>{esc(sname)}</b> : {esc(sdesc)}</div>"
-        spells_html = f"<div class='rules-cols spells-section'><div class='rs-hdr spells-hdr' style='color:#fff;border-color:#2c3e7a;'>Sorts</div>{items}</div>"
-
-    units_html = ""
-    for cat_name, types in CATS:
-        cat_units = [u for u in data["units"] if u.get("unit_detail",u.get("type")) in types]
-        if not cat_units: continue
-        cards = "".join(unit_card(u) for u in cat_units)
-        units_html += f"<div class='cat-banner'>{esc(cat_name)}</div><div class='grid'>{cards}</div><div class='page-gap'></div>"
-
-    css = """
-body{font-family:'Segoe UI',Helvetica,sans-serif;margin:0;padding:12px;background:#fff;color:#212529;font-size:11px;}
-.page{max-width:210mm;margin:0 auto;}
-.main-title{background:#1a1a2e;color:#fff;text-align:center;padding:14px 8px 8px;font-size:20px;font-weight:700;letter-spacing:1px;}
-.main-sub{background:#16213e;color:#aab4d4;text-align:center;padding:3px;font-size:9px;}
-.intro{padding:8px 4px;font-size:10px;color:#444;border-bottom:1px solid #dee2e6;margin-bottom:8px;}
-/* Intro 2 colonnes */
-.section-hdr{font-weight:700;font-size:9px;text-transform:uppercase;letter-spacing:.8px;
-  color:#1a1a2e;border-bottom:2px solid #1a1a2e;padding-bottom:3px;margin-bottom:5px;}
-.intro-txt{font-size:8px;color:#333;line-height:1.45;margin:0;}
-/* Règles */
-.rules-wrap{display:grid;grid-template-columns:1fr 1fr 1fr;gap:8px;margin-bottom:8px;}
-/* Zone règles spéciales en 3 colonnes CSS */
-.rules-cols{column-count:3;column-gap:10px;column-rule:1px solid #dee2e6;margin:8px 0 10px;font-size:7.5px;}
-.spells-section{column-count:1;margin-top:6px;border-top:2px solid #2c3e7a;padding-top:4px;}
-.spells-hdr{background:#2c3e7a;padding:2px 6px;font-weight:700;font-size:8px;text-transform:uppercase;letter-spacing:.5px;display:inline-block;width:100%;box-sizing:border-box;margin-bottom:4px;}
-.rs-hdr{font-weight:700;font-size:8px;text-transform:uppercase;letter-spacing:.6px;
-  border-bottom:2px solid currentColor;padding-bottom:2px;margin:8px 0 4px;
-  break-after:avoid;column-span:none;}
-.rs-hdr:first-child{margin-top:0;}
-.ri-blk{break-inside:avoid;margin-bottom:3px;line-height:1.35;}
-/* Récap */
-.recap-wrap{margin-bottom:8px;}
-.recap-banner{background:#2c3e7a;color:#fff;font-weight:700;font-size:9px;padding:3px 6px;margin-top:4px;}
-.recap-table{width:100%;border-collapse:collapse;font-size:8.5px;}
-.recap-table th{background:#eef1f8;padding:2px 4px;border:1px solid #dee2e6;font-weight:700;color:#6c757d;font-size:8px;}
-.recap-table td{padding:2px 4px;border:1px solid #dee2e6;vertical-align:top;}
-.recap-table tr:nth-child(even)td{background:#f8f9fa;}
-/* Catégories et cartes */
-.cat-banner{background:#1a1a2e;color:#fff;font-weight:700;font-size:11px;padding:4px 8px;margin:10px 0 4px;letter-spacing:.5px;}
-.grid{display:grid;grid-template-columns:1fr 1fr;gap:6px;margin-bottom:4px;}
-.uc{border:1px solid #dee2e6;border-radius:3px;overflow:hidden;}
-.uh{background:#eef1f8;display:flex;justify-content:space-between;align-items:center;padding:3px 5px;border-bottom:1px solid #dee2e6;}
-.uh b{font-size:9px;}
-.uc-cost{font-size:8.5px;font-weight:700;color:#c0392b;}
-.us{background:#eef1f8;font-size:7.5px;color:#6c757d;font-weight:700;padding:2px 5px;border-bottom:1px solid #dee2e6;}
-.ur{background:#eef1f8;font-size:7px;padding:2px 5px;border-bottom:1px solid #dee2e6;}
-.wt{width:100%;border-collapse:collapse;font-size:8px;}
-.wt th{background:#eef1f8;padding:1px 3px;border-bottom:1px solid #dee2e6;color:#6c757d;font-size:7px;}
-.wt td{padding:1px 3px;border-bottom:1px solid #dee2e6;vertical-align:top;}
-.wt tr:last-child td{border-bottom:none;}
-.wn{font-size:8px;font-weight:700;}
-.ws{font-size:7px;color:#444;}
-.og{font-size:7.5px;font-weight:700;padding:2px 5px 1px;background:#f8f9fa;border-top:1px solid #dee2e6;margin-top:1px;}
-.ol{font-size:7px;padding:1px 5px 1px 12px;display:flex;justify-content:space-between;border-bottom:1px solid #f0f0f0;}
-.oc{color:#c0392b;font-weight:700;white-space:nowrap;margin-left:4px;}
-@media print{
-  body{margin:0;padding:4px;}
-  .page{max-width:100%;}
-  /* Chaque catégorie commence sur une nouvelle page */
-  .cat-banner{page-break-before:always;break-before:page;}
-  /* Sauf la première bannière (Héros) : elle suit le récap sur la même page */
-  .cat-banner:first-of-type{page-break-before:always;break-before:page;}
-  /* Les cartes d'unités ne se coupent pas */
-  .uc{page-break-inside:avoid;break-inside:avoid;}
-  /* La grille 2 colonnes se coupe entre les cartes uniquement */
-  .grid{page-break-inside:auto;}
-  /* Zone règles + sorts = page 1 complète */
-  .rules-cols,.spells-section,.recap-wrap{page-break-inside:avoid;}
-  /* Éviter les coupures dans les titres */
-  .main-title,.main-sub{page-break-after:avoid;}
-  .page-gap{page-break-after:always;break-after:page;height:0;}
-  /* Ne pas sauter de page après la dernière catégorie */
-  .page-gap:last-child{page-break-after:auto;break-after:auto;}
-}
-"""
-
-    # Tableau récapitulatif
-    def recap_row(u):
-        bw = u.get("weapon",[])
-        if isinstance(bw,dict): bw=[bw]
-        sz = u.get("size",1)
-        eq = []
-        for w in bw:
-            if isinstance(w,dict):
-                cnt = w.get("count","")
-                cs  = f"{cnt}x " if cnt and cnt>1 else (f"{sz}x " if sz>1 else "1x ")
-                rng = fmt_r(w.get("range"))
-                att = w.get("attacks","?")
-                pa  = w.get("armor_piercing",0) or 0
-                sr2 = ", ".join(w.get("special_rules",[])) or ""
-                p   = f"{cs}{w['name']} ({rng}, A{att}"
-                if pa: p += f", PA({pa})"
-                if sr2: p += f", {sr2}"
-                p += ")"
-                eq.append(esc(p))
-        return (f"<tr><td><b>{esc(u['name'])} [{sz}]</b></td>"
-                f"<td>{u.get('quality','?')}</td>"
-                f"<td>{u.get('defense','?')}</td>"
-                f"<td>{' | '.join(eq)}</td>"
-                f"<td>{esc(', '.join(u.get('special_rules',[]))[:80])}</td>"
-                f"<td><b>{u.get('base_cost','?')}</b></td></tr>")
-
-    recap_html = "<div class='recap-wrap'>"
-    for cat_name, types in [("Héros",["hero","named_hero"]),("Unités de base",["unit"]),("Véhicules légers / Monstres / Titans",["light_vehicle","vehicle","titan"])]:
-        cu = [u for u in data["units"] if u.get("unit_detail",u.get("type")) in types]
-        if not cu: continue
-        rows = "".join(recap_row(u) for u in cu)
-        recap_html += (f"<div class='recap-banner'>{esc(cat_name)}</div>"
-                       f"<table class='recap-table'><thead><tr>"
-                       f"<th>Nom [taille]</th><th>Qua</th><th>Déf</th>"
-                       f"<th>Équipement</th><th>Règles spéciales</th><th>Coût</th>"
-                       f"</tr></thead><tbody>{rows}</tbody></table>")
-    recap_html += "</div>"
-
-    intro_block = ""
-    if desc or history:
-        history_html = esc(history).replace(
-            chr(10) + chr(10), "</p><p class='intro-txt'>"
-        )
-        intro_block = f"""<div style="display:grid;grid-template-columns:1fr 1fr;gap:12px;margin:8px 0 10px;">
-  <div>
-    <div class="section-hdr">Introduction</div>
-    <div class="intro-txt">{esc(desc)}</div>
-    <div class="section-hdr" style="margin-top:8px;">Au sujet d'OPR</div>
-    <div class="intro-txt">OPR (www.onepagerules.com) h??berge de nombreux jeux gratuits con??us pour ??tre rapides ?? apprendre et faciles ?? jouer. Ce projet a ??t?? r??alis?? par des joueurs, pour des joueurs, et ne peut exister que gr??ce au g??n??reux soutien de notre formidable communaut?? ! Si vous souhaitez soutenir le d??veloppement de nos jeux, vous pouvez faire un don sur : www.patreon.com/onepagerules. Merci de jouer ?? OPR !</div>
-  </div>
-  <div>
-    <div class="section-hdr">Histoire de la faction</div>
-    <div class="intro-txt">{history_html}</div>
-  </div>
-</div>"""
-
-    return f"""<!DOCTYPE html><html lang="fr"><head><meta charset="utf-8">
-<title>{esc(faction)} ??? {esc(game)}</title>
-<style>{css}</style></head><body><div class="page">
-<div class="main-title">{esc(faction.upper())}</div>
-<div class="main-sub">{esc(game)} ??? v{esc(version)}</div>
-{intro_block}
-<div class='rules-cols'>
-{rules_section("R??gle sp??ciale de l'arm??e", army_rules)}
-{rules_section("R??gles sp??ciales", other_rules, "#2c3e7a")}
-{rules_section("R??gles sp??ciales d'aura", aura_rules, "#555")}
-</div>
-{spells_html}
-{recap_html}
-{units_html}
-</div></body></html>"""
+def faction_export_key(kind, game, faction, catalog_version):
+    """Empreinte du contenu d'une faction, calculée une fois par version du catalogue (pas à chaque rerun)."""
+    return application.catalog.export_key(kind, game, faction, catalog_version)
+
+def export_button(job_key, label, file_name, mime, key):
+    """Bouton de téléchargement d'un export en tâche de fond (ou son état s'il n'est pas prêt)."""
+    _status = EXPORT_JOBS.status(job_key)
+    if _status == "error":
+        st.error(f"Export impossible : {EXPORT_JOBS.error(job_key)}")
+    elif _status == "done":
+        st.download_button(label, data=EXPORT_JOBS.result(job_key), file_name=file_name, mime=mime, use_container_width=True, key=key)
+    elif _poll_export is None:
+        st.button("⏳ Préparation… (actualiser)", key=f"{key}_wait", use_container_width=True)
+    else:
+        st.caption("⏳ Préparation…")
+
+def _polled_export(job_key, label, file_name, mime, key):
+    """Relancé seul toutes les EXPORT_POLL_SECONDS ; un rerun complet quand l'export est prêt arrête le sondage."""
+    if EXPORT_JOBS.status(job_key) != "pending":
+        st.rerun()
+    export_button(job_key, label, file_name, mime, key)
+
+try:
+    _poll_export = (getattr(st, "fragment", None) or getattr(st, "experimental_fragment"))(run_every=EXPORT_POLL_SECONDS)(_polled_export)
+except (AttributeError, TypeError):
+    # Streamlit sans fragments périodiques : bouton d'actualisation manuel
+    _poll_export = None
+
+def export_download(job_key, label, file_name, mime, key):
+    """Téléchargement d'un export en tâche de fond ; tant qu'il est en cours, un fragment périodique le sonde."""
+    if _poll_export is not None and EXPORT_JOBS.status(job_key) == "pending":
+        _poll_export(job_key, label, file_name, mime, key)
+    else:
+        export_button(job_key, label, file_name, mime, key)
+
 
 
 
@@ -435,20 +204,37 @@ with st.sidebar:
             st.markdown(f"**Unités :** {units_now} / {units_cap}")
             st.markdown(f"**Héros :** {heroes_now} / {heroes_cap}")
     # ── Export HTML de faction ─────────────────────────────────────────────
-    if st.session_state.get("faction_data"):
+    _sheet_catalog = session_catalog() if st.session_state.get("page") == "army" else None
+    if _sheet_catalog is not None and _sheet_catalog.get_faction(st.session_state.get("game"), st.session_state.get("faction")):
         st.subheader("📘 Fiche de faction")
-        _fdata = st.session_state.faction_data
-        _faction_slug = re.sub(r'[^a-z0-9]', '_', _fdata.get("faction","faction").lower()).strip('_')
-        _html_faction = export_faction_html(_fdata)
-        st.download_button(
-            "📄 Exporter fiche faction (HTML)",
-            data=_html_faction,
-            file_name=f"{_faction_slug}_fiche.html",
-            mime="text/html",
-            use_container_width=True,
-            key="dl_faction_html"
-        )
+        _faction_slug = re.sub(r'[^a-z0-9]', '_', st.session_state.faction.lower()).strip('_')
+        _sheet_data = _sheet_catalog.get_faction(st.session_state.game, st.session_state.faction)
+        with span("app.sidebar_faction_sheet"):
+            _sheet_job = EXPORT_JOBS.submit("faction_html", _sheet_data, key=faction_export_key("faction_html", st.session_state.game, st.session_state.faction, _sheet_catalog))
+        export_download(_sheet_job, "📄 Exporter fiche faction (HTML)", f"{_faction_slug}_fiche.html", "text/html", "dl_faction_html")
+        if PDF_AVAILABLE:
+            # Le PDF (reportlab) est lourd : il n'est lancé qu'à la demande.
+            _pdf_key = faction_export_key("faction_pdf", st.session_state.game, st.session_state.faction, _sheet_catalog)
+            if EXPORT_JOBS.status(_pdf_key) == "unknown":
+                if st.button("📕 Préparer la fiche PDF", key="prepare_faction_pdf", use_container_width=True):
+                    EXPORT_JOBS.submit("faction_pdf", _sheet_data, key=_pdf_key); st.rerun()
+            else:
+                export_download(_pdf_key, "📕 Exporter fiche faction (PDF)", f"{_faction_slug}_fiche.pdf", "application/pdf", "dl_faction_pdf")
     st.divider()
+    # ── Panneau de profilage (ARMYBUILDER_PROFILE=1) ─────────────────────────
+    if PROFILER.enabled:
+        with st.expander("🛠️ Profilage", expanded=False):
+            st.dataframe([{k: v for k, v in row.items() if k != "histogram"} for row in PROFILER.snapshot()], use_container_width=True, hide_index=True)
+            _health = application.warmup.health()
+            st.caption(f"Préchauffage : {_health['status']}" + (f" ({_health['duration_ms']:.0f} ms)" if _health["duration_ms"] is not None else "") + (f" — {len(_health['errors'])} erreur(s)" if _health["errors"] else ""))
+            _sessions = SESSION_FOOTPRINTS.summary()
+            st.caption(f"Sessions actives : {_sessions['sessions']} — mémoire totale {_sessions['total_bytes'] / 1e6:.1f} Mo, p95 {_sessions['p95_bytes'] / 1e3:.0f} ko, max {_sessions['max_bytes'] / 1e3:.0f} ko")
+            st.caption("Modules lourds chargés : " + ", ".join(f"{name} {'✅' if loaded else '—'}" for name, loaded in loaded_modules().items()))
+            _colP1, _colP2, _colP3 = st.columns(3)
+            with _colP1: st.download_button("JSON", data=PROFILER.to_json(), file_name="profil.json", mime="application/json", key="profile_json")
+            with _colP2: st.download_button("Prometheus", data=PROFILER.to_prometheus(), file_name="profil.prom", mime="text/plain", key="profile_prom")
+            with _colP3:
+                if st.button("Réinitialiser", key="profile_reset"): PROFILER.reset(); st.rerun()
 
 
 # ── Lecture du paramètre ?list= (QR code de partage) ────────────────────────
@@ -457,9 +243,8 @@ if not st.session_state.get("_qr_loaded"):
     try:
         _qp = st.query_params.get("list", "")
         if _qp:
-            import zlib as _z, base64 as _b64q, urllib.parse as _uq
-            _raw  = _b64q.urlsafe_b64decode(_uq.unquote(_qp).encode() + b"==")
-            _data = json.loads(_z.decompress(_raw).decode())
+            _raw  = base64.urlsafe_b64decode(urllib.parse.unquote(_qp).encode() + b"==")
+            _data = CODEC.loads(zlib.decompress(_raw))
             # Pré-remplir jeu, faction et points directement dans session_state
             if _data.get("game"):    st.session_state["game"]    = _data["game"]
             if _data.get("faction"): st.session_state["faction"] = _data["faction"]
@@ -508,588 +293,57 @@ def validate_army_rules(army_list, army_points, game):
             check_unit_max_cost(army_list, army_points, game_config) and
             check_unit_copy_rule(army_list, army_points, game_config))
 
-def check_weapon_conditions(unit_key, requires, unit=None):
+def requirement_evaluator(unit_key, unit):
+    """Prérequis mémorisés du brouillon : seuls les groupes en aval d'une sélection modifiée sont réévalués."""
+    _evaluator = st.session_state.get(f"{unit_key}_requirements")
+    if _evaluator is None or _evaluator.unit is not unit:
+        _labels = unit_labels(unit)
+        _faction_reqs = application.catalog.requirements(st.session_state.get("game", ""), st.session_state.get("faction", ""), session_catalog())
+        _graph = _faction_reqs.for_unit(unit, _labels) if _faction_reqs is not None else UpgradeDependencyGraph(unit, _labels)
+        _evaluator = st.session_state[f"{unit_key}_requirements"] = RequirementEvaluator(unit, _labels, _graph)
+    return _evaluator
+
+def check_weapon_conditions(unit_key, requires, unit=None, group_idx=None):
     """
     Vérifie si les conditions d'une option sont remplies.
     Prend en compte :
     - Les sélections explicites dans session_state (armes choisies, options nommées)
     - Les armes de BASE de l'unité, actives sauf si remplacées par type=weapon
     - Les armes de BASE retirées par un conditional_weapon avec replaces
+    Avec group_idx, le résultat est mémorisé selon les seuls groupes dont ce groupe dépend.
     """
     if not requires:
         return True
-    current_weapons = []
     selections = st.session_state.unit_selections.get(unit_key, {})
-
-    def _selected_group_weapons(group, selected_value):
-        if not unit or not isinstance(selected_value, str):
-            return []
-        gtype = group.get("type", "")
-        if gtype not in ("weapon", "conditional_weapon"):
-            return []
-
-        if gtype == "weapon":
-            bw = unit.get("weapon", [])
-            if isinstance(bw, list) and bw:
-                lbls = [w.get("name", "Arme") for w in bw if isinstance(w, dict)]
-                default_lbl = lbls[0] if len(lbls) == 1 else " et ".join(lbls)
-            elif isinstance(bw, dict):
-                default_lbl = bw.get("name", "Arme")
-            else:
-                default_lbl = ""
-            if selected_value == default_lbl:
-                return []
-
-        for option in group.get("options", []):
-            weapon_data = option.get("weapon", {})
-            if gtype == "weapon":
-                option_label = (" et ".join(w.get("name", "Arme") for w in weapon_data) + f" (+{option['cost']} pts)") if isinstance(weapon_data, list) else format_weapon_option(weapon_data, option.get("cost", 0))
-            else:
-                option_label = format_weapon_option(weapon_data, option.get("cost", 0)) if isinstance(weapon_data, dict) and weapon_data else f"{option.get('name', 'Amélioration')} (+{option.get('cost', 0)} pts)"
-            if option_label != selected_value:
-                continue
-            if isinstance(weapon_data, list):
-                return [w for w in weapon_data if isinstance(w, dict)]
-            if isinstance(weapon_data, dict) and weapon_data:
-                return [weapon_data]
-            return []
-        return []
-
-    # 1. Sélections explicites (armes choisies dans les groupes conditional/weapon)
-    for key, v in selections.items():
-        if key.startswith("group_") and unit is not None:
-            try:
-                group_idx = int(key.split("_", 1)[1])
-            except (IndexError, ValueError):
-                group_idx = None
-            if group_idx is not None and group_idx < len(unit.get("upgrade_groups", [])):
-                selected_weapons = _selected_group_weapons(unit.get("upgrade_groups", [])[group_idx], v)
-                if selected_weapons:
-                    current_weapons.extend(selected_weapons)
-                    continue
-        if isinstance(v, str) and v not in ("Aucune amélioration", "Aucune arme", "Aucun rôle",
-                                             "Aucune monture", "Aucune option de mobilité"):
-            current_weapons.append({"name": v.split(" (")[0]})
-
-    # 2. Armes de BASE — actives sauf si remplacées
-    if unit is not None:
-        # a) Un groupe type=weapon actif → armes de base remplacées en bloc
-        replaced_by_weapon_group = False
-        for gi, g in enumerate(unit.get("upgrade_groups", [])):
-            if g.get("type") != "weapon":
-                continue
-            g_key = f"group_{gi}"
-            sel = selections.get(g_key, "")
-            if not sel:
-                continue
-            # Reconstruire choices[0] = label de l'armement de base (= pas de remplacement)
-            bw = unit.get("weapon", [])
-            if isinstance(bw, list) and bw:
-                lbls = [w.get("name", "Arme") for w in bw if isinstance(w, dict)]
-                default_lbl = lbls[0] if len(lbls) == 1 else " et ".join(lbls)
-            elif isinstance(bw, dict):
-                default_lbl = bw.get("name", "Arme")
-            else:
-                default_lbl = ""
-            # Remplacement actif seulement si l'utilisateur a choisi autre chose que le défaut
-            if sel != default_lbl:
-                replaced_by_weapon_group = True
-                break
-
-        if not replaced_by_weapon_group:
-            # Les requires vérifient l'armement de BASE de l'unité.
-            # Les retraits par d'autres conditional_weapon ne bloquent PAS les requires
-            # (ex: remplacer le Bouclier ne doit pas empêcher de remplacer l'ACC ensuite).
-            for w in unit.get("weapon", []):
-                if isinstance(w, dict):
-                    current_weapons.append(w)
-
-    for req in requires:
-        if not any(w.get("name") == req or req in w.get("tags", []) for w in current_weapons):
-            return False
-    return True
-
-def format_unit_option(u):
-    name_part = u["name"] + (" [1]" if u.get("type") == "hero" else f" [{u.get('size', 10)}]")
-    return f"{name_part} | Qual {u.get('quality','?')}+ | Déf {u.get('defense','?')}+ | {u.get('base_cost',0)} pts"
-def weapon_profile_md(weapon):
-    """Retourne une ligne de profil lisible pour l'UI : Mêlée | A2 | PA1 | Règles"""
-    if not weapon or not isinstance(weapon, dict): return ""
-    rng = weapon.get("range", "Mêlée")
-    if rng in (None, "-", "mêlée", "Mêlée") or str(rng).lower() == "mêlée":
-        rng_str = "Mêlée"
-    elif isinstance(rng, (int, float)):
-        rng_str = f'{int(rng)}"'
-    else:
-        s = str(rng).strip(); rng_str = s if s.endswith('"') else f'{s}"'
-    att = weapon.get("attacks", "?")
-    ap  = weapon.get("armor_piercing", "?")
-    sr  = weapon.get("special_rules", [])
-    parts = [f"{rng_str} | A{att} | PA{ap}"]
-    if sr: parts.append(", ".join(sr))
-    return " | ".join(parts)
-
-def format_weapon_option(weapon, cost=0):
-    if not weapon or not isinstance(weapon, dict): return "Aucune arme"
-    rng = weapon.get("range","Mêlée")
-    if rng in (None,"-","mêlée","Mêlée") or str(rng).lower()=="mêlée": rng_str="Mêlée"
-    elif isinstance(rng,(int,float)): rng_str=f'{int(rng)}"'
-    else: s=str(rng).strip(); rng_str=s if s.endswith('"') else f'{s}"'
-    sr = weapon.get("special_rules",[])
-    profile_inner = f"{rng_str}/A{weapon.get('attacks','?')}/PA{weapon.get('armor_piercing','?')}"
-    if sr: profile_inner += f", {', '.join(sr)}"
-    profile = f"{weapon.get('name','Arme')} ({profile_inner})"
-    if cost > 0: profile += f" (+{cost} pts)"
-    return profile
-
-def format_mobility_option(opt):
-    """Formate une option de mobilité GDF (données à la racine de l'option)."""
-    if not opt or not isinstance(opt, dict): return "Aucune option"
-    name = opt.get("name", "Option")
-    cost = opt.get("cost", 0)
-    sr = [s for s in opt.get("special_rules", []) if "Coriace" not in s]
-    coriace = opt.get("coriace_bonus", 0)
-    stats = []
-    if coriace > 0: stats.append(f"Coriace+{coriace}")
-    w = opt.get("weapon")
-    if w and isinstance(w, dict):
-        stats.append(f"{w.get('name','Arme')} A{w.get('attacks','?')}/PA{w.get('armor_piercing','?')}")
-    if sr: stats.extend(sr)
-    label = name
-    if stats: label += f" ({', '.join(stats)})"
-    return label + f" (+{cost} pts)"
-
-def format_mount_option(mount):
-    if not mount or not isinstance(mount, dict): return "Aucune monture"
-    name = mount.get("name", "Monture")
-    cost = mount.get("cost", 0)
-    mount_data = mount.get("mount", {})
-    weapons = mount_data.get("weapon", [])
-    if isinstance(weapons, dict): weapons = [weapons]
-    coriace = mount_data.get("coriace_bonus", 0)
-    stats = []
-    for w in weapons:
-        if isinstance(w, dict):
-            p = f"{w.get('name','Arme')} A{w.get('attacks','?')}/PA{w.get('armor_piercing','?')}"
-            sp = ", ".join(w.get("special_rules", []))
-            if sp: p += f" ({sp})"
-            stats.append(p)
-    if coriace > 0: stats.append(f"Coriace+{coriace}")
-    sr = mount_data.get("special_rules", [])
-    if sr:
-        rt = ", ".join([r for r in sr if not r.startswith(("Griffes", "Sabots"))])
-        if rt: stats.append(rt)
-    label = name
-    if stats: label += f" ({', '.join(stats)})"
-    return label + f" (+{cost} pts)"
+    if unit is None:
+        return requirements_met(None, None, selections, requires)
+    if group_idx is not None:
+        return requirement_evaluator(unit_key, unit).met(group_idx, requires, selections)
+    return requirements_met(unit, unit_labels(unit), selections, requires)
 
 # ======================================================
 # EXPORT HTML — STYLE ARMYFORGE (VERSION FINALE CORRIGÉE)
 # ======================================================
-def export_html(army_list, army_name, army_limit):
-
-    def esc(txt):
-        if txt is None: return ""
-        return str(txt).replace("&","&amp;").replace("<","&lt;").replace(">","&gt;").replace('"',"&quot;")
-
-    def get_priority(unit):
-        d = unit.get("unit_detail", unit.get("type","unit"))
-        order = {"named_hero": 1, "hero": 2, "unit": 3, "light_vehicle": 4, "vehicle": 5, "titan": 6}
-        return order.get(d, 7)
-
-    def fmt_range(rng):
-        if rng in (None, "-", "mêlée", "Mêlée") or str(rng).lower() == "mêlée": return "-"
-        if isinstance(rng, (int, float)): return f'{int(rng)}"'
-        s = str(rng).strip()
-        return s if s.endswith('"') else f'{s}"'
-
-    def collect_weapons(unit):
-        # unit["weapon"] contient DEJA toutes les armes consolidees par la page army
-        result = []
-        bw = unit.get("weapon", [])
-        if isinstance(bw, dict): bw = [bw]
-        _unit_size = unit.get("size", 1)
-        for w in bw:
-            if isinstance(w, dict):
-                wc = w.copy(); wc.setdefault("range", "Mêlée")
-                if not wc.get("_upgraded") and not wc.get("_mount_weapon"):
-                    wc["_is_base"] = True
-                    # _count explicite = décrément partiel (ex: 1 Épée restante sur 3 après remplacement)
-                    # → on le respecte tel quel, on ne le supprime plus.
-                    # Seulement si pas de count du tout → count implicite = unit_size
-                    if "_count" not in wc and "count" not in wc and _unit_size > 1:
-                        wc["_count"] = _unit_size
-                result.append(wc)
-        # Armes de monture
-        if unit.get("mount"):
-            m = unit["mount"]
-            if isinstance(m, dict):
-                md = m.get("mount", {})
-                if isinstance(md, dict):
-                    mws = md.get("weapon", [])
-                    if isinstance(mws, dict): mws = [mws]
-                    for w in mws:
-                        if isinstance(w, dict):
-                            wc = w.copy(); wc.setdefault("range", "Mêlée"); wc["_mount_weapon"] = True; result.append(wc)
-        return result
-
-    def group_weapons(weapons, unit_size=1):
-        # Agrège les armes par profil.
-        # _count ou count → quantité ; sinon 1 par défaut.
-        # Le décrément des armes remplacées (variable_weapon_count) est déjà
-        # géré dans la boucle principale → pas de passe _replaces ici.
-        wmap = {}
-        for w in weapons:
-            if not isinstance(w, dict): continue
-            wc = w.copy(); wc.setdefault("range","Mêlée")
-            key = (wc.get("name",""), wc.get("range",""), wc.get("attacks",""),
-                   wc.get("armor_piercing",""), tuple(sorted(wc.get("special_rules",[]))))
-            cnt = wc.get("_count", wc.get("count", 1)) or 1
-            if key not in wmap:
-                wmap[key] = wc; wmap[key]["_display_count"] = cnt
-            else:
-                wmap[key]["_display_count"] += cnt
-        return [v for v in wmap.values() if v.get("_display_count", 1) > 0]
-
-    def get_rules(unit):
-        rules = set()
-        for r in unit.get("special_rules", []):
-            if isinstance(r, str): rules.add(r)
-        if "options" in unit and isinstance(unit["options"], dict):
-            for group in unit["options"].values():
-                opts = group if isinstance(group, list) else [group]
-                for opt in opts:
-                    if isinstance(opt, dict):
-                        for r in opt.get("special_rules", []):
-                            if isinstance(r, str): rules.add(r)
-        if unit.get("mount"):
-            m = unit["mount"]
-            if isinstance(m, dict):
-                md = m.get("mount", {})
-                if isinstance(md, dict):
-                    for r in md.get("special_rules", []):
-                        if isinstance(r, str) and not r.startswith(("Griffes","Sabots")): rules.add(r)
-        return sorted(rules)
-
-    def render_weapon_rows(final_weapons, unit_size=1):
-        rows = ""
-        for w in final_weapons:
-            name     = esc(w.get("name","Arme"))
-            cnt      = w.get("_display_count", 1) or 1
-            is_base  = w.get("_is_base", False)
-            upgraded = w.get("_upgraded", False)
-            is_mount = w.get("_mount_weapon", False)
-
-            if cnt > 1:
-                nd = f"{cnt}x {name}"
-            elif cnt == 1:
-                if is_mount:
-                    nd = name
-                elif unit_size > 1:
-                    nd = f"1x {name}"
-                elif upgraded:
-                    nd = f"1x {name}"
-                else:
-                    nd = name
-            else:
-                nd = name
-
-            rng = fmt_range(w.get("range","Mêlée"))
-            att = w.get("attacks","-"); ap = w.get("armor_piercing","-")
-            spe = ", ".join(w.get("special_rules",[])) or "-"
-            rows += f"<tr><td class='weapon-name'>{nd}</td><td>{rng}</td><td>{att}</td><td>{ap}</td><td>{spe}</td></tr>"
-        return rows
-
-    def render_upgrade_rows(unit):
-        return ""   # remplacé par render_upgrades_section
-
-    def render_upgrades_section(unit):
-        """Bloc Améliorations sous les règles spéciales."""
-        upgrades = []
-        if "options" in unit and isinstance(unit["options"], dict):
-            for group_opts in unit["options"].values():
-                opts = group_opts if isinstance(group_opts, list) else [group_opts]
-                for opt in opts:
-                    if not isinstance(opt, dict): continue
-                    rules = ", ".join(opt.get("special_rules", []))
-                    upgrades.append((opt.get("name","Amélioration"), rules))
-        if not upgrades: return ""
-        items = ""
-        for n, r in upgrades:
-            items += f'<span class="rule-tag" style="background:#e8f4fd;border-color:#b8d9f0;">{esc(n)}'
-            if r: items += f' <span style="font-weight:400;color:#555;">({esc(r)})</span>'
-            items += '</span>'
-        return (
-            '<div style="border-top:1px solid var(--brd);margin-top:8px;padding-top:8px;">'
-            '<div class="rules-title">Améliorations</div>'
-            f'<div style="margin-bottom:4px;">{items}</div>'
-            '</div>'
-        )
-
-    def render_mount_section(unit):
-        if not unit.get("mount"): return ""
-        mount = unit["mount"]
-        if not isinstance(mount, dict) or "mount" not in mount: return ""
-        md = mount["mount"]; mname = esc(mount.get("name","Monture")); mcost = mount.get("cost",0)
-        mws = md.get("weapon",[]); 
-        if isinstance(mws, dict): mws = [mws]
-        wrows = ""
-        for w in mws:
-            if not isinstance(w, dict): continue
-            spe = ", ".join(w.get("special_rules",[])) or "-"
-            wrows += f"<tr><td class='weapon-name'>{esc(w.get('name','Arme'))}</td><td>{fmt_range(w.get('range','-'))}</td><td>{w.get('attacks','-')}</td><td>{w.get('armor_piercing','-')}</td><td>{spe}</td></tr>"
-        mrules = [r for r in md.get("special_rules",[]) if not r.startswith(("Griffes","Sabots","Coriace"))]
-        rhtml = " ".join(f'<span class="rule-tag">{esc(r)}</span>' for r in mrules) if mrules else ""
-        return f"""<div class="mount-section"><div class="section-title">🐴 {mname} (+{mcost} pts)</div>
-{('<div style="margin-bottom:8px;">' + rhtml + '</div>') if rhtml else ""}
-<table class="weapon-table"><thead><tr><th>Arme</th><th>Por</th><th>Att</th><th>PA</th><th>Spé</th></tr></thead><tbody>{wrows}</tbody></table></div>"""
-
-    # Dictionnaire nom → description pour les tooltips (génériques + faction)
-    # Utilise le champ "key" pour le matching VF
-    _rules_dict = dict(load_generic_rules())  # génériques en base
-    _rules_dict.update(load_faction_rules_dict())  # faction par-dessus
-
-    sorted_units = sorted(army_list, key=get_priority)
-    total_cost = sum(u.get("cost",0) for u in sorted_units)
-
-    html = f"""<!DOCTYPE html><html lang="fr"><head><meta charset="utf-8">
-<title>Liste d'Armée OPR - {esc(army_name)}</title>
-<link href="https://fonts.googleapis.com/css2?family=Inter:wght@400;500;600;700&display=swap" rel="stylesheet">
-<style>
-:root{{--bg:#fff;--hdr:#f8f9fa;--accent:#3498db;--txt:#212529;--muted:#6c757d;--brd:#dee2e6;--red:#e74c3c;--rule:#e9ecef;--mount:#f3e5f5;--badge:#e9ecef;}}
-*{{box-sizing:border-box;}}
-body{{background:var(--bg);color:var(--txt);font-family:'Inter',sans-serif;margin:0;padding:12px;line-height:1.3;font-size:12px;}}
-.army{{max-width:210mm;margin:0 auto;}}
-
-/* ── Titre & résumé ── */
-.army-title{{text-align:center;font-size:18px;font-weight:700;margin-bottom:8px;border-bottom:2px solid var(--accent);padding-bottom:6px;}}
-.army-summary{{display:flex;justify-content:space-between;align-items:center;background:var(--hdr);padding:8px 12px;border-radius:6px;margin:8px 0 12px;border:1px solid var(--brd);font-size:12px;}}
-.summary-cost{{font-family:monospace;font-size:16px;font-weight:bold;color:var(--red);}}
-
-/* ── Grille 2 colonnes ── */
-.units-grid{{display:grid;grid-template-columns:1fr 1fr;gap:8px;}}
-
-/* ── Carte unité ── */
-.unit-card{{background:var(--bg);border:1px solid var(--brd);border-radius:6px;break-inside:avoid;page-break-inside:avoid;font-size:11px;}}
-.unit-header{{padding:6px 8px 4px;background:var(--hdr);border-bottom:1px solid var(--brd);border-radius:6px 6px 0 0;}}
-.unit-name-container{{display:flex;justify-content:space-between;align-items:flex-start;}}
-.unit-name{{font-size:13px;font-weight:700;margin:0;line-height:1.2;}}
-.unit-cost{{font-family:monospace;font-size:12px;font-weight:700;color:var(--red);white-space:nowrap;margin-left:6px;}}
-.unit-type{{font-size:10px;color:var(--muted);margin-top:1px;}}
-.unit-stats{{display:flex;gap:6px;padding:4px 0 2px;flex-wrap:wrap;}}
-.stat-badge{{background:var(--badge);padding:2px 7px;border-radius:12px;font-weight:600;display:flex;align-items:center;gap:4px;border:1px solid var(--brd);}}
-.stat-value{{font-weight:700;font-size:11px;}}
-.stat-label{{font-size:9px;color:var(--muted);}}
-.section{{padding:4px 8px 6px;}}
-.section-title{{font-weight:600;margin:4px 0 3px;font-size:11px;display:flex;align-items:center;gap:5px;border-bottom:1px solid var(--brd);padding-bottom:2px;color:var(--accent);}}
-.weapon-table{{width:100%;border-collapse:collapse;margin:0 0 4px;font-size:10px;}}
-.weapon-table th{{background:var(--hdr);padding:2px 5px;text-align:left;font-weight:600;border-bottom:1px solid var(--brd);border-right:1px solid var(--brd);font-size:9px;color:var(--muted);}}
-.weapon-table th:last-child{{border-right:none;}}
-.weapon-table td{{padding:2px 5px;border-bottom:1px solid var(--brd);border-right:1px solid var(--brd);vertical-align:top;line-height:1.3;}}
-.weapon-table td:last-child{{border-right:none;}} .weapon-table tr:last-child td{{border-bottom:none;}}
-.weapon-name{{font-weight:600;}}
-.rules-section{{margin:3px 0 0;}}
-.rules-title{{font-weight:600;margin-bottom:3px;font-size:10px;color:var(--muted);text-transform:uppercase;letter-spacing:.03em;}}
-.rule-tag{{background:var(--rule);padding:1px 6px;border-radius:3px;font-size:9px;border:1px solid var(--brd);margin-right:3px;margin-bottom:3px;display:inline-block;line-height:1.5;cursor:pointer;}}#opr-tooltip{{display:none;position:fixed;top:50%;left:50%;transform:translate(-50%,-50%);background:#222;color:#fff;padding:12px 16px;border-radius:8px;font-size:11px;line-height:1.6;max-width:300px;white-space:pre-wrap;z-index:9999;text-align:left;box-shadow:0 4px 24px rgba(0,0,0,.5);}}#opr-overlay{{display:none;position:fixed;inset:0;z-index:9998;background:rgba(0,0,0,.2);cursor:pointer;}}
-.mount-section{{background:var(--mount);border:1px solid var(--brd);border-radius:4px;padding:4px 8px;margin:4px 0;font-size:10px;}}
-.mount-section .section-title{{font-size:10px;}}
-
-/* ── Page de légende (règles + sorts) ── */
-.legend-page{{page-break-before:always;break-before:page;padding:12px 0;}}
-.faction-rules{{padding:8px;border-radius:6px;border:1px solid var(--brd);}}
-.legend-title{{text-align:center;color:var(--accent);border-bottom:2px solid var(--accent);padding-bottom:6px;margin-bottom:12px;font-size:14px;font-weight:700;}}
-.rule-item{{margin-bottom:4px;padding-bottom:4px;border-bottom:1px solid var(--brd);}}
-.rule-item:last-child{{border-bottom:none;margin-bottom:0;padding-bottom:0;}}
-.rule-name{{color:var(--accent);font-weight:600;font-size:8px;margin-bottom:1px;}}
-.rule-desc{{font-size:7.5px;line-height:1.28;color:#555;}}
-
-@media print{{
-  body{{padding:6px;}}
-  .army{{max-width:100%;}}
-  .unit-card{{border:0.5px solid #ccc;box-shadow:none;background:white;}}
-  .faction-rules{{border:0.5px solid #ccc;}}
-  .legend-page{{page-break-before:always;}}
-}}
-</style></head><body><div class="army">
-<div class="army-title">{esc(army_name)} — {total_cost}/{army_limit} pts</div>
-<div class="army-summary">
-  <div><span style="color:var(--muted);">Unités :</span> <strong>{len(sorted_units)}</strong></div>
-  <div class="summary-cost">{total_cost}/{army_limit} pts</div>
-</div>
-<div class="units-grid">
-"""
-
-    for unit in sorted_units:
-        if not isinstance(unit, dict): continue
-        name = esc(unit.get("name","Unité")); cost = unit.get("cost",0)
-        quality = esc(unit.get("quality","-")); defense = esc(unit.get("defense","-"))
-        size = unit.get("size",10); coriace = unit.get("coriace",0)
-
-        rules = get_rules(unit)
-        def _get_rule_desc(r, rd):
-            d = rd.get(r, "")
-            if not d:  # matching partiel pour Coriace (9) → Coriace
-                for k, v in rd.items():
-                    if r.startswith(k + " ") or r.startswith(k + "("):
-                        return v
-            return d
-        def _safe_tip(txt):
-            """Encode la description pour data-tip."""
-            return txt.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;").replace('"', "&#34;").replace("'", "&#39;")
-        def _rule_tag(r):
-            desc = _get_rule_desc(r, _rules_dict)
-            if desc:
-                return (f'<span class="rule-tag" data-tip="{_safe_tip(desc)}"'
-                        f' onclick="showTip(this)">{esc(r)}</span>')
-            return f'<span class="rule-tag">{esc(r)}</span>'
-        rules_html = " ".join(_rule_tag(r) for r in rules) if rules else '<span class="rule-tag">Aucune</span>'
-
-        weapons = collect_weapons(unit)
-        final_weapons = group_weapons(weapons, unit_size=size)
-        weapon_rows = render_weapon_rows(final_weapons, unit_size=size)
-        upgrade_rows     = render_upgrade_rows(unit)
-        upgrades_section = render_upgrades_section(unit)
-        mount_section    = render_mount_section(unit)
-
-        detail_labels = {
-            "named_hero":    "Héros nommé",
-            "hero":          "Héros",
-            "unit":          "Unité de base",
-            "light_vehicle": "Véhicule léger / Petit monstre",
-            "vehicle":       "Véhicule / Monstre",
-            "titan":         "Titan",
-        }
-        detail_label = detail_labels.get(unit.get("unit_detail", unit.get("type","unit")), "")
-
-        html += f"""<div class="unit-card">
-  <div class="unit-header">
-    <div class="unit-name-container">
-      <div class="unit-name">{name}{'<div class="unit-type">' + detail_label + '</div>' if detail_label else ''}</div>
-      <div class="unit-cost">{cost} pts</div>
-    </div>
-    <div class="unit-stats">
-      <div class="stat-badge"><span class="stat-label">QUAL</span><span class="stat-value">{quality}+</span></div>
-      <div class="stat-badge"><span class="stat-label">DÉF</span><span class="stat-value">{defense}+</span></div>
-      {'<div class="stat-badge"><span class="stat-label">CORIACE</span><span class="stat-value">' + str(coriace) + '</span></div>' if coriace > 0 else ''}
-      <div class="stat-badge"><span class="stat-label">TAILLE</span><span class="stat-value">{size}</span></div>
-    </div>
-  </div>
-  <div class="section">
-    <div class="rules-section">
-      <div class="rules-title">Règles spéciales</div>
-      <div style="margin-bottom:4px;">{rules_html}</div>
-      {upgrades_section}
-    </div>
-    <div class="section-title">⚔️ Armes</div>
-    <table class="weapon-table">
-      <thead><tr><th>Arme</th><th>Por</th><th>Att</th><th>PA</th><th>Spé</th></tr></thead>
-      <tbody>{weapon_rows}</tbody>
-    </table>
-    {mount_section}
-  </div>
-</div>"""
-
-    html += "</div>\n"  # ferme .units-grid
 
-    try:
-        faction_rules = st.session_state.get("faction_special_rules", [])
-        faction_spells = st.session_state.get("faction_spells", {})
-        all_rules = [r for r in faction_rules if isinstance(r, dict)]
-        if all_rules or faction_spells:
-            # ── Page légende : règles + sorts en colonnes CSS auto-ajustées ──
-            # columns: auto répartit le contenu sur plusieurs colonnes en remplissant
-            # chaque colonne avant d'en créer une nouvelle → s'adapte à n'importe quel volume.
-            html += """<div class="legend-page"><div class="faction-rules">"""
-            html += """<div class="legend-title">📜 Règles spéciales &amp; Sorts</div>"""
-            html += """<div style="columns:3;column-gap:12px;column-rule:1px solid #dee2e6;font-size:9px;">"""
-
-            if all_rules:
-                if faction_spells:
-                    html += """<div style="break-after:column;"></div>""" if False else ""
-                for rule in sorted(all_rules, key=lambda x: x.get("name","").lower()):
-                    html += (
-                        f'<div class="rule-item" style="break-inside:avoid;">'
-                        f'<div class="rule-name">{esc(rule.get("name",""))}</div>'
-                        f'<div class="rule-desc">{esc(rule.get("description",""))}</div>'
-                        f'</div>'
-                    )
-
-            if faction_spells:
-                if all_rules:
-                    html += '<div class="rule-item" style="break-inside:avoid;border-bottom:2px solid var(--accent);margin-bottom:8px;"><div style="font-size:10px;font-weight:700;color:var(--accent);">✨ Sorts</div></div>'
-                for spell_name, spell_data in faction_spells.items():
-                    if isinstance(spell_data, dict):
-                        desc = spell_data.get("description","")
-                    else:
-                        desc = str(spell_data)
-                    html += (
-                        f'<div class="rule-item" style="break-inside:avoid;">'
-                        f'<div class="rule-name">{esc(spell_name)}</div>'
-                        f'<div class="rule-desc">{esc(desc)}</div>'
-                        f'</div>'
-                    )
+def army_export_key(army_name, army_limit):
+    """Clé de l'export HTML de la liste : empreinte incrémentale de la liste + contenu de la faction (pas de hachage des données complètes)."""
+    _game, _faction = st.session_state.get("game", ""), st.session_state.get("faction", "")
+    return content_hash(
+        "army_html", application.session.army_fingerprint(), army_name, army_limit, _game,
+        faction_export_key("faction_html", _game, _faction, session_catalog()),
+    )
 
-            html += "</div></div></div>"  # ferme columns + faction-rules + legend-page
-    except Exception as e:
-        html += f'<div style="color:red;padding:10px;">Erreur règles faction : {esc(str(e))}</div>'
-
-    # QR code : stratégie double
-    # 1. qrcode[pil] installé → PNG base64 inline (offline)
-    # 2. fallback → URL api.qrserver.com (requiert internet à l'ouverture)
-    import urllib.parse as _urlp
-    # QR code : URL vers l'app avec la liste encodée (compressée + base64)
-    # Le téléphone ouvre directement l'app au scan
-    import zlib as _zlib
-    _list_data = json.dumps({
-        "game": st.session_state.get("game",""),
-        "faction": army_name, "pts": army_limit,
-        "list_name": army_name,
-        "army_list": army_list,
-        "army_cost": sum(u.get("cost",0) for u in army_list),
-        "units": [{"n": u.get("name",""), "c": u.get("cost",0)} for u in army_list]
-    }, ensure_ascii=False, separators=(',',':'))
-    _compressed = _zlib.compress(_list_data.encode(), level=9)
-    import base64 as _b64u, urllib.parse as _urlp
-    _b64_data = _b64u.urlsafe_b64encode(_compressed).decode()
-    _payload = APP_URL + "?list=" + _urlp.quote(_b64_data)
-
-    _qr_img_tag = ""
-    try:
-        import qrcode as _qrc, io as _io, base64 as _b64
-        _qr = _qrc.QRCode(version=None, error_correction=_qrc.constants.ERROR_CORRECT_M, box_size=4, border=2)
-        _qr.add_data(_payload); _qr.make(fit=True)
-        _img = _qr.make_image(fill_color="black", back_color="white")
-        _buf = _io.BytesIO(); _img.save(_buf, format="PNG"); _buf.seek(0)
-        _qr_b64 = _b64.b64encode(_buf.read()).decode()
-        _qr_img_tag = f'<img src="data:image/png;base64,{_qr_b64}" style="width:96px;height:96px;display:block;margin:0 auto;border:1px solid var(--brd);border-radius:4px;" alt="QR code">'
-    except Exception:
-        # Fallback URL externe (fonctionne si internet disponible à l'ouverture du HTML)
-        _qr_url = "https://api.qrserver.com/v1/create-qr-code/?data=" + _urlp.quote(_payload) + "&size=96x96&margin=2"
-        _qr_img_tag = f'<img src="{_qr_url}" style="width:96px;height:96px;display:block;margin:0 auto;border:1px solid var(--brd);border-radius:4px;" alt="QR code">'
-
-    html += (
-        '<div style="text-align:center;margin-top:28px;padding:16px 0;border-top:1px solid var(--brd);">'
-        '<div style="font-size:10px;color:var(--muted);margin-bottom:8px;letter-spacing:.06em;text-transform:uppercase;">Scanner pour partager</div>'
-        + _qr_img_tag +
-        '</div>'
+def submit_army_export(army_list, army_name, army_limit):
+    """Export HTML de la liste (contexte de la session : règles pour les infobulles, légende) lancé en tâche de fond."""
+    rules_dict = dict(load_generic_rules())  # génériques en base
+    rules_dict.update(load_faction_rules_dict())  # faction par-dessus
+    return EXPORT_JOBS.submit(
+        "army_html", army_list, army_name, army_limit, key=army_export_key(army_name, army_limit),
+        game=st.session_state.get("game", ""),
+        rules_dict=rules_dict,
+        faction_rules=st.session_state.get("faction_special_rules", []),
+        faction_spells=st.session_state.get("faction_spells", {}),
     )
-    html += '''<div id="opr-overlay" onclick="hideTip()"></div>
-<div id="opr-tooltip"></div>
-<script>
-function showTip(el){
-  var tip=document.getElementById("opr-tooltip");
-  var ov=document.getElementById("opr-overlay");
-  tip.textContent=el.getAttribute("data-tip");
-  tip.style.display="block";
-  ov.style.display="block";
-}
-function hideTip(){
-  document.getElementById("opr-tooltip").style.display="none";
-  document.getElementById("opr-overlay").style.display="none";
-}
-</script>'''
-    html += f'<div style="text-align:center;margin-top:16px;font-size:11px;color:var(--muted);">Généré par OPR ArmyBuilder FRA — {datetime.now().strftime("%d/%m/%Y %H:%M")}</div></div></body></html>'
-    return html
 
 def load_generic_rules():
     try:
@@ -1108,17 +362,24 @@ def load_faction_rules_dict():
             if k: result[k] = desc
     return result
 
-@st.cache_data
 def load_factions():
+    """Catalogue courant (rechargé à chaud par le watcher) : (version, factions par jeu, jeux)."""
     try:
-        return application.load_factions()
+        with span("app.load_factions"):
+            version = application.catalog.current_version()
+        return version, version.factions, version.games
     except Exception as e:
         st.error(f"Erreur chargement des factions: {e}")
-        return {}, []
+        return None, {}, []
 
 if st.session_state.page == "setup":
-    factions_by_game, games = load_factions()
+    catalog_version, factions_by_game, games = load_factions()
     if not games: st.error("Aucun jeu trouvé"); st.stop()
+    # Fichiers de faction invalides : ignorés individuellement, le reste du catalogue reste disponible
+    if catalog_version is not None and catalog_version.errors:
+        with st.expander(f"⚠️ {len(catalog_version.errors)} fichier(s) de faction ignoré(s)"):
+            for _err in catalog_version.errors:
+                st.markdown(f"- `{_err}`")
 
     # ── Bandeau liste partagée reçue via QR ──────────────────────────────────
     if st.session_state.get("_qr_pending"):
@@ -1145,28 +406,15 @@ if st.session_state.page == "setup":
         "Grimdark Future Firefight":{"color": "#e67e22", "short": "GDF:FF"},
         "Age of Fantasy Skirmish":  {"color": "#27ae60", "short": "AoF:S"},
     }
-    _BASE = Path(__file__).resolve().parent
-    game_images = {
-        "Age of Fantasy":            str(_BASE / "assets/games/aof_cover.jpg"),
-        "Age of Fantasy Regiments": str(_BASE / "assets/games/aofr_cover.jpg"),
-        "Grimdark Future":           str(_BASE / "assets/games/gf_cover.jpg"),
-        "Grimdark Future Firefight":str(_BASE / "assets/games/gff_cover.jpg"),
-        "Age of Fantasy Skirmish":  str(_BASE / "assets/games/aofs_cover.jpg"),
-    }
     meta  = game_meta.get(current_game, {"color": "#2980b9", "short": "OPR"})
     acc   = meta["color"]
     short = meta["short"]
 
-    # Image vignette en base64 si disponible
+    # Image vignette en base64 si disponible (encodée une fois par processus)
     vignette_html = ""
-    img_path = game_images.get(current_game, "")
-    if img_path and Path(img_path).exists():
-        try:
-            with open(img_path, "rb") as f:
-                b64 = base64.b64encode(f.read()).decode()
-            vignette_html = f'<img src="data:image/jpeg;base64,{b64}" style="width:100%;height:100%;object-fit:cover;border-radius:8px;">'
-        except Exception:
-            pass
+    _cover = cover_data_uri(application.base_dir, current_game)
+    if _cover:
+        vignette_html = f'<img src="{_cover}" style="width:100%;height:100%;object-fit:cover;border-radius:8px;">'
     if not vignette_html:
         # Fallback : icône triangles SVG colorée par jeu
         vignette_html = f"""<svg width="64" height="64" viewBox="0 0 64 64" fill="none" xmlns="http://www.w3.org/2000/svg">
@@ -1253,6 +501,11 @@ if st.session_state.page == "setup":
         faction = st.selectbox("Faction", faction_options, index=_faction_idx, label_visibility="collapsed")
         if st.session_state.get("army_list") and faction != st.session_state.get("faction",""):
             st.warning("⚠️ Changer de faction réinitialisera l'armée en cours.")
+        # Prérequis d'améliorations vérifiés au chargement de la faction (cycles, noms introuvables)
+        _faction_reqs = application.catalog.requirements(game, faction, catalog_version)
+        if _faction_reqs is not None and _faction_reqs.issues:
+            with st.expander(f"⚠️ {len(_faction_reqs.issues)} prérequis d'amélioration incohérent(s)"):
+                for _issue in _faction_reqs.issues: st.markdown(f"- {_issue}")
     with col3:
         st.markdown("<span class='badge'>Format</span>", unsafe_allow_html=True)
         gc = GAME_CONFIG.get(game, {})
@@ -1274,6 +527,7 @@ if st.session_state.page == "setup":
                 points=points,
                 list_name=list_name.strip() or f"Liste_{datetime.now().strftime('%Y%m%d')}",
                 faction_data=fd,
+                catalog_version=catalog_version,
             )
             if _game_changed or _faction_changed:
                 application.session.reset_army()
@@ -1309,21 +563,78 @@ if st.session_state.page == "army":
 
     colE1, colE2, colE3 = st.columns(3)
     with colE1:
-        json_data = json.dumps({"game":st.session_state.game,"faction":st.session_state.faction,"points":st.session_state.points,"list_name":st.session_state.list_name,"army_list":st.session_state.army_list,"army_cost":st.session_state.army_cost,"exported_at":datetime.now().strftime("%Y-%m-%d %H:%M")}, indent=2, ensure_ascii=False)
+        # Export machine (réimportable) : JSON minifié
+        json_data = export_json(st.session_state.game, st.session_state.faction, st.session_state.points, st.session_state.list_name, st.session_state.army_list, st.session_state.army_cost)
         st.download_button("📄 Export JSON", data=json_data, file_name=f"{_base_name}.json", mime="application/json", use_container_width=True, key="export_json")
     with colE2:
-        html_data = export_html(st.session_state.army_list, st.session_state.list_name, st.session_state.points)
-        st.download_button("🌐 Export HTML", data=html_data, file_name=f"{_base_name}.html", mime="text/html", use_container_width=True, key="export_html_btn")
+        # Rendu HTML (+ QR) à la demande seulement : éditer la liste ne relance aucun export.
+        _html_key = st.session_state["army_export_key"] = army_export_key(st.session_state.list_name, st.session_state.points)
+        if EXPORT_JOBS.status(_html_key) == "unknown":
+            if st.button("🌐 Préparer l'export HTML", key="prepare_army_html", use_container_width=True):
+                submit_army_export(st.session_state.army_list, st.session_state.list_name, st.session_state.points); st.rerun()
+        else:
+            export_download(_html_key, "🌐 Export HTML", f"{_base_name}.html", "text/html", "export_html_btn")
     with colE3:
         uploaded_file = st.file_uploader("📥 Importer", type=["json"], label_visibility="collapsed", key="import_file")
         if uploaded_file is not None:
             try:
-                imported_data = json.loads(uploaded_file.getvalue().decode("utf-8"))
+                # Lecture en flux : un fichier énorme est refusé dès la unité MAX_IMPORTED_UNITS + 1
+                imported_data = CODEC.load_stream(uploaded_file, "army_list", max_items=MAX_IMPORTED_UNITS)
                 if not isinstance(imported_data, dict) or "army_list" not in imported_data: st.error("Fichier invalide."); st.stop()
                 application.session.load_imported_army(imported_data)
                 st.success(f"Liste importée ! ({len(imported_data['army_list'])} unités)"); st.rerun()
             except Exception as e: st.error(f"Erreur import: {e}")
 
+    # ── Sauvegarde locale des listes (par joueur) ───────────────────────────
+    @fragment
+    def saved_lists_panel():
+        """Listes sauvegardées du joueur (fragment : la pagination ne relance pas la page).
+
+        Les listes appartiennent au couple pseudo + code secret : sans le code, on ne peut ni les voir ni les supprimer.
+        """
+        with st.expander("💾 Mes listes sauvegardées", expanded=False):
+            _player = st.text_input("Nom du joueur", value=st.session_state.player_name, key="player_name_input", placeholder="Votre pseudo…")
+            st.session_state.player_name = _player.strip()
+            _secret = st.text_input("Code secret", value=st.session_state.player_secret, key="player_secret_input", type="password", help="Protège vos listes : sans lui, personne (vous compris) ne peut les relire ni les supprimer.")
+            st.session_state.player_secret = _secret
+            _name, _code = st.session_state.player_name, st.session_state.player_secret
+            if _name and not _code:
+                st.info("Choisissez un code secret pour sauvegarder et retrouver vos listes.")
+            if _name and _code:
+                if st.button("💾 Sauvegarder cette liste", key="save_list_btn", use_container_width=True):
+                    st.session_state.saved_list_id = application.army_lists.save_list(
+                        player=_name,
+                        secret=_code,
+                        game=st.session_state.game,
+                        faction=st.session_state.faction,
+                        list_name=st.session_state.list_name,
+                        points=st.session_state.points,
+                        army_list=st.session_state.army_list,
+                        army_cost=st.session_state.army_cost,
+                        list_id=st.session_state.saved_list_id,
+                    )
+                    st.success("Liste sauvegardée !")
+                _saved_total = application.army_lists.count_lists(_name, _code, st.session_state.game, st.session_state.faction)
+                _pages = max(1, math.ceil(_saved_total / 10))
+                _page = st.number_input("Page", min_value=1, max_value=_pages, value=1, step=1, key="saved_lists_page") if _pages > 1 else 1
+                for _saved in application.army_lists.list_lists(_name, _code, st.session_state.game, st.session_state.faction, page=_page, page_size=10):
+                    _cs1, _cs2, _cs3 = st.columns([4, 1, 1])
+                    _cs1.markdown(f"**{_saved['list_name']}** — {_saved['army_cost']}/{_saved['points']} pts · {_saved['unit_count']} unité(s) · {_saved['updated_at'].replace('T', ' ')}")
+                    if _cs2.button("📂 Charger", key=f"load_saved_{_saved['id']}", use_container_width=True):
+                        _stored = application.army_lists.get_list(_saved["id"], _name, _code)
+                        if _stored:
+                            application.session.load_saved_army(_stored)
+                            st.session_state.points = _stored["points"]
+                            invalidate_army()
+                    if _cs3.button("🗑", key=f"delete_saved_{_saved['id']}", use_container_width=True):
+                        application.army_lists.delete_list(_saved["id"], _name, _code)
+                        if st.session_state.saved_list_id == _saved["id"]: st.session_state.saved_list_id = None
+                        rerun_fragment()
+                if not _saved_total:
+                    st.caption("Aucune liste sauvegardée pour cette faction.")
+
+    saved_lists_panel()
+
     st.subheader("📊 Points de l'Armée")
     pu = st.session_state.army_cost; pt = st.session_state.points
     gc = GAME_CONFIG.get(st.session_state.game, {})
@@ -1368,6 +679,47 @@ if st.session_state.page == "army":
   </div>
 </div>
 """, unsafe_allow_html=True)
+
+    # Complétion automatique : recherche exacte (sac à dos) sous les limites de GAME_CONFIG
+    @fragment
+    def auto_fill_panel(pt, restants):
+        """Proposition de complétion automatique (fragment : changer l'objectif ne relance que ce panneau).
+
+        Le calcul (énumération des configurations, puis sac à dos) ne se fait qu'au clic sur « Proposer » ;
+        la proposition est gardée tant que la liste, le format et l'objectif ne changent pas.
+        """
+        if not NUMPY_AVAILABLE or st.session_state.game not in GAME_CONFIG or restants <= 0:
+            return
+        with st.expander("🤖 Compléter automatiquement", expanded=False):
+            _metrics = {"Dépenser un maximum de points": "points", "Maximiser la Coriace totale": "coriace", "Maximiser les dégâts attendus": "damage"}
+            _metric = st.selectbox("Objectif", list(_metrics), key="auto_fill_metric")
+            _request = (application.session.army_fingerprint(), pt, _metrics[_metric], session_catalog().number)
+            _stored = st.session_state.get("auto_fill_proposal")
+            _proposal = _stored[1] if _stored and _stored[0] == _request else None
+            if _proposal is None:
+                if st.button("🤖 Proposer", key="auto_fill_propose", use_container_width=True):
+                    _auto_builder = application.catalog.auto_builder(st.session_state.game, st.session_state.faction, session_catalog())
+                    if _auto_builder is None:
+                        return
+                    with st.spinner("Recherche de la meilleure complétion…"):
+                        _proposal = _auto_builder.build(pt, _metrics[_metric], existing=st.session_state.army_list)
+                    st.session_state["auto_fill_proposal"] = (_request, _proposal)
+                else:
+                    return
+            if _proposal["units"]:
+                st.markdown("\n".join(f"- {c.label} — {c.cost} pts" for c in _proposal["units"]))
+                st.caption(f"+{_proposal['cost']} pts")
+                _configs = application.catalog.configurations(st.session_state.game, st.session_state.faction, session_catalog())
+                if _configs is not None and _configs.truncated():
+                    st.caption("Trop de configurations pour être toutes étudiées, proposées dans leur version de base : " + ", ".join(_configs.truncated()))
+                if st.button("➕ Ajouter ces unités", key="auto_fill_add", use_container_width=True):
+                    application.session.add_units([c.to_army_unit() for c in _proposal["units"]], "Complétion automatique")
+                    st.session_state.pop("auto_fill_proposal", None)
+                    invalidate_army()
+            else:
+                st.info("Aucune unité ne rentre dans les points restants.")
+
+    auto_fill_panel(pt, restants)
     st.divider()
 
     if st.session_state.faction_special_rules:
@@ -1380,521 +732,373 @@ if st.session_state.page == "army":
             for sn, sd in st.session_state.faction_spells.items():
                 if isinstance(sd, dict): st.markdown(f"**{sn}**: {sd.get('description','')}")
 
-    st.subheader("Liste de l'Armée")
-    if not st.session_state.army_list:
-        st.markdown("Aucune unité ajoutée pour le moment.")
-    else:
-        def fmt_rng(r):
-            if r in (None,"-","mêlée","Mêlée") or str(r).lower()=="mêlée": return "Mêlée"
-            return f'{int(r)}"' if isinstance(r,(int,float)) else str(r)
-        def fmt_weapon_line(w):
-            if not isinstance(w,dict): return ""
-            sr=", ".join(w.get("special_rules",[])); rng=fmt_rng(w.get("range","Mêlée"))
-            return f"{w.get('name','?')} ({rng}/A{w.get('attacks','?')}/PA{w.get('armor_piercing','?')}{', '+sr if sr else ''})"
-
-        # Séparateurs de section par type
-        _section_labels = {
-            "named_hero":   ("★ Héros nommés",    "⭐"),
-            "hero":         ("Héros",              "🦸"),
-            "unit":         ("Unités de base",     "⚔️"),
-            "light_vehicle":("Véhicules légers",   "🐉"),
-            "vehicle":      ("Véhicules / Monstres","🏰"),
-            "titan":        ("Titans",             "💀"),
-        }
-        _current_section = None
-
-        for i, ud in enumerate(st.session_state.army_list):
-            _sec = ud.get("unit_detail", ud.get("type","unit"))
-            if _sec != _current_section:
-                _current_section = _sec
-                _lbl, _ico = _section_labels.get(_sec, (_sec, "•"))
-                st.markdown(f'<div class="section-header">{_ico} {_lbl}</div>', unsafe_allow_html=True)
-
-            with st.expander(f"{ud['name']} — {ud['cost']} pts", expanded=False):
-                # ── Ligne de stats ──────────────────────────────────────────
-                cor=ud.get("coriace",0)
-                stats_html = (
-                    f"<span style='margin-right:12px;'>Qual <b>{ud.get('quality','?')}+</b></span>"
-                    f"<span style='margin-right:12px;'>Déf <b>{ud.get('defense','?')}+</b></span>"
-                    f"<span style='margin-right:12px;'>Taille <b>{ud.get('size','?')}</b></span>"
-                    + (f"<span>Coriace <b>{cor}</b></span>" if cor else "")
+    @fragment
+    def army_list_panel():
+        """Liste de l'armée ; toute modification invalide la page entière (points, exports)."""
+        st.subheader("Liste de l'Armée")
+        _history = application.session.army_history()
+        _colU, _colR = st.columns(2)
+        with _colU:
+            if st.button("↶ Annuler" + (f" ({_history.undo_label})" if _history.can_undo else ""), key="undo_army", disabled=not _history.can_undo, use_container_width=True):
+                application.session.undo(); invalidate_army()
+        with _colR:
+            if st.button("↷ Rétablir" + (f" ({_history.redo_label})" if _history.can_redo else ""), key="redo_army", disabled=not _history.can_redo, use_container_width=True):
+                application.session.redo(); invalidate_army()
+        if not st.session_state.army_list:
+            st.markdown("Aucune unité ajoutée pour le moment.")
+        else:
+            # Résumés construits à l'ajout de chaque unité ; seule la page affichée est rendue
+            _summaries = application.session.army_summaries()
+            _section, _page = None, 1
+            if len(_summaries) > ARMY_LIST_PAGE_SIZE:
+                _counts = dict(army_sections(_summaries))
+                _choices = [None, *_counts]
+                if st.session_state.get("army_list_section") not in _choices: st.session_state["army_list_section"] = None
+                _colS, _colP = st.columns([3, 1])
+                _section = _colS.selectbox(
+                    "Section", _choices, key="army_list_section",
+                    format_func=lambda sec: f"Toutes ({len(_summaries)})" if sec is None else f"{section_header(sec)} ({_counts[sec]})",
                 )
-                st.markdown(f"<div style='font-size:clamp(12px,2vw,0.85em);color:#555;margin-bottom:6px;'>{stats_html}</div>", unsafe_allow_html=True)
-
-                # ── Armes ───────────────────────────────────────────────────
-                weapons=ud.get("weapon",[])
-                ws=weapons if isinstance(weapons,list) else [weapons]
-                armes=[fmt_weapon_line(w) for w in ws if isinstance(w,dict)]
-                if armes:
-                    st.markdown(
-                        "<div style='font-size:clamp(12px,2vw,0.8em);color:#333;margin-bottom:4px;'>"
-                        "<b>Armes :</b> " + " · ".join(armes) + "</div>",
-                        unsafe_allow_html=True)
-
-                # ── Améliorations (rôles, upgrades) ─────────────────────────
-                upgrades_items=[]
-                if "options" in ud and isinstance(ud["options"],dict):
-                    for gopts in ud["options"].values():
-                        opts=gopts if isinstance(gopts,list) else [gopts]
-                        for opt in opts:
-                            if not isinstance(opt,dict): continue
-                            sr_upg=", ".join(opt.get("special_rules",[]))
-                            label=opt.get("name","?")
-                            upgrades_items.append(f"{label}" + (f" <span style='color:#888;'>({sr_upg})</span>" if sr_upg else ""))
-                if upgrades_items:
-                    st.markdown(
-                        "<div style='font-size:clamp(12px,2vw,0.8em);color:#333;margin-bottom:4px;'>"
-                        "<b>Améliorations :</b> " + " · ".join(upgrades_items) + "</div>",
-                        unsafe_allow_html=True)
-
-                # ── Monture ─────────────────────────────────────────────────
-                if ud.get("mount"):
-                    m=ud["mount"]; md=m.get("mount",{})
-                    mws=md.get("weapon",[]); mws=mws if isinstance(mws,list) else [mws]
-                    marmes=[fmt_weapon_line(w) for w in mws if isinstance(w,dict)]
-                    msr=[r for r in md.get("special_rules",[]) if "Coriace" not in r]
-                    mount_parts=[]
-                    if marmes: mount_parts.append("Armes : "+" · ".join(marmes))
-                    if msr: mount_parts.append(", ".join(msr))
-                    st.markdown(
-                        f"<div style='font-size:clamp(12px,2vw,0.8em);color:#333;margin-bottom:4px;'>"
-                        f"<b>🐴 {m.get('name','Monture')}</b>"
-                        + (f" — {' | '.join(mount_parts)}" if mount_parts else "")
-                        + "</div>",
-                        unsafe_allow_html=True)
-
-                # ── Règles spéciales ────────────────────────────────────────
-                sr_unit=ud.get("special_rules",[])
-                if sr_unit:
-                    st.markdown(
-                        "<div style='font-size:clamp(12px,2vw,0.78em);color:#666;margin-bottom:6px;'>"
-                        + ", ".join(sr_unit) + "</div>",
-                        unsafe_allow_html=True)
-
-                # ── Boutons supprimer / dupliquer ───────────────────────────
-                _col1, _col2 = st.columns(2)
-                with _col1:
-                    if st.button("🗑 Supprimer", key=f"delete_{i}", type="secondary", use_container_width=True):
-                        st.session_state.army_cost -= ud["cost"]; st.session_state.army_list.pop(i); st.rerun()
-                with _col2:
-                    if st.button("⧉ Dupliquer", key=f"dup_{i}", use_container_width=True):
-                        import copy as _copy
-                        _dup = _copy.deepcopy(ud)
-                        st.session_state.army_list.insert(i+1, _dup)
-                        st.session_state.army_cost += _dup["cost"]
-                        st.rerun()
-
-    st.divider(); st.subheader("Filtres par type d'unité")
-    filter_categories = {"Tous":None,"Héros":["hero"],"Héros nommés":["named_hero"],"Unités de base":["unit"],"Véhicules légers / Petits monstres":["light_vehicle"],"Véhicules / Monstres":["vehicle"],"Titans":["titan"]}
-    for cat in filter_categories:
-        if st.button(cat, key=f"filter_{cat}", use_container_width=True): st.session_state.unit_filter = cat; st.rerun()
-
-    fu = st.session_state.units if st.session_state.unit_filter == "Tous" else [u for u in st.session_state.units if u.get("unit_detail") in filter_categories[st.session_state.unit_filter]]
-
-    # Recherche par nom
-    _search = st.text_input("🔍 Rechercher une unité", value="", placeholder="Nom de l'unité…", label_visibility="collapsed", key="unit_search")
-    if _search.strip():
-        fu = [u for u in fu if _search.strip().lower() in u.get("name","").lower()]
-
-    st.markdown(f"<div style='text-align:right;margin:4px 0 8px;color:#6c757d;font-size:.85em;'>{len(fu)} unité(s) — filtre : {st.session_state.unit_filter}</div>", unsafe_allow_html=True)
-    if not fu: st.warning(f"Aucune unité trouvée."); st.stop()
-
-    unit = st.selectbox("Unité disponible", fu, format_func=format_unit_option, key="unit_select")
-    if not unit: st.error("Aucune unité sélectionnée."); st.stop()
-    if "upgrade_groups" not in unit: unit["upgrade_groups"] = []
-
-    # ── Armes de base + règles spéciales en texte simple ────────────────────
-    _base_weapons = unit.get("weapon", [])
-    if isinstance(_base_weapons, dict): _base_weapons = [_base_weapons]
-    _wp_html = "".join(
-        f"<div style='margin-bottom:2px;'>⚔️ <b>{_bw.get('name','')}</b> — {weapon_profile_md(_bw)}</div>"
-        for _bw in _base_weapons if isinstance(_bw, dict)
-    )
-    _unit_sr_names = [r if isinstance(r, str) else r.get("name","") for r in unit.get("special_rules", [])]
-    _sr_html = (
-        f"<div style='margin-top:6px;'><b>Règles spéciales :</b> {', '.join(_unit_sr_names)}</div>"
-        if _unit_sr_names else ""
-    )
-    if _wp_html or _sr_html:
-        st.markdown(
-            f"<div style='font-size:13px;margin-bottom:10px;line-height:1.6;'>{_wp_html}{_sr_html}</div>",
-            unsafe_allow_html=True
-        )
+                _pages = max(1, math.ceil((len(_summaries) if _section is None else _counts[_section]) / ARMY_LIST_PAGE_SIZE))
+                if st.session_state.get("army_list_page", 1) > _pages: st.session_state["army_list_page"] = _pages
+                _page = _colP.number_input("Page", min_value=1, max_value=_pages, value=1, step=1, key="army_list_page") if _pages > 1 else 1
+            _rows, _pages = army_page(_summaries, _section, _page, ARMY_LIST_PAGE_SIZE)
+
+            _current_section = None
+            for i, _summary in _rows:
+                if _summary.section != _current_section:
+                    _current_section = _summary.section
+                    st.markdown(f'<div class="section-header">{section_header(_current_section)}</div>', unsafe_allow_html=True)
+
+                with st.expander(_summary.title, expanded=False):
+                    st.markdown(_summary.body_html, unsafe_allow_html=True)
+
+                    # ── Boutons supprimer / dupliquer ───────────────────────────
+                    _col1, _col2 = st.columns(2)
+                    with _col1:
+                        if st.button("🗑 Supprimer", key=f"delete_{i}", type="secondary", use_container_width=True):
+                            application.session.remove_unit(i); invalidate_army()
+                    with _col2:
+                        if st.button("⧉ Dupliquer", key=f"dup_{i}", use_container_width=True):
+                            # Copie partagée (aucun deepcopy) : les unités de la liste ne sont jamais modifiées en place
+                            application.session.duplicate_unit(i); invalidate_army()
+
+    army_list_panel()
+
+    @fragment
+    def unit_configurator():
+        """Sélecteur d'unité, options et coût : un changement d'option ne relance que ce fragment."""
+        st.divider(); st.subheader("Filtres par type d'unité")
+        filter_categories = {"Tous":None,"Héros":["hero"],"Héros nommés":["named_hero"],"Unités de base":["unit"],"Véhicules légers / Petits monstres":["light_vehicle"],"Véhicules / Monstres":["vehicle"],"Titans":["titan"]}
+        for cat in filter_categories:
+            if st.button(cat, key=f"filter_{cat}", use_container_width=True): st.session_state.unit_filter = cat; rerun_fragment()
+
+        # Recherche indexée (nom, règles, armes, sans accents) : "epee", "regle:eclaireur", "pa>=2 portee>=18"…
+        _search = st.text_input("🔍 Rechercher une unité", value="", placeholder="Nom, règle, arme, pa>=2…", label_visibility="collapsed", key="unit_search")
+        _all_factions = st.checkbox("Chercher dans toutes les factions", key="unit_search_all")
+        _index = application.catalog.search_index(session_catalog())
+        _hits = _index.search(_search, game=st.session_state.game, faction=st.session_state.faction, unit_details=filter_categories[st.session_state.unit_filter])
+        fu = [hit.unit for hit in _hits]
+        if _all_factions and _search.strip():
+            _others = [hit for hit in _index.search(_search, limit=50) if (hit.game, hit.faction) != (st.session_state.game, st.session_state.faction)]
+            if _others:
+                st.caption("Ailleurs : " + " · ".join(f"{hit.name} ({hit.faction}, {hit.game})" for hit in _others))
+
+        st.markdown(f"<div style='text-align:right;margin:4px 0 8px;color:#6c757d;font-size:.85em;'>{len(fu)} unité(s) — filtre : {st.session_state.unit_filter}</div>", unsafe_allow_html=True)
+        if not fu: st.warning(f"Aucune unité trouvée."); return
+
+        # Libellés du sélecteur et des options précalculés une fois par unité et version du catalogue
+        _faction_labels = application.catalog.labels(st.session_state.game, st.session_state.faction, session_catalog())
+        unit = st.selectbox("Unité disponible", fu, format_func=_faction_labels.picker, key="unit_select")
+        if not unit: st.error("Aucune unité sélectionnée."); return
+        _labels = _faction_labels.for_unit(unit)
+
+        # ── Armes de base + règles spéciales en texte simple ────────────────────
+        if _labels.profile_html:
+            st.markdown(_labels.profile_html, unsafe_allow_html=True)
+
+        # ── Efficacité des options d'armes (blessures attendues, calcul vectorisé par faction) ──
+        _efficiency = application.catalog.upgrade_efficiency(st.session_state.game, st.session_state.faction, session_catalog())
+        _unit_scores = _efficiency.for_unit(unit["name"]) if _efficiency else []
+        if _unit_scores:
+            with st.expander("📈 Efficacité des options d'armes"):
+                st.dataframe(
+                    [
+                        {"Option": s["option"], "Coût": s["cost"],
+                         **{f"Déf {d}+": w for d, w in zip(_efficiency.defenses, s["wounds_by_defense"])},
+                         "Blessures / 100 pts": s["score"]}
+                        for s in _unit_scores
+                    ],
+                    hide_index=True, use_container_width=True,
+                )
+                st.caption("Gain de blessures attendues par tour (contre les armes remplacées) selon la Défense de la cible.")
 
-    # Chaque configuration d'unité a un key unique basé sur un compteur.
-    # Quand l'unité change, on incrémente → pas de collision entre deux unités du même nom.
-    if st.session_state.draft_unit_name != unit['name']:
-        st.session_state.draft_counter += 1
-        st.session_state.draft_unit_name = unit['name']
-    unit_key = f"draft_{st.session_state.draft_counter}"
-    st.session_state.unit_selections.setdefault(unit_key, {})
+        # Chaque configuration d'unité a un key unique basé sur un compteur.
+        # Quand l'unité change, on incrémente → pas de collision entre deux unités du même nom.
+        # Les brouillons précédents (sélections + clés de widgets) sont purgés au passage.
+        unit_key = application.session.select_draft(unit['name'])
 
     
-    weapons = copy.deepcopy(list(unit.get("weapon",[]))); selected_options = {}; mount = None
-    weapon_cost = 0; mount_cost = 0; upgrades_cost_multi = 0; upgrades_cost_unique = 0
-
-
-    def _is_unique_upgrade(g):
-        """True si cette amélioration reste x1 même pour une unité combinée."""
-        _gtype = g.get("type","")
-        _gname = g.get("group","")
-        _desc  = g.get("description","").lower()
-        _req   = g.get("requires",[])
-        # Sergent et ses cascades → toujours unique
-        if _gname == "Sergent": return True
-        if any("+" in r for r in _req): return True  # cascade sergent
-        # Rôles et mobilité (héros) → unique
-        if _gtype in ("role","mobility"): return True
-        # Upgrades : "toutes les figurines" → multiplié, sinon unique
-        if _gtype == "upgrades":
-            return "toutes" not in _desc
-        # conditional_weapon non-sergent → multiplié
-        if _gtype == "conditional_weapon":
+        weapons = copy.deepcopy(list(unit.get("weapon",[]))); selected_options = {}; mount = None
+        weapon_cost = 0; mount_cost = 0; upgrades_cost_multi = 0; upgrades_cost_unique = 0
+
+
+        def _is_unique_upgrade(g):
+            """True si cette amélioration reste x1 même pour une unité combinée."""
+            _gtype = g.get("type","")
+            _gname = g.get("group","")
+            _desc  = g.get("description","").lower()
+            _req   = g.get("requires",[])
+            # Sergent et ses cascades → toujours unique
+            if _gname == "Sergent": return True
+            if any("+" in r for r in _req): return True  # cascade sergent
+            # Rôles et mobilité (héros) → unique
+            if _gtype in ("role","mobility"): return True
+            # Upgrades : "toutes les figurines" → multiplié, sinon unique
+            if _gtype == "upgrades":
+                return "toutes" not in _desc
+            # conditional_weapon non-sergent → multiplié
+            if _gtype == "conditional_weapon":
+                return False
+            # variable_weapon_count → multiplié
             return False
-        # variable_weapon_count → multiplié
-        return False
 
-    for g_idx, group in enumerate(unit.get("upgrade_groups",[])):
-        g_key = f"group_{g_idx}"
-        gtype = group.get("type","")
-        _multiplier_eff = 2 if st.session_state.get(f"{unit_key}_combined") else 1
-        _g_mult = 1 if _is_unique_upgrade(group) else _multiplier_eff
-        # requires au niveau du groupe
-        group_requires = group.get("requires", [])
-        if group_requires and not check_weapon_conditions(unit_key, group_requires, unit): continue
-        # requires_not au niveau du groupe (ex: Sœurs Protectrices)
-        group_requires_not = group.get("requires_not", [])
-        if group_requires_not and any(
-            check_weapon_conditions(unit_key, [rn], unit)
-            for rn in group_requires_not
-        ): continue
-        hvo = (bool(group.get("options")) if gtype != "conditional_weapon"
-               else any(not o.get("requires") or check_weapon_conditions(unit_key, o.get("requires",[]), unit) for o in group.get("options",[])))
-        if not hvo: continue
-        st.subheader(group.get("group","Améliorations"))
-
-        if gtype == "weapon":
-            bw = unit.get("weapon",[])
-            if isinstance(bw,list) and bw:
-                lbls=[w.get("name","Arme") for w in bw if isinstance(w,dict)]
-                choices=[lbls[0] if len(lbls)==1 else " et ".join(lbls)]
-            elif isinstance(bw,dict): choices=[format_weapon_option(bw)]
-            else: choices=[]
-            opt_map={}
-            for o in group.get("options",[]):
-                w=o.get("weapon",{})
-                lbl=(" et ".join(x.get("name","Arme") for x in w)+f" (+{o['cost']} pts)") if isinstance(w,list) else format_weapon_option(w,o["cost"])
-                choices.append(lbl); opt_map[lbl]=o
-            if choices:
-                cur=st.session_state.unit_selections[unit_key].get(g_key,choices[0])
-                ch=st.radio("Sélection de l'arme",choices,index=choices.index(cur) if cur in choices else 0,key=f"{unit_key}_{g_key}_weapon")
-                st.session_state.unit_selections[unit_key][g_key]=ch
-                if ch!=choices[0]:
-                    for ol,o in opt_map.items():
-                        if ol==ch:
-                            weapon_cost+=o["cost"]
-                            _new_ws = copy.deepcopy(o["weapon"] if isinstance(o["weapon"],list) else [o["weapon"]])
-                            _replaces = o.get("replaces", [])
-                            if _replaces:
-                                # "replaces" explicite → retirer seulement les armes nommées
-                                _replaced = set()
-                                _kept = []
-                                for _w in weapons:
-                                    if isinstance(_w, dict) and _w.get("name") in _replaces and _w.get("name") not in _replaced:
-                                        _replaced.add(_w.get("name"))  # retirer une seule fois
+        with span("app.upgrade_groups"):
+            for g_idx, group in enumerate(unit.get("upgrade_groups",[])):
+                g_key = f"group_{g_idx}"
+                gtype = group.get("type","")
+                _multiplier_eff = 2 if st.session_state.get(f"{unit_key}_combined") else 1
+                _g_mult = 1 if _is_unique_upgrade(group) else _multiplier_eff
+                # requires au niveau du groupe
+                group_requires = group.get("requires", [])
+                if group_requires and not check_weapon_conditions(unit_key, group_requires, unit, g_idx): continue
+                # requires_not au niveau du groupe (ex: Sœurs Protectrices)
+                group_requires_not = group.get("requires_not", [])
+                if group_requires_not and any(
+                    check_weapon_conditions(unit_key, [rn], unit, g_idx)
+                    for rn in group_requires_not
+                ): continue
+                hvo = (bool(group.get("options")) if gtype != "conditional_weapon"
+                       else any(not o.get("requires") or check_weapon_conditions(unit_key, o.get("requires",[]), unit, g_idx) for o in group.get("options",[])))
+                if not hvo: continue
+                st.subheader(group.get("group","Améliorations"))
+
+                if gtype == "weapon":
+                    choices=[_labels.default_weapon] if _labels.default_weapon is not None else []
+                    opt_map={}
+                    for lbl,o in zip(_labels.options[g_idx],group.get("options",[])):
+                        choices.append(lbl); opt_map[lbl]=o
+                    if choices:
+                        cur=st.session_state.unit_selections[unit_key].get(g_key,choices[0])
+                        ch=st.radio("Sélection de l'arme",choices,index=choices.index(cur) if cur in choices else 0,key=f"{unit_key}_{g_key}_weapon")
+                        st.session_state.unit_selections[unit_key][g_key]=ch
+                        if ch!=choices[0]:
+                            for ol,o in opt_map.items():
+                                if ol==ch:
+                                    weapon_cost+=o["cost"]
+                                    _new_ws = copy.deepcopy(o["weapon"] if isinstance(o["weapon"],list) else [o["weapon"]])
+                                    _replaces = o.get("replaces", [])
+                                    if _replaces:
+                                        # "replaces" explicite → retirer seulement les armes nommées
+                                        _replaced = set()
+                                        _kept = []
+                                        for _w in weapons:
+                                            if isinstance(_w, dict) and _w.get("name") in _replaces and _w.get("name") not in _replaced:
+                                                _replaced.add(_w.get("name"))  # retirer une seule fois
+                                            else:
+                                                _kept.append(_w)
+                                        weapons = _kept + _new_ws
                                     else:
-                                        _kept.append(_w)
-                                weapons = _kept + _new_ws
-                            else:
-                                # Pas de "replaces" → remplacement total sauf armes de bête (count)
-                                _kept = [w for w in weapons if isinstance(w, dict)
-                                         and (w.get("count") or w.get("_mount_weapon"))]
-                                weapons = _new_ws + _kept
-                            break
-
-        elif gtype == "conditional_weapon":
-            ao=[o for o in group.get("options",[]) if not o.get("requires") or check_weapon_conditions(unit_key,o.get("requires",[]),unit)]
-            if not ao: st.markdown(f"<div style='color:#999;font-size:.9em;'>{group.get('description','')} <em>(Non disponible)</em></div>",unsafe_allow_html=True)
-            else:
-                choices=["Aucune amélioration"]; opt_map={}
-                for o in ao:
-                    w_cond=o.get("weapon",{})
-                    if isinstance(w_cond,dict) and w_cond:
-                        lbl=format_weapon_option(w_cond, o.get("cost",0))
+                                        # Pas de "replaces" → remplacement total sauf armes de bête (count)
+                                        _kept = [w for w in weapons if isinstance(w, dict)
+                                                 and (w.get("count") or w.get("_mount_weapon"))]
+                                        weapons = _new_ws + _kept
+                                    break
+
+                elif gtype == "conditional_weapon":
+                    ao=[(lbl,o) for lbl,o in zip(_labels.options[g_idx],group.get("options",[])) if not o.get("requires") or check_weapon_conditions(unit_key,o.get("requires",[]),unit, g_idx)]
+                    if not ao: st.markdown(f"<div style='color:#999;font-size:.9em;'>{group.get('description','')} <em>(Non disponible)</em></div>",unsafe_allow_html=True)
                     else:
-                        lbl=f"{o.get('name','Amélioration')} (+{o.get('cost',0)} pts)"
-                    choices.append(lbl); opt_map[lbl]=o
-                cur=st.session_state.unit_selections[unit_key].get(g_key,choices[0])
-                ch=st.radio(group.get("description","Sélectionnez une amélioration"),choices,index=choices.index(cur) if cur in choices else 0,key=f"{unit_key}_{g_key}_cond")
-                st.session_state.unit_selections[unit_key][g_key]=ch
-                if ch!=choices[0]:
-                    opt=opt_map[ch]
-                    if _g_mult==1: upgrades_cost_unique+=opt.get("cost",0)
-                    else: upgrades_cost_multi+=opt.get("cost",0)
-                    if "weapon" in opt:
-                        nw=opt["weapon"]
-                        extra={"_upgraded":True}
-                        if opt.get("requires"): extra["_unique"]=True
-                        # Pour unité combinée, arme de troupe (pas sergent/cascade) → _count=multiplier
-                        if not _is_unique_upgrade(group) and _multiplier_eff > 1:
-                            extra["_count"] = _multiplier_eff
-                        # Si "replaces" → décrémenter ou retirer les armes remplacées
-                        _cond_replaces = opt.get("replaces", [])
-                        _multiplier_eff = 2 if st.session_state.get(f"{unit_key}_combined") else 1
-                        _unit_sz = unit.get("size", 1) * _multiplier_eff
-                        if _cond_replaces:
-                            _replaced_names = set()
-                            _kept_weapons = []
-                            for _w in weapons:
-                                if isinstance(_w,dict) and _w.get("name") in _cond_replaces and _w.get("name") not in _replaced_names:
-                                    _replaced_names.add(_w.get("name"))
-                                    # Si arme sans _count → count implicite = unit_size
-                                    # Décrémenter de 1 plutôt que retirer entièrement
-                                    _implicit = "_count" not in _w and "count" not in _w
-                                    if _implicit and _w.get("_upgraded"):
-                                        # Arme _upgraded : count réel = 1 → retirer complètement
-                                        pass
-                                    elif _implicit and _unit_sz > 1:
-                                        # Arme de base portée par toutes les figurines → décrémenter
-                                        _wc = _w.copy()
-                                        _wc["_count"] = _unit_sz - 1
-                                        _kept_weapons.append(_wc)
-                                    elif "_count" in _w and _w["_count"] > 1:
-                                        _wc = _w.copy(); _wc["_count"] -= 1
-                                        _kept_weapons.append(_wc)
-                                    elif "count" in _w and _w["count"] > 1:
-                                        _wc = _w.copy(); _wc["count"] -= 1
-                                        _kept_weapons.append(_wc)
-                                    # sinon count=1 → retirer complètement
-                                else:
-                                    _kept_weapons.append(_w)
-                            weapons = _kept_weapons
-                        if isinstance(nw,dict): weapons.append({**nw,**extra})
-                        elif isinstance(nw,list): weapons.extend({**w,**extra} for w in nw)
-
-        elif gtype == "variable_weapon_count":
-            # Vérifier le requires du GROUPE (pas de l'option)
-            group_requires = group.get("requires", [])
-            if group_requires:
-                # Vérifier d'abord dans les weapons courantes (ex: Fusil lourd des Éclaireurs)
-                _req_in_current = all(
-                    any(w.get("name") == req for w in weapons if isinstance(w, dict))
-                    for req in group_requires
-                )
-                if not _req_in_current and not check_weapon_conditions(unit_key, group_requires, unit):
-                    continue  # Groupe masqué si condition non remplie
-            else:
-                # ── Auto-check : si toutes les options ont un "replaces", vérifier que
-                # ces armes existent dans weapons courants (ex: sniper des Éclaireurs) ──
-                _all_replaces = [r for opt in group.get("options", []) for r in opt.get("replaces", [])]
-                if _all_replaces:
-                    _replaces_present = any(
-                        w.get("name") in _all_replaces for w in weapons if isinstance(w, dict)
-                    )
-                    if not _replaces_present:
-                        continue  # Groupe masqué si rien à remplacer dans les weapons courantes
-            # ── Calcul du budget total du groupe (pour sliders interdépendants) ──
-            # On calcule mc_total à partir de la première option (toutes partagent le même max_count)
-            _first_opt = group.get("options", [{}])[0] if group.get("options") else {}
-            _mc_cfg_g  = _first_opt.get("max_count", {})
-            _mc_type_g = _mc_cfg_g.get("type", "size_based") if isinstance(_mc_cfg_g, dict) else "size_based"
-            if _mc_type_g == "fixed":
-                _group_budget = _mc_cfg_g.get("value", 1)
-            elif _mc_type_g == "count_in_weapons":
-                _wn_g = _mc_cfg_g.get("weapon_name", "")
-                # Les armes de base n'ont pas de _count/count explicite : elles valent size figurines
-                # Les armes ajoutées par variable_weapon_count ont _count explicite
-                _base_weapon_names = [w.get("name") for w in unit.get("weapon", []) if isinstance(w, dict)]
-                def _weapon_count(w, unit_size):
-                    if "_count" in w:
-                        return w["_count"]
-                    if "count" in w:
-                        return w["count"]
-                    # Arme de base sans count explicite → 1 exemplaire par figurine
-                    if w.get("name") in _base_weapon_names:
-                        return unit_size
-                    return 1
-                _group_budget = sum(_weapon_count(w, unit.get("size", 1)) for w in weapons if isinstance(w, dict) and w.get("name") == _wn_g)
-            elif _mc_type_g == "size_based":
-                _group_budget = min(_mc_cfg_g.get("value", unit.get("size", 1)), unit.get("size", 1))
-            else:
-                _group_budget = unit.get("size", 1)
-            _group_budget = max(_group_budget, 0)
-            # ── Clés de toutes les options du groupe ──────────────────────────
-            _group_options = group.get("options", [])
-            _all_cnt_keys  = [f"{unit_key}_{g_key}_cnt_{oi2}" for oi2 in range(len(_group_options))]
-            # Lire les valeurs actuelles depuis st.session_state directement
-            # (Streamlit stocke les number_input dans st.session_state[key], pas dans unit_selections)
-            def _read_cnt(k):
-                # Priorité : st.session_state[k] (valeur Streamlit) puis unit_selections
-                v = st.session_state.get(k)
-                if v is not None:
-                    return int(v)
-                return st.session_state.unit_selections[unit_key].get(k, 0)
-            st.markdown(f"<div style='margin-bottom:10px;color:#6c757d;'>{group.get('description','')}</div>",unsafe_allow_html=True)
-            for oi,option in enumerate(group.get("options",[])):
-                req=option.get("requires",[])
-                if req and not check_weapon_conditions(unit_key,req,unit):
-                    st.markdown(f"<div style='color:#999;font-size:.9em;'>{option['name']} <em>(Non disponible)</em></div>",unsafe_allow_html=True); continue
-                # Profil(s) de l'arme sous le titre
-                _opt_nw = option.get("weapon", {})
-                _profiles = []
-                if isinstance(_opt_nw, list):
-                    _profiles = [f"⚔️ **{_w.get('name','')}** — {weapon_profile_md(_w)}" for _w in _opt_nw if isinstance(_w, dict)]
-                elif isinstance(_opt_nw, dict) and _opt_nw:
-                    _profiles = [f"⚔️ **{_opt_nw.get('name','')}** — {weapon_profile_md(_opt_nw)}"]
-                _profile_label = "  \n".join(_profiles)
-                st.markdown(f"**{option['name']}**" + (f"  \n{_profile_label}" if _profile_label else ""))
-                # ── max_count selon le type ──────────────────────
-                mc_cfg  = option.get("max_count", {})
-                mc_type = mc_cfg.get("type","size_based") if isinstance(mc_cfg,dict) else "size_based"
-                if mc_type == "fixed":
-                    mc = mc_cfg.get("value",1)
-                elif mc_type == "size_based":
-                    mc = min(mc_cfg.get("value", unit.get("size",1)), unit.get("size",1))
-                elif mc_type == "count_in_weapons":
-                    # Compter les exemplaires dans weapons courants
-                    # Armes de base sans count explicite → 1 par figurine (× size)
-                    wn = mc_cfg.get("weapon_name","")
-                    _base_wnames = [w.get("name") for w in unit.get("weapon", []) if isinstance(w, dict)]
-                    def _wcount(w, sz):
-                        if "_count" in w: return w["_count"]
-                        if "count" in w: return w["count"]
-                        return sz if w.get("name") in _base_wnames else 1
-                    mc = sum(_wcount(w, unit.get("size",1)) for w in weapons if isinstance(w,dict) and w.get("name")==wn)
-                else:
-                    mc = unit.get("size",1)
-                mc = max(mc, 0)
-                # ── Interdépendance : recalculer le total depuis session_state à chaque option ──
-                cnt_key = f"{unit_key}_{g_key}_cnt_{oi}"
-                _my_current = _read_cnt(cnt_key)
-                # Somme de toutes les AUTRES options du groupe (lues depuis session_state)
-                _others_used = sum(_read_cnt(k) for k in _all_cnt_keys if k != cnt_key)
-                _mc_interdep = max(min(mc, _group_budget - _others_used), 0)
-                prev = min(_my_current, _mc_interdep)
-                cnt = st.number_input(f"Nombre de {option['name']} (0 – {_mc_interdep})", min_value=option.get("min_count",0), max_value=max(_mc_interdep, option.get("min_count",0)), value=prev, step=1, key=cnt_key)
-                st.session_state.unit_selections[unit_key][cnt_key] = cnt
-                tc=cnt*option["cost"]
-                if _g_mult==1: upgrades_cost_unique+=tc
-                else: upgrades_cost_multi+=tc
-                if cnt > 0 or tc > 0:
-                    st.markdown(f"<div style='margin:10px 0;padding:8px;background:#f8f9fa;border-radius:4px;'><strong>{option['name']}</strong> × {cnt} = <strong style='color:#e74c3c;'>{tc} pts</strong></div>",unsafe_allow_html=True)
-                if cnt > 0:
-                    # BUG 2 FIX : fw repart de weapons COURANT (pas des armes de base)
-                    fw = copy.deepcopy(weapons)
-                    nw = option["weapon"]
-                    opt_replaces = option.get("replaces",[])
-                    # BUG 3 FIX : pour les armes avec count > 1, décrémenter count
-                    if opt_replaces:
-                        remaining = cnt
-                        new_fw = []
-                        _base_w_names_vwc = [bw.get("name") for bw in unit.get("weapon", []) if isinstance(bw, dict)]
-                        _unit_sz_vwc = unit.get("size", 1)
-                        for w in fw:
-                            if not isinstance(w,dict): new_fw.append(w); continue
-                            if w.get("name") in opt_replaces and remaining > 0:
-                                # Arme de base sans _count ni count → count implicite = unit.size
-                                if "_count" not in w and "count" not in w and w.get("name") in _base_w_names_vwc:
-                                    w_count = _unit_sz_vwc
-                                else:
-                                    w_count = w.get("_count", w.get("count", 1))
-                                if w_count > remaining:
-                                    wc = w.copy()
-                                    # Décrémenter le bon champ
-                                    if "_count" in w: wc["_count"] = w_count - remaining
-                                    elif "count" in w: wc["count"] = w_count - remaining
-                                    else: wc["_count"] = w_count - remaining  # arme de base → on pose _count
-                                    new_fw.append(wc)
-                                    remaining = 0
-                                else:
-                                    remaining -= w_count
-                            else:
-                                new_fw.append(w)
-                        fw = new_fw
-                    if isinstance(nw,dict): fw.append({**nw,"_count":cnt,"_replaces":opt_replaces,"_upgraded":True})
-                    elif isinstance(nw,list): fw.extend({**w2,"_count":cnt,"_replaces":opt_replaces,"_upgraded":True} for w2 in nw)
-                    weapons = fw
-        elif gtype == "role":
-            choices=["Aucun rôle"]; opt_map={}
-            for o in group.get("options",[]):
-                sr=o.get("special_rules",[]); lbl=o.get("name","Rôle")
-                if sr: lbl+=f" | {', '.join(sr)}"
-                lbl+=f" (+{o.get('cost',0)} pts)"; choices.append(lbl); opt_map[lbl]=o
-            cur=st.session_state.unit_selections[unit_key].get(g_key,choices[0])
-            ch=st.radio(group.get("group","Rôle"),choices,index=choices.index(cur) if cur in choices else 0,key=f"{unit_key}_{g_key}_role",horizontal=len(choices)<=4)
-            st.session_state.unit_selections[unit_key][g_key]=ch
-            if ch!=choices[0]:
-                opt=opt_map[ch]
-                if _g_mult==1: upgrades_cost_unique+=opt.get("cost",0)
-                else: upgrades_cost_multi+=opt.get("cost",0)
-                selected_options[group.get("group","Rôle")]=[opt]
-                rw=opt.get("weapon",[])
-                if isinstance(rw,list): weapons.extend(copy.deepcopy(rw))
-                elif isinstance(rw,dict): weapons.append(copy.deepcopy(rw))
-
-        elif gtype == "upgrades":
-            for oi,o in enumerate(group.get("options",[])):
-                ok=f"{unit_key}_{g_key}_{o['name']}_{oi}"
-                # Afficher les special_rules entre parenthèses si présentes
-                sr_label = o.get("special_rules", [])
-                sr_str = f" ({', '.join(sr_label)})" if sr_label else ""
-                chk=st.checkbox(f"{o['name']}{sr_str} (+{o['cost']} pts)",value=st.session_state.unit_selections[unit_key].get(ok,False),key=ok)
-                st.session_state.unit_selections[unit_key][ok]=chk
-                if chk:
-                    if _g_mult==1: upgrades_cost_unique+=o["cost"]
-                    else: upgrades_cost_multi+=o["cost"]
-                    selected_options.setdefault(group.get("group","Options"),[]).append(o)
-
-        elif gtype == "mobility":
-            # Mobilité GDF : comme une monture mais données à la racine de l'option
-            choices=["Aucune option de mobilité"]; opt_map={}
-            for o in group.get("options",[]): lbl=format_mobility_option(o); choices.append(lbl); opt_map[lbl]=o
-            cur=st.session_state.unit_selections[unit_key].get(g_key,choices[0])
-            ch=st.radio(group.get("description","Mobilité"),choices,index=choices.index(cur) if cur in choices else 0,key=f"{unit_key}_{g_key}_mobility")
-            st.session_state.unit_selections[unit_key][g_key]=ch
-            if ch!=choices[0]:
-                mob_opt=opt_map[ch]; mount_cost=mob_opt["cost"]
-                # Construire un objet mount compatible avec le reste du code
-                mount={"name":mob_opt["name"],"cost":mob_opt["cost"],
-                       "mount":{"weapon":mob_opt.get("weapon",[]) if not isinstance(mob_opt.get("weapon"),dict) else [mob_opt["weapon"]],
-                                "special_rules":mob_opt.get("special_rules",[]),
-                                "coriace_bonus":mob_opt.get("coriace_bonus",0)}}
-
-        elif gtype == "mount":
-            choices=["Aucune monture"]; opt_map={}
-            for o in group.get("options",[]): lbl=format_mount_option(o); choices.append(lbl); opt_map[lbl]=o
-            cur=st.session_state.unit_selections[unit_key].get(g_key,choices[0])
-            ch=st.radio("Monture",choices,index=choices.index(cur) if cur in choices else 0,key=f"{unit_key}_{g_key}_mount")
-            st.session_state.unit_selections[unit_key][g_key]=ch
-            if ch!="Aucune monture": mount=opt_map[ch]; mount_cost=mount["cost"]
-
-    multiplier=1
-    if unit.get("type")!="hero" and unit.get("size",1)>1:
-        if st.checkbox("Unité combinée",key=f"{unit_key}_combined"): multiplier=2
-
-    final_cost=(unit.get("base_cost",0)+weapon_cost+upgrades_cost_multi)*multiplier+upgrades_cost_unique+mount_cost
-    st.subheader("Coût de l'unité sélectionnée"); st.markdown(f"**Coût total :** {final_cost} pts"); st.divider()
-
-    if st.button("➕ Ajouter à l'armée",key=f"{unit_key}_add"):
-        if st.session_state.army_cost+final_cost>st.session_state.points:
-            st.error(f"⛔ Dépassement : {st.session_state.army_cost+final_cost} / {st.session_state.points} pts"); st.stop()
-        cor=unit.get("coriace",0); asr=unit.get("special_rules",[]).copy()
-        if mount and "mount" in mount: cor+=mount["mount"].get("coriace_bonus",0)
-        for g in unit.get("upgrade_groups",[]):
-            gk=f"group_{unit.get('upgrade_groups',[]).index(g)}"
-            so=st.session_state.unit_selections[unit_key].get(gk,"")
-            if so and so not in ("Aucune amélioration","Aucun rôle"):
-                for opt in g.get("options",[]):
-                    _so_name = so.split(" | ")[0].split(" (+")[0].strip()
-                    if "special_rules" in opt and opt.get("name","") == _so_name: asr.extend(opt["special_rules"])
-        if mount:
-            for r in mount.get("mount",{}).get("special_rules",[]):
-                if not r.startswith(("Griffes","Sabots")) and "Coriace" not in r: asr.append(r)
-        ud={"name":unit["name"],"type":unit.get("type","unit"),"unit_detail":unit.get("unit_detail",unit.get("type","unit")),"cost":final_cost,"size":unit.get("size",10)*multiplier if unit.get("type")!="hero" else 1,"quality":unit.get("quality"),"defense":unit.get("defense"),"weapon":weapons,"options":selected_options,"mount":mount,"special_rules":list(set(asr)),"coriace":cor}
-        if validate_army_rules(st.session_state.army_list+[ud],st.session_state.points,st.session_state.game):
-            st.session_state.army_list.append(ud)
-            st.session_state.army_cost += final_cost
-            # Incrémenter le draft_counter → la prochaine unité (même nom) repart vierge
-            st.session_state.draft_counter += 1
-            st.session_state.draft_unit_name = ""
-            st.rerun()
+                        choices=["Aucune amélioration"]; opt_map={}
+                        for lbl,o in ao:
+                            choices.append(lbl); opt_map[lbl]=o
+                        cur=st.session_state.unit_selections[unit_key].get(g_key,choices[0])
+                        ch=st.radio(group.get("description","Sélectionnez une amélioration"),choices,index=choices.index(cur) if cur in choices else 0,key=f"{unit_key}_{g_key}_cond")
+                        st.session_state.unit_selections[unit_key][g_key]=ch
+                        if ch!=choices[0]:
+                            opt=opt_map[ch]
+                            if _g_mult==1: upgrades_cost_unique+=opt.get("cost",0)
+                            else: upgrades_cost_multi+=opt.get("cost",0)
+                            if "weapon" in opt:
+                                nw=opt["weapon"]
+                                extra={"_upgraded":True}
+                                if opt.get("requires"): extra["_unique"]=True
+                                # Pour unité combinée, arme de troupe (pas sergent/cascade) → _count=multiplier
+                                if not _is_unique_upgrade(group) and _multiplier_eff > 1:
+                                    extra["_count"] = _multiplier_eff
+                                # Si "replaces" → décrémenter ou retirer les armes remplacées
+                                _cond_replaces = opt.get("replaces", [])
+                                _multiplier_eff = 2 if st.session_state.get(f"{unit_key}_combined") else 1
+                                _unit_sz = unit.get("size", 1) * _multiplier_eff
+                                if _cond_replaces:
+                                    _replaced_names = set()
+                                    _kept_weapons = []
+                                    for _w in weapons:
+                                        if isinstance(_w,dict) and _w.get("name") in _cond_replaces and _w.get("name") not in _replaced_names:
+                                            _replaced_names.add(_w.get("name"))
+                                            # Si arme sans _count → count implicite = unit_size
+                                            # Décrémenter de 1 plutôt que retirer entièrement
+                                            _implicit = "_count" not in _w and "count" not in _w
+                                            if _implicit and _w.get("_upgraded"):
+                                                # Arme _upgraded : count réel = 1 → retirer complètement
+                                                pass
+                                            elif _implicit and _unit_sz > 1:
+                                                # Arme de base portée par toutes les figurines → décrémenter
+                                                _wc = _w.copy()
+                                                _wc["_count"] = _unit_sz - 1
+                                                _kept_weapons.append(_wc)
+                                            elif "_count" in _w and _w["_count"] > 1:
+                                                _wc = _w.copy(); _wc["_count"] -= 1
+                                                _kept_weapons.append(_wc)
+                                            elif "count" in _w and _w["count"] > 1:
+                                                _wc = _w.copy(); _wc["count"] -= 1
+                                                _kept_weapons.append(_wc)
+                                            # sinon count=1 → retirer complètement
+                                        else:
+                                            _kept_weapons.append(_w)
+                                    weapons = _kept_weapons
+                                if isinstance(nw,dict): weapons.append({**nw,**extra})
+                                elif isinstance(nw,list): weapons.extend({**w,**extra} for w in nw)
+
+                elif gtype == "variable_weapon_count":
+                    # Vérifier le requires du GROUPE (pas de l'option)
+                    group_requires = group.get("requires", [])
+                    if group_requires:
+                        # Vérifier d'abord dans les weapons courantes (ex: Fusil lourd des Éclaireurs)
+                        _req_in_current = all(
+                            any(w.get("name") == req for w in weapons if isinstance(w, dict))
+                            for req in group_requires
+                        )
+                        if not _req_in_current and not check_weapon_conditions(unit_key, group_requires, unit, g_idx):
+                            continue  # Groupe masqué si condition non remplie
+                    else:
+                        # ── Auto-check : si toutes les options ont un "replaces", vérifier que
+                        # ces armes existent dans weapons courants (ex: sniper des Éclaireurs) ──
+                        _all_replaces = [r for opt in group.get("options", []) for r in opt.get("replaces", [])]
+                        if _all_replaces:
+                            _replaces_present = any(
+                                w.get("name") in _all_replaces for w in weapons if isinstance(w, dict)
+                            )
+                            if not _replaces_present:
+                                continue  # Groupe masqué si rien à remplacer dans les weapons courantes
+                    # ── Budget du groupe suivi par l'allocateur (sliders interdépendants) ──
+                    _group_options = group.get("options", [])
+                    _all_cnt_keys  = [f"{unit_key}_{g_key}_cnt_{oi2}" for oi2 in range(len(_group_options))]
+                    # Lire les valeurs actuelles depuis st.session_state directement
+                    # (Streamlit stocke les number_input dans st.session_state[key], pas dans unit_selections)
+                    def _read_cnt(k):
+                        # Priorité : st.session_state[k] (valeur Streamlit) puis unit_selections
+                        v = st.session_state.get(k)
+                        if v is not None:
+                            return int(v)
+                        return st.session_state.unit_selections[unit_key].get(k, 0)
+                    _allocator = WeaponCountAllocator(unit, group, weapons, [_read_cnt(k) for k in _all_cnt_keys])
+                    st.markdown(f"<div style='margin-bottom:10px;color:#6c757d;'>{group.get('description','')}</div>",unsafe_allow_html=True)
+                    for oi,option in enumerate(_group_options):
+                        req=option.get("requires",[])
+                        if req and not check_weapon_conditions(unit_key,req,unit, g_idx):
+                            st.markdown(f"<div style='color:#999;font-size:.9em;'>{option['name']} <em>(Non disponible)</em></div>",unsafe_allow_html=True); continue
+                        # Profil(s) de l'arme sous le titre
+                        _profile_label = _labels.profiles[g_idx][oi]
+                        st.markdown(f"**{option['name']}**" + (f"  \n{_profile_label}" if _profile_label else ""))
+                        # ── Bornes : max_count de l'option, limité par ce que les autres options laissent du budget ──
+                        cnt_key = _all_cnt_keys[oi]
+                        _bounds = _allocator.bounds(oi)
+                        cnt = st.number_input(f"Nombre de {option['name']} (0 – {_bounds.limit})", min_value=_bounds.min_value, max_value=_bounds.max_value, value=_bounds.value, step=1, key=cnt_key)
+                        st.session_state.unit_selections[unit_key][cnt_key] = cnt
+                        tc=cnt*option["cost"]
+                        if _g_mult==1: upgrades_cost_unique+=tc
+                        else: upgrades_cost_multi+=tc
+                        if cnt > 0 or tc > 0:
+                            st.markdown(f"<div style='margin:10px 0;padding:8px;background:#f8f9fa;border-radius:4px;'><strong>{option['name']}</strong> × {cnt} = <strong style='color:#e74c3c;'>{tc} pts</strong></div>",unsafe_allow_html=True)
+                        # Armes remplacées décomptées (sans copie des armes) et nouvelles armes ajoutées
+                        _allocator.choose(oi, cnt)
+                    weapons = _allocator.weapons()
+                elif gtype == "role":
+                    choices=["Aucun rôle"]; opt_map={}
+                    for lbl,o in zip(_labels.options[g_idx],group.get("options",[])): choices.append(lbl); opt_map[lbl]=o
+                    cur=st.session_state.unit_selections[unit_key].get(g_key,choices[0])
+                    ch=st.radio(group.get("group","Rôle"),choices,index=choices.index(cur) if cur in choices else 0,key=f"{unit_key}_{g_key}_role",horizontal=len(choices)<=4)
+                    st.session_state.unit_selections[unit_key][g_key]=ch
+                    if ch!=choices[0]:
+                        opt=opt_map[ch]
+                        if _g_mult==1: upgrades_cost_unique+=opt.get("cost",0)
+                        else: upgrades_cost_multi+=opt.get("cost",0)
+                        selected_options[group.get("group","Rôle")]=[opt]
+                        rw=opt.get("weapon",[])
+                        if isinstance(rw,list): weapons.extend(copy.deepcopy(rw))
+                        elif isinstance(rw,dict): weapons.append(copy.deepcopy(rw))
+
+                elif gtype == "upgrades":
+                    for oi,o in enumerate(group.get("options",[])):
+                        ok=f"{unit_key}_{g_key}_{o['name']}_{oi}"
+                        # Afficher les special_rules entre parenthèses si présentes
+                        sr_label = o.get("special_rules", [])
+                        sr_str = f" ({', '.join(sr_label)})" if sr_label else ""
+                        chk=st.checkbox(f"{o['name']}{sr_str} (+{o['cost']} pts)",value=st.session_state.unit_selections[unit_key].get(ok,False),key=ok)
+                        st.session_state.unit_selections[unit_key][ok]=chk
+                        if chk:
+                            if _g_mult==1: upgrades_cost_unique+=o["cost"]
+                            else: upgrades_cost_multi+=o["cost"]
+                            selected_options.setdefault(group.get("group","Options"),[]).append(o)
+
+                elif gtype == "mobility":
+                    # Mobilité GDF : comme une monture mais données à la racine de l'option
+                    choices=["Aucune option de mobilité"]; opt_map={}
+                    for lbl,o in zip(_labels.options[g_idx],group.get("options",[])): choices.append(lbl); opt_map[lbl]=o
+                    cur=st.session_state.unit_selections[unit_key].get(g_key,choices[0])
+                    ch=st.radio(group.get("description","Mobilité"),choices,index=choices.index(cur) if cur in choices else 0,key=f"{unit_key}_{g_key}_mobility")
+                    st.session_state.unit_selections[unit_key][g_key]=ch
+                    if ch!=choices[0]:
+                        mob_opt=opt_map[ch]; mount_cost=mob_opt["cost"]
+                        # Construire un objet mount compatible avec le reste du code
+                        mount=mobility_mount(mob_opt)
+
+                elif gtype == "mount":
+                    choices=["Aucune monture"]; opt_map={}
+                    for lbl,o in zip(_labels.options[g_idx],group.get("options",[])): choices.append(lbl); opt_map[lbl]=o
+                    cur=st.session_state.unit_selections[unit_key].get(g_key,choices[0])
+                    ch=st.radio("Monture",choices,index=choices.index(cur) if cur in choices else 0,key=f"{unit_key}_{g_key}_mount")
+                    st.session_state.unit_selections[unit_key][g_key]=ch
+                    if ch!="Aucune monture": mount=opt_map[ch]; mount_cost=mount["cost"]
+
+        multiplier=1
+        if unit.get("type")!="hero" and unit.get("size",1)>1:
+            if st.checkbox("Unité combinée",key=f"{unit_key}_combined"): multiplier=2
+
+        final_cost=(unit.get("base_cost",0)+weapon_cost+upgrades_cost_multi)*multiplier+upgrades_cost_unique+mount_cost
+        st.subheader("Coût de l'unité sélectionnée"); st.markdown(f"**Coût total :** {final_cost} pts"); st.divider()
+
+        if st.button("➕ Ajouter à l'armée",key=f"{unit_key}_add"):
+            if st.session_state.army_cost+final_cost>st.session_state.points:
+                st.error(f"⛔ Dépassement : {st.session_state.army_cost+final_cost} / {st.session_state.points} pts"); return
+            cor=unit.get("coriace",0); asr=unit.get("special_rules",[]).copy()
+            if mount and "mount" in mount: cor+=mount["mount"].get("coriace_bonus",0)
+            for g in unit.get("upgrade_groups",[]):
+                gk=f"group_{unit.get('upgrade_groups',[]).index(g)}"
+                so=st.session_state.unit_selections[unit_key].get(gk,"")
+                if so and so not in ("Aucune amélioration","Aucun rôle"):
+                    for opt in g.get("options",[]):
+                        _so_name = so.split(" | ")[0].split(" (+")[0].strip()
+                        if "special_rules" in opt and opt.get("name","") == _so_name: asr.extend(opt["special_rules"])
+            if mount:
+                for r in mount.get("mount",{}).get("special_rules",[]):
+                    if not r.startswith(("Griffes","Sabots")) and "Coriace" not in r: asr.append(r)
+            ud={"name":unit["name"],"type":unit.get("type","unit"),"unit_detail":unit.get("unit_detail",unit.get("type","unit")),"cost":final_cost,"size":unit.get("size",10)*multiplier if unit.get("type")!="hero" else 1,"quality":unit.get("quality"),"defense":unit.get("defense"),"weapon":weapons,"options":selected_options,"mount":mount,"special_rules":list(dict.fromkeys(asr)),"coriace":cor}
+            if validate_army_rules(st.session_state.army_list+[ud],st.session_state.points,st.session_state.game):
+                application.session.add_unit(ud)
+                # Clore le brouillon → la prochaine unité (même nom) repart vierge
+                application.session.finish_draft()
+                invalidate_army()
+
+    unit_configurator()
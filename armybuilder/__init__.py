@@ -1,7 +1,7 @@
 from .application import ArmyBuilderApplication
 from .config import APP_URL, GAME_COLORS, GAME_CONFIG
 from .services import ArmyRuleValidator, FactionCatalogService
-from .session import SessionStateManager
+from .session import SESSION_FOOTPRINTS, SessionStateManager
 
 __all__ = [
     "APP_URL",
@@ -10,5 +10,6 @@ __all__ = [
     "FactionCatalogService",
     "GAME_COLORS",
     "GAME_CONFIG",
+    "SESSION_FOOTPRINTS",
     "SessionStateManager",
 ]
@@ -1,9 +1,11 @@
 from pathlib import Path
 from typing import Any
 
-from armybuilder.config import GAME_CONFIG
+from armybuilder.config import GAME_CONFIG, WARMUP_ENABLED
 from armybuilder.services import ArmyRuleValidator, FactionCatalogService
 from armybuilder.session import SessionStateManager
+from armybuilder.warmup import CatalogWarmup
+from repositories import SqliteArmyListRepository
 
 
 class ArmyBuilderApplication:
@@ -13,11 +15,16 @@ class ArmyBuilderApplication:
         self.base_dir = Path(base_dir)
         self.game_config = GAME_CONFIG
         self.session = SessionStateManager(session_state)
-        self.catalog = FactionCatalogService(self.base_dir)
+        self.catalog = FactionCatalogService.shared(self.base_dir)
         self.validator = ArmyRuleValidator(self.game_config)
+        self.army_lists = SqliteArmyListRepository(self.base_dir)
+        self.warmup = CatalogWarmup.shared(self.catalog, self.base_dir)
 
     def initialize(self) -> None:
         self.session.initialize_defaults()
+        self.catalog.start_watching()
+        if WARMUP_ENABLED:
+            self.warmup.start()
 
     def load_factions(self) -> tuple[dict[str, dict[str, dict[str, Any]]], list[str]]:
         return self.catalog.load_factions()
@@ -0,0 +1,150 @@
+from armybuilder.history import ArmyUnit
+
+
+# Séparateurs de section de la liste d'armée, dans l'ordre d'affichage.
+SECTION_LABELS = {
+    "named_hero":   ("★ Héros nommés",    "⭐"),
+    "hero":         ("Héros",              "🦸"),
+    "unit":         ("Unités de base",     "⚔️"),
+    "light_vehicle":("Véhicules légers",   "🐉"),
+    "vehicle":      ("Véhicules / Monstres","🏰"),
+    "titan":        ("Titans",             "💀"),
+}
+
+
+def fmt_rng(r):
+    if r in (None,"-","mêlée","Mêlée") or str(r).lower()=="mêlée": return "Mêlée"
+    return f'{int(r)}"' if isinstance(r,(int,float)) else str(r)
+
+
+def fmt_weapon_line(w):
+    if not isinstance(w,dict): return ""
+    sr=", ".join(w.get("special_rules",[])); rng=fmt_rng(w.get("range","Mêlée"))
+    return f"{w.get('name','?')} ({rng}/A{w.get('attacks','?')}/PA{w.get('armor_piercing','?')}{', '+sr if sr else ''})"
+
+
+def section_of(unit: ArmyUnit) -> str:
+    return unit.get("unit_detail", unit.get("type", "unit"))
+
+
+def section_header(section: str) -> str:
+    label, icon = SECTION_LABELS.get(section, (section, "•"))
+    return f"{icon} {label}"
+
+
+def unit_body_html(ud: ArmyUnit) -> str:
+    """HTML shown inside a unit's expander: stats, weapons, upgrades, mount and rules."""
+    parts = []
+    cor = ud.get("coriace", 0)
+    stats_html = (
+        f"<span style='margin-right:12px;'>Qual <b>{ud.get('quality','?')}+</b></span>"
+        f"<span style='margin-right:12px;'>Déf <b>{ud.get('defense','?')}+</b></span>"
+        f"<span style='margin-right:12px;'>Taille <b>{ud.get('size','?')}</b></span>"
+        + (f"<span>Coriace <b>{cor}</b></span>" if cor else "")
+    )
+    parts.append(f"<div style='font-size:clamp(12px,2vw,0.85em);color:#555;margin-bottom:6px;'>{stats_html}</div>")
+
+    weapons = ud.get("weapon", [])
+    ws = weapons if isinstance(weapons, list) else [weapons]
+    armes = [fmt_weapon_line(w) for w in ws if isinstance(w, dict)]
+    if armes:
+        parts.append(
+            "<div style='font-size:clamp(12px,2vw,0.8em);color:#333;margin-bottom:4px;'>"
+            "<b>Armes :</b> " + " · ".join(armes) + "</div>")
+
+    upgrades_items = []
+    if "options" in ud and isinstance(ud["options"], dict):
+        for gopts in ud["options"].values():
+            opts = gopts if isinstance(gopts, list) else [gopts]
+            for opt in opts:
+                if not isinstance(opt, dict): continue
+                sr_upg = ", ".join(opt.get("special_rules", []))
+                upgrades_items.append(f"{opt.get('name','?')}" + (f" <span style='color:#888;'>({sr_upg})</span>" if sr_upg else ""))
+    if upgrades_items:
+        parts.append(
+            "<div style='font-size:clamp(12px,2vw,0.8em);color:#333;margin-bottom:4px;'>"
+            "<b>Améliorations :</b> " + " · ".join(upgrades_items) + "</div>")
+
+    if ud.get("mount"):
+        m = ud["mount"]; md = m.get("mount", {})
+        mws = md.get("weapon", []); mws = mws if isinstance(mws, list) else [mws]
+        marmes = [fmt_weapon_line(w) for w in mws if isinstance(w, dict)]
+        msr = [r for r in md.get("special_rules", []) if "Coriace" not in r]
+        mount_parts = []
+        if marmes: mount_parts.append("Armes : " + " · ".join(marmes))
+        if msr: mount_parts.append(", ".join(msr))
+        parts.append(
+            f"<div style='font-size:clamp(12px,2vw,0.8em);color:#333;margin-bottom:4px;'>"
+            f"<b>🐴 {m.get('name','Monture')}</b>"
+            + (f" — {' | '.join(mount_parts)}" if mount_parts else "")
+            + "</div>")
+
+    sr_unit = ud.get("special_rules", [])
+    if sr_unit:
+        parts.append(
+            "<div style='font-size:clamp(12px,2vw,0.78em);color:#666;margin-bottom:6px;'>"
+            + ", ".join(sr_unit) + "</div>")
+    return "".join(parts)
+
+
+class ArmyUnitSummary:
+    """Display strings of one army unit, built once when the unit enters the list.
+
+    Army units are never mutated after being added (see ``ArmySnapshot``),
+    so the summary stays valid for as long as the unit is in the list.
+    """
+
+    __slots__ = ("section", "title", "body_html")
+
+    def __init__(self, unit: ArmyUnit) -> None:
+        self.section = section_of(unit)
+        self.title = f"{unit.get('name', '?')} — {unit.get('cost', 0)} pts"
+        self.body_html = unit_body_html(unit)
+
+
+class ArmySummaryCache:
+    """``ArmyUnitSummary`` of each unit of an army list, keyed by identity.
+
+    Duplicated units share their dict, hence their summary. Each entry keeps
+    its unit alive so the id cannot be reused while the entry exists;
+    ``sync`` drops units that left the list and summarizes the new ones.
+    """
+
+    def __init__(self) -> None:
+        self._entries: dict[int, tuple[ArmyUnit, ArmyUnitSummary]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def summary(self, unit: ArmyUnit) -> ArmyUnitSummary:
+        entry = self._entries.get(id(unit))
+        if entry is None or entry[0] is not unit:
+            entry = self._entries[id(unit)] = (unit, ArmyUnitSummary(unit))
+        return entry[1]
+
+    def sync(self, army_list: list[ArmyUnit]) -> list[ArmyUnitSummary]:
+        summaries = [self.summary(unit) for unit in army_list]
+        if len(self._entries) > len(army_list):
+            alive = {id(unit) for unit in army_list}
+            self._entries = {key: entry for key, entry in self._entries.items() if key in alive}
+        return summaries
+
+
+def army_sections(summaries: list[ArmyUnitSummary]) -> list[tuple[str, int]]:
+    """``(section, unit count)`` of the list, known sections first in display order."""
+    counts: dict[str, int] = {}
+    for summary in summaries:
+        counts[summary.section] = counts.get(summary.section, 0) + 1
+    order = list(SECTION_LABELS)
+    return sorted(counts.items(), key=lambda item: (order.index(item[0]) if item[0] in order else len(order), item[0]))
+
+
+def army_page(
+    summaries: list[ArmyUnitSummary], section: str | None, page: int, page_size: int
+) -> tuple[list[tuple[int, ArmyUnitSummary]], int]:
+    """Visible ``(army index, summary)`` rows of ``section`` (None = all) and the page count."""
+    rows = [(index, summary) for index, summary in enumerate(summaries) if section is None or summary.section == section]
+    pages = max(1, -(-len(rows) // page_size))
+    page = max(1, min(page, pages))
+    return rows[(page - 1) * page_size:page * page_size], pages
+
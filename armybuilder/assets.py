@@ -0,0 +1,33 @@
+import base64
+import threading
+from pathlib import Path
+
+
+# Vignettes des jeux (page de configuration), relatives à la racine du dépôt.
+GAME_COVERS = {
+    "Age of Fantasy":            "assets/games/aof_cover.jpg",
+    "Age of Fantasy Regiments":  "assets/games/aofr_cover.jpg",
+    "Grimdark Future":           "assets/games/gf_cover.jpg",
+    "Grimdark Future Firefight": "assets/games/gff_cover.jpg",
+    "Age of Fantasy Skirmish":   "assets/games/aofs_cover.jpg",
+}
+
+_LOCK = threading.Lock()
+_DATA_URIS: dict[Path, str | None] = {}
+
+
+def cover_data_uri(base_dir: Path, game: str) -> str | None:
+    """``data:`` URI of a game's cover image, encoded once per process (None without image)."""
+    relative = GAME_COVERS.get(game)
+    if relative is None:
+        return None
+    path = Path(base_dir) / relative
+    if path in _DATA_URIS:
+        return _DATA_URIS[path]
+    try:
+        data_uri = "data:image/jpeg;base64," + base64.b64encode(path.read_bytes()).decode()
+    except OSError:
+        data_uri = None
+    with _LOCK:
+        _DATA_URIS[path] = data_uri
+    return data_uri
@@ -0,0 +1,369 @@
+import math
+from collections.abc import Callable, Iterable, Sequence
+from functools import reduce
+from typing import Any
+
+from armybuilder.combat import NUMPY_AVAILABLE, CombatEngine, WeaponProfiles
+from armybuilder.config import GAME_CONFIG
+from armybuilder.lazy import lazy_import
+
+np = lazy_import("numpy")
+
+
+UnitData = dict[str, Any]
+
+METRICS = ("points", "coriace", "damage")
+# Défense de référence pour la métrique "damage" (blessures attendues).
+DAMAGE_REFERENCE_DEFENSE = 4
+# Configurations gardées par unité (fronts de Pareto coût/valeur de chaque métrique, réunis).
+MAX_CONFIGS_PER_UNIT = 60
+_NEGATIVE = -1e18
+
+
+class UnitConfig:
+    """One fully chosen way to field a unit: cost and resulting profile."""
+
+    __slots__ = ("name", "hero", "cost", "unit", "selections", "combined", "models", "tough", "weapons", "special_rules")
+
+    def __init__(
+        self,
+        unit: UnitData,
+        cost: int,
+        selections: tuple[tuple[int, str], ...] = (),
+        combined: bool = False,
+        weapons: list[dict[str, Any]] | None = None,
+        special_rules: list[str] | None = None,
+        tough: int | None = None,
+    ) -> None:
+        self.unit = unit
+        self.name = unit.get("name", "")
+        self.hero = unit.get("type") == "hero"
+        self.cost = cost
+        self.selections = selections
+        self.combined = combined
+        size = 1 if self.hero else int(unit.get("size") or 1)
+        self.models = size * 2 if combined else size
+        self.tough = tough if tough is not None else int(unit.get("coriace") or 1)
+        self.weapons = weapons if weapons is not None else list(unit.get("weapon", []))
+        self.special_rules = special_rules if special_rules is not None else list(unit.get("special_rules", []))
+
+    @property
+    def label(self) -> str:
+        parts = [name for _, name in self.selections]
+        if self.combined:
+            parts.insert(0, "Unité combinée")
+        return f"{self.name} ({', '.join(parts)})" if parts else self.name
+
+    def to_army_unit(self) -> UnitData:
+        """Army list entry with the same keys and shapes as units added from the configurator.
+
+        Role and upgrade options are listed per group as option dicts and a
+        mount (or mobility) option becomes the ``mount`` entry, whose
+        weapons are then no longer part of ``weapon``.
+        """
+        unit = self.unit
+        groups = unit.get("upgrade_groups", [])
+        options: dict[str, list[dict[str, Any]]] = {}
+        mount = None
+        for index, name in self.selections:
+            group = groups[index]
+            option = next((o for o in group.get("options", []) if o.get("name") == name), None)
+            if option is None:
+                continue
+            group_type = group.get("type")
+            if group_type == "role":
+                options[group.get("group", "Rôle")] = [option]
+            elif group_type == "upgrades":
+                options.setdefault(group.get("group", "Options"), []).append(option)
+            elif group_type == "mount":
+                mount = option
+            elif group_type == "mobility":
+                mount = mobility_mount(option)
+        weapons = self.weapons
+        if mount is not None:
+            weapons = _without_weapons(weapons, _weapon_dicts(mount.get("mount", {}).get("weapon")))
+        return {
+            "name": self.name,
+            "type": unit.get("type", "unit"),
+            "unit_detail": unit.get("unit_detail", unit.get("type", "unit")),
+            "cost": self.cost,
+            "size": self.models,
+            "quality": unit.get("quality"),
+            "defense": unit.get("defense"),
+            "weapon": weapons,
+            "options": options,
+            "mount": mount,
+            "special_rules": list(dict.fromkeys(self.special_rules)),
+            "coriace": self.tough,
+        }
+
+
+def mobility_mount(option: dict[str, Any]) -> dict[str, Any]:
+    """``mount`` entry of a mobility option (its data sits at the option's root)."""
+    weapon = option.get("weapon", [])
+    return {
+        "name": option["name"],
+        "cost": option["cost"],
+        "mount": {
+            "weapon": [weapon] if isinstance(weapon, dict) else weapon,
+            "special_rules": option.get("special_rules", []),
+            "coriace_bonus": option.get("coriace_bonus", 0),
+        },
+    }
+
+
+def _weapon_dicts(value: Any) -> list[dict[str, Any]]:
+    if isinstance(value, dict):
+        return [value]
+    return [weapon for weapon in value or [] if isinstance(weapon, dict)]
+
+
+def _without_weapons(weapons: list[dict[str, Any]], removed: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    # Une ligne retirée par arme de monture (la configuration les range avec les autres).
+    names = [weapon.get("name") for weapon in removed]
+    kept = []
+    for weapon in weapons:
+        if weapon.get("name") in names:
+            names.remove(weapon.get("name"))
+        else:
+            kept.append(weapon)
+    return kept
+
+
+def base_configurations(unit: UnitData) -> list[UnitConfig]:
+    """The unit as printed, plus its combined version for multi-model units."""
+    configs = [UnitConfig(unit, unit.get("base_cost", 0))]
+    if unit.get("type") != "hero" and unit.get("size", 1) > 1:
+        configs.append(UnitConfig(unit, unit.get("base_cost", 0) * 2, combined=True))
+    return configs
+
+
+class ArmyAutoBuilder:
+    """Proposes legal army lists for a faction by exact knapsack search.
+
+    Limits come from ``GAME_CONFIG``: hero cap, copies per unit, maximum
+    unit cost ratio and units per points. Each unit is first reduced to the
+    configurations on the cost/value Pareto front of some metric (at most
+    ``MAX_CONFIGS_PER_UNIT``), so ``configs`` holds only those. Heroes and
+    other units are solved as two multiple-choice knapsacks over ``(units
+    picked, points)`` with NumPy max-plus updates; every unit contributes a
+    small table "best value for j copies at cost c" built from its
+    configurations and memoized across calls. The two halves are then
+    combined on the points axis and the picks rebuilt by backtracking.
+    """
+
+    def __init__(
+        self,
+        units: Sequence[UnitData],
+        game: str,
+        configurations: Callable[[UnitData], Iterable[UnitConfig]] = base_configurations,
+    ) -> None:
+        if not NUMPY_AVAILABLE:
+            raise ImportError("NumPy est requis pour la génération automatique de listes (pip install numpy).")
+        self.game_config = GAME_CONFIG[game]
+        self.configs = {unit.get("name", ""): list(configurations(unit)) for unit in units}
+        self._values: dict[str, dict[str, list[float]]] = {}
+        self._tables: dict[tuple[Any, ...], Any] = {}
+        self._reduce()
+
+    def build(
+        self,
+        points: int,
+        metric: str = "points",
+        existing: Sequence[UnitData] = (),
+    ) -> dict[str, Any]:
+        """Best legal completion of ``existing`` for an army of ``points``.
+
+        Returns ``{"units": [UnitConfig...], "cost", "value", "metric"}``;
+        ``cost`` and ``value`` cover the added units only.
+        """
+        if metric not in METRICS:
+            raise ValueError(f"Métrique inconnue : {metric} (attendu : {', '.join(METRICS)})")
+        config = self.game_config
+        budget = points - sum(unit.get("cost", 0) for unit in existing)
+        max_unit_cost = points * config["unit_max_cost_ratio"]
+        copy_cap = 1 + math.floor(points / config["unit_copy_rule"])
+        hero_cap = math.floor(points / config["hero_limit"]) - sum(1 for unit in existing if unit.get("type") == "hero")
+        unit_cap = math.floor(points / config["unit_per_points"]) - sum(1 for unit in existing if unit.get("type") != "hero")
+        used: dict[str, int] = {}
+        for unit in existing:
+            used[unit.get("name", "")] = used.get(unit.get("name", ""), 0) + 1
+        if budget <= 0:
+            return {"units": [], "cost": 0, "value": 0.0, "metric": metric}
+
+        step = self._step(budget)
+        cells = budget // step
+        values = self._metric_values(metric)
+        halves = []
+        for hero, cap in ((True, hero_cap), (False, unit_cap)):
+            classes = []
+            for name, configs in self.configs.items():
+                copies = min(copy_cap - used.get(name, 0), max(cap, 0))
+                allowed = [
+                    index for index, unit_config in enumerate(configs)
+                    if unit_config.hero == hero and unit_config.cost <= min(max_unit_cost, budget)
+                ]
+                if copies > 0 and allowed:
+                    classes.append((name, allowed, copies))
+            halves.append(self._solve(classes, max(cap, 0), cells, step, values))
+
+        (hero_best, hero_pick), (unit_best, unit_pick) = halves
+        split = int(np.argmax(hero_best + unit_best[::-1]))
+        picks = hero_pick(split) + unit_pick(cells - split)
+        return {
+            "units": picks,
+            "cost": sum(pick.cost for pick in picks),
+            "value": round(sum(values[pick.name][self.configs[pick.name].index(pick)] for pick in picks), 3),
+            "metric": metric,
+        }
+
+    def _solve(
+        self,
+        classes: list[tuple[str, list[int], int]],
+        cap: int,
+        cells: int,
+        step: int,
+        values: dict[str, list[float]],
+    ) -> tuple[Any, Callable[[int], list[UnitConfig]]]:
+        """Multiple-choice knapsack over ``(count, cells)``; returns best-by-budget and a backtracker."""
+        best = np.full((cap + 1, cells + 1), _NEGATIVE)
+        best[0, 0] = 0.0
+        layers = []
+        for name, allowed, copies in classes:
+            table = self._class_table(name, tuple(allowed), min(copies, cap), cells, step, values)
+            updated = best.copy()
+            choice = np.full(best.shape, -1, dtype=np.int32)
+            for entry, (count, cost, value, _) in enumerate(table):
+                if count > cap or cost > cells:
+                    continue
+                candidate = best[: cap + 1 - count, : cells + 1 - cost] + value
+                target = updated[count:, cost:]
+                better = candidate > target
+                target[better] = candidate[better]
+                choice[count:, cost:][better] = entry
+            layers.append((table, choice))
+            best = updated
+
+        # Meilleure valeur pour un budget <= p (en cellules), tous effectifs confondus, + petite prime aux points dépensés.
+        score = best + np.arange(cells + 1)[np.newaxis, :] * step * 1e-6
+        flat_best = score.max(axis=0)
+        best_count = score.argmax(axis=0)
+        prefix_value = np.maximum.accumulate(flat_best)
+        # Cellule réellement atteinte pour chaque budget : dernier point où le maximum cumulé a progressé.
+        improved = np.concatenate(([True], flat_best[1:] > prefix_value[:-1]))
+        prefix_cell = np.maximum.accumulate(np.where(improved, np.arange(cells + 1), 0))
+
+        def backtrack(budget_cells: int) -> list[UnitConfig]:
+            cell = int(prefix_cell[budget_cells])
+            count = int(best_count[cell])
+            picks: list[UnitConfig] = []
+            for (name, _, _), (table, choice) in zip(reversed(classes), reversed(layers)):
+                entry = choice[count, cell]
+                if entry < 0:
+                    continue
+                entry_count, entry_cost, _, members = table[entry]
+                picks.extend(self.configs[name][index] for index in members)
+                count -= entry_count
+                cell -= entry_cost
+            return picks[::-1]
+
+        return prefix_value, backtrack
+
+    def _class_table(
+        self,
+        name: str,
+        allowed: tuple[int, ...],
+        copies: int,
+        cells: int,
+        step: int,
+        values: dict[str, list[float]],
+    ) -> list[tuple[int, int, float, tuple[int, ...]]]:
+        """``(copies, cost cells, value, config indices)`` Pareto entries for 1..copies picks of a unit."""
+        key = (name, allowed, copies, cells, step, id(values))
+        table = self._tables.get(key)
+        if table is not None:
+            return table
+
+        configs = self.configs[name]
+        unit_values = values[name]
+        singles = _pareto([(configs[index].cost // step, unit_values[index], (index,)) for index in allowed])
+        table = [(1, cost, value, members) for cost, value, members in singles]
+        level = singles
+        for count in range(2, copies + 1):
+            level = _pareto(
+                [
+                    (cost + extra_cost, value + extra_value, members + extra_members)
+                    for cost, value, members in level
+                    for extra_cost, extra_value, extra_members in singles
+                    if cost + extra_cost <= cells
+                ]
+            )
+            table.extend((count, cost, value, members) for cost, value, members in level)
+        self._tables[key] = table
+        return table
+
+    def _reduce(self) -> None:
+        """Keep, per unit, the configurations on the Pareto front of at least one metric."""
+        values = {metric: self._metric_values(metric) for metric in METRICS}
+        share = max(MAX_CONFIGS_PER_UNIT // len(METRICS), 2)
+        for name, configs in self.configs.items():
+            kept: set[int] = set()
+            for metric in METRICS:
+                front = [members[0] for _, _, members in _pareto([(config.cost, value, (index,)) for index, (config, value) in enumerate(zip(configs, values[metric][name]))])]
+                if len(front) > share:
+                    # Front trop long : échantillonné régulièrement sur l'axe des coûts, extrémités comprises.
+                    front = [front[round(position * (len(front) - 1) / (share - 1))] for position in range(share)]
+                kept.update(front)
+            rows = sorted(kept)
+            self.configs[name] = [configs[index] for index in rows]
+            for metric in METRICS:
+                values[metric][name] = [values[metric][name][index] for index in rows]
+
+    def _metric_values(self, metric: str) -> dict[str, list[float]]:
+        values = self._values.get(metric)
+        if values is not None:
+            return values
+        if metric == "points":
+            values = {name: [float(config.cost) for config in configs] for name, configs in self.configs.items()}
+        elif metric == "coriace":
+            values = {name: [float(config.models * config.tough) for config in configs] for name, configs in self.configs.items()}
+        else:
+            values = self._damage_values()
+        self._values[metric] = values
+        return values
+
+    def _damage_values(self) -> dict[str, list[float]]:
+        # Les configurations énumérées partagent leurs dicts d'armes : chaque profil n'est évalué qu'une fois.
+        profiles: dict[tuple[int, int, Any], int] = {}
+        weapons = []
+        rows = []
+        for name, configs in self.configs.items():
+            for index, config in enumerate(configs):
+                for weapon in config.weapons:
+                    if isinstance(weapon, dict):
+                        count = weapon.get("count") or config.models
+                        key = (id(weapon), count, config.unit.get("quality", 6))
+                        if key not in profiles:
+                            profiles[key] = len(weapons)
+                            weapons.append(((name, None, None, weapon.get("name", "")), dict(weapon, attacks=(weapon.get("attacks") or 0) * count), key[2]))
+                        rows.append((name, index, profiles[key]))
+        wounds = CombatEngine((DAMAGE_REFERENCE_DEFENSE,)).expected_wounds(WeaponProfiles.from_weapons(weapons))[:, 0] if weapons else []
+        values = {name: [0.0] * len(configs) for name, configs in self.configs.items()}
+        for name, index, profile in rows:
+            values[name][index] += float(wounds[profile])
+        return values
+
+    def _step(self, budget: int) -> int:
+        costs = [config.cost for configs in self.configs.values() for config in configs if config.cost > 0]
+        return reduce(math.gcd, costs, budget) or 1
+
+
+def _pareto(entries: list[tuple[int, float, tuple[int, ...]]]) -> list[tuple[int, float, tuple[int, ...]]]:
+    """Keep entries not dominated by a cheaper-or-equal, better-or-equal one."""
+    kept: list[tuple[int, float, tuple[int, ...]]] = []
+    best = _NEGATIVE
+    for cost, value, members in sorted(entries, key=lambda entry: (entry[0], -entry[1])):
+        if value > best:
+            kept.append((cost, value, members))
+            best = value
+    return kept
@@ -0,0 +1,233 @@
+import threading
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+from armybuilder.profiling import profiled, span
+from repositories import FactionFileError, JsonFactionRepository
+from repositories.catalog_pack import PackedCatalog
+
+
+FactionData = dict[str, Any]
+FactionsByGame = dict[str, dict[str, FactionData]]
+FileStamp = tuple[int, int]
+
+
+class CatalogVersion:
+    """Immutable view of the faction catalog at one point in time.
+
+    Sessions keep a reference to the version they were built from, so a
+    reload never changes the data under a list that is being edited.
+    Caches derived from the catalog (indexes, labels...) hang off the
+    version through ``derive`` and are dropped with it. ``errors`` lists
+    the faction files that failed to load: they are left out (or kept at
+    their last valid content) instead of failing the whole catalog.
+    """
+
+    def __init__(
+        self, number: int, factions: FactionsByGame, games: list[str], errors: tuple[FactionFileError, ...] = ()
+    ) -> None:
+        self.number = number
+        self.factions = factions
+        self.games = games
+        self.errors = errors
+        self._derived: dict[str, Any] = {}
+        self._derived_lock = threading.Lock()
+
+    def get_faction(self, game: str | None, faction: str | None) -> FactionData | None:
+        return self.factions.get(game or "", {}).get(faction or "")
+
+    def derive(self, name: str, builder: Callable[["CatalogVersion"], Any]) -> Any:
+        value = self._derived.get(name, _MISSING)
+        if value is not _MISSING:
+            return value
+        with self._derived_lock:
+            value = self._derived.get(name, _MISSING)
+            if value is _MISSING:
+                value = self._derived[name] = builder(self)
+        return value
+
+
+class FactionCatalogStore:
+    """Holds the current catalog version and swaps in reloaded files atomically."""
+
+    def __init__(self, repository: JsonFactionRepository) -> None:
+        self.repository = repository
+        self._version: CatalogVersion | None = None
+        self._refresh_lock = threading.Lock()
+        self._raw_by_path: dict[Path, FactionData] = {}
+        self._faction_stamps: dict[Path, FileStamp] = {}
+        self._common_rules_stamp: FileStamp | None = None
+        self._path_keys: dict[Path, tuple[str, str]] = {}
+        self._read_errors: dict[Path, FactionFileError] = {}
+        self._normalize_errors: dict[Path, FactionFileError] = {}
+
+    def current(self) -> CatalogVersion:
+        version = self._version
+        if version is None:
+            self.refresh()
+            version = self._version
+        return version
+
+    @profiled("catalog.refresh")
+    def refresh(self) -> bool:
+        """Re-parse changed files only; return True when a new version was published."""
+        with self._refresh_lock:
+            common_rules_stamp = _stamp(self.repository.common_rules_repository.common_rules_path())
+            faction_stamps = {path: _stamp(path) for path in self.repository.list_faction_files()}
+
+            rules_changed = common_rules_stamp != self._common_rules_stamp
+            changed = [
+                path for path, stamp in faction_stamps.items()
+                if self._faction_stamps.get(path) != stamp
+            ]
+            removed = [path for path in self._faction_stamps if path not in faction_stamps]
+            if self._version is not None and not (rules_changed or changed or removed):
+                return False
+
+            if rules_changed:
+                with span("repository.reload_common_rules"):
+                    self.repository.reload_common_rules()
+            for path in removed:
+                self._raw_by_path.pop(path, None)
+                self._read_errors.pop(path, None)
+            with span("repository.read_faction_files"):
+                parsed, errors = self.repository.read_faction_files(changed)
+            # Un fichier illisible garde sa dernière version valide (s'il en avait une).
+            self._raw_by_path.update(parsed)
+            for path in changed:
+                self._read_errors.pop(path, None)
+            self._read_errors.update((error.path, error) for error in errors)
+
+            reload_paths = self._raw_by_path if rules_changed or self._version is None else parsed
+            self._publish(set(reload_paths), set(removed))
+            self._faction_stamps = faction_stamps
+            self._common_rules_stamp = common_rules_stamp
+            return True
+
+    def _publish(self, reload_paths: set[Path], removed_paths: set[Path]) -> None:
+        previous = self._version
+        factions: FactionsByGame = {}
+        if previous is not None:
+            factions = {game: dict(by_faction) for game, by_faction in previous.factions.items()}
+
+        # Une variante (extends) est rematérialisée avec sa base, et après elle.
+        bases = {path: self.repository.variant_base(path, raw) for path, raw in self._raw_by_path.items()}
+        reload_paths = reload_paths | {path for path, base in bases.items() if base is not None and base in reload_paths | removed_paths}
+
+        for path in removed_paths:
+            key = self._path_keys.get(path)
+            if key is not None:
+                factions.get(key[0], {}).pop(key[1], None)
+
+        for path in sorted(reload_paths, key=lambda path: (bases[path] is not None, path)):
+            self._normalize_errors.pop(path, None)
+            base_path = bases[path]
+            # Pas de chaînes de variantes : la base doit être une faction autonome.
+            chained = base_path is not None and bool(self._raw_by_path.get(base_path, {}).get("extends"))
+            base_key = self._path_keys.get(base_path) if base_path is not None and not chained else None
+            base = factions.get(base_key[0], {}).get(base_key[1]) if base_key is not None else None
+            try:
+                with span("repository.normalize_faction"):
+                    faction_data = self.repository.normalize_faction(self._raw_by_path[path], base)
+            except Exception as error:
+                # Fichier modifié mais invalide : l'entrée précédente (et sa clé) reste publiée.
+                self._normalize_errors[path] = FactionFileError.from_exception(path, error)
+                continue
+            previous_key = self._path_keys.get(path)
+            if faction_data is None:
+                self._path_keys.pop(path, None)
+            else:
+                key = self._path_keys[path] = (faction_data["game"], faction_data["faction"])
+            # L'ancienne entrée n'est retirée qu'une fois la nouvelle normalisée (jeu ou nom changés, ou fichier ignoré).
+            if previous_key is not None and (faction_data is None or previous_key != key):
+                factions.get(previous_key[0], {}).pop(previous_key[1], None)
+            if faction_data is not None:
+                factions.setdefault(key[0], {})[key[1]] = faction_data
+        for path in removed_paths:
+            self._path_keys.pop(path, None)
+            self._normalize_errors.pop(path, None)
+
+        factions = {game: by_faction for game, by_faction in factions.items() if by_faction}
+        number = previous.number + 1 if previous is not None else 1
+        # Affectation atomique : les lecteurs voient l'ancienne ou la nouvelle version, jamais un mélange.
+        errors = {**self._normalize_errors, **self._read_errors}
+        self._version = CatalogVersion(number, factions, sorted(factions), tuple(errors[path] for path in sorted(errors)))
+
+
+class PackedCatalogStore:
+    """Catalog served from a pack file (``python -m repositories.catalog_pack``).
+
+    Factions are decoded from the memory-mapped pack on first access, so the
+    worker processes of a host share its pages instead of each parsing every
+    JSON file. ``refresh`` publishes a new version when the pack is rebuilt.
+    """
+
+    def __init__(self, pack_path: Path) -> None:
+        self.pack_path = Path(pack_path)
+        self._version: CatalogVersion | None = None
+        self._refresh_lock = threading.Lock()
+        self._pack_stamp: FileStamp | None = None
+
+    def current(self) -> CatalogVersion:
+        version = self._version
+        if version is None:
+            self.refresh()
+            version = self._version
+        return version
+
+    @profiled("catalog.refresh")
+    def refresh(self) -> bool:
+        with self._refresh_lock:
+            stamp = _stamp(self.pack_path)
+            if self._version is not None and stamp == self._pack_stamp:
+                return False
+            with span("repository.open_pack"):
+                pack = PackedCatalog(self.pack_path)
+            number = self._version.number + 1 if self._version is not None else 1
+            # L'ancienne projection reste valide pour les versions encore référencées (os.replace au build).
+            self._version = CatalogVersion(number, pack.factions(), list(pack.games), tuple(pack.errors))
+            self._pack_stamp = stamp
+            return True
+
+
+class CatalogWatcher:
+    """Background thread polling the data directories and refreshing the store."""
+
+    def __init__(self, store: FactionCatalogStore | PackedCatalogStore, interval: float = 2.0) -> None:
+        self.store = store
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        if self.running or self.interval <= 0:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="catalog-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 1)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.store.refresh()
+            except Exception:
+                # Fichier en cours d'écriture ou JSON invalide : on garde la version courante.
+                continue
+
+
+_MISSING = object()
+
+
+def _stamp(path: Path) -> FileStamp:
+    stat = path.stat()
+    return stat.st_mtime_ns, stat.st_size
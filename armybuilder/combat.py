@@ -0,0 +1,255 @@
+import re
+from collections.abc import Iterable, Sequence
+from typing import Any
+
+from armybuilder.lazy import lazy_import, module_available
+
+# NumPy n'est importé qu'au premier calcul (démarrage plus rapide des workers).
+NUMPY_AVAILABLE = module_available("numpy")
+np = lazy_import("numpy")
+
+
+FactionData = dict[str, Any]
+
+DEFAULT_DEFENSES = (2, 3, 4, 5, 6)
+# Règles d'armes prises en compte par le calcul ; les autres sont ignorées.
+MODELLED_RULES = (
+    "Perforant",
+    "Mortel",
+    "Explosion",
+    "Fiable",
+    "Fléau",
+    "Fracas",
+    "Fauchage",
+    "Purge",
+    "Lacération",
+)
+RENDING_AP = 4
+
+_RULE_RE = re.compile(r"^\s*([^(]+?)\s*(?:\(\s*(\d+)\s*\))?\s*$")
+_ALL_MODELS_RE = re.compile(r"\btou(?:te)?s\b", re.IGNORECASE)
+
+
+def parse_rule(rule: Any) -> tuple[str, int | None]:
+    """Split ``"Mortel (3)"`` into ``("Mortel", 3)``."""
+    name = rule if isinstance(rule, str) else rule.get("name", "") if isinstance(rule, dict) else ""
+    match = _RULE_RE.match(name)
+    if match is None:
+        return name.strip(), None
+    value = match.group(2)
+    return match.group(1), int(value) if value is not None else None
+
+
+class WeaponProfiles:
+    """Columnar weapon profiles: one row per weapon, one NumPy array per attribute.
+
+    ``rows`` keeps ``(unit, group, option, weapon)`` labels aligned with the
+    arrays so results can be mapped back to the faction data.
+    """
+
+    COLUMNS = (
+        "attacks",
+        "quality",
+        "ap",
+        "deadly",
+        "blast",
+        "rending",
+        "bane",
+        "smash",
+        "reap",
+        "purge",
+        "shred",
+    )
+
+    def __init__(self, rows: list[tuple[str, str | None, str | None, str]], columns: dict[str, Any]) -> None:
+        self.rows = rows
+        for name in self.COLUMNS:
+            setattr(self, name, columns[name])
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    @classmethod
+    def from_weapons(
+        cls,
+        weapons: Iterable[tuple[tuple[str, str | None, str | None, str], dict[str, Any], int]],
+    ) -> "WeaponProfiles":
+        """Build from ``(label, weapon, attacker_quality)`` triples."""
+        _require_numpy()
+        rows: list[tuple[str, str | None, str | None, str]] = []
+        values: dict[str, list[int]] = {name: [] for name in cls.COLUMNS}
+        for label, weapon, quality in weapons:
+            rules = dict(parse_rule(rule) for rule in weapon.get("special_rules", []))
+            rows.append(label)
+            values["attacks"].append(_int(weapon.get("attacks"), 0))
+            values["quality"].append(2 if "Fiable" in rules else _int(quality, 6))
+            values["ap"].append(_int(weapon.get("armor_piercing"), 0))
+            values["deadly"].append(rules.get("Mortel") or 1)
+            values["blast"].append(rules.get("Explosion") or 1)
+            values["rending"].append("Perforant" in rules)
+            values["bane"].append("Fléau" in rules)
+            values["smash"].append("Fracas" in rules)
+            values["reap"].append("Fauchage" in rules)
+            values["purge"].append("Purge" in rules)
+            values["shred"].append("Lacération" in rules or "Eclatement" in rules or "Éclatement" in rules)
+        columns = {name: np.asarray(column, dtype=np.int16) for name, column in values.items()}
+        return cls(rows, columns)
+
+    @classmethod
+    def from_faction(cls, faction_data: FactionData) -> "WeaponProfiles":
+        """Every base, option and mount weapon of a faction, at its unit's quality."""
+        return cls.from_weapons(_faction_weapons(faction_data))
+
+
+class CombatEngine:
+    """Expected hits and wounds for weapon profiles against a grid of Defense values.
+
+    Everything is computed in one broadcast over a ``(weapons, defenses)``
+    array. Dice conventions: an unmodified 6 always succeeds and an
+    unmodified 1 always fails, both to hit and to block.
+    """
+
+    def __init__(self, defenses: Sequence[int] = DEFAULT_DEFENSES) -> None:
+        _require_numpy()
+        self.defenses = np.asarray(defenses, dtype=np.int16)
+
+    def expected_hits(self, profiles: WeaponProfiles) -> Any:
+        """Expected hits per weapon, split as ``(hits on 2-5, hits on unmodified 6)``."""
+        quality = np.clip(profiles.quality, 2, 7).astype(np.float64)
+        normal = np.maximum(6 - quality, 0) / 6 * profiles.attacks
+        sixes = profiles.attacks / 6
+        return normal, sixes
+
+    def expected_wounds(self, profiles: WeaponProfiles) -> Any:
+        """``(weapons, defenses)`` array of expected wounds per weapon."""
+        if not len(profiles):
+            return np.zeros((0, len(self.defenses)))
+        normal, sixes = self.expected_hits(profiles)
+        defense = self.defenses[np.newaxis, :]
+        ap = _column(profiles.ap) + np.where(_column(profiles.reap) & (defense <= 3), 2, 0)
+        ap = ap + np.where(_column(profiles.purge) & (defense <= 4), 1, 0)
+        ap_sixes = np.where(_column(profiles.rending), np.maximum(ap, RENDING_AP), ap)
+        blast = np.where(_column(profiles.smash) & (defense >= 5), np.maximum(_column(profiles.blast), 3), _column(profiles.blast))
+        bane = _column(profiles.bane)
+
+        hits = _column(normal) * blast
+        hits_sixes = _column(sixes) * blast
+        unblocked = hits * (1 - _block_chance(defense + ap, bane)) + hits_sixes * (1 - _block_chance(defense + ap_sixes, bane))
+        wounds = unblocked * _column(profiles.deadly)
+        # Lacération : chaque 1 non modifié au jet de blocage inflige une blessure de plus.
+        wounds = wounds + np.where(_column(profiles.shred), (hits + hits_sixes) / 6, 0)
+        return wounds
+
+
+class UpgradeEfficiency:
+    """Points-efficiency of every weapon option of a faction."""
+
+    def __init__(self, faction_data: FactionData, defenses: Sequence[int] = DEFAULT_DEFENSES) -> None:
+        self.engine = CombatEngine(defenses)
+        self.defenses = [int(defense) for defense in self.engine.defenses]
+        self.profiles = WeaponProfiles.from_faction(faction_data)
+        self.wounds = self.engine.expected_wounds(self.profiles)
+        self.scores = self._score(faction_data)
+
+    def for_unit(self, unit_name: str) -> list[dict[str, Any]]:
+        return [score for score in self.scores if score["unit"] == unit_name]
+
+    def _score(self, faction_data: FactionData) -> list[dict[str, Any]]:
+        by_label: dict[tuple[str, str | None, str | None], Any] = {}
+        base_by_name: dict[tuple[str, str], Any] = {}
+        for row, label in enumerate(self.profiles.rows):
+            key = label[:3]
+            by_label[key] = by_label[key] + self.wounds[row] if key in by_label else self.wounds[row]
+            if label[1] is None:
+                base_by_name[(label[0], label[3])] = self.wounds[row]
+
+        scores: list[dict[str, Any]] = []
+        for unit in faction_data.get("units", []):
+            unit_name = unit.get("name", "")
+            for group in unit.get("upgrade_groups", []):
+                copies = _copies(unit, group)
+                for option in group.get("options", []):
+                    gained = by_label.get((unit_name, group.get("group", ""), option.get("name", "")))
+                    if gained is None:
+                        continue
+                    lost = sum(
+                        (base_by_name[(unit_name, name)] for name in _replaced_names(unit, group, option) if (unit_name, name) in base_by_name),
+                        np.zeros(len(self.defenses)),
+                    )
+                    delta = (gained - lost) * copies
+                    cost = option.get("cost", 0)
+                    mean_delta = float(delta.mean())
+                    scores.append(
+                        {
+                            "unit": unit_name,
+                            "group": group.get("group", ""),
+                            "option": option.get("name", ""),
+                            "cost": cost,
+                            "copies": copies,
+                            "wounds_by_defense": [round(float(value), 3) for value in delta],
+                            "wounds": round(mean_delta, 3),
+                            "score": round(mean_delta / cost * 100, 2) if cost > 0 else None,
+                        }
+                    )
+        return scores
+
+
+def _column(values: Any) -> Any:
+    return np.asarray(values)[:, np.newaxis]
+
+
+def _block_chance(need: Any, bane: Any) -> Any:
+    faces = np.where(need > 6, 1, 7 - np.maximum(need, 2))
+    chance = faces / 6
+    # Fléau : les 6 non modifiés au blocage sont relancés.
+    return np.where(bane, (faces - 1) / 6 + chance / 6, chance)
+
+
+def _faction_weapons(faction_data: FactionData):
+    for unit in faction_data.get("units", []):
+        unit_name = unit.get("name", "")
+        quality = unit.get("quality", 6)
+        for weapon in _weapon_list(unit.get("weapon")):
+            yield (unit_name, None, None, weapon.get("name", "")), weapon, quality
+        for group in unit.get("upgrade_groups", []):
+            for option in group.get("options", []):
+                label = (unit_name, group.get("group", ""), option.get("name", ""))
+                weapons = _weapon_list(option.get("weapon"))
+                mount = option.get("mount")
+                if isinstance(mount, dict):
+                    weapons += _weapon_list(mount.get("weapon"))
+                for weapon in weapons:
+                    yield (*label, weapon.get("name", "")), weapon, quality
+
+
+def _weapon_list(value: Any) -> list[dict[str, Any]]:
+    if isinstance(value, dict):
+        return [value] if value else []
+    if isinstance(value, list):
+        return [weapon for weapon in value if isinstance(weapon, dict)]
+    return []
+
+
+def _replaced_names(unit: dict[str, Any], group: dict[str, Any], option: dict[str, Any]) -> list[str]:
+    if option.get("replaces"):
+        return list(option["replaces"])
+    if group.get("type") == "weapon":
+        # Même règle que le configurateur : sans "replaces", toutes les armes de base sont remplacées.
+        return [weapon.get("name", "") for weapon in _weapon_list(unit.get("weapon")) if not weapon.get("count")]
+    return []
+
+
+def _copies(unit: dict[str, Any], group: dict[str, Any]) -> int:
+    # "Remplacer toutes…" / "Améliorer toutes les figurines…" : l'option équipe toute l'unité.
+    if _ALL_MODELS_RE.search(group.get("description", "")):
+        return max(_int(unit.get("size"), 1), 1)
+    return 1
+
+
+def _int(value: Any, default: int) -> int:
+    return value if isinstance(value, int) and not isinstance(value, bool) else default
+
+
+def _require_numpy() -> None:
+    if not NUMPY_AVAILABLE:
+        raise ImportError("NumPy est requis pour le calcul de combat (pip install numpy).")
@@ -1,5 +1,45 @@
+import multiprocessing
+import os
+
 APP_URL = "https://armybuilder-fra.streamlit.app/"
 
+# Intervalle (s) de scrutation des JSON de factions pour le rechargement à chaud ; 0 = désactivé.
+CATALOG_WATCH_INTERVAL = float(os.environ.get("ARMYBUILDER_CATALOG_WATCH_INTERVAL", "2"))
+
+# Catalogue empaqueté (python -m repositories.catalog_pack) partagé par mmap entre workers ; vide = JSON.
+CATALOG_PACK_PATH = os.environ.get("ARMYBUILDER_CATALOG_PACK", "")
+
+# Import JSON d'une liste : lu en flux, refusé au-delà de ce nombre d'unités.
+MAX_IMPORTED_UNITS = 500
+
+# Démarrage des processus de calcul (exports, simulations) : jamais "fork", le serveur a déjà des
+# threads (watcher, préchauffage, santé, scripts) dont les verrous seraient copiés verrouillés.
+PROCESS_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+# Intervalle de sondage des exports en tâche de fond (fragment relancé tant qu'ils sont en cours).
+EXPORT_POLL_SECONDS = 2
+
+# Liste d'armée : unités rendues par page (formats à gros points : 100+ unités).
+ARMY_LIST_PAGE_SIZE = 20
+
+# Préchauffage des caches partagés au démarrage du worker (thread de fond) ; 0 = désactivé.
+WARMUP_ENABLED = os.environ.get("ARMYBUILDER_WARMUP", "1").lower() not in ("", "0", "false", "no")
+
+# État du préchauffage pour l'orchestrateur : fichier JSON et/ou port local (GET /health) ; vide / 0 = désactivé.
+# Plusieurs workers par hôte : chacun écoute sur HEALTH_PORT + WORKER_INDEX, et le chemin
+# du fichier peut contenir {worker} ou {pid}.
+HEALTH_FILE = os.environ.get("ARMYBUILDER_HEALTH_FILE", "")
+HEALTH_PORT = int(os.environ.get("ARMYBUILDER_HEALTH_PORT", "0"))
+WORKER_INDEX = int(os.environ.get("ARMYBUILDER_WORKER_INDEX", "0"))
+
+# Empreinte mémoire des sessions : mesurée après chaque modification de l'armée et au moins
+# tous les FOOTPRINT_SAMPLE_RUNS reruns ; une session muette depuis FOOTPRINT_TTL_SECONDS est oubliée.
+FOOTPRINT_SAMPLE_RUNS = 20
+FOOTPRINT_TTL_SECONDS = 1800
+
+# Instrumentation des reruns (spans chronométrés + panneau de débogage) ; désactivée par défaut.
+PROFILING_ENABLED = os.environ.get("ARMYBUILDER_PROFILE", "").lower() not in ("", "0", "false", "no")
+
 GAME_COLORS = {
     "Age of Fantasy": "#2980b9",
     "Age of Fantasy Regiments": "#8e44ad",
@@ -71,4 +111,7 @@ DEFAULT_SESSION_STATE = {
     "units": [],
     "faction_special_rules": [],
     "faction_spells": {},
+    "player_name": "",
+    "player_secret": "",
+    "saved_list_id": None,
 }
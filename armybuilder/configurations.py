@@ -0,0 +1,485 @@
+import sys
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+
+from armybuilder.builder import UnitConfig, base_configurations
+from armybuilder.combat import NUMPY_AVAILABLE
+from armybuilder.lazy import lazy_import
+
+np = lazy_import("numpy")
+
+
+UnitData = dict[str, Any]
+FactionData = dict[str, Any]
+# (index dans le registre d'armes de l'unité, nombre d'exemplaires, arme d'amélioration unique)
+WeaponSlot = tuple[int, int, bool]
+Selection = tuple[int, str, int]
+
+# Au-delà, l'énumération d'une unité est abandonnée (et signalée) plutôt que de saturer la mémoire.
+MAX_STATES_PER_UNIT = 10_000
+
+
+def is_unique_upgrade(group: dict[str, Any]) -> bool:
+    """True when the upgrade stays x1 on a combined unit (same rule as the configurator)."""
+    group_type = group.get("type", "")
+    if group.get("group", "") == "Sergent":
+        return True
+    if any("+" in requirement for requirement in group.get("requires", [])):
+        return True
+    if group_type in ("role", "mobility"):
+        return True
+    if group_type == "upgrades":
+        return "toutes" not in group.get("description", "").lower()
+    return False
+
+
+class _State:
+    """Partial configuration while walking the upgrade groups."""
+
+    __slots__ = ("weapons", "names", "multi", "unique", "rules", "coriace", "selections", "ways")
+
+    def __init__(
+        self,
+        weapons: tuple[WeaponSlot, ...],
+        names: frozenset[str],
+        multi: int = 0,
+        unique: int = 0,
+        rules: tuple[str, ...] = (),
+        coriace: int = 0,
+        selections: tuple[Selection, ...] = (),
+        ways: int = 1,
+    ) -> None:
+        self.weapons = weapons
+        self.names = names
+        self.multi = multi
+        self.unique = unique
+        self.rules = rules
+        self.coriace = coriace
+        self.selections = selections
+        self.ways = ways
+
+    def key(self) -> tuple[Any, ...]:
+        # Les règles spéciales ne changent ni la légalité des choix suivants ni le profil de combat :
+        # deux états qui ne diffèrent que par elles sont fusionnés (le premier sert de représentant).
+        return (tuple(sorted(self.weapons)), self.names, self.multi, self.unique, self.coriace)
+
+    def derive(self, **changes: Any) -> "_State":
+        if not changes:
+            return _State(self.weapons, self.names, self.multi, self.unique, self.rules, self.coriace, self.selections, self.ways)
+        values = {name: getattr(self, name) for name in self.__slots__}
+        values.update(changes)
+        return _State(**values)
+
+
+class UnitConfigurationSpace:
+    """Every distinct legal configuration of one unit, stored column-wise.
+
+    ``cost``, ``models`` and ``tough`` are NumPy arrays (one entry per
+    configuration); ``selections``, ``weapons`` and ``ways`` are parallel
+    lists and ``weapon_registry`` holds each weapon dict once.
+
+    Groups are walked in order and partial configurations are merged as soon
+    as they agree on everything that matters later (weapons, the names
+    referenced by ``requires``/``requires_not``, costs, Coriace), so the
+    walk stays small even for units whose raw option space is in the
+    hundreds of thousands. ``ways`` keeps how many raw selections each row
+    stands for: ``configurations`` is the exact number of legal selections
+    and ``len()`` the number of distinct cost/profile rows. ``unreachable``
+    lists the ``(group index, option name)`` pairs no selection can reach.
+
+    A unit whose walk exceeds ``MAX_STATES_PER_UNIT`` partial states is
+    not enumerable: ``truncated`` is set and the space is left empty (no
+    rows, no count, no unreachable options) rather than partial.
+    """
+
+    def __init__(self, unit: UnitData) -> None:
+        self.unit = unit
+        self.weapon_registry: list[dict[str, Any]] = []
+        self._registry_index: dict[int, int] = {}
+        self._relevant = frozenset(_referenced_names(unit))
+        self._reachable: set[tuple[int, str]] = set()
+        self._options: dict[tuple[int, int], tuple[Any, ...]] = {}
+        self._base_names = frozenset(weapon.get("name", "") for weapon in unit.get("weapon", []))
+        self.truncated = False
+
+        states = self._enumerate()
+        if self.truncated:
+            states, self._reachable = [], set()
+        rows: dict[tuple[Any, ...], tuple[int, int, int, _State]] = {}
+        # Beaucoup d'états partagent le même armement : son profil final n'est calculé qu'une fois.
+        final_weapons: dict[tuple[tuple[WeaponSlot, ...], bool], tuple[WeaponSlot, ...]] = {}
+        variants = self._combined_variants()
+        for state in states:
+            for combined in variants:
+                cost, models, tough = self._totals(state, combined)
+                weapons = final_weapons.get((state.weapons, combined))
+                if weapons is None:
+                    weapons = final_weapons[(state.weapons, combined)] = self._final_weapons(state, combined)
+                key = (cost, models, tough, weapons)
+                if key in rows:
+                    rows[key][3].ways += state.ways
+                    continue
+                selections = state.selections + ((-1, "Unité combinée", 1),) if combined else state.selections
+                rows[key] = (cost, models, tough, _State(weapons, state.names, rules=state.rules, selections=selections, ways=state.ways))
+
+        ordered = sorted(rows.values(), key=lambda row: row[0])
+        self.cost = np.asarray([row[0] for row in ordered], dtype=np.int32)
+        self.models = np.asarray([row[1] for row in ordered], dtype=np.int16)
+        self.tough = np.asarray([row[2] for row in ordered], dtype=np.int16)
+        self.selections = [row[3].selections for row in ordered]
+        self.weapons = [row[3].weapons for row in ordered]
+        self.rules = [row[3].rules for row in ordered]
+        self.ways = [row[3].ways for row in ordered]
+        self.configurations = sum(self.ways)
+        self.unreachable = [] if self.truncated else [
+            (index, option.get("name", ""))
+            for index, group in enumerate(unit.get("upgrade_groups", []))
+            for option in group.get("options", [])
+            if (index, option.get("name", "")) not in self._reachable
+        ]
+
+    def __len__(self) -> int:
+        return len(self.cost)
+
+    def unit_configs(self) -> list[UnitConfig]:
+        """Materialize the rows as ``UnitConfig`` objects (for the army auto-builder)."""
+        unit = self.unit
+        base_rules = list(unit.get("special_rules", []))
+        configs = []
+        # Les lignes partagent les mêmes dicts d'armes (une copie par (arme, nombre)) et les mêmes libellés.
+        counted: dict[tuple[int, int], dict[str, Any]] = {}
+        labels: dict[Selection, tuple[int, str]] = {}
+        for row, selections in enumerate(self.selections):
+            weapons = []
+            for index, count, _ in self.weapons[row]:
+                weapon = counted.get((index, count))
+                if weapon is None:
+                    weapon = counted[(index, count)] = dict(self.weapon_registry[index], count=count)
+                weapons.append(weapon)
+            chosen = []
+            for selection in selections:
+                if selection[0] >= 0:
+                    label = labels.get(selection)
+                    if label is None:
+                        group, name, count = selection
+                        label = labels[selection] = (group, name if count == 1 else f"{name} x{count}")
+                    chosen.append(label)
+            configs.append(
+                UnitConfig(
+                    unit,
+                    int(self.cost[row]),
+                    selections=tuple(chosen),
+                    combined=len(chosen) < len(selections),
+                    weapons=weapons,
+                    special_rules=base_rules + list(self.rules[row]),
+                    tough=int(self.tough[row]),
+                )
+            )
+        return configs
+
+    # ── Énumération ──────────────────────────────────────────────────────
+    def _enumerate(self) -> list[_State]:
+        unit = self.unit
+        size = self._size()
+        base = tuple(
+            (self._register(weapon), int(weapon.get("count") or size), False)
+            for weapon in unit.get("weapon", [])
+        )
+        names = frozenset(weapon.get("name", "") for weapon in unit.get("weapon", [])) & self._relevant
+        states = [_State(base, names)]
+        for index, group in enumerate(unit.get("upgrade_groups", [])):
+            expanded: dict[tuple[Any, ...], _State] = {}
+            for state in states:
+                for child in self._expand(index, group, state):
+                    _merge(expanded, child)
+                    if len(expanded) > MAX_STATES_PER_UNIT:
+                        self.truncated = True
+                        return []
+            states = list(expanded.values())
+        return states
+
+    def _expand(self, index: int, group: dict[str, Any], state: _State) -> Iterator[_State]:
+        yield state.derive()
+        requires = group.get("requires", [])
+        if requires and not all(name in state.names or name in self._weapon_names(state) for name in requires):
+            return
+        if any(name in state.names for name in group.get("requires_not", [])):
+            return
+
+        group_type = group.get("type", "")
+        unique = is_unique_upgrade(group)
+        options = [
+            option for option in group.get("options", [])
+            if all(name in state.names for name in option.get("requires", []))
+            and not any(name in state.names for name in option.get("requires_not", []))
+        ]
+        if group_type == "upgrades":
+            yield from self._expand_subsets(index, group, state, options, unique)
+        elif group_type == "variable_weapon_count":
+            yield from self._expand_counts(index, group, state, options, unique)
+        else:
+            for option in options:
+                yield self._apply(index, group, state, option, 1, unique)
+
+    def _expand_subsets(
+        self, index: int, group: dict[str, Any], state: _State, options: list[dict[str, Any]], unique: bool
+    ) -> Iterator[_State]:
+        # Sous-ensembles non vides construits option par option, en fusionnant au fur et à mesure ceux
+        # qui ne diffèrent plus pour la suite (coût, armes, noms requis) : pas d'explosion en 2^n.
+        subsets: dict[tuple[Any, ...], _State] = {}
+        for option in options:
+            layer: dict[tuple[Any, ...], _State] = {}
+            for child in subsets.values():
+                _merge(layer, child.derive())
+            for child in (state, *subsets.values()):
+                _merge(layer, self._apply(index, group, child, option, 1, unique))
+            subsets = layer
+        yield from subsets.values()
+
+    def _expand_counts(
+        self, index: int, group: dict[str, Any], state: _State, options: list[dict[str, Any]], unique: bool
+    ) -> Iterator[_State]:
+        all_replaces = [name for option in group.get("options", []) for name in option.get("replaces", [])]
+        if not group.get("requires") and all_replaces and not any(name in all_replaces for name in self._weapon_names(state)):
+            return
+        first = group.get("options", [{}])[0] if group.get("options") else {}
+        budget = self._max_count(first.get("max_count", {}), state)
+        bounds = [
+            (option.get("min_count", 0), min(self._max_count(option.get("max_count", {}), state), budget))
+            for option in options
+        ]
+        for counts in _bounded_counts(bounds, budget):
+            if not any(counts):
+                continue
+            child = state
+            for option, count in zip(options, counts):
+                if count:
+                    child = self._apply(index, group, child, option, count, unique)
+            yield child
+
+    def _apply(
+        self, index: int, group: dict[str, Any], state: _State, option: dict[str, Any], count: int, unique: bool
+    ) -> _State:
+        group_type = group.get("type", "")
+        name, cost, added, added_names, rules, coriace_bonus, replaces, is_mount = self._option(index, group_type, option)
+        cost *= count
+        weapons = list(state.weapons)
+        names = state.names
+
+        if group_type == "weapon":
+            kept, removed = [], 0
+            for slot in weapons:
+                weapon = self.weapon_registry[slot[0]]
+                if (replaces and weapon.get("name") in replaces) or (not replaces and not weapon.get("count")):
+                    removed = max(removed, slot[1])
+                else:
+                    kept.append(slot)
+            # Un remplacement d'arme désactive l'armement de base pour les "requires".
+            names = names - self._base_names
+            weapons = kept + [(weapon, removed or self._size(), False) for weapon in added]
+        elif group_type in ("conditional_weapon", "variable_weapon_count"):
+            weapons = self._replace(weapons, replaces, count)
+            weapons += [(weapon, count, unique) for weapon in added]
+        elif is_mount:
+            weapons += [(weapon, 1, True) for weapon in added]
+        else:
+            weapons += [(weapon, count, unique) for weapon in added]
+
+        unique_cost = cost if unique or is_mount else 0
+        return _State(
+            tuple(weapons),
+            names | added_names,
+            state.multi + (0 if unique_cost else cost),
+            state.unique + unique_cost,
+            tuple(sorted(set(state.rules).union(rules))) if rules else state.rules,
+            state.coriace + coriace_bonus,
+            state.selections + ((index, name, count),),
+            state.ways,
+        )
+
+    def _option(self, index: int, group_type: str, option: dict[str, Any]) -> tuple[Any, ...]:
+        """What applying ``option`` adds, computed once per option (registered weapons, names, rules…)."""
+        cached = self._options.get((index, id(option)))
+        if cached is not None:
+            return cached
+        name = option.get("name", "")
+        self._reachable.add((index, name))
+        mount = option.get("mount") if group_type == "mount" else option if group_type == "mobility" else None
+        weapons = _weapon_list(option.get("weapon"))
+        rules = list(option.get("special_rules", []))
+        coriace_bonus = option.get("coriace_bonus", 0)
+        if mount is not None:
+            # Les armes de la monture s'ajoutent ; les noms "requis" restent ceux des armes de l'option.
+            added = [self._register(weapon) for weapon in _weapon_list(mount.get("weapon"))]
+            if group_type == "mount":
+                rules += [
+                    rule for rule in mount.get("special_rules", [])
+                    if not rule.startswith(("Griffes", "Sabots")) and "Coriace" not in rule
+                ]
+                coriace_bonus += mount.get("coriace_bonus", 0)
+        else:
+            added = [self._register(weapon) for weapon in weapons]
+        added_names = frozenset({weapon.get("name", "") for weapon in weapons} | {name}) & self._relevant
+        cached = self._options[(index, id(option))] = (
+            name, option.get("cost", 0), added, added_names, tuple(rules), coriace_bonus,
+            option.get("replaces") or [], mount is not None,
+        )
+        return cached
+
+    def _replace(self, weapons: list[WeaponSlot], replaces: list[str], count: int) -> list[WeaponSlot]:
+        if not replaces:
+            return weapons
+        remaining = count
+        kept = []
+        for slot in weapons:
+            if remaining > 0 and self.weapon_registry[slot[0]].get("name") in replaces:
+                if slot[1] > remaining:
+                    kept.append((slot[0], slot[1] - remaining, slot[2]))
+                remaining -= min(slot[1], remaining)
+            else:
+                kept.append(slot)
+        return kept
+
+    def _max_count(self, config: Any, state: _State) -> int:
+        size = self._size()
+        if not isinstance(config, dict):
+            return size
+        kind = config.get("type", "size_based")
+        if kind == "fixed":
+            return max(config.get("value", 1), 0)
+        if kind == "count_in_weapons":
+            name = config.get("weapon_name", "")
+            return sum(count for index, count, _ in state.weapons if self.weapon_registry[index].get("name") == name)
+        return max(min(config.get("value", size), size), 0)
+
+    # ── Totaux ───────────────────────────────────────────────────────────
+    def _combined_variants(self) -> tuple[bool, ...]:
+        return (False, True) if self.unit.get("type") != "hero" and self.unit.get("size", 1) > 1 else (False,)
+
+    def _totals(self, state: _State, combined: bool) -> tuple[int, int, int]:
+        multiplier = 2 if combined else 1
+        cost = (self.unit.get("base_cost", 0) + state.multi) * multiplier + state.unique
+        return cost, self._size() * multiplier, int(self.unit.get("coriace") or 1) + state.coriace
+
+    def _final_weapons(self, state: _State, combined: bool) -> tuple[WeaponSlot, ...]:
+        weapons: dict[tuple[int, bool], int] = {}
+        for index, count, unique in state.weapons:
+            if count > 0:
+                total = count * (2 if combined and not unique else 1)
+                weapons[(index, unique)] = weapons.get((index, unique), 0) + total
+        return tuple(sorted((index, count, unique) for (index, unique), count in weapons.items()))
+
+    def _size(self) -> int:
+        return 1 if self.unit.get("type") == "hero" else int(self.unit.get("size") or 1)
+
+    def _weapon_names(self, state: _State) -> set[str]:
+        return {self.weapon_registry[index].get("name", "") for index, count, _ in state.weapons if count > 0}
+
+    def _register(self, weapon: dict[str, Any]) -> int:
+        index = self._registry_index.get(id(weapon))
+        if index is None:
+            index = self._registry_index[id(weapon)] = len(self.weapon_registry)
+            self.weapon_registry.append(weapon)
+        return index
+
+
+def _merge(states: dict[tuple[Any, ...], _State], child: _State) -> None:
+    key = child.key()
+    if key in states:
+        states[key].ways += child.ways
+    else:
+        states[key] = child
+
+
+def _bounded_counts(bounds: list[tuple[int, int]], budget: int) -> Iterator[tuple[int, ...]]:
+    """Every ``(count per option)`` within its ``(min, max)`` bounds whose sum fits in ``budget``."""
+    if not bounds:
+        yield ()
+        return
+    low, high = bounds[0]
+    rest_minimum = sum(minimum for minimum, _ in bounds[1:])
+    for count in range(low, max(min(high, budget - rest_minimum), low - 1) + 1):
+        for rest in _bounded_counts(bounds[1:], budget - count):
+            yield (count,) + rest
+
+
+def _referenced_names(unit: UnitData) -> set[str]:
+    names: set[str] = set()
+    for group in unit.get("upgrade_groups", []):
+        names.update(group.get("requires", []), group.get("requires_not", []))
+        for option in group.get("options", []):
+            names.update(option.get("requires", []), option.get("requires_not", []))
+    return names
+
+
+class FactionConfigurations:
+    """Configuration spaces of every unit of a faction, built once per catalog version.
+
+    ``issues`` lists the units that could not be enumerated and the
+    options no selection can reach (usually a misspelt ``requires``).
+    """
+
+    def __init__(self, faction_data: FactionData) -> None:
+        if not NUMPY_AVAILABLE:
+            raise ImportError("NumPy est requis pour l'énumération des configurations (pip install numpy).")
+        self.units = {unit.get("name", ""): UnitConfigurationSpace(unit) for unit in faction_data.get("units", [])}
+        self.issues = [issue for space in self.units.values() for issue in configuration_issues(space)]
+
+    def counts(self) -> dict[str, int | None]:
+        """Exact number of legal selections per unit (None when the unit could not be enumerated)."""
+        return {name: None if space.truncated else space.configurations for name, space in self.units.items()}
+
+    def truncated(self) -> list[str]:
+        return [name for name, space in self.units.items() if space.truncated]
+
+    def unreachable(self) -> dict[str, list[tuple[int, str]]]:
+        return {name: space.unreachable for name, space in self.units.items() if space.unreachable}
+
+    def unit_configs(self, unit: UnitData) -> list[UnitConfig]:
+        """Enumerated rows of ``unit``; the unit as printed (and combined) when it is not enumerable."""
+        space = self.units[unit.get("name", "")]
+        return base_configurations(unit) if space.truncated else space.unit_configs()
+
+
+def configuration_issues(space: UnitConfigurationSpace) -> list[str]:
+    name = space.unit.get("name", "")
+    if space.truncated:
+        return [f"{name} : plus de {MAX_STATES_PER_UNIT} configurations partielles, énumération abandonnée"]
+    groups = space.unit.get("upgrade_groups", [])
+    return [
+        f"{name} : {groups[index].get('group', f'groupe {index}')} — option « {option} » jamais sélectionnable"
+        for index, option in space.unreachable
+    ]
+
+
+def main(argv: list[str] | None = None) -> int:
+    from repositories import JsonFactionRepository
+
+    args = list(sys.argv[1:] if argv is None else argv)
+    base_dir = Path(args[0]) if args else Path(__file__).resolve().parent.parent
+    factions_by_game, games = JsonFactionRepository(base_dir).load_catalog()
+    count = 0
+    for game in games:
+        for faction, faction_data in sorted(factions_by_game[game].items()):
+            configurations = FactionConfigurations(faction_data)
+            for name, total in configurations.counts().items():
+                rows = len(configurations.units[name])
+                print(f"{game} / {faction} — {name} : " + (f"{total} configuration(s), {rows} ligne(s)" if total is not None else "non énumérée"))
+            for issue in configurations.issues:
+                print(f"{game} / {faction} — ⚠ {issue}")
+                count += 1
+    print(f"{count} problème(s) dans les configurations d'unités")
+    return 1 if count else 0
+
+
+def _weapon_list(value: Any) -> list[dict[str, Any]]:
+    if isinstance(value, dict):
+        return [value] if value else []
+    if isinstance(value, list):
+        return [weapon for weapon in value if isinstance(weapon, dict)]
+    return []
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,170 @@
+import hashlib
+import importlib.util
+import multiprocessing
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import CancelledError, Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any
+
+from armybuilder.config import PROCESS_START_METHOD
+from armybuilder.exporters import export_faction_html, export_html
+from armybuilder.fingerprints import canonical_bytes
+
+
+EXPORT_KINDS = ("army_html", "faction_html", "faction_pdf")
+# generate_faction_pdf.py est à la racine du dépôt et dépend de reportlab (optionnel).
+PDF_AVAILABLE = importlib.util.find_spec("reportlab") is not None
+DEFAULT_CACHE_SIZE = 64
+
+
+def content_hash(kind: str, *args: Any, **kwargs: Any) -> str:
+    """Stable key of an export: same kind and same inputs give the same key."""
+    return hashlib.sha256(canonical_bytes([kind, args, kwargs])).hexdigest()
+
+
+class ExportJobQueue:
+    """Heavy exports rendered in a process pool, deduplicated and cached by content hash.
+
+    ``submit`` returns immediately with the job key; the Streamlit script
+    polls ``status``/``result`` on later reruns instead of rendering inline,
+    so a long PDF or full-faction sheet never blocks the session and does
+    not hold the GIL shared with other sessions' reruns. Identical requests
+    (same content hash) share one job, and finished results are kept in a
+    small LRU cache. Workers run at a lower priority than the app process;
+    ``workers=0`` renders inline (tests, environments without processes).
+    A pool broken by a dead worker (OOM kill mid-PDF) is replaced on the
+    next submit; failed or cancelled jobs are resubmitted.
+    """
+
+    def __init__(self, workers: int | None = None, cache_size: int = DEFAULT_CACHE_SIZE) -> None:
+        self.workers = max((os.cpu_count() or 2) - 1, 1) if workers is None else workers
+        self.cache_size = cache_size
+        self._lock = threading.Lock()
+        self._pool: ProcessPoolExecutor | None = None
+        self._jobs: OrderedDict[str, Future] = OrderedDict()
+
+    def submit(self, kind: str, *args: Any, key: str | None = None, **kwargs: Any) -> str:
+        """Queue an export (no-op when the same content is queued or cached); ``key`` overrides the hash."""
+        if kind not in EXPORT_KINDS:
+            raise ValueError(f"Export inconnu : {kind} (attendu : {', '.join(EXPORT_KINDS)})")
+        key = key or content_hash(kind, *args, **kwargs)
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None and not (job.done() and _failed(job)):
+                self._jobs.move_to_end(key)
+                return key
+            job = self._submit(kind, args, kwargs) if self.workers else _render_inline(kind, args, kwargs)
+            self._jobs[key] = job
+            self._evict()
+        return key
+
+    def status(self, key: str) -> str:
+        """``"pending"``, ``"done"``, ``"error"`` or ``"unknown"`` (never submitted or evicted)."""
+        job = self._jobs.get(key)
+        if job is None:
+            return "unknown"
+        if not job.done():
+            return "pending"
+        return "error" if _failed(job) else "done"
+
+    def result(self, key: str, timeout: float | None = 0) -> Any:
+        """Rendered export, or None while pending (``timeout`` seconds to wait, None = block)."""
+        job = self._jobs.get(key)
+        if job is None:
+            return None
+        if not job.done() and timeout == 0:
+            return None
+        try:
+            return job.result(timeout=timeout)
+        except (TimeoutError, CancelledError):
+            return None
+
+    def error(self, key: str) -> BaseException | None:
+        job = self._jobs.get(key)
+        if job is None or not job.done():
+            return None
+        return CancelledError("Export annulé") if job.cancelled() else job.exception()
+
+    def shutdown(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def _submit(self, kind: str, args: tuple[Any, ...], kwargs: dict[str, Any]) -> Future:
+        # Pool cassé (worker tué) : on le remplace une fois, puis on rend sur place.
+        for _ in range(2):
+            pool = self._executor()
+            try:
+                return pool.submit(render_export, kind, args, kwargs)
+            except BrokenProcessPool:
+                self._pool = None
+                pool.shutdown(wait=False, cancel_futures=True)
+        return _render_inline(kind, args, kwargs)
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context(PROCESS_START_METHOD),
+                initializer=_lower_priority,
+            )
+        return self._pool
+
+    def _evict(self) -> None:
+        # On ne retire que des travaux terminés : un export en cours reste joignable.
+        for key in list(self._jobs):
+            if len(self._jobs) <= self.cache_size:
+                break
+            if self._jobs[key].done():
+                del self._jobs[key]
+
+
+def _failed(job: Future) -> bool:
+    return job.cancelled() or job.exception() is not None
+
+
+def _render_inline(kind: str, args: tuple[Any, ...], kwargs: dict[str, Any]) -> Future:
+    job: Future = Future()
+    try:
+        job.set_result(render_export(kind, args, kwargs))
+    except Exception as error:
+        job.set_exception(error)
+    return job
+
+
+def render_export(kind: str, args: tuple[Any, ...], kwargs: dict[str, Any]) -> Any:
+    """Worker entry point: HTML exports return ``str``, the PDF returns ``bytes``."""
+    if kind == "army_html":
+        return export_html(*args, **kwargs)
+    if kind == "faction_html":
+        return export_faction_html(*args, **kwargs)
+    if kind == "faction_pdf":
+        return _faction_pdf(*args, **kwargs)
+    raise ValueError(f"Export inconnu : {kind}")
+
+
+def _faction_pdf(data: dict[str, Any]) -> bytes:
+    from generate_faction_pdf import generate_faction_pdf
+
+    handle, path = tempfile.mkstemp(suffix=".pdf")
+    os.close(handle)
+    try:
+        generate_faction_pdf(data, path)
+        with open(path, "rb") as file:
+            return file.read()
+    finally:
+        os.unlink(path)
+
+
+def _lower_priority() -> None:
+    try:
+        os.nice(10)
+    except (AttributeError, OSError):
+        pass
+
+
+EXPORT_JOBS = ExportJobQueue()
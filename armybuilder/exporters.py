@@ -0,0 +1,744 @@
+import base64
+import io
+import urllib.parse
+import zlib
+from datetime import datetime
+
+from armybuilder.config import APP_URL
+from armybuilder.lazy import lazy_import, module_available
+from armybuilder.profiling import profiled, span
+from repositories.json_codec import CODEC
+
+# qrcode (et PIL derrière lui) n'est chargé qu'au premier export de liste.
+QRCODE_AVAILABLE = module_available("qrcode")
+qrcode = lazy_import("qrcode")
+
+
+@profiled("export.export_faction_html")
+def export_faction_html(data):
+    """Génère un HTML complet de la fiche de faction (toutes unités, règles, sorts)."""
+    def esc(t):
+        if t is None: return ""
+        return str(t).replace("&","&amp;").replace("<","&lt;").replace(">","&gt;").replace('"',"&quot;")
+
+    faction = data.get("faction","Faction")
+    game    = data.get("game","")
+    version = data.get("version","")
+    desc    = data.get("description","")
+    history = data.get("history","")
+
+    def fmt_r(r):
+        s = str(r) if r is not None else "-"
+        return s if s in ("Mêlée","-") else f'{s}"'
+
+    def weapon_rows(weapons):
+        if not weapons: return ""
+        bw = weapons if isinstance(weapons, list) else [weapons]
+        rows = ""
+        for w in bw:
+            if not isinstance(w, dict): continue
+            cnt  = w.get("count","")
+            cn   = f"{cnt}x " if cnt and cnt > 1 else ""
+            rng  = fmt_r(w.get("range"))
+            att  = w.get("attacks","-")
+            pa   = w.get("armor_piercing",0) or "-"
+            sr   = ", ".join(w.get("special_rules",[])) or "-"
+            rows += (f"<tr><td class='wn'><b>{esc(cn+w.get('name',''))}</b></td>"
+                     f"<td>{esc(rng)}</td><td>A{att}</td><td>{pa}</td>"
+                     f"<td class='ws'>{esc(sr)}</td></tr>\n")
+        return rows
+
+    def unit_card(u):
+        name   = esc(u["name"])
+        cost   = u.get("base_cost","?")
+        size   = u.get("size",1)
+        qual   = u.get("quality","?")
+        defe   = u.get("defense","?")
+        cor    = u.get("coriace","")
+        sr     = ", ".join(u.get("special_rules",[]))
+        named  = u.get("unit_detail") == "named_hero" or "Unique" in u.get("special_rules",[])
+        star   = "★ " if named else ""
+        cor_s  = f" | Coriace {cor}" if cor else ""
+        html   = f"""<div class='uc'>
+<div class='uh'><span><b>{star}{name} [{size}]</b></span><span class='uc-cost'>{cost} pts</span></div>
+<div class='us'>Qual {qual}+&nbsp;|&nbsp;Déf {defe}+{esc(cor_s)}</div>"""
+        if sr: html += f"<div class='ur'>{esc(sr)}</div>"
+        # Armes de base
+        wr = weapon_rows(u.get("weapon",[]))
+        if wr:
+            html += """<table class='wt'><thead><tr>
+<th>Arme</th><th>Portée</th><th>Att</th><th>PA</th><th>Règles spé.</th>
+</tr></thead><tbody>""" + wr + "</tbody></table>"
+        # Options
+        for g in u.get("upgrade_groups",[]):
+            gtype = g.get("type","")
+            desc_g = esc(g.get("description",""))
+            req   = g.get("requires",[])
+            req_s = f" <i>[{esc(', '.join(req))}]</i>" if req else ""
+            html += f"<div class='og'><b>{desc_g}</b>{req_s}</div>"
+            for o in g.get("options",[]):
+                oname = esc(o.get("name",""))
+                ocost = o.get("cost",0)
+                cost_s = f"+{ocost} pts" if ocost > 0 else "Gratuit"
+                # Pour les montures, lire les SR depuis o["mount"] si présent
+                _mdata = o.get("mount",{})
+                if _mdata and gtype == "mount":
+                    _msr = list(_mdata.get("special_rules",[]))
+                    _mws = _mdata.get("weapon",[])
+                    if isinstance(_mws,dict): _mws=[_mws]
+                    _mw_parts=[]
+                    for _mw in _mws:
+                        if isinstance(_mw,dict) and _mw.get('name'):
+                            _mp=f"{_mw['name']} (A{_mw.get('attacks','?')}"
+                            if _mw.get('armor_piercing'): _mp+=f", PA({_mw['armor_piercing']})"
+                            _msr2=', '.join(_mw.get('special_rules',[]))
+                            if _msr2: _mp+=f", {_msr2}"
+                            _mp+=")"; _mw_parts.append(esc(_mp))
+                    _mcor=_mdata.get('coriace_bonus',0)
+                    _mcor_s=[f"Coriace (+{_mcor})"] if _mcor else []
+                    osr = ", ".join(_mw_parts + _mcor_s + [esc(r) for r in _msr])
+                else:
+                    osr   = ", ".join(o.get("special_rules",[]))
+                ow    = o.get("weapon") if gtype != "mount" else None
+                det   = ""
+                if ow:
+                    ws = ow if isinstance(ow,list) else [ow]
+                    parts = []
+                    for w in ws:
+                        if isinstance(w,dict):
+                            rng = fmt_r(w.get("range"))
+                            att = w.get("attacks","?")
+                            pa  = w.get("armor_piercing",0) or 0
+                            sr2 = ", ".join(w.get("special_rules",[])) or ""
+                            # Ne pas répéter le nom de l'arme si identique à oname
+                            _wname = w.get('name','')
+                            _inner = f"{rng}, A{att}"
+                            if pa: _inner += f", PA({pa})"
+                            if sr2: _inner += f", {sr2}"
+                            p = f"{_wname} ({_inner})" if _wname != o.get('name','') else f"({_inner})"
+                            parts.append(esc(p))
+                    det = ", ".join(parts)
+                elif osr:
+                    det = esc(osr)
+                # det peut déjà contenir des parenthèses (profil arme) ou non (montures/SR)
+                label = oname if not det else (
+                    f"{oname} {det}" if det.startswith("(") else f"{oname} ({det})")
+                html += (f"<div class='ol'>{label}"
+                         f"<span class='oc'>{esc(cost_s)}</span></div>")
+        html += "</div>"
+        return html
+
+    # Groupes d'unités
+    CATS = [
+        ("Héros",                              ["hero"]),
+        ("Unités de base",                    ["unit"]),
+        ("Véhicules légers / Petits monstres", ["light_vehicle"]),
+        ("Véhicules / Monstres",               ["vehicle"]),
+        ("Titans",                             ["titan"]),
+        ("Personnages nommés",                 ["named_hero"]),
+    ]
+
+    # Règles spéciales — catégorisation
+    rules = data.get("faction_special_rules",[])
+    spells = data.get("spells",{})
+
+    # Détecter la règle d'armée (première, ou celle marquée army_rule)
+    army_rules = []
+    aura_rules = []
+    other_rules = []
+    for r in rules:
+        n = r.get("name","").lower()
+        if r.get("army_rule") or (len(rules) > 0 and rules.index(r) == 0 and r.get("army_rule") is not False and "aura" not in n):
+            # Heuristique : première règle non-aura = règle d'armée
+            if not army_rules and "aura" not in n:
+                army_rules.append(r)
+                continue
+        if "aura" in n:
+            aura_rules.append(r)
+        else:
+            other_rules.append(r)
+
+    def rules_section(title, rule_list, color="#1a1a2e"):
+        """Retourne un bloc sous-titre + règles pour insertion dans la zone column-count."""
+        if not rule_list: return ""
+        items = ""
+        for r in rule_list:
+            items += (f"<div class='ri-blk'>"
+                      f"<b>{esc(r.get('name',''))}</b> : {esc(r.get('description',''))}"
+                      f"</div>")
+        return (f"<div class='rs-hdr' style='border-color:{color};color:{color};'>"
+                f"{esc(title)}</div>{items}")
+
+    spells_html = ""
+    if spells:
+        items = ""
+        for sname, sdata in spells.items():
+            sdesc = sdata.get("description",sdata) if isinstance(sdata,dict) else sdata
+            items += f"<div class='ri-blk'><b>{esc(sname)}</b> : {esc(sdesc)}</div>"
+        spells_html = f"<div class='rules-cols spells-section'><div class='rs-hdr spells-hdr' style='color:#fff;border-color:#2c3e7a;'>Sorts</div>{items}</div>"
+
+    units_html = ""
+    for cat_name, types in CATS:
+        cat_units = [u for u in data["units"] if u.get("unit_detail",u.get("type")) in types]
+        if not cat_units: continue
+        cards = "".join(unit_card(u) for u in cat_units)
+        units_html += f"<div class='cat-banner'>{esc(cat_name)}</div><div class='grid'>{cards}</div><div class='page-gap'></div>"
+
+    css = """
+body{font-family:'Segoe UI',Helvetica,sans-serif;margin:0;padding:12px;background:#fff;color:#212529;font-size:11px;}
+.page{max-width:210mm;margin:0 auto;}
+.main-title{background:#1a1a2e;color:#fff;text-align:center;padding:14px 8px 8px;font-size:20px;font-weight:700;letter-spacing:1px;}
+.main-sub{background:#16213e;color:#aab4d4;text-align:center;padding:3px;font-size:9px;}
+.intro{padding:8px 4px;font-size:10px;color:#444;border-bottom:1px solid #dee2e6;margin-bottom:8px;}
+/* Intro 2 colonnes */
+.section-hdr{font-weight:700;font-size:9px;text-transform:uppercase;letter-spacing:.8px;
+  color:#1a1a2e;border-bottom:2px solid #1a1a2e;padding-bottom:3px;margin-bottom:5px;}
+.intro-txt{font-size:8px;color:#333;line-height:1.45;margin:0;}
+/* Règles */
+.rules-wrap{display:grid;grid-template-columns:1fr 1fr 1fr;gap:8px;margin-bottom:8px;}
+/* Zone règles spéciales en 3 colonnes CSS */
+.rules-cols{column-count:3;column-gap:10px;column-rule:1px solid #dee2e6;margin:8px 0 10px;font-size:7.5px;}
+.spells-section{column-count:1;margin-top:6px;border-top:2px solid #2c3e7a;padding-top:4px;}
+.spells-hdr{background:#2c3e7a;padding:2px 6px;font-weight:700;font-size:8px;text-transform:uppercase;letter-spacing:.5px;display:inline-block;width:100%;box-sizing:border-box;margin-bottom:4px;}
+.rs-hdr{font-weight:700;font-size:8px;text-transform:uppercase;letter-spacing:.6px;
+  border-bottom:2px solid currentColor;padding-bottom:2px;margin:8px 0 4px;
+  break-after:avoid;column-span:none;}
+.rs-hdr:first-child{margin-top:0;}
+.ri-blk{break-inside:avoid;margin-bottom:3px;line-height:1.35;}
+/* Récap */
+.recap-wrap{margin-bottom:8px;}
+.recap-banner{background:#2c3e7a;color:#fff;font-weight:700;font-size:9px;padding:3px 6px;margin-top:4px;}
+.recap-table{width:100%;border-collapse:collapse;font-size:8.5px;}
+.recap-table th{background:#eef1f8;padding:2px 4px;border:1px solid #dee2e6;font-weight:700;color:#6c757d;font-size:8px;}
+.recap-table td{padding:2px 4px;border:1px solid #dee2e6;vertical-align:top;}
+.recap-table tr:nth-child(even)td{background:#f8f9fa;}
+/* Catégories et cartes */
+.cat-banner{background:#1a1a2e;color:#fff;font-weight:700;font-size:11px;padding:4px 8px;margin:10px 0 4px;letter-spacing:.5px;}
+.grid{display:grid;grid-template-columns:1fr 1fr;gap:6px;margin-bottom:4px;}
+.uc{border:1px solid #dee2e6;border-radius:3px;overflow:hidden;}
+.uh{background:#eef1f8;display:flex;justify-content:space-between;align-items:center;padding:3px 5px;border-bottom:1px solid #dee2e6;}
+.uh b{font-size:9px;}
+.uc-cost{font-size:8.5px;font-weight:700;color:#c0392b;}
+.us{background:#eef1f8;font-size:7.5px;color:#6c757d;font-weight:700;padding:2px 5px;border-bottom:1px solid #dee2e6;}
+.ur{background:#eef1f8;font-size:7px;padding:2px 5px;border-bottom:1px solid #dee2e6;}
+.wt{width:100%;border-collapse:collapse;font-size:8px;}
+.wt th{background:#eef1f8;padding:1px 3px;border-bottom:1px solid #dee2e6;color:#6c757d;font-size:7px;}
+.wt td{padding:1px 3px;border-bottom:1px solid #dee2e6;vertical-align:top;}
+.wt tr:last-child td{border-bottom:none;}
+.wn{font-size:8px;font-weight:700;}
+.ws{font-size:7px;color:#444;}
+.og{font-size:7.5px;font-weight:700;padding:2px 5px 1px;background:#f8f9fa;border-top:1px solid #dee2e6;margin-top:1px;}
+.ol{font-size:7px;padding:1px 5px 1px 12px;display:flex;justify-content:space-between;border-bottom:1px solid #f0f0f0;}
+.oc{color:#c0392b;font-weight:700;white-space:nowrap;margin-left:4px;}
+@media print{
+  body{margin:0;padding:4px;}
+  .page{max-width:100%;}
+  /* Chaque catégorie commence sur une nouvelle page */
+  .cat-banner{page-break-before:always;break-before:page;}
+  /* Sauf la première bannière (Héros) : elle suit le récap sur la même page */
+  .cat-banner:first-of-type{page-break-before:always;break-before:page;}
+  /* Les cartes d'unités ne se coupent pas */
+  .uc{page-break-inside:avoid;break-inside:avoid;}
+  /* La grille 2 colonnes se coupe entre les cartes uniquement */
+  .grid{page-break-inside:auto;}
+  /* Zone règles + sorts = page 1 complète */
+  .rules-cols,.spells-section,.recap-wrap{page-break-inside:avoid;}
+  /* Éviter les coupures dans les titres */
+  .main-title,.main-sub{page-break-after:avoid;}
+  .page-gap{page-break-after:always;break-after:page;height:0;}
+  /* Ne pas sauter de page après la dernière catégorie */
+  .page-gap:last-child{page-break-after:auto;break-after:auto;}
+}
+"""
+
+    # Tableau récapitulatif
+    def recap_row(u):
+        bw = u.get("weapon",[])
+        if isinstance(bw,dict): bw=[bw]
+        sz = u.get("size",1)
+        eq = []
+        for w in bw:
+            if isinstance(w,dict):
+                cnt = w.get("count","")
+                cs  = f"{cnt}x " if cnt and cnt>1 else (f"{sz}x " if sz>1 else "1x ")
+                rng = fmt_r(w.get("range"))
+                att = w.get("attacks","?")
+                pa  = w.get("armor_piercing",0) or 0
+                sr2 = ", ".join(w.get("special_rules",[])) or ""
+                p   = f"{cs}{w['name']} ({rng}, A{att}"
+                if pa: p += f", PA({pa})"
+                if sr2: p += f", {sr2}"
+                p += ")"
+                eq.append(esc(p))
+        return (f"<tr><td><b>{esc(u['name'])} [{sz}]</b></td>"
+                f"<td>{u.get('quality','?')}</td>"
+                f"<td>{u.get('defense','?')}</td>"
+                f"<td>{' | '.join(eq)}</td>"
+                f"<td>{esc(', '.join(u.get('special_rules',[]))[:80])}</td>"
+                f"<td><b>{u.get('base_cost','?')}</b></td></tr>")
+
+    recap_html = "<div class='recap-wrap'>"
+    for cat_name, types in [("Héros",["hero","named_hero"]),("Unités de base",["unit"]),("Véhicules légers / Monstres / Titans",["light_vehicle","vehicle","titan"])]:
+        cu = [u for u in data["units"] if u.get("unit_detail",u.get("type")) in types]
+        if not cu: continue
+        rows = "".join(recap_row(u) for u in cu)
+        recap_html += (f"<div class='recap-banner'>{esc(cat_name)}</div>"
+                       f"<table class='recap-table'><thead><tr>"
+                       f"<th>Nom [taille]</th><th>Qua</th><th>Déf</th>"
+                       f"<th>Équipement</th><th>Règles spéciales</th><th>Coût</th>"
+                       f"</tr></thead><tbody>{rows}</tbody></table>")
+    recap_html += "</div>"
+
+    intro_block = ""
+    if desc or history:
+        history_html = esc(history).replace(
+            chr(10) + chr(10), "</p><p class='intro-txt'>"
+        )
+        intro_block = f"""<div style="display:grid;grid-template-columns:1fr 1fr;gap:12px;margin:8px 0 10px;">
+  <div>
+    <div class="section-hdr">Introduction</div>
+    <div class="intro-txt">{esc(desc)}</div>
+    <div class="section-hdr" style="margin-top:8px;">Au sujet d'OPR</div>
+    <div class="intro-txt">OPR (www.onepagerules.com) h??berge de nombreux jeux gratuits con??us pour ??tre rapides ?? apprendre et faciles ?? jouer. Ce projet a ??t?? r??alis?? par des joueurs, pour des joueurs, et ne peut exister que gr??ce au g??n??reux soutien de notre formidable communaut?? ! Si vous souhaitez soutenir le d??veloppement de nos jeux, vous pouvez faire un don sur : www.patreon.com/onepagerules. Merci de jouer ?? OPR !</div>
+  </div>
+  <div>
+    <div class="section-hdr">Histoire de la faction</div>
+    <div class="intro-txt">{history_html}</div>
+  </div>
+</div>"""
+
+    return f"""<!DOCTYPE html><html lang="fr"><head><meta charset="utf-8">
+<title>{esc(faction)} ??? {esc(game)}</title>
+<style>{css}</style></head><body><div class="page">
+<div class="main-title">{esc(faction.upper())}</div>
+<div class="main-sub">{esc(game)} ??? v{esc(version)}</div>
+{intro_block}
+<div class='rules-cols'>
+{rules_section("R??gle sp??ciale de l'arm??e", army_rules)}
+{rules_section("R??gles sp??ciales", other_rules, "#2c3e7a")}
+{rules_section("R??gles sp??ciales d'aura", aura_rules, "#555")}
+</div>
+{spells_html}
+{recap_html}
+{units_html}
+</div></body></html>"""
+
+
+@profiled("export.export_json")
+def export_json(game, faction, points, list_name, army_list, army_cost, exported_at=None):
+    """Contenu du téléchargement JSON d'une liste d'armée (relu par l'import)."""
+    return CODEC.dumps({
+        "game": game,
+        "faction": faction,
+        "points": points,
+        "list_name": list_name,
+        "army_list": army_list,
+        "army_cost": army_cost,
+        "exported_at": exported_at or datetime.now().strftime("%Y-%m-%d %H:%M"),
+    })
+
+
+@profiled("export.export_html")
+def export_html(army_list, army_name, army_limit, game="", rules_dict=None, faction_rules=(), faction_spells=None):
+    """Génère le HTML imprimable d'une liste d'armée (avec QR code de partage).
+    rules_dict : {nom de règle: description} pour les infobulles ; faction_rules / faction_spells : page légende."""
+
+    def esc(txt):
+        if txt is None: return ""
+        return str(txt).replace("&","&amp;").replace("<","&lt;").replace(">","&gt;").replace('"',"&quot;")
+
+    def get_priority(unit):
+        d = unit.get("unit_detail", unit.get("type","unit"))
+        order = {"named_hero": 1, "hero": 2, "unit": 3, "light_vehicle": 4, "vehicle": 5, "titan": 6}
+        return order.get(d, 7)
+
+    def fmt_range(rng):
+        if rng in (None, "-", "mêlée", "Mêlée") or str(rng).lower() == "mêlée": return "-"
+        if isinstance(rng, (int, float)): return f'{int(rng)}"'
+        s = str(rng).strip()
+        return s if s.endswith('"') else f'{s}"'
+
+    def collect_weapons(unit):
+        # unit["weapon"] contient DEJA toutes les armes consolidees par la page army
+        result = []
+        bw = unit.get("weapon", [])
+        if isinstance(bw, dict): bw = [bw]
+        _unit_size = unit.get("size", 1)
+        for w in bw:
+            if isinstance(w, dict):
+                wc = w.copy(); wc.setdefault("range", "Mêlée")
+                if not wc.get("_upgraded") and not wc.get("_mount_weapon"):
+                    wc["_is_base"] = True
+                    # _count explicite = décrément partiel (ex: 1 Épée restante sur 3 après remplacement)
+                    # → on le respecte tel quel, on ne le supprime plus.
+                    # Seulement si pas de count du tout → count implicite = unit_size
+                    if "_count" not in wc and "count" not in wc and _unit_size > 1:
+                        wc["_count"] = _unit_size
+                result.append(wc)
+        # Armes de monture
+        if unit.get("mount"):
+            m = unit["mount"]
+            if isinstance(m, dict):
+                md = m.get("mount", {})
+                if isinstance(md, dict):
+                    mws = md.get("weapon", [])
+                    if isinstance(mws, dict): mws = [mws]
+                    for w in mws:
+                        if isinstance(w, dict):
+                            wc = w.copy(); wc.setdefault("range", "Mêlée"); wc["_mount_weapon"] = True; result.append(wc)
+        return result
+
+    def group_weapons(weapons, unit_size=1):
+        # Agrège les armes par profil.
+        # _count ou count → quantité ; sinon 1 par défaut.
+        # Le décrément des armes remplacées (variable_weapon_count) est déjà
+        # géré dans la boucle principale → pas de passe _replaces ici.
+        wmap = {}
+        for w in weapons:
+            if not isinstance(w, dict): continue
+            wc = w.copy(); wc.setdefault("range","Mêlée")
+            key = (wc.get("name",""), wc.get("range",""), wc.get("attacks",""),
+                   wc.get("armor_piercing",""), tuple(sorted(wc.get("special_rules",[]))))
+            cnt = wc.get("_count", wc.get("count", 1)) or 1
+            if key not in wmap:
+                wmap[key] = wc; wmap[key]["_display_count"] = cnt
+            else:
+                wmap[key]["_display_count"] += cnt
+        return [v for v in wmap.values() if v.get("_display_count", 1) > 0]
+
+    def get_rules(unit):
+        rules = set()
+        for r in unit.get("special_rules", []):
+            if isinstance(r, str): rules.add(r)
+        if "options" in unit and isinstance(unit["options"], dict):
+            for group in unit["options"].values():
+                opts = group if isinstance(group, list) else [group]
+                for opt in opts:
+                    if isinstance(opt, dict):
+                        for r in opt.get("special_rules", []):
+                            if isinstance(r, str): rules.add(r)
+        if unit.get("mount"):
+            m = unit["mount"]
+            if isinstance(m, dict):
+                md = m.get("mount", {})
+                if isinstance(md, dict):
+                    for r in md.get("special_rules", []):
+                        if isinstance(r, str) and not r.startswith(("Griffes","Sabots")): rules.add(r)
+        return sorted(rules)
+
+    def render_weapon_rows(final_weapons, unit_size=1):
+        rows = ""
+        for w in final_weapons:
+            name     = esc(w.get("name","Arme"))
+            cnt      = w.get("_display_count", 1) or 1
+            is_base  = w.get("_is_base", False)
+            upgraded = w.get("_upgraded", False)
+            is_mount = w.get("_mount_weapon", False)
+
+            if cnt > 1:
+                nd = f"{cnt}x {name}"
+            elif cnt == 1:
+                if is_mount:
+                    nd = name
+                elif unit_size > 1:
+                    nd = f"1x {name}"
+                elif upgraded:
+                    nd = f"1x {name}"
+                else:
+                    nd = name
+            else:
+                nd = name
+
+            rng = fmt_range(w.get("range","Mêlée"))
+            att = w.get("attacks","-"); ap = w.get("armor_piercing","-")
+            spe = ", ".join(w.get("special_rules",[])) or "-"
+            rows += f"<tr><td class='weapon-name'>{nd}</td><td>{rng}</td><td>{att}</td><td>{ap}</td><td>{spe}</td></tr>"
+        return rows
+
+    def render_upgrade_rows(unit):
+        return ""   # remplacé par render_upgrades_section
+
+    def render_upgrades_section(unit):
+        """Bloc Améliorations sous les règles spéciales."""
+        upgrades = []
+        if "options" in unit and isinstance(unit["options"], dict):
+            for group_opts in unit["options"].values():
+                opts = group_opts if isinstance(group_opts, list) else [group_opts]
+                for opt in opts:
+                    if not isinstance(opt, dict): continue
+                    rules = ", ".join(opt.get("special_rules", []))
+                    upgrades.append((opt.get("name","Amélioration"), rules))
+        if not upgrades: return ""
+        items = ""
+        for n, r in upgrades:
+            items += f'<span class="rule-tag" style="background:#e8f4fd;border-color:#b8d9f0;">{esc(n)}'
+            if r: items += f' <span style="font-weight:400;color:#555;">({esc(r)})</span>'
+            items += '</span>'
+        return (
+            '<div style="border-top:1px solid var(--brd);margin-top:8px;padding-top:8px;">'
+            '<div class="rules-title">Améliorations</div>'
+            f'<div style="margin-bottom:4px;">{items}</div>'
+            '</div>'
+        )
+
+    def render_mount_section(unit):
+        if not unit.get("mount"): return ""
+        mount = unit["mount"]
+        if not isinstance(mount, dict) or "mount" not in mount: return ""
+        md = mount["mount"]; mname = esc(mount.get("name","Monture")); mcost = mount.get("cost",0)
+        mws = md.get("weapon",[]); 
+        if isinstance(mws, dict): mws = [mws]
+        wrows = ""
+        for w in mws:
+            if not isinstance(w, dict): continue
+            spe = ", ".join(w.get("special_rules",[])) or "-"
+            wrows += f"<tr><td class='weapon-name'>{esc(w.get('name','Arme'))}</td><td>{fmt_range(w.get('range','-'))}</td><td>{w.get('attacks','-')}</td><td>{w.get('armor_piercing','-')}</td><td>{spe}</td></tr>"
+        mrules = [r for r in md.get("special_rules",[]) if not r.startswith(("Griffes","Sabots","Coriace"))]
+        rhtml = " ".join(f'<span class="rule-tag">{esc(r)}</span>' for r in mrules) if mrules else ""
+        return f"""<div class="mount-section"><div class="section-title">🐴 {mname} (+{mcost} pts)</div>
+{('<div style="margin-bottom:8px;">' + rhtml + '</div>') if rhtml else ""}
+<table class="weapon-table"><thead><tr><th>Arme</th><th>Por</th><th>Att</th><th>PA</th><th>Spé</th></tr></thead><tbody>{wrows}</tbody></table></div>"""
+
+    # Dictionnaire nom → description pour les tooltips (génériques + faction)
+    # Utilise le champ "key" pour le matching VF
+    _rules_dict = dict(rules_dict or {})
+
+    sorted_units = sorted(army_list, key=get_priority)
+    total_cost = sum(u.get("cost",0) for u in sorted_units)
+
+    html = f"""<!DOCTYPE html><html lang="fr"><head><meta charset="utf-8">
+<title>Liste d'Armée OPR - {esc(army_name)}</title>
+<link href="https://fonts.googleapis.com/css2?family=Inter:wght@400;500;600;700&display=swap" rel="stylesheet">
+<style>
+:root{{--bg:#fff;--hdr:#f8f9fa;--accent:#3498db;--txt:#212529;--muted:#6c757d;--brd:#dee2e6;--red:#e74c3c;--rule:#e9ecef;--mount:#f3e5f5;--badge:#e9ecef;}}
+*{{box-sizing:border-box;}}
+body{{background:var(--bg);color:var(--txt);font-family:'Inter',sans-serif;margin:0;padding:12px;line-height:1.3;font-size:12px;}}
+.army{{max-width:210mm;margin:0 auto;}}
+
+/* ── Titre & résumé ── */
+.army-title{{text-align:center;font-size:18px;font-weight:700;margin-bottom:8px;border-bottom:2px solid var(--accent);padding-bottom:6px;}}
+.army-summary{{display:flex;justify-content:space-between;align-items:center;background:var(--hdr);padding:8px 12px;border-radius:6px;margin:8px 0 12px;border:1px solid var(--brd);font-size:12px;}}
+.summary-cost{{font-family:monospace;font-size:16px;font-weight:bold;color:var(--red);}}
+
+/* ── Grille 2 colonnes ── */
+.units-grid{{display:grid;grid-template-columns:1fr 1fr;gap:8px;}}
+
+/* ── Carte unité ── */
+.unit-card{{background:var(--bg);border:1px solid var(--brd);border-radius:6px;break-inside:avoid;page-break-inside:avoid;font-size:11px;}}
+.unit-header{{padding:6px 8px 4px;background:var(--hdr);border-bottom:1px solid var(--brd);border-radius:6px 6px 0 0;}}
+.unit-name-container{{display:flex;justify-content:space-between;align-items:flex-start;}}
+.unit-name{{font-size:13px;font-weight:700;margin:0;line-height:1.2;}}
+.unit-cost{{font-family:monospace;font-size:12px;font-weight:700;color:var(--red);white-space:nowrap;margin-left:6px;}}
+.unit-type{{font-size:10px;color:var(--muted);margin-top:1px;}}
+.unit-stats{{display:flex;gap:6px;padding:4px 0 2px;flex-wrap:wrap;}}
+.stat-badge{{background:var(--badge);padding:2px 7px;border-radius:12px;font-weight:600;display:flex;align-items:center;gap:4px;border:1px solid var(--brd);}}
+.stat-value{{font-weight:700;font-size:11px;}}
+.stat-label{{font-size:9px;color:var(--muted);}}
+.section{{padding:4px 8px 6px;}}
+.section-title{{font-weight:600;margin:4px 0 3px;font-size:11px;display:flex;align-items:center;gap:5px;border-bottom:1px solid var(--brd);padding-bottom:2px;color:var(--accent);}}
+.weapon-table{{width:100%;border-collapse:collapse;margin:0 0 4px;font-size:10px;}}
+.weapon-table th{{background:var(--hdr);padding:2px 5px;text-align:left;font-weight:600;border-bottom:1px solid var(--brd);border-right:1px solid var(--brd);font-size:9px;color:var(--muted);}}
+.weapon-table th:last-child{{border-right:none;}}
+.weapon-table td{{padding:2px 5px;border-bottom:1px solid var(--brd);border-right:1px solid var(--brd);vertical-align:top;line-height:1.3;}}
+.weapon-table td:last-child{{border-right:none;}} .weapon-table tr:last-child td{{border-bottom:none;}}
+.weapon-name{{font-weight:600;}}
+.rules-section{{margin:3px 0 0;}}
+.rules-title{{font-weight:600;margin-bottom:3px;font-size:10px;color:var(--muted);text-transform:uppercase;letter-spacing:.03em;}}
+.rule-tag{{background:var(--rule);padding:1px 6px;border-radius:3px;font-size:9px;border:1px solid var(--brd);margin-right:3px;margin-bottom:3px;display:inline-block;line-height:1.5;cursor:pointer;}}#opr-tooltip{{display:none;position:fixed;top:50%;left:50%;transform:translate(-50%,-50%);background:#222;color:#fff;padding:12px 16px;border-radius:8px;font-size:11px;line-height:1.6;max-width:300px;white-space:pre-wrap;z-index:9999;text-align:left;box-shadow:0 4px 24px rgba(0,0,0,.5);}}#opr-overlay{{display:none;position:fixed;inset:0;z-index:9998;background:rgba(0,0,0,.2);cursor:pointer;}}
+.mount-section{{background:var(--mount);border:1px solid var(--brd);border-radius:4px;padding:4px 8px;margin:4px 0;font-size:10px;}}
+.mount-section .section-title{{font-size:10px;}}
+
+/* ── Page de légende (règles + sorts) ── */
+.legend-page{{page-break-before:always;break-before:page;padding:12px 0;}}
+.faction-rules{{padding:8px;border-radius:6px;border:1px solid var(--brd);}}
+.legend-title{{text-align:center;color:var(--accent);border-bottom:2px solid var(--accent);padding-bottom:6px;margin-bottom:12px;font-size:14px;font-weight:700;}}
+.rule-item{{margin-bottom:4px;padding-bottom:4px;border-bottom:1px solid var(--brd);}}
+.rule-item:last-child{{border-bottom:none;margin-bottom:0;padding-bottom:0;}}
+.rule-name{{color:var(--accent);font-weight:600;font-size:8px;margin-bottom:1px;}}
+.rule-desc{{font-size:7.5px;line-height:1.28;color:#555;}}
+
+@media print{{
+  body{{padding:6px;}}
+  .army{{max-width:100%;}}
+  .unit-card{{border:0.5px solid #ccc;box-shadow:none;background:white;}}
+  .faction-rules{{border:0.5px solid #ccc;}}
+  .legend-page{{page-break-before:always;}}
+}}
+</style></head><body><div class="army">
+<div class="army-title">{esc(army_name)} — {total_cost}/{army_limit} pts</div>
+<div class="army-summary">
+  <div><span style="color:var(--muted);">Unités :</span> <strong>{len(sorted_units)}</strong></div>
+  <div class="summary-cost">{total_cost}/{army_limit} pts</div>
+</div>
+<div class="units-grid">
+"""
+
+    for unit in sorted_units:
+        if not isinstance(unit, dict): continue
+        name = esc(unit.get("name","Unité")); cost = unit.get("cost",0)
+        quality = esc(unit.get("quality","-")); defense = esc(unit.get("defense","-"))
+        size = unit.get("size",10); coriace = unit.get("coriace",0)
+
+        rules = get_rules(unit)
+        def _get_rule_desc(r, rd):
+            d = rd.get(r, "")
+            if not d:  # matching partiel pour Coriace (9) → Coriace
+                for k, v in rd.items():
+                    if r.startswith(k + " ") or r.startswith(k + "("):
+                        return v
+            return d
+        def _safe_tip(txt):
+            """Encode la description pour data-tip."""
+            return txt.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;").replace('"', "&#34;").replace("'", "&#39;")
+        def _rule_tag(r):
+            desc = _get_rule_desc(r, _rules_dict)
+            if desc:
+                return (f'<span class="rule-tag" data-tip="{_safe_tip(desc)}"'
+                        f' onclick="showTip(this)">{esc(r)}</span>')
+            return f'<span class="rule-tag">{esc(r)}</span>'
+        rules_html = " ".join(_rule_tag(r) for r in rules) if rules else '<span class="rule-tag">Aucune</span>'
+
+        weapons = collect_weapons(unit)
+        final_weapons = group_weapons(weapons, unit_size=size)
+        weapon_rows = render_weapon_rows(final_weapons, unit_size=size)
+        upgrade_rows     = render_upgrade_rows(unit)
+        upgrades_section = render_upgrades_section(unit)
+        mount_section    = render_mount_section(unit)
+
+        detail_labels = {
+            "named_hero":    "Héros nommé",
+            "hero":          "Héros",
+            "unit":          "Unité de base",
+            "light_vehicle": "Véhicule léger / Petit monstre",
+            "vehicle":       "Véhicule / Monstre",
+            "titan":         "Titan",
+        }
+        detail_label = detail_labels.get(unit.get("unit_detail", unit.get("type","unit")), "")
+
+        html += f"""<div class="unit-card">
+  <div class="unit-header">
+    <div class="unit-name-container">
+      <div class="unit-name">{name}{'<div class="unit-type">' + detail_label + '</div>' if detail_label else ''}</div>
+      <div class="unit-cost">{cost} pts</div>
+    </div>
+    <div class="unit-stats">
+      <div class="stat-badge"><span class="stat-label">QUAL</span><span class="stat-value">{quality}+</span></div>
+      <div class="stat-badge"><span class="stat-label">DÉF</span><span class="stat-value">{defense}+</span></div>
+      {'<div class="stat-badge"><span class="stat-label">CORIACE</span><span class="stat-value">' + str(coriace) + '</span></div>' if coriace > 0 else ''}
+      <div class="stat-badge"><span class="stat-label">TAILLE</span><span class="stat-value">{size}</span></div>
+    </div>
+  </div>
+  <div class="section">
+    <div class="rules-section">
+      <div class="rules-title">Règles spéciales</div>
+      <div style="margin-bottom:4px;">{rules_html}</div>
+      {upgrades_section}
+    </div>
+    <div class="section-title">⚔️ Armes</div>
+    <table class="weapon-table">
+      <thead><tr><th>Arme</th><th>Por</th><th>Att</th><th>PA</th><th>Spé</th></tr></thead>
+      <tbody>{weapon_rows}</tbody>
+    </table>
+    {mount_section}
+  </div>
+</div>"""
+
+    html += "</div>\n"  # ferme .units-grid
+
+    try:
+        faction_spells = faction_spells or {}
+        all_rules = [r for r in faction_rules if isinstance(r, dict)]
+        if all_rules or faction_spells:
+            # ── Page légende : règles + sorts en colonnes CSS auto-ajustées ──
+            # columns: auto répartit le contenu sur plusieurs colonnes en remplissant
+            # chaque colonne avant d'en créer une nouvelle → s'adapte à n'importe quel volume.
+            html += """<div class="legend-page"><div class="faction-rules">"""
+            html += """<div class="legend-title">📜 Règles spéciales &amp; Sorts</div>"""
+            html += """<div style="columns:3;column-gap:12px;column-rule:1px solid #dee2e6;font-size:9px;">"""
+
+            if all_rules:
+                if faction_spells:
+                    html += """<div style="break-after:column;"></div>""" if False else ""
+                for rule in sorted(all_rules, key=lambda x: x.get("name","").lower()):
+                    html += (
+                        f'<div class="rule-item" style="break-inside:avoid;">'
+                        f'<div class="rule-name">{esc(rule.get("name",""))}</div>'
+                        f'<div class="rule-desc">{esc(rule.get("description",""))}</div>'
+                        f'</div>'
+                    )
+
+            if faction_spells:
+                if all_rules:
+                    html += '<div class="rule-item" style="break-inside:avoid;border-bottom:2px solid var(--accent);margin-bottom:8px;"><div style="font-size:10px;font-weight:700;color:var(--accent);">✨ Sorts</div></div>'
+                for spell_name, spell_data in faction_spells.items():
+                    if isinstance(spell_data, dict):
+                        desc = spell_data.get("description","")
+                    else:
+                        desc = str(spell_data)
+                    html += (
+                        f'<div class="rule-item" style="break-inside:avoid;">'
+                        f'<div class="rule-name">{esc(spell_name)}</div>'
+                        f'<div class="rule-desc">{esc(desc)}</div>'
+                        f'</div>'
+                    )
+
+            html += "</div></div></div>"  # ferme columns + faction-rules + legend-page
+    except Exception as e:
+        html += f'<div style="color:red;padding:10px;">Erreur règles faction : {esc(str(e))}</div>'
+
+    # QR code : URL vers l'app avec la liste encodée (compressée + base64)
+    # Le téléphone ouvre directement l'app au scan
+    _list_data = CODEC.dumps({
+        "game": game,
+        "faction": army_name, "pts": army_limit,
+        "list_name": army_name,
+        "army_list": army_list,
+        "army_cost": sum(u.get("cost",0) for u in army_list),
+        "units": [{"n": u.get("name",""), "c": u.get("cost",0)} for u in army_list]
+    })
+    _compressed = zlib.compress(_list_data.encode(), level=9)
+    _b64_data = base64.urlsafe_b64encode(_compressed).decode()
+    _payload = APP_URL + "?list=" + urllib.parse.quote(_b64_data)
+    with span("export.qr_code"):
+        _qr_img_tag = qr_img_tag(_payload)
+
+    html += (
+        '<div style="text-align:center;margin-top:28px;padding:16px 0;border-top:1px solid var(--brd);">'
+        '<div style="font-size:10px;color:var(--muted);margin-bottom:8px;letter-spacing:.06em;text-transform:uppercase;">Scanner pour partager</div>'
+        + _qr_img_tag +
+        '</div>'
+    )
+    html += '''<div id="opr-overlay" onclick="hideTip()"></div>
+<div id="opr-tooltip"></div>
+<script>
+function showTip(el){
+  var tip=document.getElementById("opr-tooltip");
+  var ov=document.getElementById("opr-overlay");
+  tip.textContent=el.getAttribute("data-tip");
+  tip.style.display="block";
+  ov.style.display="block";
+}
+function hideTip(){
+  document.getElementById("opr-tooltip").style.display="none";
+  document.getElementById("opr-overlay").style.display="none";
+}
+</script>'''
+    html += f'<div style="text-align:center;margin-top:16px;font-size:11px;color:var(--muted);">Généré par OPR ArmyBuilder FRA — {datetime.now().strftime("%d/%m/%Y %H:%M")}</div></div></body></html>'
+    return html
+
+
+def qr_img_tag(payload):
+    """Balise <img> du QR code : PNG base64 inline si qrcode[pil] est installé (hors ligne),
+    sinon URL api.qrserver.com (requiert internet à l'ouverture du HTML)."""
+    style = "width:96px;height:96px;display:block;margin:0 auto;border:1px solid var(--brd);border-radius:4px;"
+    if QRCODE_AVAILABLE:
+        try:
+            qr = qrcode.QRCode(version=None, error_correction=qrcode.constants.ERROR_CORRECT_M, box_size=4, border=2)
+            qr.add_data(payload); qr.make(fit=True)
+            img = qr.make_image(fill_color="black", back_color="white")
+            buf = io.BytesIO(); img.save(buf, format="PNG")
+            return f'<img src="data:image/png;base64,{base64.b64encode(buf.getvalue()).decode()}" style="{style}" alt="QR code">'
+        except Exception:
+            pass
+    qr_url = "https://api.qrserver.com/v1/create-qr-code/?data=" + urllib.parse.quote(payload) + "&size=96x96&margin=2"
+    return f'<img src="{qr_url}" style="{style}" alt="QR code">'
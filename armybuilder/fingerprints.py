@@ -0,0 +1,77 @@
+import hashlib
+import json
+from collections.abc import Iterable
+from typing import Any
+
+
+ArmyUnit = dict[str, Any]
+
+# Préfixes distincts : une empreinte d'unité ne peut pas valoir celle d'une liste.
+_UNIT_PREFIX = b"armybuilder.unit.v1\x00"
+_LIST_PREFIX = b"armybuilder.list.v1\x00"
+
+
+def canonical_bytes(value: Any) -> bytes:
+    """Canonical JSON of ``value``: sorted keys, no whitespace, UTF-8.
+
+    Always the stdlib encoder, whatever the codec backend, so a fingerprint
+    never changes with the installed JSON engine. List order is kept: it is
+    meaningful (weapons, rules) and must be deterministic at the source.
+    """
+    return json.dumps(value, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+
+
+def unit_fingerprint(unit: ArmyUnit) -> bytes:
+    """SHA-256 digest of one army unit's content."""
+    return hashlib.sha256(_UNIT_PREFIX + canonical_bytes(unit)).digest()
+
+
+def combine_fingerprints(digests: Iterable[bytes]) -> str:
+    """Root of a list from its units' digests, in order (hex).
+
+    Only the 32-byte digests are hashed again, so the root of a list whose
+    units are already fingerprinted costs a few microseconds; the layout
+    of the list's storage (snapshot chunks) does not enter the result.
+    """
+    digests = list(digests)
+    root = hashlib.sha256(_LIST_PREFIX + len(digests).to_bytes(8, "big"))
+    for digest in digests:
+        root.update(digest)
+    return root.hexdigest()
+
+
+def army_fingerprint(army_list: Iterable[ArmyUnit]) -> str:
+    """Stable key of an army list's content (every unit hashed; see ``FingerprintCache``)."""
+    return combine_fingerprints(unit_fingerprint(unit) for unit in army_list)
+
+
+class FingerprintCache:
+    """Digest of each unit of an army list, keyed by identity.
+
+    Army units are read-only once added (see ``ArmySnapshot``), so a unit is
+    hashed once, when it enters the list; a duplicate shares its dict, hence
+    its digest, and an edit only hashes the unit it adds. Each entry keeps
+    its unit alive so the id cannot be reused while the entry exists.
+    """
+
+    def __init__(self) -> None:
+        self._entries: dict[int, tuple[ArmyUnit, bytes]] = {}
+        self.hashed = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def unit(self, unit: ArmyUnit) -> bytes:
+        entry = self._entries.get(id(unit))
+        if entry is None or entry[0] is not unit:
+            entry = self._entries[id(unit)] = (unit, unit_fingerprint(unit))
+            self.hashed += 1
+        return entry[1]
+
+    def army(self, army_list: list[ArmyUnit]) -> str:
+        """Fingerprint of ``army_list``; units that left the list are forgotten."""
+        digests = [self.unit(unit) for unit in army_list]
+        alive = {id(unit) for unit in army_list}
+        if len(self._entries) > len(alive):
+            self._entries = {key: entry for key, entry in self._entries.items() if key in alive}
+        return combine_fingerprints(digests)
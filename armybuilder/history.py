@@ -0,0 +1,179 @@
+from collections.abc import Iterable, Iterator
+from typing import Any
+
+
+ArmyUnit = dict[str, Any]
+
+
+class ArmySnapshot:
+    """Immutable army list stored as shared fixed-size chunks.
+
+    An edit rebuilds only the chunk it touches plus the (short) chunk spine;
+    every other chunk, and every unit dict, is shared with the previous
+    snapshot. Units must therefore be treated as read-only once added.
+    """
+
+    CHUNK_SIZE = 32
+
+    __slots__ = ("_chunks", "_chunk_costs", "_length")
+
+    def __init__(
+        self,
+        chunks: tuple[tuple[ArmyUnit, ...], ...] = (),
+        chunk_costs: tuple[int, ...] = (),
+    ) -> None:
+        self._chunks = chunks
+        self._chunk_costs = chunk_costs
+        self._length = sum(len(chunk) for chunk in chunks)
+
+    @classmethod
+    def from_units(cls, units: Iterable[ArmyUnit]) -> "ArmySnapshot":
+        units = tuple(units)
+        size = cls.CHUNK_SIZE
+        chunks = tuple(units[start:start + size] for start in range(0, len(units), size))
+        return cls(chunks, tuple(_chunk_cost(chunk) for chunk in chunks))
+
+    @property
+    def cost(self) -> int:
+        return sum(self._chunk_costs)
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __iter__(self) -> Iterator[ArmyUnit]:
+        for chunk in self._chunks:
+            yield from chunk
+
+    def __getitem__(self, index: int) -> ArmyUnit:
+        chunk_index, offset = self._locate(index)
+        return self._chunks[chunk_index][offset]
+
+    def to_list(self) -> list[ArmyUnit]:
+        return list(self)
+
+    def append(self, unit: ArmyUnit) -> "ArmySnapshot":
+        return self.insert(self._length, unit)
+
+    def insert(self, index: int, unit: ArmyUnit) -> "ArmySnapshot":
+        if not self._chunks:
+            return ArmySnapshot(((unit,),), (_unit_cost(unit),))
+
+        index = max(0, min(index, self._length))
+        if index == self._length:
+            chunk_index, offset = len(self._chunks) - 1, len(self._chunks[-1])
+        else:
+            chunk_index, offset = self._locate(index)
+
+        chunk = self._chunks[chunk_index]
+        new_chunk = chunk[:offset] + (unit,) + chunk[offset:]
+        if len(new_chunk) > 2 * self.CHUNK_SIZE:
+            middle = len(new_chunk) // 2
+            replacement = (new_chunk[:middle], new_chunk[middle:])
+        else:
+            replacement = (new_chunk,)
+        return self._replace_chunk(chunk_index, replacement)
+
+    def remove(self, index: int) -> "ArmySnapshot":
+        chunk_index, offset = self._locate(index)
+        chunk = self._chunks[chunk_index]
+        new_chunk = chunk[:offset] + chunk[offset + 1:]
+        return self._replace_chunk(chunk_index, (new_chunk,) if new_chunk else ())
+
+    def _replace_chunk(
+        self, chunk_index: int, replacement: tuple[tuple[ArmyUnit, ...], ...]
+    ) -> "ArmySnapshot":
+        chunks = self._chunks[:chunk_index] + replacement + self._chunks[chunk_index + 1:]
+        costs = (
+            self._chunk_costs[:chunk_index]
+            + tuple(_chunk_cost(chunk) for chunk in replacement)
+            + self._chunk_costs[chunk_index + 1:]
+        )
+        return ArmySnapshot(chunks, costs)
+
+    def _locate(self, index: int) -> tuple[int, int]:
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("Index d'unité hors de la liste d'armée.")
+        for chunk_index, chunk in enumerate(self._chunks):
+            if index < len(chunk):
+                return chunk_index, index
+            index -= len(chunk)
+        raise IndexError("Index d'unité hors de la liste d'armée.")
+
+
+class ArmyEditLog:
+    """Undo/redo history of army snapshots."""
+
+    def __init__(self, units: Iterable[ArmyUnit] = (), max_history: int = 100) -> None:
+        self.max_history = max_history
+        self._entries: list[tuple[str, ArmySnapshot]] = [("", ArmySnapshot.from_units(units))]
+        self._position = 0
+
+    @property
+    def current(self) -> ArmySnapshot:
+        return self._entries[self._position][1]
+
+    @property
+    def can_undo(self) -> bool:
+        return self._position > 0
+
+    @property
+    def can_redo(self) -> bool:
+        return self._position < len(self._entries) - 1
+
+    @property
+    def undo_label(self) -> str:
+        return self._entries[self._position][0] if self.can_undo else ""
+
+    @property
+    def redo_label(self) -> str:
+        return self._entries[self._position + 1][0] if self.can_redo else ""
+
+    def add(self, unit: ArmyUnit) -> ArmySnapshot:
+        return self._commit(f"Ajout de {unit.get('name', 'unité')}", self.current.append(unit))
+
+    def add_many(self, units: list[ArmyUnit], label: str) -> ArmySnapshot:
+        snapshot = self.current
+        for unit in units:
+            snapshot = snapshot.append(unit)
+        return self._commit(label, snapshot)
+
+    def remove(self, index: int) -> ArmySnapshot:
+        name = self.current[index].get("name", "unité")
+        return self._commit(f"Suppression de {name}", self.current.remove(index))
+
+    def duplicate(self, index: int) -> ArmySnapshot:
+        unit = self.current[index]
+        return self._commit(
+            f"Duplication de {unit.get('name', 'unité')}", self.current.insert(index + 1, unit)
+        )
+
+    def undo(self) -> bool:
+        if not self.can_undo:
+            return False
+        self._position -= 1
+        return True
+
+    def redo(self) -> bool:
+        if not self.can_redo:
+            return False
+        self._position += 1
+        return True
+
+    def _commit(self, label: str, snapshot: ArmySnapshot) -> ArmySnapshot:
+        del self._entries[self._position + 1:]
+        self._entries.append((label, snapshot))
+        overflow = len(self._entries) - (self.max_history + 1)
+        if overflow > 0:
+            del self._entries[:overflow]
+        self._position = len(self._entries) - 1
+        return snapshot
+
+
+def _unit_cost(unit: ArmyUnit) -> int:
+    return unit.get("cost", 0) if isinstance(unit, dict) else 0
+
+
+def _chunk_cost(chunk: tuple[ArmyUnit, ...]) -> int:
+    return sum(_unit_cost(unit) for unit in chunk)
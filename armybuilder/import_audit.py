@@ -0,0 +1,46 @@
+import re
+import subprocess
+import sys
+from typing import Any
+
+
+_IMPORT_TIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+DEFAULT_MODULES = ("armybuilder", "armybuilder.export_jobs")
+
+
+def audit_imports(modules: list[str], limit: int = 25) -> list[dict[str, Any]]:
+    """Per-module import cost of ``modules`` in a fresh interpreter (``python -X importtime``).
+
+    Returns the ``limit`` most expensive modules by cumulative time, in
+    microseconds, with their nesting depth in the import tree.
+    """
+    code = "; ".join(f"import {module}" for module in modules)
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else "import impossible")
+    rows = []
+    for line in completed.stderr.splitlines():
+        match = _IMPORT_TIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            rows.append({"module": module, "self_us": int(self_us), "cumulative_us": int(cumulative_us), "depth": len(indent) // 2})
+    return sorted(rows, key=lambda row: row["cumulative_us"], reverse=True)[:limit]
+
+
+def main(argv: list[str] | None = None) -> int:
+    """``python -m armybuilder.import_audit [module ...]``: print the import-cost audit."""
+    modules = (argv if argv is not None else sys.argv[1:]) or list(DEFAULT_MODULES)
+    rows = audit_imports(modules)
+    print(f"{'cumulé (ms)':>12}{'propre (ms)':>12}  module")
+    for row in rows:
+        print(f"{row['cumulative_us'] / 1000:>12.1f}{row['self_us'] / 1000:>12.1f}  {'  ' * row['depth']}{row['module']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,214 @@
+from typing import Any
+
+
+FactionData = dict[str, Any]
+# Types de groupes dont les options sont affichées par un radio à libellés précalculés.
+LABELLED_GROUP_TYPES = ("weapon", "conditional_weapon", "role", "mobility", "mount")
+
+
+def format_unit_option(u):
+    name_part = u["name"] + (" [1]" if u.get("type") == "hero" else f" [{u.get('size', 10)}]")
+    return f"{name_part} | Qual {u.get('quality','?')}+ | Déf {u.get('defense','?')}+ | {u.get('base_cost',0)} pts"
+
+
+def weapon_profile_md(weapon):
+    """Retourne une ligne de profil lisible pour l'UI : Mêlée | A2 | PA1 | Règles"""
+    if not weapon or not isinstance(weapon, dict): return ""
+    rng = weapon.get("range", "Mêlée")
+    if rng in (None, "-", "mêlée", "Mêlée") or str(rng).lower() == "mêlée":
+        rng_str = "Mêlée"
+    elif isinstance(rng, (int, float)):
+        rng_str = f'{int(rng)}"'
+    else:
+        s = str(rng).strip(); rng_str = s if s.endswith('"') else f'{s}"'
+    att = weapon.get("attacks", "?")
+    ap  = weapon.get("armor_piercing", "?")
+    sr  = weapon.get("special_rules", [])
+    parts = [f"{rng_str} | A{att} | PA{ap}"]
+    if sr: parts.append(", ".join(sr))
+    return " | ".join(parts)
+
+
+def format_weapon_option(weapon, cost=0):
+    if not weapon or not isinstance(weapon, dict): return "Aucune arme"
+    rng = weapon.get("range","Mêlée")
+    if rng in (None,"-","mêlée","Mêlée") or str(rng).lower()=="mêlée": rng_str="Mêlée"
+    elif isinstance(rng,(int,float)): rng_str=f'{int(rng)}"'
+    else: s=str(rng).strip(); rng_str=s if s.endswith('"') else f'{s}"'
+    sr = weapon.get("special_rules",[])
+    profile_inner = f"{rng_str}/A{weapon.get('attacks','?')}/PA{weapon.get('armor_piercing','?')}"
+    if sr: profile_inner += f", {', '.join(sr)}"
+    profile = f"{weapon.get('name','Arme')} ({profile_inner})"
+    if cost > 0: profile += f" (+{cost} pts)"
+    return profile
+
+
+def format_mobility_option(opt):
+    """Formate une option de mobilité GDF (données à la racine de l'option)."""
+    if not opt or not isinstance(opt, dict): return "Aucune option"
+    name = opt.get("name", "Option")
+    cost = opt.get("cost", 0)
+    sr = [s for s in opt.get("special_rules", []) if "Coriace" not in s]
+    coriace = opt.get("coriace_bonus", 0)
+    stats = []
+    if coriace > 0: stats.append(f"Coriace+{coriace}")
+    w = opt.get("weapon")
+    if w and isinstance(w, dict):
+        stats.append(f"{w.get('name','Arme')} A{w.get('attacks','?')}/PA{w.get('armor_piercing','?')}")
+    if sr: stats.extend(sr)
+    label = name
+    if stats: label += f" ({', '.join(stats)})"
+    return label + f" (+{cost} pts)"
+
+
+def format_mount_option(mount):
+    if not mount or not isinstance(mount, dict): return "Aucune monture"
+    name = mount.get("name", "Monture")
+    cost = mount.get("cost", 0)
+    mount_data = mount.get("mount", {})
+    weapons = mount_data.get("weapon", [])
+    if isinstance(weapons, dict): weapons = [weapons]
+    coriace = mount_data.get("coriace_bonus", 0)
+    stats = []
+    for w in weapons:
+        if isinstance(w, dict):
+            p = f"{w.get('name','Arme')} A{w.get('attacks','?')}/PA{w.get('armor_piercing','?')}"
+            sp = ", ".join(w.get("special_rules", []))
+            if sp: p += f" ({sp})"
+            stats.append(p)
+    if coriace > 0: stats.append(f"Coriace+{coriace}")
+    sr = mount_data.get("special_rules", [])
+    if sr:
+        rt = ", ".join([r for r in sr if not r.startswith(("Griffes", "Sabots"))])
+        if rt: stats.append(rt)
+    label = name
+    if stats: label += f" ({', '.join(stats)})"
+    return label + f" (+{cost} pts)"
+
+
+def format_role_option(option):
+    lbl = option.get("name", "Rôle")
+    sr = option.get("special_rules", [])
+    if sr: lbl += f" | {', '.join(sr)}"
+    return lbl + f" (+{option.get('cost', 0)} pts)"
+
+
+def option_label(group_type: str, option: dict[str, Any]) -> str | None:
+    """Radio label of ``option`` in a group of ``group_type`` (None for unlabelled groups)."""
+    if group_type == "weapon":
+        weapon = option.get("weapon", {})
+        if isinstance(weapon, list):
+            return " et ".join(w.get("name", "Arme") for w in weapon) + f" (+{option['cost']} pts)"
+        return format_weapon_option(weapon, option["cost"])
+    if group_type == "conditional_weapon":
+        weapon = option.get("weapon", {})
+        if isinstance(weapon, dict) and weapon:
+            return format_weapon_option(weapon, option.get("cost", 0))
+        return f"{option.get('name', 'Amélioration')} (+{option.get('cost', 0)} pts)"
+    if group_type == "role":
+        return format_role_option(option)
+    if group_type == "mobility":
+        return format_mobility_option(option)
+    if group_type == "mount":
+        return format_mount_option(option)
+    return None
+
+
+def option_profiles(option: dict[str, Any]) -> str:
+    """Markdown weapon profile lines shown under a ``variable_weapon_count`` option."""
+    weapon = option.get("weapon", {})
+    if isinstance(weapon, list):
+        profiles = [f"⚔️ **{w.get('name','')}** — {weapon_profile_md(w)}" for w in weapon if isinstance(w, dict)]
+    elif isinstance(weapon, dict) and weapon:
+        profiles = [f"⚔️ **{weapon.get('name','')}** — {weapon_profile_md(weapon)}"]
+    else:
+        profiles = []
+    return "  \n".join(profiles)
+
+
+def default_weapon_label(unit: dict[str, Any]) -> str | None:
+    """First choice of a ``weapon`` group: the unit's base armament (None without one)."""
+    base = unit.get("weapon", [])
+    if isinstance(base, list) and base:
+        names = [w.get("name", "Arme") for w in base if isinstance(w, dict)]
+        return names[0] if len(names) == 1 else " et ".join(names)
+    if isinstance(base, dict):
+        return format_weapon_option(base)
+    return None
+
+
+def base_profile_html(unit: dict[str, Any]) -> str:
+    """HTML block of the unit's base weapons and special rules ("" when both are empty)."""
+    weapons_html = "".join(
+        f"<div style='margin-bottom:2px;'>⚔️ <b>{w.get('name','')}</b> — {weapon_profile_md(w)}</div>"
+        for w in unit.get("weapon", []) if isinstance(w, dict)
+    )
+    rule_names = [r if isinstance(r, str) else r.get("name", "") for r in unit.get("special_rules", [])]
+    rules_html = f"<div style='margin-top:6px;'><b>Règles spéciales :</b> {', '.join(rule_names)}</div>" if rule_names else ""
+    if not (weapons_html or rules_html):
+        return ""
+    return f"<div style='font-size:13px;margin-bottom:10px;line-height:1.6;'>{weapons_html}{rules_html}</div>"
+
+
+class UnitLabels:
+    """Display strings of one unit, computed once from its compiled data.
+
+    ``options[g][o]`` is the radio label of option ``o`` in upgrade group
+    ``g`` (None for groups rendered otherwise) and ``profiles[g][o]`` the
+    markdown weapon profile of a ``variable_weapon_count`` option.
+    """
+
+    __slots__ = ("picker", "profile_html", "default_weapon", "options", "profiles")
+
+    def __init__(self, unit: dict[str, Any]) -> None:
+        self.picker = format_unit_option(unit)
+        self.profile_html = base_profile_html(unit)
+        self.default_weapon = default_weapon_label(unit)
+        options = []
+        profiles = []
+        for group in unit.get("upgrade_groups", []):
+            group_type = group.get("type", "")
+            group_options = group.get("options", [])
+            if group_type in LABELLED_GROUP_TYPES:
+                options.append(tuple(option_label(group_type, option) for option in group_options))
+            else:
+                options.append((None,) * len(group_options))
+            if group_type == "variable_weapon_count":
+                profiles.append(tuple(option_profiles(option) for option in group_options))
+            else:
+                profiles.append(("",) * len(group_options))
+        self.options = tuple(options)
+        self.profiles = tuple(profiles)
+
+    def option_index(self, group_index: int, label: str) -> int | None:
+        """Index of the option of ``group_index`` whose label is ``label``."""
+        if group_index >= len(self.options):
+            return None
+        for index, candidate in enumerate(self.options[group_index]):
+            if candidate == label:
+                return index
+        return None
+
+
+class FactionLabels:
+    """Precomputed ``UnitLabels`` of every unit of a compiled faction.
+
+    Built once per catalog version (see ``FactionCatalogService.labels``).
+    Units are looked up by identity: the compiled units of a version are
+    never copied nor mutated, and the version keeps them alive.
+    """
+
+    def __init__(self, faction_data: FactionData) -> None:
+        self._units = {id(unit): UnitLabels(unit) for unit in faction_data.get("units", [])}
+
+    def __len__(self) -> int:
+        return len(self._units)
+
+    def for_unit(self, unit: dict[str, Any]) -> UnitLabels:
+        """Cached labels of ``unit``, or fresh ones for a unit from another version."""
+        labels = self._units.get(id(unit))
+        return labels if labels is not None else UnitLabels(unit)
+
+    def picker(self, unit: dict[str, Any]) -> str:
+        """``format_func`` of the unit selectbox."""
+        return self.for_unit(unit).picker
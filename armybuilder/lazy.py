@@ -0,0 +1,74 @@
+import importlib
+import importlib.util
+import sys
+import threading
+import types
+from typing import Any
+
+
+_LOCK = threading.RLock()
+_PROXIES: dict[str, "LazyModule"] = {}
+_AVAILABLE: dict[str, bool] = {}
+
+# Dépendances lourdes différées : chargées au premier usage, puis résidentes.
+HEAVY_MODULES = ("numpy", "qrcode", "PIL", "reportlab")
+
+
+class LazyModule(types.ModuleType):
+    """Stand-in for a module that is imported on first attribute access.
+
+    After the first access the real module's namespace is copied onto the
+    proxy, so later lookups are plain attribute reads and the module stays
+    resident (it is also in ``sys.modules`` like any import).
+    """
+
+    def __init__(self, name: str) -> None:
+        super().__init__(name)
+        self.__dict__["_lazy_module"] = None
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(_resolve(self), name)
+
+
+def _resolve(proxy: LazyModule) -> types.ModuleType:
+    # Pas de méthodes sur le proxy : l'espace de noms copié (numpy.load...) les masquerait.
+    module = proxy.__dict__["_lazy_module"]
+    if module is None:
+        with _LOCK:
+            module = proxy.__dict__["_lazy_module"]
+            if module is None:
+                module = importlib.import_module(proxy.__name__)
+                namespace = {key: value for key, value in vars(module).items() if key not in ("__name__", "__spec__", "__loader__")}
+                proxy.__dict__.update(namespace)
+                proxy.__dict__["_lazy_module"] = module
+    return module
+
+
+def is_loaded(proxy: LazyModule) -> bool:
+    return proxy.__dict__["_lazy_module"] is not None
+
+
+def lazy_import(name: str) -> LazyModule:
+    """Shared lazy proxy for ``name`` (the import itself happens on first use)."""
+    with _LOCK:
+        proxy = _PROXIES.get(name)
+        if proxy is None:
+            proxy = _PROXIES[name] = LazyModule(name)
+        return proxy
+
+
+def module_available(name: str) -> bool:
+    """Whether ``name`` can be imported, checked without importing it."""
+    available = _AVAILABLE.get(name)
+    if available is None:
+        try:
+            available = importlib.util.find_spec(name) is not None
+        except (ImportError, ValueError):
+            available = False
+        _AVAILABLE[name] = available
+    return available
+
+
+def loaded_modules() -> dict[str, bool]:
+    """Heavy optional modules and whether this process has imported them yet."""
+    return {name: name in sys.modules for name in HEAVY_MODULES}
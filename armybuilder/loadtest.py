@@ -0,0 +1,252 @@
+"""Load generator: many simulated sessions driving app.py through Streamlit's AppTest.
+
+Everything runs in-process (no server, no network): every session is an
+``AppTest`` whose script runs in its own thread, as Streamlit does for real
+sessions in one worker process. Usage::
+
+    python -m armybuilder.loadtest --sessions 200 --concurrency 50
+"""
+
+import argparse
+import base64
+import json
+import random
+import resource
+import sys
+import threading
+import time
+import urllib.parse
+import zlib
+from collections.abc import Sequence
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any
+
+from armybuilder.export_jobs import EXPORT_JOBS
+from armybuilder.exporters import export_json
+from armybuilder.session import SESSION_FOOTPRINTS
+from repositories.json_codec import CODEC
+
+
+APP_PATH = Path(__file__).resolve().parent.parent / "app.py"
+STEPS = ("open", "setup", "build_army", "configure", "add_unit", "export", "qr_scan")
+DEFAULT_TIMEOUT = 60.0
+
+
+def qr_payload(game: str, faction: str, points: int, army_list: list[dict[str, Any]]) -> str:
+    """``?list=`` value encoded like the QR code of the HTML export."""
+    data = CODEC.dumps(
+        {
+            "game": game,
+            "faction": faction,
+            "pts": points,
+            "army_list": army_list,
+            "army_cost": sum(unit.get("cost", 0) for unit in army_list),
+            "units": [{"n": unit.get("name", ""), "c": unit.get("cost", 0)} for unit in army_list],
+        }
+    )
+    return urllib.parse.quote(base64.urlsafe_b64encode(zlib.compress(data.encode(), level=9)).decode())
+
+
+class LoadTestReport:
+    """Step latencies, errors and memory growth collected from every session."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.timings: dict[str, list[float]] = {step: [] for step in STEPS}
+        self.errors: list[str] = []
+        self.sessions = 0
+        self.completed = 0
+        self.elapsed = 0.0
+        self.rss_growth_kb = 0
+        self.session_bytes: dict[str, int] = {}
+
+    def record(self, step: str, seconds: float) -> None:
+        with self._lock:
+            self.timings.setdefault(step, []).append(seconds)
+
+    def fail(self, message: str) -> None:
+        with self._lock:
+            self.errors.append(message)
+
+    def finish_session(self, ok: bool) -> None:
+        with self._lock:
+            self.sessions += 1
+            self.completed += int(ok)
+
+    def to_dict(self) -> dict[str, Any]:
+        steps = {}
+        for step, values in self.timings.items():
+            if not values:
+                continue
+            ordered = sorted(values)
+            steps[step] = {
+                "count": len(ordered),
+                "p50_ms": round(_percentile(ordered, 50) * 1000, 1),
+                "p90_ms": round(_percentile(ordered, 90) * 1000, 1),
+                "p99_ms": round(_percentile(ordered, 99) * 1000, 1),
+                "max_ms": round(ordered[-1] * 1000, 1),
+            }
+        reruns = sum(len(values) for values in self.timings.values())
+        return {
+            "sessions": self.sessions,
+            "completed": self.completed,
+            "errors": len(self.errors),
+            "elapsed_s": round(self.elapsed, 2),
+            "sessions_per_s": round(self.completed / self.elapsed, 2) if self.elapsed else 0.0,
+            "reruns_per_s": round(reruns / self.elapsed, 2) if self.elapsed else 0.0,
+            "rss_growth_kb": self.rss_growth_kb,
+            "rss_growth_kb_per_session": round(self.rss_growth_kb / self.sessions, 1) if self.sessions else 0.0,
+            "session_state": self.session_bytes,
+            "steps": steps,
+            "first_errors": self.errors[:5],
+        }
+
+    def format_text(self) -> str:
+        data = self.to_dict()
+        lines = [
+            f"Sessions : {data['completed']}/{data['sessions']} terminées, {data['errors']} erreur(s) en {data['elapsed_s']} s",
+            f"Débit    : {data['sessions_per_s']} sessions/s, {data['reruns_per_s']} reruns/s",
+            f"Mémoire  : +{data['rss_growth_kb']} Ko RSS (+{data['rss_growth_kb_per_session']} Ko/session), "
+            f"état de session max {data['session_state'].get('max_bytes', 0)} o",
+            f"{'Étape':<12}{'n':>6}{'p50':>10}{'p90':>10}{'p99':>10}{'max':>10}  (ms)",
+        ]
+        for step, stats in data["steps"].items():
+            lines.append(f"{step:<12}{stats['count']:>6}{stats['p50_ms']:>10}{stats['p90_ms']:>10}{stats['p99_ms']:>10}{stats['max_ms']:>10}")
+        lines += [f"  ! {error}" for error in data["first_errors"]]
+        return "\n".join(lines)
+
+
+class SimulatedSession:
+    """One user walking setup → army → configure → add → export, then opening the QR link."""
+
+    def __init__(self, app_path: Path, report: LoadTestReport, rng: random.Random, timeout: float = DEFAULT_TIMEOUT) -> None:
+        self.app_path = str(app_path)
+        self.report = report
+        self.rng = rng
+        self.timeout = timeout
+
+    def run(self) -> bool:
+        from streamlit.testing.v1 import AppTest
+
+        app = AppTest.from_file(self.app_path, default_timeout=self.timeout)
+        self._step("open", app.run)
+
+        game_box = _by_label(app.selectbox, "Jeu")
+        game = self.rng.choice(list(game_box.options))
+        self._step("setup", game_box.set_value(game).run)
+        faction_box = _by_label(app.selectbox, "Faction")
+        faction_box.set_value(self.rng.choice(list(faction_box.options)))
+        self._step("build_army", app.button(key="build_army").click().run)
+        if app.session_state["page"] != "army":
+            raise RuntimeError("la page armée ne s'est pas ouverte")
+
+        unit_box = app.selectbox(key="unit_select")
+        unit_box.set_value(self.rng.choice(list(unit_box.options)))
+        radios = [radio for radio in app.radio if radio.key and radio.key.endswith(("_weapon", "_cond", "_role"))]
+        if radios:
+            radio = self.rng.choice(radios)
+            radio.set_value(self.rng.choice(list(radio.options)))
+        self._step("configure", app.run)
+        self._step("add_unit", _by_label(app.button, "➕ Ajouter à l'armée").click().run)
+        # L'export HTML (+ QR) est demandé par son bouton puis rendu en tâche de fond : on attend le travail ;
+        # le JSON est le contenu du bouton de téléchargement.
+        self._step("export", lambda: self._export(app))
+
+        army_list = list(app.session_state["army_list"])
+        if not army_list:
+            raise RuntimeError("aucune unité ajoutée")
+        scan = AppTest.from_file(self.app_path, default_timeout=self.timeout)
+        scan.query_params["list"] = qr_payload(game, app.session_state["faction"], app.session_state["points"], army_list)
+        self._step("qr_scan", scan.run)
+        if "_qr_army_list" not in scan.session_state:
+            raise RuntimeError("liste du QR code non relue")
+        return True
+
+    def _export(self, app: Any) -> Any:
+        # Même liste déjà exportée par une autre session : le bouton laisse directement place au téléchargement.
+        prepare = [button for button in app.button if button.key == "prepare_army_html"]
+        result = prepare[0].click().run() if prepare else app.run()
+        key = app.session_state["army_export_key"]
+        if EXPORT_JOBS.result(key, timeout=self.timeout) is None:
+            raise RuntimeError(f"export HTML non rendu : {EXPORT_JOBS.error(key) or EXPORT_JOBS.status(key)}")
+        state = app.session_state
+        army_list = state["army_list"]
+        payload = export_json(state["game"], state["faction"], state["points"], state["list_name"], army_list, state["army_cost"])
+        if len(CODEC.loads(payload)["army_list"]) != len(army_list):
+            raise RuntimeError("export JSON incomplet")
+        return result
+
+    def _step(self, name: str, action: Any) -> None:
+        started = time.perf_counter()
+        result = action()
+        self.report.record(name, time.perf_counter() - started)
+        exceptions = getattr(result, "exception", None)
+        if exceptions:
+            raise RuntimeError(f"{name} : {exceptions[0].message}")
+
+
+def run_load_test(
+    sessions: int = 100,
+    concurrency: int = 20,
+    app_path: Path = APP_PATH,
+    seed: int = 0,
+    timeout: float = DEFAULT_TIMEOUT,
+) -> LoadTestReport:
+    """Run ``sessions`` simulated users, ``concurrency`` at a time, and aggregate the results."""
+    report = LoadTestReport()
+
+    def one(index: int) -> None:
+        try:
+            ok = SimulatedSession(app_path, report, random.Random(seed + index), timeout).run()
+        except Exception as error:
+            report.fail(f"session {index} : {error}")
+            ok = False
+        report.finish_session(ok)
+
+    rss_before = _rss_kb()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(concurrency, 1)) as pool:
+        list(pool.map(one, range(sessions)))
+    report.elapsed = time.perf_counter() - started
+    report.rss_growth_kb = _rss_kb() - rss_before
+    report.session_bytes = SESSION_FOOTPRINTS.summary()
+    return report
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Test de charge hors ligne de l'application (AppTest).")
+    parser.add_argument("--sessions", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT)
+    parser.add_argument("--json", action="store_true", help="rapport JSON au lieu du texte")
+    args = parser.parse_args(argv)
+
+    report = run_load_test(args.sessions, args.concurrency, seed=args.seed, timeout=args.timeout)
+    print(json.dumps(report.to_dict(), ensure_ascii=False, indent=2) if args.json else report.format_text())
+    return 1 if report.errors else 0
+
+
+def _by_label(elements: Any, label: str) -> Any:
+    for element in elements:
+        if element.label == label:
+            return element
+    raise LookupError(f"élément introuvable : {label}")
+
+
+def _percentile(ordered: list[float], rank: float) -> float:
+    return ordered[min(len(ordered) - 1, int(len(ordered) * rank / 100))]
+
+
+def _rss_kb() -> int:
+    """Current resident set size (Linux), peak RSS elsewhere."""
+    try:
+        with open("/proc/self/statm", encoding="ascii") as file:
+            return int(file.read().split()[1]) * resource.getpagesize() // 1024
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+if __name__ == "__main__":
+    sys.exit(main())
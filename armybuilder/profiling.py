@@ -0,0 +1,179 @@
+import json
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from collections.abc import Callable
+from contextlib import nullcontext
+from functools import wraps
+from typing import Any, TypeVar
+
+from armybuilder.config import PROFILING_ENABLED
+
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+# Bornes (s) des seaux d'histogramme, au format Prometheus (le dernier seau est +Inf).
+HISTOGRAM_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+# Nombre de mesures conservées par span pour l'histogramme glissant et les percentiles.
+WINDOW_SIZE = 500
+
+_DISABLED_SPAN = nullcontext()
+
+
+class SpanStats:
+    """Timings of one named span: totals and bucket counts since start, plus a rolling window.
+
+    The window only feeds the debug panel (recent histogram, percentiles);
+    exported histograms use the cumulative counts, which never decrease.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.blocks = 0
+        self.buckets = [0] * (len(HISTOGRAM_BUCKETS) + 1)
+        self.window: deque[float] = deque(maxlen=WINDOW_SIZE)
+
+    def add(self, duration: float, blocks: int) -> None:
+        self.count += 1
+        self.total += duration
+        self.max = max(self.max, duration)
+        self.blocks += blocks
+        self.buckets[bisect_left(HISTOGRAM_BUCKETS, duration)] += 1
+        self.window.append(duration)
+
+    def histogram(self) -> list[int]:
+        """Per-bucket counts over the rolling window (last entry: above every bound)."""
+        counts = [0] * (len(HISTOGRAM_BUCKETS) + 1)
+        for duration in self.window:
+            counts[bisect_left(HISTOGRAM_BUCKETS, duration)] += 1
+        return counts
+
+    def percentile(self, rank: float) -> float:
+        if not self.window:
+            return 0.0
+        ordered = sorted(self.window)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * rank / 100))]
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "span": self.name,
+            "count": self.count,
+            "total_ms": round(self.total * 1000, 3),
+            "mean_ms": round(self.total / self.count * 1000, 3) if self.count else 0.0,
+            "p50_ms": round(self.percentile(50) * 1000, 3),
+            "p95_ms": round(self.percentile(95) * 1000, 3),
+            "max_ms": round(self.max * 1000, 3),
+            "blocks_per_call": round(self.blocks / self.count, 1) if self.count else 0.0,
+            "histogram": self.histogram(),
+        }
+
+
+class _Span:
+    __slots__ = ("profiler", "name", "started", "blocks")
+
+    def __init__(self, profiler: "Profiler", name: str) -> None:
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self) -> "_Span":
+        self.blocks = sys.getallocatedblocks()
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type: Any, exc: Any, traceback: Any) -> None:
+        duration = time.perf_counter() - self.started
+        self.profiler.record(self.name, duration, sys.getallocatedblocks() - self.blocks)
+
+
+class Profiler:
+    """Process-wide named spans (enabled with ARMYBUILDER_PROFILE=1).
+
+    ``span(name)`` times a block and ``profiled(name)`` a function. Besides
+    the duration, each span records the change in allocated memory blocks
+    (``sys.getallocatedblocks``) as a cheap allocation counter. When the
+    profiler is disabled, ``span`` returns a shared no-op context and
+    ``profiled`` leaves the function untouched.
+    """
+
+    def __init__(self, enabled: bool = False) -> None:
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._spans: dict[str, SpanStats] = {}
+
+    def span(self, name: str) -> Any:
+        if not self.enabled:
+            return _DISABLED_SPAN
+        return _Span(self, name)
+
+    def profiled(self, name: str) -> Callable[[F], F]:
+        def decorate(function: F) -> F:
+            if not self.enabled:
+                return function
+
+            @wraps(function)
+            def wrapper(*args: Any, **kwargs: Any) -> Any:
+                with _Span(self, name):
+                    return function(*args, **kwargs)
+
+            return wrapper  # type: ignore[return-value]
+
+        return decorate
+
+    def record(self, name: str, duration: float, blocks: int = 0) -> None:
+        with self._lock:
+            stats = self._spans.get(name)
+            if stats is None:
+                stats = self._spans[name] = SpanStats(name)
+            stats.add(duration, blocks)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._spans.clear()
+
+    def snapshot(self) -> list[dict[str, Any]]:
+        """Every span's summary, slowest total first."""
+        with self._lock:
+            rows = [stats.to_dict() for stats in self._spans.values()]
+        return sorted(rows, key=lambda row: row["total_ms"], reverse=True)
+
+    def to_json(self) -> str:
+        return json.dumps({"buckets": list(HISTOGRAM_BUCKETS), "spans": self.snapshot()}, ensure_ascii=False, indent=2)
+
+    def to_prometheus(self) -> str:
+        """Prometheus text exposition: one histogram (since start) and a calls counter per span, net blocks as a gauge."""
+        lines = [
+            "# HELP armybuilder_span_seconds Durée des spans depuis le démarrage.",
+            "# TYPE armybuilder_span_seconds histogram",
+        ]
+        with self._lock:
+            spans = [
+                (_label(stats.name), list(stats.buckets), stats.total, stats.count, stats.blocks)
+                for stats in self._spans.values()
+            ]
+        for label, buckets, total, count, _ in spans:
+            cumulative = 0
+            for bound, bucket in zip(HISTOGRAM_BUCKETS + ("+Inf",), buckets):
+                cumulative += bucket
+                lines.append(f'armybuilder_span_seconds_bucket{{span="{label}",le="{bound}"}} {cumulative}')
+            lines.append(f'armybuilder_span_seconds_sum{{span="{label}"}} {total:.6f}')
+            lines.append(f'armybuilder_span_seconds_count{{span="{label}"}} {count}')
+        lines += ["# HELP armybuilder_span_calls_total Appels depuis le démarrage.", "# TYPE armybuilder_span_calls_total counter"]
+        lines += [f'armybuilder_span_calls_total{{span="{label}"}} {count}' for label, _, _, count, _ in spans]
+        # Solde net (allocations - libérations) : peut baisser, donc une jauge et non un compteur.
+        lines += ["# HELP armybuilder_span_blocks Blocs mémoire alloués nets depuis le démarrage.", "# TYPE armybuilder_span_blocks gauge"]
+        lines += [f'armybuilder_span_blocks{{span="{label}"}} {blocks}' for label, _, _, _, blocks in spans]
+        return "\n".join(lines) + "\n"
+
+
+def _label(name: str) -> str:
+    return name.replace("\\", "\\\\").replace('"', '\\"')
+
+
+PROFILER = Profiler(PROFILING_ENABLED)
+span = PROFILER.span
+profiled = PROFILER.profiled
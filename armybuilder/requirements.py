@@ -0,0 +1,300 @@
+import sys
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Any
+
+from armybuilder.labels import LABELLED_GROUP_TYPES, FactionLabels, UnitLabels
+
+
+FactionData = dict[str, Any]
+Selections = Mapping[str, Any]
+
+# Valeurs de radio « rien de choisi » : elles ne fournissent aucun nom aux requires.
+NO_SELECTION_LABELS = ("Aucune amélioration", "Aucune arme", "Aucun rôle", "Aucune monture", "Aucune option de mobilité")
+
+
+def selected_option(unit: dict[str, Any], labels: UnitLabels, group_idx: int, value: Any) -> dict[str, Any] | None:
+    """Option of a weapon group chosen by the radio label ``value`` (None for the base armament)."""
+    if not isinstance(value, str):
+        return None
+    group = unit.get("upgrade_groups", [])[group_idx]
+    group_type = group.get("type", "")
+    if group_type not in ("weapon", "conditional_weapon"):
+        return None
+    if group_type == "weapon" and value == (labels.default_weapon or ""):
+        return None
+    option_idx = labels.option_index(group_idx, value)
+    return None if option_idx is None else group.get("options", [])[option_idx]
+
+
+def option_weapons(option: dict[str, Any]) -> list[dict[str, Any]]:
+    weapon_data = option.get("weapon", {})
+    if isinstance(weapon_data, list):
+        return [w for w in weapon_data if isinstance(w, dict)]
+    if isinstance(weapon_data, dict) and weapon_data:
+        return [weapon_data]
+    return []
+
+
+def selection_provides(unit: dict[str, Any] | None, labels: UnitLabels | None, key: str, value: Any) -> list[dict[str, Any]]:
+    """What a stored selection counts as for ``requires``: its weapons, else a name taken from its label.
+
+    A combined option (several weapons, e.g. "Pistolet lourd de sergent +
+    Épée énergétique") also counts under its own name: that is what the
+    sergeant cascade groups require.
+    """
+    if unit is not None and key.startswith("group_"):
+        try:
+            group_idx = int(key.split("_", 1)[1])
+        except (IndexError, ValueError):
+            group_idx = None
+        if group_idx is not None and group_idx < len(unit.get("upgrade_groups", [])):
+            option = selected_option(unit, labels, group_idx, value)
+            weapons = option_weapons(option) if option is not None else []
+            if weapons:
+                if isinstance(option.get("weapon"), list) and option.get("name"):
+                    return [*weapons, {"name": option["name"]}]
+                return weapons
+    if isinstance(value, str) and value not in NO_SELECTION_LABELS:
+        return [{"name": value.split(" (")[0]}]
+    return []
+
+
+def base_weapons_replaced(unit: dict[str, Any], labels: UnitLabels, selections: Selections) -> bool:
+    """Whether a ``weapon`` group is set to something other than the base armament."""
+    default_label = labels.default_weapon or ""
+    for group_idx, group in enumerate(unit.get("upgrade_groups", [])):
+        if group.get("type") != "weapon":
+            continue
+        selected = selections.get(f"group_{group_idx}", "")
+        if selected and selected != default_label:
+            return True
+    return False
+
+
+def requirements_met(
+    unit: dict[str, Any] | None, labels: UnitLabels | None, selections: Selections, requires: list[str]
+) -> bool:
+    """Whether every name of ``requires`` matches a weapon (name or tag) of the current configuration.
+
+    The configuration is the explicit selections plus the unit's base
+    weapons, unless a ``weapon`` group replaced them. Weapons removed by a
+    ``conditional_weapon`` with ``replaces`` still count (replacing the
+    shield must not forbid replacing the melee weapon afterwards).
+    """
+    if not requires:
+        return True
+    current_weapons = []
+    for key, value in selections.items():
+        current_weapons.extend(selection_provides(unit, labels, key, value))
+    if unit is not None and not base_weapons_replaced(unit, labels, selections):
+        current_weapons.extend(w for w in unit.get("weapon", []) if isinstance(w, dict))
+    for req in requires:
+        if not any(w.get("name") == req or req in w.get("tags", []) for w in current_weapons):
+            return False
+    return True
+
+
+def _provided_names(weapons: list[dict[str, Any]]) -> set[str]:
+    names = set()
+    for weapon in weapons:
+        names.add(weapon.get("name"))
+        names.update(weapon.get("tags", []))
+    return names
+
+
+def _required_names(group: dict[str, Any]) -> set[str]:
+    names = set(group.get("requires", [])) | set(group.get("requires_not", []))
+    for option in group.get("options", []):
+        names.update(option.get("requires", []))
+    return names
+
+
+class UpgradeDependencyGraph:
+    """Which upgrade groups of a unit can change the availability of which.
+
+    Group ``h`` is upstream of ``g`` when some radio value of ``h`` (or
+    the removal of the base weapons, for a ``weapon`` group) provides a
+    name that ``g`` lists in ``requires`` or ``requires_not``, at group
+    or option level. A ``variable_weapon_count`` group's own ``requires``
+    is also met by the weapons already configured, as the configurator
+    checks it: weapons added by an earlier count group make that group
+    upstream too. Checkbox groups are never upstream. ``cycles`` lists the
+    groups that depend on each other (a self-dependency counts); ``order``
+    is a topological order of the others.
+    """
+
+    __slots__ = ("upstream", "downstream", "order", "cycles", "unknown")
+
+    def __init__(self, unit: dict[str, Any], labels: UnitLabels) -> None:
+        groups = unit.get("upgrade_groups", [])
+        base_names = _provided_names([w for w in unit.get("weapon", []) if isinstance(w, dict)])
+        provides: list[set[str]] = []
+        # Armes ajoutées par les groupes à compteur, visibles des requires de groupe à compteur suivants
+        counted: list[set[str]] = []
+        for group_idx, group in enumerate(groups):
+            names: set[str] = set()
+            group_type = group.get("type", "")
+            if group_type in LABELLED_GROUP_TYPES:
+                choices = list(labels.options[group_idx])
+                if group_type == "weapon":
+                    choices.append(labels.default_weapon)
+                    names |= base_names
+                for value in choices:
+                    names |= _provided_names(selection_provides(unit, labels, f"group_{group_idx}", value))
+            provides.append(names)
+            counted.append({
+                weapon.get("name") for option in group.get("options", []) for weapon in option_weapons(option)
+            } if group_type == "variable_weapon_count" else set())
+
+        required = [_required_names(group) for group in groups]
+        counted_required = [
+            set(group.get("requires", [])) if group.get("type") == "variable_weapon_count" else set() for group in groups
+        ]
+        self.upstream = tuple(
+            tuple(
+                h for h in range(len(groups))
+                if provides[h] & required[g] or (h < g and counted[h] & counted_required[g])
+            )
+            for g in range(len(groups))
+        )
+        self.downstream = tuple(
+            tuple(g for g in range(len(groups)) if h in self.upstream[g]) for h in range(len(groups))
+        )
+        # Noms requis que rien ne peut fournir (ni arme de base, ni option) : requires jamais satisfait
+        available = base_names.union(*provides)
+        self.unknown = tuple(
+            (g, name)
+            for g in range(len(groups))
+            for name in sorted(required[g] - available)
+            if not (name in counted_required[g] and any(name in counted[h] for h in range(g)))
+        )
+        self.order, self.cycles = _topological_order(self.upstream)
+
+
+def _topological_order(upstream: tuple[tuple[int, ...], ...]) -> tuple[tuple[int, ...], tuple[tuple[int, ...], ...]]:
+    """Kahn's algorithm; nodes left over sit on (or behind) a cycle, reported as strongly connected sets."""
+    pending = [len(set(parents)) for parents in upstream]
+    children: list[list[int]] = [[] for _ in upstream]
+    for node, parents in enumerate(upstream):
+        for parent in set(parents):
+            children[parent].append(node)
+    ready = [node for node, count in enumerate(pending) if count == 0]
+    order = []
+    while ready:
+        node = ready.pop(0)
+        order.append(node)
+        for child in children[node]:
+            pending[child] -= 1
+            if pending[child] == 0:
+                ready.append(child)
+    leftover = [node for node in range(len(upstream)) if node not in order]
+    return tuple(order), tuple(_cyclic_components(upstream, leftover))
+
+
+def _cyclic_components(upstream: tuple[tuple[int, ...], ...], nodes: list[int]) -> list[tuple[int, ...]]:
+    components = []
+    seen: set[int] = set()
+    for node in nodes:
+        if node in seen:
+            continue
+        ancestors = _reachable(node, lambda n: upstream[n])
+        descendants = _reachable(node, lambda n: [c for c in nodes if n in upstream[c]])
+        component = ancestors & descendants
+        if component:
+            seen |= component
+            components.append(tuple(sorted(component)))
+    return components
+
+
+def _reachable(start: int, step) -> set[int]:
+    reached: set[int] = set()
+    stack = list(step(start))
+    while stack:
+        node = stack.pop()
+        if node not in reached:
+            reached.add(node)
+            stack.extend(step(node))
+    return reached
+
+
+class RequirementEvaluator:
+    """Memoized ``requirements_met`` for one draft of one unit.
+
+    A check is keyed by the group asking and by the current values of that
+    group's upstream groups only: after a selection changes, the checks of
+    the groups downstream of it are recomputed and every other answer is
+    reused. Kept in session state per draft (pruned with it).
+    """
+
+    __slots__ = ("unit", "labels", "graph", "_results", "evaluations")
+
+    def __init__(self, unit: dict[str, Any], labels: UnitLabels, graph: UpgradeDependencyGraph) -> None:
+        self.unit = unit
+        self.labels = labels
+        self.graph = graph
+        self._results: dict[tuple[Any, ...], bool] = {}
+        self.evaluations = 0
+
+    def met(self, group_idx: int, requires: list[str], selections: Selections) -> bool:
+        if not requires:
+            return True
+        upstream = self.graph.upstream[group_idx] if group_idx < len(self.graph.upstream) else ()
+        signature = tuple(selections.get(f"group_{h}") for h in upstream)
+        key = (group_idx, tuple(requires), signature)
+        result = self._results.get(key)
+        if result is None:
+            self.evaluations += 1
+            result = self._results[key] = requirements_met(self.unit, self.labels, selections, requires)
+        return result
+
+
+class FactionRequirements:
+    """``UpgradeDependencyGraph`` of every unit of a compiled faction, keyed by identity like ``FactionLabels``.
+
+    Built once per catalog version; ``issues`` lists the cycles and the
+    requirements nothing can satisfy, found when the faction is loaded.
+    """
+
+    def __init__(self, faction_data: FactionData, labels: FactionLabels | None = None) -> None:
+        labels = labels or FactionLabels(faction_data)
+        units = faction_data.get("units", [])
+        self._graphs = {id(unit): UpgradeDependencyGraph(unit, labels.for_unit(unit)) for unit in units}
+        self.issues = [issue for unit in units for issue in unit_dependency_issues(unit, self._graphs[id(unit)])]
+
+    def for_unit(self, unit: dict[str, Any], labels: UnitLabels) -> UpgradeDependencyGraph:
+        graph = self._graphs.get(id(unit))
+        return graph if graph is not None else UpgradeDependencyGraph(unit, labels)
+
+
+def unit_dependency_issues(unit: dict[str, Any], graph: UpgradeDependencyGraph) -> list[str]:
+    """Human-readable problems in the upgrade requirements of ``unit``."""
+    groups = unit.get("upgrade_groups", [])
+    name = unit.get("name", "?")
+    issues = []
+    for cycle in graph.cycles:
+        names = " → ".join(groups[g].get("group", f"groupe {g}") for g in cycle)
+        issues.append(f"{name} : dépendance circulaire entre groupes ({names})")
+    for g, required in graph.unknown:
+        issues.append(f"{name} : {groups[g].get('group', f'groupe {g}')} requiert « {required} », fourni par aucune arme ni option")
+    return issues
+
+
+def main(argv: list[str] | None = None) -> int:
+    from repositories import JsonFactionRepository
+
+    args = list(sys.argv[1:] if argv is None else argv)
+    base_dir = Path(args[0]) if args else Path(__file__).resolve().parent.parent
+    factions_by_game, games = JsonFactionRepository(base_dir).load_catalog()
+    count = 0
+    for game in games:
+        for faction, faction_data in sorted(factions_by_game[game].items()):
+            for issue in FactionRequirements(faction_data).issues:
+                print(f"{game} / {faction} — {issue}")
+                count += 1
+    print(f"{count} incohérence(s) dans les prérequis d'améliorations")
+    return 1 if count else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
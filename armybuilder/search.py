@@ -0,0 +1,261 @@
+import re
+import unicodedata
+from bisect import bisect_left, bisect_right
+from collections.abc import Iterable
+from typing import Any
+
+
+FactionData = dict[str, Any]
+FactionsByGame = dict[str, dict[str, FactionData]]
+
+FIELDS = ("name", "rule", "weapon")
+# Filtres numériques de la barre de recherche : alias (sans accents) -> attribut indexé.
+NUMERIC_ALIASES = {
+    "pa": "weapon_ap",
+    "ap": "weapon_ap",
+    "portee": "weapon_range",
+    "range": "weapon_range",
+    "attaques": "weapon_attacks",
+    "a": "weapon_attacks",
+    "qualite": "quality",
+    "q": "quality",
+    "defense": "defense",
+    "def": "defense",
+    "cout": "base_cost",
+    "pts": "base_cost",
+    "coriace": "coriace",
+    "taille": "size",
+}
+UNIT_ATTRIBUTES = ("quality", "defense", "base_cost", "coriace", "size")
+WEAPON_ATTRIBUTES = ("weapon_ap", "weapon_range", "weapon_attacks")
+FIELD_PREFIXES = {"regle": "rule", "rule": "rule", "arme": "weapon", "weapon": "weapon", "nom": "name"}
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_FILTER_RE = re.compile(r"^([a-z]+)(>=|<=|>|<|=)(\d+)$")
+_LIGATURES = str.maketrans({"œ": "oe", "æ": "ae", "Œ": "oe", "Æ": "ae", "ß": "ss"})
+
+
+def fold(text: str) -> str:
+    """Lowercase and strip accents: "Épée" and "epee" fold to the same key."""
+    decomposed = unicodedata.normalize("NFKD", str(text).translate(_LIGATURES))
+    return "".join(char for char in decomposed if not unicodedata.combining(char)).lower()
+
+
+def tokenize(text: str) -> list[str]:
+    return _TOKEN_RE.findall(fold(text))
+
+
+class UnitRef:
+    """One indexed unit with the faction it belongs to."""
+
+    __slots__ = ("id", "game", "faction", "unit")
+
+    def __init__(self, unit_id: int, game: str, faction: str, unit: dict[str, Any]) -> None:
+        self.id = unit_id
+        self.game = game
+        self.faction = faction
+        self.unit = unit
+
+    @property
+    def name(self) -> str:
+        return self.unit.get("name", "")
+
+    def __repr__(self) -> str:
+        return f"UnitRef({self.game!r}, {self.faction!r}, {self.name!r})"
+
+
+class SearchQuery:
+    """Parsed search: prefix terms per field plus numeric filters."""
+
+    def __init__(
+        self,
+        terms: Iterable[str] = (),
+        field_terms: dict[str, list[str]] | None = None,
+        filters: Iterable[tuple[str, str, float]] = (),
+    ) -> None:
+        self.terms = list(terms)
+        self.field_terms = field_terms or {}
+        self.filters = list(filters)
+
+    @classmethod
+    def parse(cls, text: str) -> "SearchQuery":
+        """Parse ``"epee regle:eclaireur pa>=2 portee>=18"`` style queries."""
+        terms: list[str] = []
+        field_terms: dict[str, list[str]] = {}
+        filters: list[tuple[str, str, float]] = []
+        for word in fold(text).split():
+            match = _FILTER_RE.match(word)
+            if match and match.group(1) in NUMERIC_ALIASES:
+                filters.append((NUMERIC_ALIASES[match.group(1)], match.group(2), float(match.group(3))))
+                continue
+            prefix, _, value = word.partition(":")
+            if value and prefix in FIELD_PREFIXES:
+                field_terms.setdefault(FIELD_PREFIXES[prefix], []).extend(_TOKEN_RE.findall(value))
+                continue
+            terms.extend(_TOKEN_RE.findall(word))
+        return cls(terms, field_terms, filters)
+
+    @property
+    def empty(self) -> bool:
+        return not (self.terms or self.field_terms or self.filters)
+
+
+class UnitSearchIndex:
+    """Inverted index over every unit of a catalog version.
+
+    Built once per ``CatalogVersion`` (see ``FactionCatalogService.search_index``):
+    postings map folded tokens to unit ids per field (unit name, rule names,
+    weapon names), sorted vocabularies give prefix lookups by bisection and
+    numeric attributes are kept as sorted ``(value, unit_id)`` columns so range
+    filters are two bisections. Option and mount weapons and rules count, since
+    they are what a player can field.
+    """
+
+    def __init__(self, factions: FactionsByGame) -> None:
+        self.units: list[UnitRef] = []
+        self._postings: dict[str, dict[str, set[int]]] = {field: {} for field in FIELDS}
+        self._columns: dict[str, list[tuple[float, int]]] = {
+            attribute: [] for attribute in UNIT_ATTRIBUTES + WEAPON_ATTRIBUTES
+        }
+        self._by_faction: dict[tuple[str, str], set[int]] = {}
+        self._by_detail: dict[str, set[int]] = {}
+
+        for game in sorted(factions):
+            for faction in sorted(factions[game]):
+                for unit in factions[game][faction].get("units", []):
+                    self._add_unit(game, faction, unit)
+
+        self._vocabulary = {field: sorted(postings) for field, postings in self._postings.items()}
+        self._values: dict[str, list[float]] = {}
+        for attribute, column in self._columns.items():
+            column.sort()
+            self._values[attribute] = [value for value, _ in column]
+        self._all_ids = frozenset(range(len(self.units)))
+
+    @classmethod
+    def from_catalog(cls, version: Any) -> "UnitSearchIndex":
+        return cls(version.factions)
+
+    def search(
+        self,
+        query: SearchQuery | str = "",
+        game: str | None = None,
+        faction: str | None = None,
+        unit_details: Iterable[str] | None = None,
+        limit: int | None = None,
+    ) -> list[UnitRef]:
+        """Units matching every term and filter; name matches come first."""
+        if isinstance(query, str):
+            query = SearchQuery.parse(query)
+
+        candidates: set[int] | frozenset[int] = self._all_ids
+        if game is not None and faction is not None:
+            candidates = self._by_faction.get((game, faction), set())
+        elif game is not None:
+            candidates = set().union(*(ids for key, ids in self._by_faction.items() if key[0] == game))
+        if unit_details is not None:
+            candidates = candidates & set().union(*(self._by_detail.get(detail, ()) for detail in unit_details))
+
+        name_hits: set[int] = set()
+        for term in query.terms:
+            in_name = self._prefix("name", term)
+            matched = in_name | self._prefix("rule", term) | self._prefix("weapon", term)
+            candidates = candidates & matched
+            name_hits |= in_name
+            if not candidates:
+                return []
+        for field, terms in query.field_terms.items():
+            for term in terms:
+                candidates = candidates & self._prefix(field, term)
+        for attribute, op, value in query.filters:
+            candidates = candidates & self._range(attribute, op, value)
+            if not candidates:
+                return []
+
+        ordered = sorted(candidates, key=lambda unit_id: (unit_id not in name_hits, unit_id))
+        if limit is not None:
+            ordered = ordered[:limit]
+        return [self.units[unit_id] for unit_id in ordered]
+
+    def _prefix(self, field: str, term: str) -> set[int]:
+        vocabulary = self._vocabulary[field]
+        postings = self._postings[field]
+        start = bisect_left(vocabulary, term)
+        end = bisect_left(vocabulary, term + "\uffff", start)
+        if end - start == 1:
+            return postings[vocabulary[start]]
+        return set().union(*(postings[token] for token in vocabulary[start:end]))
+
+    def _range(self, attribute: str, op: str, value: float) -> set[int]:
+        column = self._columns.get(attribute)
+        if column is None:
+            return set()
+        values = self._values[attribute]
+        if op == ">=":
+            selected = column[bisect_left(values, value):]
+        elif op == ">":
+            selected = column[bisect_right(values, value):]
+        elif op == "<=":
+            selected = column[:bisect_right(values, value)]
+        elif op == "<":
+            selected = column[:bisect_left(values, value)]
+        else:
+            selected = column[bisect_left(values, value):bisect_right(values, value)]
+        return {unit_id for _, unit_id in selected}
+
+    def _add_unit(self, game: str, faction: str, unit: dict[str, Any]) -> None:
+        unit_id = len(self.units)
+        self.units.append(UnitRef(unit_id, game, faction, unit))
+        self._by_faction.setdefault((game, faction), set()).add(unit_id)
+        self._by_detail.setdefault(unit.get("unit_detail") or unit.get("type", "unit"), set()).add(unit_id)
+
+        self._index_text("name", unit.get("name", ""), unit_id)
+        for attribute in UNIT_ATTRIBUTES:
+            value = unit.get(attribute)
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                self._columns[attribute].append((value, unit_id))
+
+        rules = list(unit.get("special_rules", []))
+        weapons = list(_weapons(unit.get("weapon")))
+        for group in unit.get("upgrade_groups", []):
+            for option in group.get("options", []):
+                rules.extend(option.get("special_rules", []))
+                weapons.extend(_weapons(option.get("weapon")))
+                mount = option.get("mount")
+                if isinstance(mount, dict):
+                    rules.extend(mount.get("special_rules", []))
+                    weapons.extend(_weapons(mount.get("weapon")))
+
+        for rule in rules:
+            self._index_text("rule", _rule_name(rule), unit_id)
+        for weapon in weapons:
+            self._index_text("weapon", weapon.get("name", ""), unit_id)
+            for rule in weapon.get("special_rules", []):
+                self._index_text("rule", _rule_name(rule), unit_id)
+            self._add_weapon_value("weapon_ap", weapon.get("armor_piercing", 0), unit_id)
+            self._add_weapon_value("weapon_attacks", weapon.get("attacks"), unit_id)
+            weapon_range = weapon.get("range")
+            self._add_weapon_value("weapon_range", 0 if isinstance(weapon_range, str) else weapon_range, unit_id)
+
+    def _index_text(self, field: str, text: str, unit_id: int) -> None:
+        postings = self._postings[field]
+        for token in tokenize(text):
+            postings.setdefault(token, set()).add(unit_id)
+
+    def _add_weapon_value(self, attribute: str, value: Any, unit_id: int) -> None:
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            self._columns[attribute].append((value, unit_id))
+
+
+def _weapons(value: Any) -> Iterable[dict[str, Any]]:
+    if isinstance(value, dict):
+        return [value] if value else []
+    if isinstance(value, list):
+        return [weapon for weapon in value if isinstance(weapon, dict)]
+    return []
+
+
+def _rule_name(rule: Any) -> str:
+    # "Effrayant (2)" est indexé sous "effrayant" : le paramètre ne sert pas à chercher.
+    name = rule if isinstance(rule, str) else rule.get("name", "") if isinstance(rule, dict) else ""
+    return name.split("(", 1)[0]
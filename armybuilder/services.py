@@ -1,10 +1,19 @@
 import math
-from functools import lru_cache
+import threading
 from pathlib import Path
 from typing import Any
 
-from armybuilder.config import GAME_CONFIG
-from repositories import CommonRulesRepository, JsonFactionRepository
+from armybuilder.catalog import CatalogVersion, CatalogWatcher, FactionCatalogStore, PackedCatalogStore
+from armybuilder.builder import ArmyAutoBuilder
+from armybuilder.combat import NUMPY_AVAILABLE, UpgradeEfficiency
+from armybuilder.config import CATALOG_PACK_PATH, CATALOG_WATCH_INTERVAL, GAME_CONFIG
+from armybuilder.configurations import FactionConfigurations
+from armybuilder.export_jobs import content_hash
+from armybuilder.labels import FactionLabels
+from armybuilder.profiling import profiled
+from armybuilder.requirements import FactionRequirements
+from armybuilder.search import UnitSearchIndex
+from repositories import JsonFactionRepository
 
 
 FactionData = dict[str, Any]
@@ -14,18 +23,118 @@ FactionsByGame = dict[str, dict[str, FactionData]]
 class FactionCatalogService:
     """Access layer for faction and common rules data."""
 
-    def __init__(self, base_dir: Path) -> None:
+    def __init__(self, base_dir: Path, pack_path: str | Path | None = None) -> None:
         self.base_dir = Path(base_dir)
         self.faction_repository = JsonFactionRepository(self.base_dir)
-        self.common_rules_repository = CommonRulesRepository(self.base_dir)
+        self.common_rules_repository = self.faction_repository.common_rules_repository
+        pack_path = CATALOG_PACK_PATH if pack_path is None else pack_path
+        if pack_path:
+            self.store = PackedCatalogStore(self.base_dir / pack_path)
+        else:
+            self.store = FactionCatalogStore(self.faction_repository)
+        self.watcher = CatalogWatcher(self.store, CATALOG_WATCH_INTERVAL)
+
+    @classmethod
+    def shared(cls, base_dir: Path) -> "FactionCatalogService":
+        """Process-wide instance: every session reads the same parsed catalog."""
+        key = Path(base_dir).resolve()
+        with _SHARED_LOCK:
+            service = _SHARED_SERVICES.get(key)
+            if service is None:
+                service = _SHARED_SERVICES[key] = cls(key)
+        return service
+
+    def current_version(self) -> CatalogVersion:
+        return self.store.current()
+
+    def start_watching(self) -> None:
+        self.watcher.start()
 
-    @lru_cache(maxsize=1)
     def load_factions(self) -> tuple[FactionsByGame, list[str]]:
-        factions, games = self.faction_repository.load_catalog()
-        return factions, games or list(GAME_CONFIG.keys())
+        version = self.current_version()
+        return version.factions, version.games or list(GAME_CONFIG.keys())
 
-    @lru_cache(maxsize=1)
+    def get_faction(self, game: str, faction: str) -> FactionData | None:
+        return self.current_version().get_faction(game, faction)
+
+    @profiled("catalog.load_generic_rules")
     def load_generic_rules(self) -> dict[str, str]:
+        return self.current_version().derive("generic_rules", self._build_generic_rules)
+
+    @profiled("catalog.search_index")
+    def search_index(self, version: CatalogVersion | None = None) -> UnitSearchIndex:
+        """Unit search index of ``version`` (current by default), built once per version."""
+        return (version or self.current_version()).derive("unit_search", UnitSearchIndex.from_catalog)
+
+    @profiled("catalog.labels")
+    def labels(self, game: str, faction: str, version: CatalogVersion | None = None) -> FactionLabels | None:
+        """Display labels of a faction's units and options, built once per version."""
+        version = version or self.current_version()
+        faction_data = version.get_faction(game, faction)
+        if faction_data is None:
+            return None
+        return version.derive(f"labels:{game}:{faction}", lambda _version: FactionLabels(faction_data))
+
+    @profiled("catalog.requirements")
+    def requirements(self, game: str, faction: str, version: CatalogVersion | None = None) -> FactionRequirements | None:
+        """Upgrade-group dependency graphs of a faction's units (and their issues), built once per version."""
+        version = version or self.current_version()
+        faction_data = version.get_faction(game, faction)
+        if faction_data is None:
+            return None
+        labels = self.labels(game, faction, version)
+        return version.derive(f"requirements:{game}:{faction}", lambda _version: FactionRequirements(faction_data, labels))
+
+    def export_key(self, kind: str, game: str, faction: str, version: CatalogVersion | None = None) -> str:
+        """Content hash of a faction export, computed once per version (the export queue's job key)."""
+        version = version or self.current_version()
+        return version.derive(
+            f"export_key:{kind}:{game}:{faction}",
+            lambda _version: content_hash(kind, version.get_faction(game, faction)),
+        )
+
+    @profiled("catalog.upgrade_efficiency")
+    def upgrade_efficiency(
+        self, game: str, faction: str, version: CatalogVersion | None = None
+    ) -> UpgradeEfficiency | None:
+        """Expected-wounds scores of a faction's weapon options (None without NumPy)."""
+        version = version or self.current_version()
+        faction_data = version.get_faction(game, faction)
+        if faction_data is None or not NUMPY_AVAILABLE:
+            return None
+        return version.derive(
+            f"upgrade_efficiency:{game}:{faction}", lambda _version: UpgradeEfficiency(faction_data)
+        )
+
+    @profiled("catalog.configurations")
+    def configurations(
+        self, game: str, faction: str, version: CatalogVersion | None = None
+    ) -> FactionConfigurations | None:
+        """Enumerated configuration spaces of a faction's units (None without NumPy)."""
+        version = version or self.current_version()
+        faction_data = version.get_faction(game, faction)
+        if faction_data is None or not NUMPY_AVAILABLE:
+            return None
+        return version.derive(
+            f"configurations:{game}:{faction}", lambda _version: FactionConfigurations(faction_data)
+        )
+
+    @profiled("catalog.auto_builder")
+    def auto_builder(
+        self, game: str, faction: str, version: CatalogVersion | None = None
+    ) -> ArmyAutoBuilder | None:
+        """List solver for a faction over every unit configuration, shared per catalog version (None without NumPy)."""
+        version = version or self.current_version()
+        faction_data = version.get_faction(game, faction)
+        if faction_data is None or not NUMPY_AVAILABLE or game not in GAME_CONFIG:
+            return None
+        configurations = self.configurations(game, faction, version)
+        return version.derive(
+            f"auto_builder:{game}:{faction}",
+            lambda _version: ArmyAutoBuilder(faction_data["units"], game, configurations=configurations.unit_configs),
+        )
+
+    def _build_generic_rules(self, version: CatalogVersion) -> dict[str, str]:
         result: dict[str, str] = {}
         for rule in self.common_rules_repository.load_rules():
             description = rule.get("description", "")
@@ -35,6 +144,10 @@ class FactionCatalogService:
         return result
 
 
+_SHARED_LOCK = threading.Lock()
+_SHARED_SERVICES: dict[Path, FactionCatalogService] = {}
+
+
 class ArmyRuleValidator:
     """Pure domain validation for game list-building rules."""
 
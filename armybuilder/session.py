@@ -1,7 +1,23 @@
+import re
+import sys
+import threading
+import time
 from collections.abc import MutableMapping
 from typing import Any
 
-from armybuilder.config import DEFAULT_SESSION_STATE
+from armybuilder.army_view import ArmySummaryCache, ArmyUnitSummary
+from armybuilder.config import DEFAULT_SESSION_STATE, FOOTPRINT_SAMPLE_RUNS, FOOTPRINT_TTL_SECONDS
+from armybuilder.fingerprints import FingerprintCache
+from armybuilder.history import ArmyEditLog, ArmyUnit
+
+
+DRAFT_KEY_PATTERN = re.compile(r"^(draft_\d+)(?:_|$)")
+
+# Clés qui référencent directement les données du catalogue partagé :
+# elles ne sont pas comptées dans l'empreinte mémoire de la session.
+SHARED_CATALOG_KEYS = ("units", "faction_special_rules", "faction_spells", "catalog_version")
+
+ARMY_HISTORY_LIMIT = 50
 
 
 class SessionStateManager:
@@ -16,9 +32,10 @@ class SessionStateManager:
                 self.session_state[key] = self._clone_default(value)
 
     def reset_army(self) -> None:
-        self.session_state["army_list"] = []
-        self.session_state["army_cost"] = 0
+        self._reset_history([])
         self.session_state["unit_selections"] = {}
+        self.session_state["saved_list_id"] = None
+        self.prune_drafts()
 
     def apply_faction_selection(
         self,
@@ -27,6 +44,7 @@ class SessionStateManager:
         points: int,
         list_name: str,
         faction_data: dict[str, Any],
+        catalog_version: Any = None,
     ) -> None:
         self.session_state["game"] = game
         self.session_state["faction"] = faction
@@ -37,23 +55,166 @@ class SessionStateManager:
             "faction_special_rules", []
         )
         self.session_state["faction_spells"] = faction_data.get("spells", {})
-        self.session_state["faction_data"] = faction_data
+        # Ancienne copie complète de la faction : la fiche est relue depuis le catalogue.
+        self.session_state.pop("faction_data", None)
+        # Version du catalogue figée pour la session (rechargement à chaud sans incohérence)
+        self.session_state["catalog_version"] = catalog_version
 
     def load_qr_army_if_pending(self) -> None:
         if self.session_state.get("_qr_army_list"):
-            self.session_state["army_list"] = self.session_state.pop("_qr_army_list")
-            self.session_state["army_cost"] = self.session_state.pop("_qr_army_cost", 0)
+            self._reset_history(self.session_state.pop("_qr_army_list"))
+            self.session_state.pop("_qr_army_cost", None)
             self.session_state["unit_selections"] = {}
+            self.prune_drafts()
 
     def load_imported_army(self, imported_data: dict[str, Any]) -> None:
         army_list = imported_data["army_list"]
         self.session_state["list_name"] = imported_data.get(
             "list_name", self.session_state.get("list_name", "")
         )
-        self.session_state["army_list"] = army_list
-        self.session_state["army_cost"] = imported_data.get(
-            "army_cost", sum(unit["cost"] for unit in army_list)
-        )
+        self._reset_history(army_list)
+
+    def load_saved_army(self, stored: dict[str, Any]) -> None:
+        self.load_imported_army(stored)
+        self.session_state["saved_list_id"] = stored.get("id")
+
+    def add_unit(self, unit: ArmyUnit) -> None:
+        self._edit_log().add(unit)
+        self._sync_army()
+
+    def add_units(self, units: list[ArmyUnit], label: str) -> None:
+        """Add several units as a single undoable edit."""
+        self._edit_log().add_many(units, label)
+        self._sync_army()
+
+    def remove_unit(self, index: int) -> None:
+        self._edit_log().remove(index)
+        self._sync_army()
+
+    def duplicate_unit(self, index: int) -> None:
+        self._edit_log().duplicate(index)
+        self._sync_army()
+
+    def undo(self) -> bool:
+        changed = self._edit_log().undo()
+        if changed:
+            self._sync_army()
+        return changed
+
+    def redo(self) -> bool:
+        changed = self._edit_log().redo()
+        if changed:
+            self._sync_army()
+        return changed
+
+    def army_history(self) -> ArmyEditLog:
+        return self._edit_log()
+
+    def army_summaries(self) -> list[ArmyUnitSummary]:
+        """Display summary of each army unit, aligned with ``army_list``."""
+        cache = self.session_state.get("army_summaries")
+        if not isinstance(cache, ArmySummaryCache):
+            cache = self.session_state["army_summaries"] = ArmySummaryCache()
+        return cache.sync(self.session_state.get("army_list", []))
+
+    def army_fingerprint(self) -> str:
+        """Stable content key of ``army_list`` (exports, caches), hashing only new units."""
+        cache = self.session_state.get("army_fingerprints")
+        if not isinstance(cache, FingerprintCache):
+            cache = self.session_state["army_fingerprints"] = FingerprintCache()
+        return cache.army(self.session_state.get("army_list", []))
+
+    def select_draft(self, unit_name: str) -> str:
+        """Return the draft key for the selected unit, evicting superseded drafts."""
+        if self.session_state.get("draft_unit_name") != unit_name:
+            self.session_state["draft_counter"] = self.session_state.get("draft_counter", 0) + 1
+            self.session_state["draft_unit_name"] = unit_name
+        draft_key = f"draft_{self.session_state['draft_counter']}"
+        self.prune_drafts(keep=draft_key)
+        self.session_state.setdefault("unit_selections", {}).setdefault(draft_key, {})
+        return draft_key
+
+    def finish_draft(self) -> None:
+        """Close the current draft so the next unit starts from a blank configuration."""
+        self.session_state["draft_counter"] = self.session_state.get("draft_counter", 0) + 1
+        self.session_state["draft_unit_name"] = ""
+        self.prune_drafts()
+
+    def prune_drafts(self, keep: str | None = None) -> int:
+        """Drop selections and widget keys of every draft other than ``keep``."""
+        removed = 0
+        selections = self.session_state.get("unit_selections", {})
+        for draft_key in [k for k in selections if k != keep]:
+            del selections[draft_key]
+            removed += 1
+
+        stale_widget_keys = []
+        for key in list(self.session_state.keys()):
+            match = DRAFT_KEY_PATTERN.match(str(key))
+            if match and match.group(1) != keep:
+                stale_widget_keys.append(key)
+        for key in stale_widget_keys:
+            del self.session_state[key]
+        return removed + len(stale_widget_keys)
+
+    def footprint(self) -> dict[str, int]:
+        """Approximate memory owned by this session, shared catalog data excluded."""
+        keys = list(self.session_state.keys())
+        draft_widgets = sum(1 for key in keys if DRAFT_KEY_PATTERN.match(str(key)))
+        seen: set[int] = set()
+        size = 0
+        for key in keys:
+            if key in SHARED_CATALOG_KEYS:
+                continue
+            size += _deep_sizeof(self.session_state[key], seen)
+        return {
+            "keys": len(keys),
+            "drafts": len(self.session_state.get("unit_selections", {})),
+            "draft_widgets": draft_widgets,
+            "army_units": len(self.session_state.get("army_list", [])),
+            "bytes": size,
+        }
+
+    def sample_footprint(
+        self, session_id: str, registry: "SessionFootprintRegistry | None" = None, every: int = FOOTPRINT_SAMPLE_RUNS
+    ) -> bool:
+        """Report ``footprint()`` after an army edit or every ``every`` runs; True when measured.
+
+        The measure walks the whole session state (history, caches): it is
+        not paid on every rerun.
+        """
+        runs = self.session_state.get("_footprint_runs", 0) + 1
+        revision = self.session_state.get("army_revision", 0)
+        due = runs >= every or self.session_state.get("_footprint_revision") != revision
+        self.session_state["_footprint_runs"] = 0 if due else runs
+        if not due:
+            (registry or SESSION_FOOTPRINTS).touch(session_id)
+            return False
+        self.session_state["_footprint_revision"] = revision
+        (registry or SESSION_FOOTPRINTS).record(session_id, self.footprint())
+        return True
+
+    def _edit_log(self) -> ArmyEditLog:
+        log = self.session_state.get("army_history")
+        army_list = self.session_state.get("army_list", [])
+        if not isinstance(log, ArmyEditLog) or len(log.current) != len(army_list):
+            log = self._reset_history(army_list)
+        return log
+
+    def _reset_history(self, army_list: list[ArmyUnit]) -> ArmyEditLog:
+        log = ArmyEditLog(army_list, max_history=ARMY_HISTORY_LIMIT)
+        self.session_state["army_history"] = log
+        self._sync_army(log)
+        return log
+
+    def _sync_army(self, log: ArmyEditLog | None = None) -> None:
+        snapshot = (log or self.session_state["army_history"]).current
+        self.session_state["army_list"] = snapshot.to_list()
+        self.session_state["army_cost"] = snapshot.cost
+        self.session_state["army_revision"] = self.session_state.get("army_revision", 0) + 1
+        # Résumés d'affichage et empreintes construits à l'ajout, pas à chaque rendu de la liste
+        self.army_summaries()
+        self.army_fingerprint()
 
     @staticmethod
     def _clone_default(value: Any) -> Any:
@@ -62,3 +223,70 @@ class SessionStateManager:
         if isinstance(value, dict):
             return dict(value)
         return value
+
+
+class SessionFootprintRegistry:
+    """Process-wide view of the latest footprint reported by each session.
+
+    Streamlit does not tell when a session ends: entries not seen for
+    ``ttl`` seconds are dropped on the next record or summary.
+    """
+
+    def __init__(self, ttl: float = FOOTPRINT_TTL_SECONDS) -> None:
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._footprints: dict[str, dict[str, int]] = {}
+        self._seen: dict[str, float] = {}
+
+    def record(self, session_id: str, footprint: dict[str, int], now: float | None = None) -> None:
+        now = time.time() if now is None else now
+        with self._lock:
+            self._footprints[session_id] = dict(footprint)
+            self._seen[session_id] = now
+            self._expire(now)
+
+    def touch(self, session_id: str, now: float | None = None) -> None:
+        """The session is alive but was not measured on this run."""
+        with self._lock:
+            if session_id in self._seen:
+                self._seen[session_id] = time.time() if now is None else now
+
+    def forget(self, session_id: str) -> None:
+        with self._lock:
+            self._footprints.pop(session_id, None)
+            self._seen.pop(session_id, None)
+
+    def summary(self, now: float | None = None) -> dict[str, int]:
+        with self._lock:
+            self._expire(time.time() if now is None else now)
+            sizes = sorted(fp.get("bytes", 0) for fp in self._footprints.values())
+        if not sizes:
+            return {"sessions": 0, "total_bytes": 0, "max_bytes": 0, "p95_bytes": 0}
+        return {
+            "sessions": len(sizes),
+            "total_bytes": sum(sizes),
+            "max_bytes": sizes[-1],
+            "p95_bytes": sizes[min(len(sizes) - 1, int(len(sizes) * 0.95))],
+        }
+
+    def _expire(self, now: float) -> None:
+        for session_id in [key for key, seen in self._seen.items() if now - seen > self.ttl]:
+            del self._seen[session_id]
+            self._footprints.pop(session_id, None)
+
+
+SESSION_FOOTPRINTS = SessionFootprintRegistry()
+
+
+def _deep_sizeof(value: Any, seen: set[int]) -> int:
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        for key, item in value.items():
+            size += _deep_sizeof(key, seen) + _deep_sizeof(item, seen)
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        for item in value:
+            size += _deep_sizeof(item, seen)
+    return size
@@ -0,0 +1,260 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any
+
+from armybuilder.combat import NUMPY_AVAILABLE, RENDING_AP, parse_rule
+from armybuilder.config import PROCESS_START_METHOD
+from armybuilder.lazy import lazy_import
+from armybuilder.weapon_counts import weapon_count
+
+np = lazy_import("numpy")
+
+
+UnitData = dict[str, Any]
+
+DEFAULT_SAMPLES = 100_000
+# Les tirages sont faits par lots pour borner la mémoire à quelques Mo par lot.
+BATCH_SIZE = 250_000
+REGENERATION_ROLL = 5
+
+
+class WeaponStats:
+    """Attack profile of one weapon line of a unit, with its parsed rules."""
+
+    __slots__ = ("name", "attacks", "quality", "ap", "deadly", "blast", "rending", "bane", "smash", "reap", "purge", "shred")
+
+    def __init__(self, weapon: dict[str, Any], quality: int, count: int) -> None:
+        rules = dict(parse_rule(rule) for rule in weapon.get("special_rules", []))
+        self.name = weapon.get("name", "")
+        self.attacks = int(weapon.get("attacks") or 0) * max(int(count), 1)
+        self.quality = 2 if "Fiable" in rules else int(quality or 6)
+        self.ap = int(weapon.get("armor_piercing") or 0)
+        self.deadly = rules.get("Mortel") or 1
+        self.blast = rules.get("Explosion") or 1
+        self.rending = "Perforant" in rules
+        self.bane = "Fléau" in rules
+        self.smash = "Fracas" in rules
+        self.reap = "Fauchage" in rules
+        self.purge = "Purge" in rules
+        self.shred = "Lacération" in rules or "Éclatement" in rules or "Eclatement" in rules
+
+    @property
+    def ignores_regeneration(self) -> bool:
+        return self.rending or self.bane or self.smash or self.purge
+
+
+class UnitProfile:
+    """Combat stats of a unit (catalog entry or army list entry), picklable for workers."""
+
+    def __init__(
+        self,
+        name: str,
+        quality: int,
+        defense: int,
+        models: int,
+        tough: int,
+        weapons: list[WeaponStats],
+        regeneration: bool = False,
+    ) -> None:
+        self.name = name
+        self.quality = quality
+        self.defense = defense
+        self.models = max(models, 1)
+        self.tough = max(tough, 1)
+        self.weapons = weapons
+        self.regeneration = regeneration
+
+    @property
+    def wounds(self) -> int:
+        return self.models * self.tough
+
+    @classmethod
+    def from_unit(cls, unit: UnitData) -> "UnitProfile":
+        models = 1 if unit.get("type") == "hero" else int(unit.get("size") or 1)
+        rules = dict(parse_rule(rule) for rule in unit.get("special_rules", []))
+        tough = int(unit.get("coriace") or rules.get("Coriace") or 1)
+        quality = int(unit.get("quality") or 6)
+        weapons = [WeaponStats(weapon, quality, count) for weapon, count in _carried_weapons(unit, models)]
+        return cls(
+            unit.get("name", ""),
+            quality,
+            int(unit.get("defense") or 6),
+            models,
+            tough,
+            weapons,
+            regeneration="Régénération" in rules,
+        )
+
+
+class DamageDistribution:
+    """Sampled wounds dealt by one attack sequence, summarized."""
+
+    def __init__(self, wounds: Any, target: UnitProfile) -> None:
+        self.samples = len(wounds)
+        capped = np.minimum(wounds, target.wounds)
+        self.histogram = np.bincount(capped, minlength=target.wounds + 1) / max(self.samples, 1)
+        self.mean = float(wounds.mean()) if self.samples else 0.0
+        self.std = float(wounds.std()) if self.samples else 0.0
+        self.kill_chance = float(self.histogram[target.wounds]) if self.samples else 0.0
+        models_killed = np.minimum(wounds // target.tough, target.models)
+        self.models_killed = float(models_killed.mean()) if self.samples else 0.0
+        self.percentiles: dict[int, int] = {}
+        if self.samples:
+            quantiles = (5, 25, 50, 75, 95)
+            self.percentiles = dict(zip(quantiles, (int(value) for value in np.percentile(wounds, quantiles))))
+
+    def at_least(self, wounds: int) -> float:
+        """Probability of dealing ``wounds`` or more (capped at the target's total)."""
+        return float(self.histogram[min(wounds, len(self.histogram) - 1):].sum())
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "samples": self.samples,
+            "mean": round(self.mean, 3),
+            "std": round(self.std, 3),
+            "kill_chance": round(self.kill_chance, 4),
+            "models_killed": round(self.models_killed, 3),
+            "percentiles": self.percentiles,
+            "histogram": [round(float(value), 5) for value in self.histogram],
+        }
+
+
+class BattleSimulator:
+    """Monte Carlo attack sequences with batched NumPy dice.
+
+    Dice are not rolled one by one: for each weapon the outcome counts of
+    every sample (miss / hit / unmodified 6, block / fail / unmodified 1...)
+    are drawn with multinomial and binomial draws over the whole batch.
+    """
+
+    def __init__(self, seed: int | None = None) -> None:
+        _require_numpy()
+        self.rng = np.random.default_rng(seed)
+
+    def simulate(self, attacker: UnitProfile, target: UnitProfile, samples: int = DEFAULT_SAMPLES) -> DamageDistribution:
+        chunks = []
+        remaining = samples
+        while remaining > 0:
+            size = min(remaining, BATCH_SIZE)
+            chunks.append(self._roll(attacker, target, size))
+            remaining -= size
+        wounds = np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.int64)
+        return DamageDistribution(wounds, target)
+
+    def _roll(self, attacker: UnitProfile, target: UnitProfile, size: int) -> Any:
+        rng = self.rng
+        total = np.zeros(size, dtype=np.int64)
+        for weapon in attacker.weapons:
+            if weapon.attacks <= 0:
+                continue
+            quality = min(max(weapon.quality, 2), 7)
+            p_hit = max(6 - quality, 0) / 6
+            outcomes = rng.multinomial(weapon.attacks, [1 - p_hit - 1 / 6, p_hit, 1 / 6], size=size)
+            blast = weapon.blast
+            if weapon.smash and target.defense >= 5:
+                blast = max(blast, 3)
+            blast = min(blast, target.models)
+
+            ap = weapon.ap
+            if weapon.reap and target.defense <= 3:
+                ap += 2
+            if weapon.purge and target.defense <= 4:
+                ap += 1
+            ap_sixes = max(ap, RENDING_AP) if weapon.rending else ap
+
+            unblocked = np.zeros(size, dtype=np.int64)
+            for hits, hit_ap in ((outcomes[:, 1] * blast, ap), (outcomes[:, 2] * blast, ap_sixes)):
+                failed, natural_ones = self._block(hits, target.defense + hit_ap, weapon.bane)
+                unblocked += failed
+                if weapon.shred:
+                    unblocked += natural_ones
+
+            if target.regeneration and not weapon.ignores_regeneration:
+                unblocked -= rng.binomial(unblocked, (7 - REGENERATION_ROLL) / 6)
+            # Mortel (X) : chaque blessure est multipliée, sans déborder sur la figurine suivante.
+            total += unblocked * min(weapon.deadly, target.tough)
+        return total
+
+    def _block(self, hits: Any, need: int, bane: bool) -> tuple[Any, Any]:
+        """Failed blocks among ``hits`` and, of those, the unmodified 1s."""
+        faces = 1 if need > 6 else 7 - max(need, 2)
+        p_block = faces / 6
+        if bane:
+            # Fléau : les 6 non modifiés sont relancés.
+            p_block = (faces - 1) / 6 + p_block / 6
+        p_one = 1 / 6
+        if bane:
+            p_one += p_one / 6
+        outcomes = self.rng.multinomial(hits, [p_block, p_one, max(1 - p_block - p_one, 0.0)])
+        return outcomes[:, 1] + outcomes[:, 2], outcomes[:, 1]
+
+
+def simulate_matchup(
+    army: list[UnitData],
+    opponents: list[UnitData],
+    samples: int = DEFAULT_SAMPLES,
+    seed: int | None = None,
+    workers: int | None = None,
+) -> list[list[dict[str, Any]]]:
+    """Every unit of ``army`` attacking every unit of ``opponents``.
+
+    Pairs run in a process pool (``workers`` processes, CPU count by
+    default; 0 runs inline). Returns ``result[attacker][target]`` summaries.
+    """
+    _require_numpy()
+    attackers = [UnitProfile.from_unit(unit) for unit in army]
+    targets = [UnitProfile.from_unit(unit) for unit in opponents]
+    seeds = np.random.SeedSequence(seed).spawn(len(attackers) * len(targets))
+    tasks = [
+        (attacker, target, samples, seeds[row * len(targets) + column])
+        for row, attacker in enumerate(attackers)
+        for column, target in enumerate(targets)
+    ]
+
+    if workers == 0 or len(tasks) <= 1:
+        results = [_simulate_pair(task) for task in tasks]
+    else:
+        context = multiprocessing.get_context(PROCESS_START_METHOD)
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count(), mp_context=context) as pool:
+            results = list(pool.map(_simulate_pair, tasks))
+    return [results[row * len(targets):(row + 1) * len(targets)] for row in range(len(attackers))]
+
+
+def _carried_weapons(unit: UnitData, models: int) -> list[tuple[dict[str, Any], int]]:
+    """Weapons of the unit and its mount with their copy count (same rule as the configurator).
+
+    Army-list weapons carry ``_count`` after a replacement or a count
+    upgrade; an ``_upgraded`` weapon without one is a single copy, and only
+    base weapons without a count are carried by every model.
+    """
+    weapons = _weapon_list(unit.get("weapon"))
+    base_names = {weapon.get("name") for weapon in weapons if not weapon.get("_upgraded") and not weapon.get("_mount_weapon")}
+    carried = [
+        (weapon, weapon_count(weapon, models, set() if weapon.get("_upgraded") else base_names))
+        for weapon in weapons
+    ]
+    mount = unit.get("mount")
+    mount_data = mount.get("mount") if isinstance(mount, dict) else None
+    if isinstance(mount_data, dict):
+        carried += [(weapon, weapon_count(weapon, models, set())) for weapon in _weapon_list(mount_data.get("weapon"))]
+    return carried
+
+
+def _weapon_list(value: Any) -> list[dict[str, Any]]:
+    if isinstance(value, dict):
+        return [value] if value else []
+    if isinstance(value, list):
+        return [weapon for weapon in value if isinstance(weapon, dict)]
+    return []
+
+
+def _require_numpy() -> None:
+    if not NUMPY_AVAILABLE:
+        raise ImportError("NumPy est requis pour la simulation (pip install numpy).")
+
+
+def _simulate_pair(task: tuple[UnitProfile, UnitProfile, int, Any]) -> dict[str, Any]:
+    attacker, target, samples, seed = task
+    distribution = BattleSimulator(seed).simulate(attacker, target, samples)
+    return {"attacker": attacker.name, "target": target.name, **distribution.to_dict()}
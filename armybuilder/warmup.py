@@ -0,0 +1,241 @@
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections.abc import Callable, Sequence
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any
+
+from armybuilder.assets import GAME_COVERS, cover_data_uri
+from armybuilder.config import HEALTH_FILE, HEALTH_PORT, WORKER_INDEX
+from armybuilder.export_jobs import EXPORT_JOBS, ExportJobQueue
+from armybuilder.profiling import span
+from armybuilder.services import FactionCatalogService
+from armybuilder.session import SESSION_FOOTPRINTS
+from repositories.json_codec import CODEC
+
+
+# Produits dérivés préparés pour chaque faction, dans l'ordre (mêmes méthodes que les pages).
+FACTION_PRODUCTS = ("labels", "requirements", "upgrade_efficiency", "auto_builder")
+# Un port par worker sur l'hôte (0 = pas d'endpoint).
+WORKER_HEALTH_PORT = HEALTH_PORT + WORKER_INDEX if HEALTH_PORT else 0
+
+_SHARED_LOCK = threading.Lock()
+_SHARED_WARMUPS: dict[Path, "CatalogWarmup"] = {}
+
+
+class CatalogWarmup:
+    """Builds a worker's shared caches once, in a background thread, then reports ready.
+
+    Each step goes through the same service methods as the pages, so the
+    first session finds the catalog version, rule index, search index,
+    per-faction labels, requirement graphs and solvers, faction sheet HTML
+    and cover images already built. A failing step is recorded and the
+    others still run: the worker is ready, just colder, unless the catalog
+    itself failed to load (status ``"failed"``, never ready). ``health()``
+    is what the health file and the local ``/health`` endpoint publish.
+
+    Streamlit only runs ``app.py`` on the first page load: to warm up at
+    boot, launch the server through ``python -m armybuilder.warmup``.
+    """
+
+    def __init__(
+        self,
+        catalog: Any,
+        base_dir: Path,
+        export_jobs: ExportJobQueue = EXPORT_JOBS,
+        health_path: str | Path | None = None,
+    ) -> None:
+        self.catalog = catalog
+        self.base_dir = Path(base_dir)
+        self.export_jobs = export_jobs
+        self.health_path = Path(health_path) if health_path else None
+        self.ready = threading.Event()
+        self.finished = threading.Event()
+        self.status = "idle"
+        self.steps: dict[str, float] = {}
+        self.errors: list[str] = []
+        self.catalog_version: int | None = None
+        self.started_at: float | None = None
+        self.finished_at: float | None = None
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._server: ThreadingHTTPServer | None = None
+
+    @classmethod
+    def shared(cls, catalog: Any, base_dir: Path) -> "CatalogWarmup":
+        """Process-wide warmup of ``base_dir``: started once, whatever the number of sessions."""
+        key = Path(base_dir).resolve()
+        with _SHARED_LOCK:
+            warmup = _SHARED_WARMUPS.get(key)
+            if warmup is None:
+                health_path = HEALTH_FILE.format(worker=WORKER_INDEX, pid=os.getpid()) if HEALTH_FILE else None
+                warmup = _SHARED_WARMUPS[key] = cls(catalog, key, health_path=health_path)
+        return warmup
+
+    def start(self, health_port: int = WORKER_HEALTH_PORT) -> bool:
+        """Launch the warmup thread (and the health endpoint); False when already started."""
+        with self._lock:
+            if self._thread is not None:
+                return False
+            self._thread = threading.Thread(target=self.run, name="catalog-warmup", daemon=True)
+            self._thread.start()
+        if health_port:
+            self.serve_health(health_port)
+        return True
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """Wait for the warmup to finish; True when the worker is ready."""
+        self.finished.wait(timeout)
+        return self.ready.is_set()
+
+    def run(self) -> None:
+        self.started_at = time.time()
+        self._set_status("warming")
+        version = self._step("catalog", self.catalog.current_version)
+        if version is not None:
+            self.catalog_version = version.number
+            self._step("generic_rules", self.catalog.load_generic_rules)
+            self._step("search_index", lambda: self.catalog.search_index(version))
+            factions = [(game, faction) for game in version.games for faction in version.factions.get(game, {})]
+            for product in FACTION_PRODUCTS:
+                build = getattr(self.catalog, product)
+                self._step(product, lambda: [build(game, faction, version) for game, faction in factions])
+            self._step("faction_sheets", lambda: self._faction_sheets(version, factions))
+        self._step("covers", lambda: [cover_data_uri(self.base_dir, game) for game in GAME_COVERS])
+        self.finished_at = time.time()
+        # Sans catalogue rien n'est servi : le worker ne doit pas recevoir de trafic.
+        if version is not None:
+            self.ready.set()
+        self._set_status("ready" if version is not None else "failed")
+        self.finished.set()
+
+    def health(self) -> dict[str, Any]:
+        return {
+            "status": self.status,
+            "ready": self.ready.is_set(),
+            "pid": os.getpid(),
+            "catalog_version": self.catalog_version,
+            "duration_ms": round((self.finished_at - self.started_at) * 1000, 1) if self.finished_at and self.started_at else None,
+            "steps_ms": dict(self.steps),
+            "errors": list(self.errors),
+            "sessions": SESSION_FOOTPRINTS.summary(),
+            "updated_at": datetime.now().isoformat(timespec="seconds"),
+        }
+
+    def serve_health(self, port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer | None:
+        """``GET /health`` on ``host:port``: 200 once warm, 503 before (JSON body either way).
+
+        A port already taken (another worker on the host) is reported in
+        ``errors`` instead of failing the page that started the warmup.
+        """
+        warmup = self
+
+        class HealthHandler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                if self.path.split("?")[0] not in ("/", "/health"):
+                    self.send_error(404)
+                    return
+                body = CODEC.dumpb(warmup.health())
+                self.send_response(200 if warmup.ready.is_set() else 503)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+        with self._lock:
+            if self._server is None:
+                try:
+                    self._server = ThreadingHTTPServer((host, port), HealthHandler)
+                except OSError as error:
+                    self.errors.append(f"health : port {port} indisponible ({error.strerror or error})")
+                    self._write_health()
+                    return None
+                threading.Thread(target=self._server.serve_forever, name="warmup-health", daemon=True).start()
+        return self._server
+
+    def shutdown(self) -> None:
+        with self._lock:
+            server, self._server = self._server, None
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+
+    def _faction_sheets(self, version: Any, factions: list[tuple[str, str]]) -> None:
+        # Même clé que la barre latérale : le premier clic télécharge une fiche déjà rendue.
+        keys = [
+            self.export_jobs.submit(
+                "faction_html",
+                version.get_faction(game, faction),
+                key=self.catalog.export_key("faction_html", game, faction, version),
+            )
+            for game, faction in factions
+        ]
+        for key in keys:
+            self.export_jobs.result(key, timeout=None)
+
+    def _step(self, name: str, action: Callable[[], Any]) -> Any:
+        started = time.perf_counter()
+        try:
+            with span(f"warmup.{name}"):
+                return action()
+        except Exception as error:
+            self.errors.append(f"{name} : {error}")
+            return None
+        finally:
+            self.steps[name] = round((time.perf_counter() - started) * 1000, 1)
+            self._write_health()
+
+    def _set_status(self, status: str) -> None:
+        self.status = status
+        self._write_health()
+
+    def _write_health(self) -> None:
+        if self.health_path is None:
+            return
+        self.health_path.parent.mkdir(parents=True, exist_ok=True)
+        handle, temp_path = tempfile.mkstemp(dir=self.health_path.parent, prefix=self.health_path.name, suffix=".tmp")
+        try:
+            with os.fdopen(handle, "wb") as file:
+                file.write(CODEC.dumpb(self.health(), pretty=True))
+            os.replace(temp_path, self.health_path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    """Boot entry point: warm the caches in this process, then hand it over to Streamlit.
+
+    ``python -m armybuilder.warmup [options Streamlit...]`` replaces
+    ``streamlit run app.py``: the health endpoint answers (503) as soon as
+    the process starts and the first visitor finds the caches built.
+    ``--check`` only warms up and prints the health report (exit 1 if not ready).
+    """
+    parser = argparse.ArgumentParser(description="Préchauffe les caches partagés puis lance l'application Streamlit.")
+    parser.add_argument("--check", action="store_true", help="préchauffer, afficher l'état et quitter (sans Streamlit)")
+    parser.add_argument("--app", default=str(Path(__file__).resolve().parent.parent / "app.py"), help="script Streamlit (défaut : app.py)")
+    args, streamlit_args = parser.parse_known_args(argv)
+    base_dir = Path(args.app).resolve().parent
+    warmup = CatalogWarmup.shared(FactionCatalogService.shared(base_dir), base_dir)
+    if args.check:
+        warmup.run()
+        print(CODEC.dumps(warmup.health(), pretty=True))
+        return 0 if warmup.ready.is_set() else 1
+    warmup.start()
+    from streamlit.web import cli as streamlit_cli
+
+    # Même processus : app.py retrouve ce préchauffage via CatalogWarmup.shared.
+    sys.argv = ["streamlit", "run", args.app, *streamlit_args]
+    return streamlit_cli.main()
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
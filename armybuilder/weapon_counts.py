@@ -0,0 +1,120 @@
+from collections.abc import Sequence
+from typing import Any
+
+
+Weapon = dict[str, Any]
+
+
+def weapon_count(weapon: Weapon, unit_size: int, base_names: set[str]) -> int:
+    """Copies of ``weapon`` carried by the unit.
+
+    An explicit ``_count``/``count`` wins; a base weapon without one is
+    carried by every model; anything else is a single copy.
+    """
+    if "_count" in weapon:
+        return weapon["_count"]
+    if "count" in weapon:
+        return weapon["count"]
+    return unit_size if weapon.get("name") in base_names else 1
+
+
+class CountBounds:
+    """Arguments of one option's number input: ``limit`` is the budget left for it."""
+
+    __slots__ = ("min_value", "max_value", "value", "limit")
+
+    def __init__(self, min_value: int, max_value: int, value: int, limit: int) -> None:
+        self.min_value = min_value
+        self.max_value = max_value
+        self.value = value
+        self.limit = limit
+
+
+class WeaponCountAllocator:
+    """Budget of a ``variable_weapon_count`` group, kept up to date as counts are chosen.
+
+    ``counts`` are the current values of the group's inputs (options whose
+    requirements fail included: their value still uses up the budget).
+    Options are then settled in order with ``bounds`` / ``choose``: the
+    copies left of each weapon and the total already allocated are kept
+    incrementally, so each input costs O(1) and the final weapons are
+    built once, sharing every dict that no replacement touched.
+    """
+
+    def __init__(self, unit: dict[str, Any], group: dict[str, Any], weapons: list[Weapon], counts: Sequence[int]) -> None:
+        self.unit = unit
+        self.options = group.get("options", [])
+        self.unit_size = unit.get("size", 1)
+        self.base_names = {w.get("name") for w in unit.get("weapon", []) if isinstance(w, dict)}
+        self.counts = [int(count) for count in counts]
+        self._allocated = sum(self.counts)
+        self._weapons = list(weapons)
+        self._copies: dict[str, int] = {}
+        for weapon in self._weapons:
+            if isinstance(weapon, dict):
+                name = weapon.get("name")
+                self._copies[name] = self._copies.get(name, 0) + weapon_count(weapon, self.unit_size, self.base_names)
+        # Toutes les options partagent le max_count de la première : budget commun du groupe
+        self.budget = self.max_count(self.options[0].get("max_count", {}) if self.options else {})
+
+    def copies(self, weapon_name: str) -> int:
+        return self._copies.get(weapon_name, 0)
+
+    def max_count(self, config: Any) -> int:
+        config = config if isinstance(config, dict) else {}
+        mc_type = config.get("type", "size_based")
+        if mc_type == "fixed":
+            value = config.get("value", 1)
+        elif mc_type == "count_in_weapons":
+            value = self.copies(config.get("weapon_name", ""))
+        elif mc_type == "size_based":
+            value = min(config.get("value", self.unit_size), self.unit_size)
+        else:
+            value = self.unit_size
+        return max(value, 0)
+
+    def bounds(self, option_idx: int) -> CountBounds:
+        option = self.options[option_idx]
+        others = self._allocated - self.counts[option_idx]
+        limit = max(min(self.max_count(option.get("max_count", {})), self.budget - others), 0)
+        min_value = option.get("min_count", 0)
+        return CountBounds(min_value, max(limit, min_value), min(self.counts[option_idx], limit), limit)
+
+    def choose(self, option_idx: int, count: int) -> None:
+        """Settle option ``option_idx`` at ``count``: replaced weapons give way to the new ones."""
+        self._allocated += count - self.counts[option_idx]
+        self.counts[option_idx] = count
+        if count <= 0:
+            return
+        option = self.options[option_idx]
+        replaces = option.get("replaces", [])
+        if replaces:
+            self._weapons = self._replace(replaces, count)
+        weapon_data = option["weapon"]
+        new_weapons = weapon_data if isinstance(weapon_data, list) else [weapon_data] if isinstance(weapon_data, dict) else []
+        for weapon in new_weapons:
+            self._weapons.append({**weapon, "_count": count, "_replaces": replaces, "_upgraded": True})
+            self._copies[weapon.get("name")] = self._copies.get(weapon.get("name"), 0) + count
+
+    def weapons(self) -> list[Weapon]:
+        return self._weapons
+
+    def _replace(self, replaces: list[str], count: int) -> list[Weapon]:
+        remaining = count
+        kept = []
+        for weapon in self._weapons:
+            if not isinstance(weapon, dict) or weapon.get("name") not in replaces or remaining <= 0:
+                kept.append(weapon)
+                continue
+            name = weapon.get("name")
+            carried = weapon_count(weapon, self.unit_size, self.base_names)
+            if carried > remaining:
+                # Décrémenter le bon champ (arme de base sans compteur → on pose _count)
+                field = "count" if "count" in weapon and "_count" not in weapon else "_count"
+                kept.append({**weapon, field: carried - remaining})
+                self._copies[name] -= remaining
+                remaining = 0
+            else:
+                self._copies[name] -= carried
+                remaining -= carried
+        return kept
@@ -1,4 +1,5 @@
-from .faction_repository import JsonFactionRepository
+from .faction_repository import FactionFileError, JsonFactionRepository
 from .common_rules_repository import CommonRulesRepository
+from .army_list_repository import SqliteArmyListRepository
 
-__all__ = ["JsonFactionRepository", "CommonRulesRepository"]
+__all__ = ["FactionFileError", "JsonFactionRepository", "CommonRulesRepository", "SqliteArmyListRepository"]
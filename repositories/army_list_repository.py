@@ -0,0 +1,279 @@
+import hashlib
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+from repositories.json_codec import CODEC
+
+
+ArmyListSummary = dict[str, Any]
+StoredArmyList = dict[str, Any]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS army_lists (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    player_key TEXT NOT NULL,
+    player TEXT NOT NULL,
+    game TEXT NOT NULL,
+    faction TEXT NOT NULL,
+    list_name TEXT NOT NULL,
+    points INTEGER NOT NULL,
+    army_cost INTEGER NOT NULL,
+    unit_count INTEGER NOT NULL,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS army_list_payloads (
+    list_id INTEGER PRIMARY KEY REFERENCES army_lists(id) ON DELETE CASCADE,
+    payload TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_army_lists_player
+    ON army_lists (player_key, updated_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_army_lists_player_game_faction
+    ON army_lists (player_key, game, faction, updated_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_army_lists_player_points
+    ON army_lists (player_key, points);
+CREATE INDEX IF NOT EXISTS idx_army_lists_game_faction_points
+    ON army_lists (game, faction, points);
+"""
+
+_SUMMARY_COLUMNS = (
+    "id, player, game, faction, list_name, points, army_cost, unit_count, created_at, updated_at"
+)
+
+# Dérivation du code secret : lente à dessein (la base ne doit pas suffire à retrouver les codes).
+PLAYER_KEY_ITERATIONS = 100_000
+
+_SCHEMA_LOCK = threading.Lock()
+_INITIALIZED_DATABASES: set[Path] = set()
+_WRITE_LOCKS: dict[Path, threading.Lock] = {}
+_CONNECTIONS = threading.local()
+
+
+class SqliteArmyListRepository:
+    """Repository responsible for persisting army lists in a local SQLite database.
+
+    Lists belong to a player name plus a secret code: only that pair can
+    list, read, update or delete them. Both are required by every method.
+    """
+
+    def __init__(self, base_dir: Path, db_path: Path | None = None) -> None:
+        self.base_dir = Path(base_dir)
+        self.db_path = Path(db_path) if db_path else self.base_dir / "saves" / "army_lists.sqlite3"
+
+    def save_list(
+        self,
+        player: str,
+        secret: str,
+        game: str,
+        faction: str,
+        list_name: str,
+        points: int,
+        army_list: list[dict[str, Any]],
+        army_cost: int | None = None,
+        list_id: int | None = None,
+    ) -> int:
+        player_key = self._player_key(player, secret)
+
+        now = datetime.now().isoformat(timespec="seconds")
+        cost = army_cost if army_cost is not None else sum(unit.get("cost", 0) for unit in army_list)
+        payload = CODEC.dumps(army_list)
+        values = (player.strip(), game, faction, list_name, int(points), int(cost), len(army_list))
+
+        with self._write() as connection:
+            if list_id is not None:
+                cursor = connection.execute(
+                    "UPDATE army_lists SET player = ?, game = ?, faction = ?, list_name = ?, "
+                    "points = ?, army_cost = ?, unit_count = ?, updated_at = ? "
+                    "WHERE id = ? AND player_key = ?",
+                    (*values, now, list_id, player_key),
+                )
+                if cursor.rowcount:
+                    connection.execute(
+                        "UPDATE army_list_payloads SET payload = ? WHERE list_id = ?",
+                        (payload, list_id),
+                    )
+                    return list_id
+
+            cursor = connection.execute(
+                "INSERT INTO army_lists (player_key, player, game, faction, list_name, points, "
+                "army_cost, unit_count, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (player_key, *values, now, now),
+            )
+            new_id = int(cursor.lastrowid)
+            connection.execute(
+                "INSERT INTO army_list_payloads (list_id, payload) VALUES (?, ?)",
+                (new_id, payload),
+            )
+            return new_id
+
+    def get_list(self, list_id: int, player: str, secret: str) -> StoredArmyList | None:
+        row = self._connection().execute(
+            f"SELECT {_SUMMARY_COLUMNS}, payload FROM army_lists "
+            "JOIN army_list_payloads ON army_list_payloads.list_id = army_lists.id "
+            "WHERE id = ? AND player_key = ?",
+            (list_id, self._player_key(player, secret)),
+        ).fetchone()
+        if row is None:
+            return None
+
+        stored = self._row_to_summary(row)
+        stored["army_list"] = CODEC.loads(row["payload"])
+        return stored
+
+    def list_lists(
+        self,
+        player: str,
+        secret: str,
+        game: str | None = None,
+        faction: str | None = None,
+        min_points: int | None = None,
+        max_points: int | None = None,
+        page: int = 1,
+        page_size: int = 20,
+    ) -> list[ArmyListSummary]:
+        where, params = self._filters(player, secret, game, faction, min_points, max_points)
+        offset = max(page - 1, 0) * page_size
+        rows = self._connection().execute(
+            f"SELECT {_SUMMARY_COLUMNS} FROM army_lists WHERE {where} "
+            "ORDER BY updated_at DESC, id DESC LIMIT ? OFFSET ?",
+            (*params, page_size, offset),
+        ).fetchall()
+        return [self._row_to_summary(row) for row in rows]
+
+    def count_lists(
+        self,
+        player: str,
+        secret: str,
+        game: str | None = None,
+        faction: str | None = None,
+        min_points: int | None = None,
+        max_points: int | None = None,
+    ) -> int:
+        where, params = self._filters(player, secret, game, faction, min_points, max_points)
+        row = self._connection().execute(
+            f"SELECT COUNT(*) FROM army_lists WHERE {where}", params
+        ).fetchone()
+        return int(row[0])
+
+    def delete_list(self, list_id: int, player: str, secret: str) -> bool:
+        with self._write() as connection:
+            cursor = connection.execute(
+                "DELETE FROM army_lists WHERE id = ? AND player_key = ?",
+                (list_id, self._player_key(player, secret)),
+            )
+            return cursor.rowcount > 0
+
+    def _filters(
+        self,
+        player: str,
+        secret: str,
+        game: str | None,
+        faction: str | None,
+        min_points: int | None,
+        max_points: int | None,
+    ) -> tuple[str, list[Any]]:
+        clauses = ["player_key = ?"]
+        params: list[Any] = [self._player_key(player, secret)]
+        if game is not None:
+            clauses.append("game = ?")
+            params.append(game)
+        if faction is not None:
+            clauses.append("faction = ?")
+            params.append(faction)
+        if min_points is not None:
+            clauses.append("points >= ?")
+            params.append(min_points)
+        if max_points is not None:
+            clauses.append("points <= ?")
+            params.append(max_points)
+        return " AND ".join(clauses), params
+
+    def _connection(self) -> sqlite3.Connection:
+        connections = getattr(_CONNECTIONS, "by_path", None)
+        if connections is None:
+            connections = _CONNECTIONS.by_path = {}
+
+        connection = connections.get(self.db_path)
+        if connection is None:
+            self._ensure_schema()
+            connection = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            connection.row_factory = sqlite3.Row
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute("PRAGMA foreign_keys=ON")
+            connection.execute("PRAGMA busy_timeout=30000")
+            connections[self.db_path] = connection
+        return connection
+
+    def _write(self) -> "_WriteTransaction":
+        with _SCHEMA_LOCK:
+            lock = _WRITE_LOCKS.setdefault(self.db_path, threading.Lock())
+        return _WriteTransaction(self._connection(), lock)
+
+    def _ensure_schema(self) -> None:
+        with _SCHEMA_LOCK:
+            if self.db_path in _INITIALIZED_DATABASES and self.db_path.exists():
+                return
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(self.db_path, timeout=30)
+            try:
+                connection.execute("PRAGMA journal_mode=WAL")
+                connection.executescript(_SCHEMA)
+                connection.commit()
+            finally:
+                connection.close()
+            _INITIALIZED_DATABASES.add(self.db_path)
+
+    @staticmethod
+    def _player_key(player: str, secret: str) -> str:
+        name = (player or "").strip().casefold()
+        if not name or not secret:
+            raise ValueError("Un nom de joueur et un code secret sont requis.")
+        # Pas de cache : le code en clair ne doit pas rester en mémoire au-delà de l'appel.
+        digest = hashlib.pbkdf2_hmac("sha256", secret.encode("utf-8"), name.encode("utf-8"), PLAYER_KEY_ITERATIONS)
+        return f"pbkdf2${digest.hex()}"
+
+    @staticmethod
+    def _row_to_summary(row: sqlite3.Row) -> ArmyListSummary:
+        return {
+            "id": row["id"],
+            "player": row["player"],
+            "game": row["game"],
+            "faction": row["faction"],
+            "list_name": row["list_name"],
+            "points": row["points"],
+            "army_cost": row["army_cost"],
+            "unit_count": row["unit_count"],
+            "created_at": row["created_at"],
+            "updated_at": row["updated_at"],
+        }
+
+
+class _WriteTransaction:
+    """Serialises writers of one process and takes SQLite's write lock up front."""
+
+    def __init__(self, connection: sqlite3.Connection, lock: threading.Lock) -> None:
+        self.connection = connection
+        self.lock = lock
+
+    def __enter__(self) -> sqlite3.Connection:
+        self.lock.acquire()
+        try:
+            self.connection.execute("BEGIN IMMEDIATE")
+        except Exception:
+            self.lock.release()
+            raise
+        return self.connection
+
+    def __exit__(self, exc_type: Any, exc: Any, traceback: Any) -> None:
+        try:
+            if exc_type is None:
+                self.connection.execute("COMMIT")
+            else:
+                self.connection.execute("ROLLBACK")
+        finally:
+            self.lock.release()
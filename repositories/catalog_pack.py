@@ -0,0 +1,205 @@
+"""
+catalog_pack.py
+Empaquette le catalogue compilé (toutes les factions valides) dans un seul
+fichier binaire indexé, lu ensuite par mmap : les processus workers
+partagent les mêmes pages via le cache du système au lieu de garder chacun
+leur copie parsée de chaque faction.
+Usage : python -m repositories.catalog_pack [--out FICHIER]
+"""
+
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import threading
+import time
+from collections.abc import Iterator, Mapping
+from pathlib import Path
+from typing import Any
+
+from repositories.faction_compiler import COMPILER_VERSION
+from repositories.faction_repository import FactionFileError, JsonFactionRepository
+from repositories.json_codec import CODEC
+
+
+FactionData = dict[str, Any]
+Span = tuple[int, int]
+
+PACK_MAGIC = b"ABPACK01"
+PACK_FORMAT = 1
+_HEADER = struct.Struct("<8sQ")
+DEFAULT_PACK_PATH = Path(__file__).resolve().parent / "data" / "catalog.pack"
+
+
+def build_pack(repository: JsonFactionRepository, out_path: Path) -> dict[str, Any]:
+    """Write the compiled catalog of ``repository`` to ``out_path``; return the index.
+
+    Each unit is stored once as compact JSON: a unit shared by a base and
+    its variants (or identical across factions) points to the same bytes.
+    The file is written aside and swapped in with ``os.replace``, so
+    processes that still map the previous pack keep reading it unharmed.
+    """
+    factions_by_game, games = repository.load_catalog()
+    blobs: list[bytes] = []
+    offsets: dict[bytes, Span] = {}
+    size = 0
+
+    def store(payload: Any) -> list[int]:
+        nonlocal size
+        blob = CODEC.dumpb(payload)
+        span = offsets.get(blob)
+        if span is None:
+            span = offsets[blob] = (size, len(blob))
+            blobs.append(blob)
+            size += len(blob)
+        return list(span)
+
+    index: dict[str, Any] = {
+        "format": PACK_FORMAT,
+        "compiler_version": COMPILER_VERSION,
+        "games": games,
+        "factions": {},
+        "errors": [error.to_dict() for error in repository.load_errors],
+    }
+    for game in games:
+        for faction, faction_data in sorted(factions_by_game[game].items()):
+            meta = {key: value for key, value in faction_data.items() if key != "units"}
+            units = faction_data.get("units", [])
+            index["factions"].setdefault(game, {})[faction] = {
+                "meta": store(meta),
+                "units": [store(unit) for unit in units],
+                "unit_names": [unit.get("name", "") for unit in units],
+            }
+
+    index_bytes = CODEC.dumpb(index)
+    out_path = Path(out_path)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    handle, temp_path = tempfile.mkstemp(dir=out_path.parent, prefix=out_path.name, suffix=".tmp")
+    try:
+        with os.fdopen(handle, "wb") as file:
+            file.write(_HEADER.pack(PACK_MAGIC, len(index_bytes)))
+            file.write(index_bytes)
+            for blob in blobs:
+                file.write(blob)
+        os.replace(temp_path, out_path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+    return index
+
+
+class PackedCatalog:
+    """Read-only view of a pack file, decoding factions and units on demand.
+
+    Decoded objects are cached by their position in the file, so a unit
+    shared between factions stays one object in this process too.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        with self.path.open("rb") as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, index_size = _HEADER.unpack_from(self._map, 0)
+        if magic != PACK_MAGIC:
+            raise ValueError(f"{self.path.name} n'est pas un catalogue empaqueté")
+        index = CODEC.loads(self._map[_HEADER.size:_HEADER.size + index_size])
+        if index.get("format") != PACK_FORMAT or index.get("compiler_version") != COMPILER_VERSION:
+            raise ValueError(f"{self.path.name} : format obsolète, relancer python -m repositories.catalog_pack")
+        self._data_start = _HEADER.size + index_size
+        self._index: dict[str, dict[str, Any]] = index["factions"]
+        self.games: list[str] = index["games"]
+        self.errors = [
+            FactionFileError(self.path.parent / error["file"], error["message"], error["line"], error["column"])
+            for error in index["errors"]
+        ]
+        self._lock = threading.Lock()
+        self._decoded: dict[int, Any] = {}
+        self._factions: dict[tuple[str, str], FactionData] = {}
+
+    def faction_names(self, game: str) -> list[str]:
+        return list(self._index.get(game, {}))
+
+    def faction(self, game: str, faction: str) -> FactionData | None:
+        key = (game, faction)
+        faction_data = self._factions.get(key)
+        if faction_data is not None:
+            return faction_data
+        entry = self._index.get(game, {}).get(faction)
+        if entry is None:
+            return None
+        with self._lock:
+            faction_data = self._factions.get(key)
+            if faction_data is None:
+                faction_data = dict(self._decode(entry["meta"]))
+                faction_data["units"] = [self._decode(span) for span in entry["units"]]
+                self._factions[key] = faction_data
+        return faction_data
+
+    def unit(self, game: str, faction: str, name: str) -> dict[str, Any] | None:
+        """One unit by name, without decoding the rest of its faction."""
+        entry = self._index.get(game, {}).get(faction)
+        if entry is None or name not in entry["unit_names"]:
+            return None
+        with self._lock:
+            return self._decode(entry["units"][entry["unit_names"].index(name)])
+
+    def factions(self) -> dict[str, "PackedFactions"]:
+        """Catalog by game, shaped like ``load_catalog``'s but decoded on access."""
+        return {game: PackedFactions(self, game) for game in self.games}
+
+    def decoded_count(self) -> int:
+        return len(self._decoded)
+
+    def _decode(self, span: Span) -> Any:
+        offset, length = span
+        value = self._decoded.get(offset)
+        if value is None:
+            start = self._data_start + offset
+            value = self._decoded[offset] = CODEC.loads(self._map[start:start + length])
+        return value
+
+
+class PackedFactions(Mapping):
+    """Factions of one game in a pack: ``{name: faction}`` decoded on first access."""
+
+    def __init__(self, catalog: PackedCatalog, game: str) -> None:
+        self._catalog = catalog
+        self._game = game
+        self._names = catalog.faction_names(game)
+
+    def __getitem__(self, faction: str) -> FactionData:
+        faction_data = self._catalog.faction(self._game, faction)
+        if faction_data is None:
+            raise KeyError(faction)
+        return faction_data
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._names)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def __contains__(self, faction: object) -> bool:
+        return faction in self._names
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = list(sys.argv[1:] if argv is None else argv)
+    out_path = DEFAULT_PACK_PATH
+    if "--out" in args:
+        out_path = Path(args[args.index("--out") + 1])
+
+    started = time.perf_counter()
+    repository = JsonFactionRepository(Path(__file__).resolve().parent.parent)
+    index = build_pack(repository, out_path)
+    elapsed = (time.perf_counter() - started) * 1000
+    count = sum(len(by_faction) for by_faction in index["factions"].values())
+    for error in repository.load_errors:
+        print(f"ignoré : {error}")
+    print(f"{out_path} : {count} faction(s), {out_path.stat().st_size // 1024} Ko, {elapsed:.0f} ms")
+    return 1 if repository.load_errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
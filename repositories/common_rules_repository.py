@@ -1,7 +1,8 @@
-import json
 from pathlib import Path
 from typing import Any
 
+from repositories.json_codec import CODEC
+
 
 CommonRule = dict[str, str]
 
@@ -15,8 +16,7 @@ class CommonRulesRepository:
 
     def load_rules(self) -> list[CommonRule]:
         common_rules_path = self._resolve_common_rules_path()
-        with common_rules_path.open(encoding="utf-8") as file:
-            data = json.load(file)
+        data = CODEC.load(common_rules_path)
 
         return [
             {
@@ -43,6 +43,9 @@ class CommonRulesRepository:
             "description": rules_by_title[title],
         }
 
+    def common_rules_path(self) -> Path:
+        return self._resolve_common_rules_path()
+
     def _resolve_common_rules_path(self) -> Path:
         common_rules_path = self.data_dir / "common-rules" / "common-rules.json"
         if common_rules_path.exists():
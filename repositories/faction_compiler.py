@@ -0,0 +1,374 @@
+"""
+faction_compiler.py
+Valide les JSON de faction contre un schéma dérivé de
+templates/squelette_faction.json et produit la forme compilée (normalisée)
+chargée par l'application.
+Usage : python -m repositories.faction_compiler [fichiers...] [--out DOSSIER]
+"""
+
+import json
+import sys
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+from repositories.json_codec import CODEC
+
+
+FactionData = dict[str, Any]
+
+TEMPLATE_PATH = Path(__file__).resolve().parent / "data" / "factions" / "templates" / "squelette_faction.json"
+
+COMPILER_VERSION = 1
+
+GROUP_TYPES = (
+    "weapon",
+    "conditional_weapon",
+    "variable_weapon_count",
+    "role",
+    "upgrades",
+    "mount",
+    "mobility",
+)
+MAX_COUNT_TYPES = ("fixed", "size_based", "count_in_weapons")
+# Variante (ex. AoF Regiments d'une faction AoF) : "extends" + surcharges, voir apply_variant.
+VARIANT_KEYS = ("extends", "units_patch", "units_add")
+MELEE_RANGES = ("", "-", "mêlée", "melee")
+
+# Champs dont la forme varie légitimement dans les données (normalisés à la compilation).
+POLYMORPHIC_FIELDS = {
+    "weapon": {"array", "object"},
+    "range": {"string", "integer", "number", "null"},
+}
+# Objets dont les clés sont des noms libres (ex. sorts).
+DYNAMIC_KEY_OBJECTS = ("$.spells",)
+REQUIRED_FIELDS = {
+    "$": ("faction", "game"),
+    "$.units[]": ("name", "base_cost", "quality", "defense"),
+    "$.units[].weapon[]": ("name",),
+    "$.units[].upgrade_groups[]": ("type", "options"),
+    "$.units[].upgrade_groups[].options[]": ("name", "cost"),
+    "$.units[].upgrade_groups[].options[].weapon[]": ("name",),
+    "$.units[].upgrade_groups[].options[].mount.weapon[]": ("name",),
+}
+
+
+class SchemaIssue:
+    """One validation problem located by its JSON path."""
+
+    __slots__ = ("path", "message")
+
+    def __init__(self, path: str, message: str) -> None:
+        self.path = path
+        self.message = message
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, SchemaIssue) and (self.path, self.message) == (other.path, other.message)
+
+    def __repr__(self) -> str:
+        return f"SchemaIssue({self.path!r}, {self.message!r})"
+
+    def __str__(self) -> str:
+        return f"{self.path}: {self.message}"
+
+
+class FactionSchema:
+    """Allowed JSON types per canonical path, derived from the faction template."""
+
+    def __init__(self, types: dict[str, set[str]]) -> None:
+        self.types = types
+
+    @classmethod
+    def from_template(cls, template: Any) -> "FactionSchema":
+        types: dict[str, set[str]] = {}
+
+        def walk(node: Any, path: str) -> None:
+            types.setdefault(path, set()).add(_json_type(node))
+            if isinstance(node, dict):
+                for key, value in node.items():
+                    child = f"{path}.{{}}" if path in DYNAMIC_KEY_OBJECTS else f"{path}.{key}"
+                    walk(value, _canonical_child(child, value))
+            elif isinstance(node, list):
+                for item in node:
+                    walk(item, f"{path}[]")
+
+        walk(template, "$")
+        for path in types:
+            field = path.rsplit(".", 1)[-1]
+            if field in POLYMORPHIC_FIELDS:
+                types[path] |= POLYMORPHIC_FIELDS[field]
+        return cls(types)
+
+    @classmethod
+    def load_default(cls) -> "FactionSchema":
+        return cls.from_template(CODEC.load(TEMPLATE_PATH))
+
+    def allowed(self, path: str) -> set[str] | None:
+        return self.types.get(path)
+
+
+class FactionCompiler:
+    """Validates faction JSON and compiles it to the normalized runtime form."""
+
+    def __init__(self, schema: FactionSchema | None = None) -> None:
+        self.schema = schema or FactionSchema.load_default()
+
+    def validate(self, data: Any) -> list[SchemaIssue]:
+        issues: list[SchemaIssue] = []
+        self._validate_node(data, "$", "$", issues)
+        return issues
+
+    def compile(self, data: FactionData) -> FactionData:
+        """Return a normalized copy; the runtime can then skip every shape check."""
+        return compile_faction(data)
+
+    def compile_file(self, file_path: Path) -> tuple[FactionData | None, list[SchemaIssue]]:
+        file_path = Path(file_path)
+        try:
+            data = CODEC.load(file_path)
+        except json.JSONDecodeError as error:
+            return None, [SchemaIssue("$", f"JSON invalide ligne {error.lineno}, colonne {error.colno} : {error.msg}")]
+
+        if data.get("extends"):
+            base, issues = self._load_base(file_path, data["extends"])
+            if issues:
+                return None, issues
+            try:
+                data = apply_variant(base, data)
+            except ValueError as error:
+                return None, [SchemaIssue("$.units_patch", str(error))]
+
+        issues = self.validate(data)
+        if issues:
+            return None, issues
+        return self.compile(data), []
+
+    def _load_base(self, file_path: Path, name: str) -> tuple[FactionData | None, list[SchemaIssue]]:
+        base_path = file_path.parent / name
+        try:
+            base = CODEC.load(base_path)
+        except (OSError, json.JSONDecodeError) as error:
+            return None, [SchemaIssue("$.extends", f"base {name} illisible : {error}")]
+        if base.get("extends"):
+            return None, [SchemaIssue("$.extends", f"la base {name} est elle-même une variante")]
+        return base, []
+
+    def _validate_node(self, node: Any, path: str, schema_path: str, issues: list[SchemaIssue]) -> None:
+        allowed = self.schema.allowed(schema_path)
+        node_type = _json_type(node)
+        if allowed is not None and node_type not in allowed:
+            if not (node_type == "integer" and "number" in allowed):
+                issues.append(SchemaIssue(path, f"type {node_type} inattendu (attendu : {', '.join(sorted(allowed))})"))
+                return
+
+        if isinstance(node, dict):
+            for field in REQUIRED_FIELDS.get(schema_path, ()):
+                if field not in node:
+                    issues.append(SchemaIssue(path, f"champ obligatoire manquant : {field}"))
+            self._validate_semantics(node, path, schema_path, issues)
+            for key, value in node.items():
+                child_schema = f"{schema_path}.{{}}" if schema_path in DYNAMIC_KEY_OBJECTS else f"{schema_path}.{key}"
+                child_path = f"{path}[{json.dumps(key, ensure_ascii=False)}]" if schema_path in DYNAMIC_KEY_OBJECTS else f"{path}.{key}"
+                self._validate_node(value, child_path, _canonical_child(child_schema, value), issues)
+        elif isinstance(node, list):
+            for index, item in enumerate(node):
+                self._validate_node(item, f"{path}[{index}]", f"{schema_path}[]", issues)
+
+    def _validate_semantics(
+        self, node: dict[str, Any], path: str, schema_path: str, issues: list[SchemaIssue]
+    ) -> None:
+        if schema_path == "$.units[].upgrade_groups[]":
+            group_type = node.get("type")
+            if group_type not in GROUP_TYPES:
+                issues.append(SchemaIssue(f"{path}.type", f"type de groupe inconnu : {group_type!r}"))
+        elif schema_path == "$.units[].upgrade_groups[].options[].max_count":
+            if node.get("type", "size_based") not in MAX_COUNT_TYPES:
+                issues.append(SchemaIssue(f"{path}.type", f"type de max_count inconnu : {node.get('type')!r}"))
+            if node.get("type") == "count_in_weapons" and not node.get("weapon_name"):
+                issues.append(SchemaIssue(path, "weapon_name obligatoire pour count_in_weapons"))
+
+
+def compile_faction(data: FactionData) -> FactionData:
+    compiled = dict(data)
+    compiled.setdefault("faction_special_rules", [])
+    compiled.setdefault("spells", {})
+    compiled["units"] = [compile_unit(unit) for unit in data.get("units", []) if isinstance(unit, dict)]
+    compiled["_compiled"] = COMPILER_VERSION
+    return compiled
+
+
+def apply_variant(
+    base: FactionData,
+    variant: FactionData,
+    unit_transform: Callable[[dict[str, Any]], dict[str, Any]] | None = None,
+) -> FactionData:
+    """Materialize ``variant`` (``extends`` + overrides) on top of ``base``.
+
+    Top-level keys of the variant replace the base's ones. ``units_patch``
+    maps a unit name to a JSON merge patch (RFC 7396), or null to drop the
+    unit; ``units_add`` appends units. Untouched units are the base's own
+    objects, shared rather than copied; patched and added units go through
+    ``unit_transform`` (e.g. ``compile_unit`` when ``base`` is compiled).
+    """
+    transform = unit_transform or (lambda unit: unit)
+    materialized = dict(base)
+    materialized.update((key, value) for key, value in variant.items() if key not in VARIANT_KEYS + ("units",))
+    if "units" in variant:
+        base_units = [transform(unit) for unit in variant["units"] if isinstance(unit, dict)]
+    else:
+        base_units = base.get("units", [])
+
+    patches = dict(variant.get("units_patch") or {})
+    units = []
+    for unit in base_units:
+        name = unit.get("name") if isinstance(unit, dict) else None
+        if name not in patches:
+            units.append(unit)
+            continue
+        patch = patches.pop(name)
+        if patch is not None:
+            units.append(transform(merge_patch(unit, patch)))
+    if patches:
+        raise ValueError(f"unité(s) inconnue(s) dans units_patch : {', '.join(sorted(patches))}")
+    units.extend(transform(unit) for unit in variant.get("units_add", []) if isinstance(unit, dict))
+    materialized["units"] = units
+    return materialized
+
+
+def merge_patch(target: Any, patch: Any) -> Any:
+    """JSON merge patch (RFC 7396): a new value, ``target`` is left untouched."""
+    if not isinstance(patch, dict):
+        return patch
+    merged = dict(target) if isinstance(target, dict) else {}
+    for key, value in patch.items():
+        if value is None:
+            merged.pop(key, None)
+        else:
+            merged[key] = merge_patch(merged.get(key), value)
+    return merged
+
+
+def compile_unit(unit: dict[str, Any]) -> dict[str, Any]:
+    compiled = dict(unit)
+    compiled["type"] = unit.get("type") or "unit"
+    compiled["unit_detail"] = unit.get("unit_detail") or compiled["type"]
+    compiled["size"] = unit.get("size", 1)
+    compiled["special_rules"] = list(unit.get("special_rules", []))
+    compiled["weapon"] = _weapon_list(unit.get("weapon"))
+    compiled["upgrade_groups"] = [
+        _compile_group(group) for group in unit.get("upgrade_groups", []) if isinstance(group, dict)
+    ]
+    return compiled
+
+
+def _compile_group(group: dict[str, Any]) -> dict[str, Any]:
+    compiled = dict(group)
+    compiled["options"] = [
+        _compile_option(option) for option in group.get("options", []) if isinstance(option, dict)
+    ]
+    return compiled
+
+
+def _compile_option(option: dict[str, Any]) -> dict[str, Any]:
+    compiled = dict(option)
+    compiled["cost"] = option.get("cost", 0)
+    # Une option garde sa forme (arme seule ou lot d'armes) : elle détermine le libellé affiché.
+    weapon = option.get("weapon")
+    if isinstance(weapon, dict):
+        compiled["weapon"] = _compile_weapon(weapon) if weapon else {}
+    elif isinstance(weapon, list):
+        compiled["weapon"] = _weapon_list(weapon)
+    mount = option.get("mount")
+    if isinstance(mount, dict):
+        compiled["mount"] = dict(mount)
+        compiled["mount"]["weapon"] = _weapon_list(mount.get("weapon"))
+        compiled["mount"]["special_rules"] = list(mount.get("special_rules", []))
+    return compiled
+
+
+def _weapon_list(weapons: Any) -> list[dict[str, Any]]:
+    if isinstance(weapons, dict):
+        weapons = [weapons] if weapons else []
+    if not isinstance(weapons, list):
+        return []
+    return [_compile_weapon(weapon) for weapon in weapons if isinstance(weapon, dict)]
+
+
+def _compile_weapon(weapon: dict[str, Any]) -> dict[str, Any]:
+    compiled = dict(weapon)
+    compiled["range"] = normalize_range(weapon.get("range"))
+    compiled["special_rules"] = list(weapon.get("special_rules", []))
+    return compiled
+
+
+def normalize_range(value: Any) -> Any:
+    if value is None or (isinstance(value, str) and value.strip().lower() in MELEE_RANGES):
+        return "Mêlée"
+    if isinstance(value, str):
+        digits = value.strip().rstrip('"').strip()
+        if digits.isdigit():
+            return int(digits)
+        return value.strip()
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def _json_type(value: Any) -> str:
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "boolean"
+    if isinstance(value, int):
+        return "integer"
+    if isinstance(value, float):
+        return "number"
+    if isinstance(value, str):
+        return "string"
+    if isinstance(value, list):
+        return "array"
+    if isinstance(value, dict):
+        return "object"
+    return type(value).__name__
+
+
+def _canonical_child(path: str, value: Any) -> str:
+    # Une arme seule (objet) est validée comme un élément de liste d'armes.
+    if path.endswith(".weapon") and isinstance(value, dict):
+        return path if value == {} else f"{path}[]"
+    return path
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = list(sys.argv[1:] if argv is None else argv)
+    out_dir: Path | None = None
+    if "--out" in args:
+        index = args.index("--out")
+        out_dir = Path(args[index + 1])
+        del args[index:index + 2]
+
+    factions_dir = TEMPLATE_PATH.parent.parent
+    paths = [Path(arg) for arg in args] or sorted(factions_dir.glob("*.json"))
+    compiler = FactionCompiler()
+    started = time.perf_counter()
+    failures = 0
+    for path in paths:
+        compiled, issues = compiler.compile_file(path)
+        if issues:
+            failures += 1
+            for issue in issues:
+                print(f"{path.name} {issue}")
+            continue
+        if out_dir is not None:
+            out_dir.mkdir(parents=True, exist_ok=True)
+            (out_dir / path.name).write_text(
+                CODEC.dumps(compiled), encoding="utf-8"
+            )
+    elapsed = (time.perf_counter() - started) * 1000
+    print(f"{len(paths)} fichier(s), {failures} en erreur, {elapsed:.0f} ms")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,13 +1,46 @@
 import json
+import os
+from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Any
 from repositories.common_rules_repository import CommonRulesRepository
+from repositories.faction_compiler import apply_variant, compile_faction, compile_unit
+from repositories.json_codec import CODEC
 
 
 FactionData = dict[str, Any]
 FactionsByGame = dict[str, dict[str, FactionData]]
 
 
+class FactionFileError:
+    """A faction file that failed to load, with the JSON error position when known."""
+
+    __slots__ = ("path", "message", "line", "column")
+
+    def __init__(self, path: Path, message: str, line: int | None = None, column: int | None = None) -> None:
+        self.path = Path(path)
+        self.message = message
+        self.line = line
+        self.column = column
+
+    @classmethod
+    def from_exception(cls, path: Path, error: Exception) -> "FactionFileError":
+        if isinstance(error, json.JSONDecodeError):
+            return cls(path, error.msg, error.lineno, error.colno)
+        return cls(path, str(error) or type(error).__name__)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"file": self.path.name, "line": self.line, "column": self.column, "message": self.message}
+
+    def __str__(self) -> str:
+        position = f" (ligne {self.line}, colonne {self.column})" if self.line is not None else ""
+        return f"{self.path.name}{position} : {self.message}"
+
+    def __repr__(self) -> str:
+        return f"FactionFileError({self})"
+
+
 class JsonFactionRepository:
     """Repository responsible for reading faction data from JSON files."""
 
@@ -16,26 +49,71 @@ class JsonFactionRepository:
         self.data_dir = self.base_dir / "repositories" / "data"
         self.common_rules_repository = CommonRulesRepository(self.base_dir)
         self._common_rules_by_title = self.common_rules_repository.load_rules_by_title()
+        self.load_errors: list[FactionFileError] = []
 
     def load_catalog(self) -> tuple[FactionsByGame, list[str]]:
+        """Healthy factions by game; files that fail to load are listed in ``load_errors``."""
         factions: FactionsByGame = {}
         games: set[str] = set()
 
-        for file_path in self._iter_faction_files():
-            data = self._load_file(file_path)
-            game = data.get("game")
-            faction = data.get("faction")
-            if not game or not faction:
+        raw, read_errors = self.read_faction_files(self._iter_faction_files())
+        # Bases d'abord, puis les variantes construites sur leur base compilée.
+        bases, errors = self._map_isolated(
+            lambda path: self.normalize_faction(raw[path]), [path for path in raw if not raw[path].get("extends")]
+        )
+        variants, variant_errors = self._map_isolated(
+            lambda path: self.normalize_faction(raw[path], bases.get(self.variant_base(path, raw[path]))),
+            [path for path in raw if raw[path].get("extends")],
+        )
+        self.load_errors = sorted(read_errors + errors + variant_errors, key=lambda error: error.path)
+        loaded = {**bases, **variants}
+        for path in sorted(loaded):
+            faction_data = loaded[path]
+            if faction_data is None:
                 continue
 
-            if game not in factions:
-                factions[game] = {}
-
-            factions[game][faction] = self._normalize_faction(data)
+            game = faction_data["game"]
+            factions.setdefault(game, {})[faction_data["faction"]] = faction_data
             games.add(game)
 
         return factions, sorted(games)
 
+    def load_faction_file(self, file_path: Path) -> FactionData | None:
+        data = self.read_faction_file(file_path)
+        base_path = self.variant_base(file_path, data)
+        base = self.normalize_faction(self.read_faction_file(base_path)) if base_path is not None else None
+        return self.normalize_faction(data, base)
+
+    def read_faction_file(self, file_path: Path) -> FactionData:
+        return self._load_file(file_path)
+
+    def read_faction_files(
+        self, file_paths: Iterable[Path], workers: int | None = None
+    ) -> tuple[dict[Path, FactionData], list[FactionFileError]]:
+        """Parse files concurrently; a broken file is reported instead of aborting the others."""
+        return self._map_isolated(self.read_faction_file, file_paths, workers)
+
+    def normalize_faction(self, data: FactionData, base: FactionData | None = None) -> FactionData | None:
+        """Compiled faction; a variant (``extends``) needs its compiled ``base``."""
+        if data.get("extends"):
+            if base is None:
+                raise ValueError(f"base {data['extends']} introuvable, invalide ou elle-même une variante")
+            return self._normalize_variant(data, base)
+        if not data.get("game") or not data.get("faction"):
+            return None
+        return self._normalize_faction(data)
+
+    def variant_base(self, file_path: Path, data: FactionData) -> Path | None:
+        """Path of the base file a variant extends (None for a standalone faction)."""
+        name = data.get("extends")
+        return Path(file_path).parent / name if name else None
+
+    def reload_common_rules(self) -> None:
+        self._common_rules_by_title = self.common_rules_repository.load_rules_by_title()
+
+    def list_faction_files(self) -> list[Path]:
+        return self._iter_faction_files()
+
     def list_games(self) -> list[str]:
         _, games = self.load_catalog()
         return games
@@ -47,6 +125,28 @@ class JsonFactionRepository:
     def get_faction(self, game: str, faction: str) -> FactionData | None:
         return self.list_factions(game).get(faction)
 
+    def _map_isolated(
+        self, load: Callable[[Path], Any], file_paths: Iterable[Path], workers: int | None = None
+    ) -> tuple[dict[Path, Any], list[FactionFileError]]:
+        file_paths = list(file_paths)
+        workers = min(len(file_paths), workers or os.cpu_count() or 1)
+
+        def attempt(file_path: Path) -> tuple[Path, Any, FactionFileError | None]:
+            try:
+                return file_path, load(file_path), None
+            except Exception as error:
+                return file_path, None, FactionFileError.from_exception(file_path, error)
+
+        if workers <= 1:
+            outcomes = [attempt(file_path) for file_path in file_paths]
+        else:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="faction-loader") as pool:
+                outcomes = list(pool.map(attempt, file_paths))
+
+        results = {file_path: value for file_path, value, error in outcomes if error is None}
+        errors = [error for _, _, error in outcomes if error is not None]
+        return results, errors
+
     def _iter_faction_files(self) -> list[Path]:
         factions_dir = self._resolve_factions_dir()
         return sorted(factions_dir.glob("*.json"))
@@ -61,8 +161,7 @@ class JsonFactionRepository:
         )
 
     def _load_file(self, file_path: Path) -> FactionData:
-        with file_path.open(encoding="utf-8") as file:
-            return json.load(file)
+        return CODEC.load(file_path)
 
     def _normalize_faction(self, data: FactionData) -> FactionData:
         normalized = dict(data)
@@ -71,7 +170,16 @@ class JsonFactionRepository:
         )
         normalized.setdefault("spells", {})
         normalized.setdefault("units", [])
-        return normalized
+        return compile_faction(normalized)
+
+    def _normalize_variant(self, data: FactionData, base: FactionData) -> FactionData | None:
+        # Les unités non modifiées sont celles de la base compilée, partagées (jamais modifiées en place).
+        variant = apply_variant(base, data, compile_unit)
+        if "faction_special_rules" in data:
+            variant["faction_special_rules"] = self._hydrate_faction_special_rules(data["faction_special_rules"])
+        if not variant.get("game") or not variant.get("faction"):
+            return None
+        return variant
 
     def _hydrate_faction_special_rules(self, rules: list[Any]) -> list[dict[str, str]]:
         hydrated_rules: list[dict[str, str]] = []
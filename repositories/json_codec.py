@@ -0,0 +1,277 @@
+"""
+json_codec.py
+Couche JSON commune aux dépôts, exports et imports : utilise le parseur le
+plus rapide installé (orjson, puis ujson) et retombe sur la bibliothèque
+standard sinon. Les erreurs de syntaxe sont toujours des
+json.JSONDecodeError avec ligne et colonne, quel que soit le moteur.
+Banc d'essai : python -m repositories.json_codec [fichiers...]
+"""
+
+import codecs
+import importlib
+import importlib.util
+import json
+import os
+import sys
+import time
+from collections.abc import Callable, Iterator
+from pathlib import Path
+from typing import IO, Any
+
+
+BACKENDS = ("orjson", "ujson", "json")
+# Moteur imposé (ex. "json" pour comparer) ; vide = le plus rapide disponible.
+JSON_BACKEND = os.environ.get("ARMYBUILDER_JSON_BACKEND", "")
+STREAM_CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE = " \t\n\r"
+_STDLIB_DECODER = json.JSONDecoder()
+
+
+def available_backends() -> list[str]:
+    return [name for name in BACKENDS if name == "json" or importlib.util.find_spec(name) is not None]
+
+
+class JsonCodec:
+    """JSON encode/decode through one backend, with stdlib semantics.
+
+    ``dumps`` is minified unless ``pretty`` (machine-facing payloads stay
+    small); ``ensure_ascii`` is always off. Whatever the backend, a syntax
+    error is re-raised as the stdlib ``json.JSONDecodeError`` (line and
+    column included) and values the backend cannot encode fall back to the
+    stdlib encoder.
+    """
+
+    def __init__(self, backend: str | None = None) -> None:
+        name = backend or JSON_BACKEND or available_backends()[0]
+        if name not in BACKENDS:
+            raise ValueError(f"Moteur JSON inconnu : {name} (attendu : {', '.join(BACKENDS)})")
+        self.name = name
+        self._module = importlib.import_module(name)
+
+    def loads(self, data: str | bytes | bytearray | memoryview) -> Any:
+        if self.name == "json":
+            return json.loads(bytes(data) if isinstance(data, memoryview) else data)
+        try:
+            return self._module.loads(data)
+        except ValueError:
+            # Reparsé par la bibliothèque standard : position exacte de l'erreur
+            # (ou valeur qu'elle accepte et pas le moteur rapide, ex. NaN).
+            text = bytes(data).decode("utf-8") if not isinstance(data, str) else data
+            return json.loads(text)
+
+    def load(self, path: Path) -> Any:
+        return self.loads(Path(path).read_bytes())
+
+    def dumps(
+        self, value: Any, *, pretty: bool = False, sort_keys: bool = False, default: Callable[[Any], Any] | None = None
+    ) -> str:
+        if self.name == "orjson":
+            option = (self._module.OPT_INDENT_2 if pretty else 0) | (self._module.OPT_SORT_KEYS if sort_keys else 0)
+            try:
+                return self._module.dumps(value, default=default, option=option | self._module.OPT_NON_STR_KEYS).decode("utf-8")
+            except TypeError:
+                pass
+        elif self.name == "ujson" and default is None:
+            try:
+                return self._module.dumps(value, ensure_ascii=False, indent=2 if pretty else 0, sort_keys=sort_keys)
+            except (TypeError, OverflowError):
+                pass
+        return json.dumps(
+            value,
+            ensure_ascii=False,
+            indent=2 if pretty else None,
+            separators=None if pretty else (",", ":"),
+            sort_keys=sort_keys,
+            default=default,
+        )
+
+    def dumpb(self, value: Any, **options: Any) -> bytes:
+        return self.dumps(value, **options).encode("utf-8")
+
+    def iter_array(self, stream: IO[Any], key: str | None = None, chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[Any]:
+        """Yield the items of the top-level array (or of the top-level ``key``) while reading ``stream``.
+
+        Only the item being decoded is buffered, so a very large import can
+        be validated or capped without holding the whole text in memory.
+        """
+        scanner = _StreamScanner(stream, chunk_size)
+        if key is None:
+            yield from scanner.array_items()
+        else:
+            for name in scanner.object_keys():
+                if name == key and scanner.peek() == "[":
+                    yield from scanner.array_items()
+                else:
+                    scanner.value()
+        scanner.end()
+
+    def load_stream(
+        self, stream: IO[Any], array_key: str, max_items: int | None = None, chunk_size: int = STREAM_CHUNK_SIZE
+    ) -> dict[str, Any]:
+        """Decode a top-level object from ``stream``, ``array_key`` item by item.
+
+        Raises ``ValueError`` as soon as the array exceeds ``max_items``,
+        before the rest of the stream is read.
+        """
+        scanner = _StreamScanner(stream, chunk_size)
+        result: dict[str, Any] = {}
+        for name in scanner.object_keys():
+            if name != array_key or scanner.peek() != "[":
+                result[name] = scanner.value()
+                continue
+            items = result[name] = []
+            for item in scanner.array_items():
+                if max_items is not None and len(items) >= max_items:
+                    raise ValueError(f"{array_key} : plus de {max_items} éléments")
+                items.append(item)
+        scanner.end()
+        return result
+
+
+class _StreamScanner:
+    """Incremental JSON reader: structure is walked by hand, values go through ``raw_decode``."""
+
+    def __init__(self, stream: IO[Any], chunk_size: int) -> None:
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.decoder = codecs.getincrementaldecoder("utf-8")()
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self, size: int | None = None) -> bool:
+        if self.eof:
+            return False
+        while True:
+            raw = self.stream.read(size or self.chunk_size)
+            chunk = self.decoder.decode(raw, final=not raw) if isinstance(raw, (bytes, bytearray)) else raw
+            if not raw:
+                self.eof = True
+            if chunk or self.eof:
+                break
+        if not chunk:
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer) or not self.fill():
+                return self.buffer[self.pos:self.pos + 1]
+
+    def expect(self, char: str) -> None:
+        if self.peek() != char:
+            raise self.error(f"Expecting '{char}'")
+        self.pos += 1
+
+    def value(self) -> Any:
+        self.peek()
+        while True:
+            try:
+                value, end = _STDLIB_DECODER.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                # Valeur coupée par la fin du tampon : lire davantage (taille doublée) et réessayer.
+                if self.fill(max(self.chunk_size, len(self.buffer))):
+                    continue
+                raise
+            # Un nombre en fin de tampon peut continuer dans le morceau suivant.
+            if end == len(self.buffer) and not self.eof and self.fill():
+                continue
+            self.pos = end
+            return value
+
+    def object_keys(self) -> Iterator[str]:
+        """Yield each key of an object, positioned on its value (which the caller must consume)."""
+        self.expect("{")
+        if self.peek() == "}":
+            self.pos += 1
+            return
+        while True:
+            if self.peek() != '"':
+                raise self.error("Expecting property name enclosed in double quotes")
+            key = self.value()
+            self.expect(":")
+            yield key
+            if self.peek() == ",":
+                self.pos += 1
+                continue
+            self.expect("}")
+            return
+
+    def array_items(self) -> Iterator[Any]:
+        self.expect("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            if self.peek() == ",":
+                self.pos += 1
+                continue
+            self.expect("]")
+            return
+
+    def end(self) -> None:
+        if self.peek():
+            raise self.error("Extra data")
+
+    def error(self, message: str) -> json.JSONDecodeError:
+        return json.JSONDecodeError(message, self.buffer, self.pos)
+
+
+def benchmark(paths: list[Path], repeat: int = 5) -> list[dict[str, Any]]:
+    """Best-of-``repeat`` decode/encode time of every installed backend over ``paths``."""
+    blobs = [Path(path).read_bytes() for path in paths]
+    rows = []
+    for name in available_backends():
+        codec = JsonCodec(name)
+        decoded = []
+        load_times = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            decoded = []
+            for blob in blobs:
+                try:
+                    decoded.append(codec.loads(blob))
+                except ValueError:
+                    continue
+            load_times.append(time.perf_counter() - started)
+        dump_times = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            size = sum(len(codec.dumpb(value)) for value in decoded)
+            dump_times.append(time.perf_counter() - started)
+        rows.append({
+            "backend": name,
+            "files": len(decoded),
+            "source_kb": sum(len(blob) for blob in blobs) // 1024,
+            "minified_kb": size // 1024,
+            "loads_ms": round(min(load_times) * 1000, 2),
+            "dumps_ms": round(min(dump_times) * 1000, 2),
+        })
+    return rows
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = list(sys.argv[1:] if argv is None else argv)
+    factions_dir = Path(__file__).resolve().parent / "data" / "factions"
+    paths = [Path(arg) for arg in args] or sorted(factions_dir.glob("*.json"))
+    rows = benchmark(paths)
+    print(f"{'Moteur':<8}{'fichiers':>10}{'source Ko':>11}{'minifié Ko':>12}{'loads ms':>10}{'dumps ms':>10}")
+    for row in rows:
+        print(
+            f"{row['backend']:<8}{row['files']:>10}{row['source_kb']:>11}{row['minified_kb']:>12}"
+            f"{row['loads_ms']:>10}{row['dumps_ms']:>10}"
+        )
+    return 0
+
+
+CODEC = JsonCodec()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
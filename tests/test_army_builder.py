@@ -0,0 +1,137 @@
+import itertools
+import json
+import time
+import unittest
+from pathlib import Path
+
+from armybuilder.combat import NUMPY_AVAILABLE
+from armybuilder.services import ArmyRuleValidator
+from repositories.faction_compiler import compile_faction
+
+
+FACTION_PATH = Path(__file__).resolve().parent.parent / "repositories" / "data" / "factions" / "soeurs_benies_gf.json"
+GAME = "Grimdark Future"
+
+
+def _unit(name: str, cost: int, unit_type: str = "unit", size: int = 5, coriace: int = 1) -> dict:
+    return {"name": name, "type": unit_type, "size": size, "base_cost": cost, "quality": 4, "defense": 4, "coriace": coriace, "weapon": []}
+
+
+@unittest.skipUnless(NUMPY_AVAILABLE, "NumPy non installé")
+class ArmyAutoBuilderTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        with FACTION_PATH.open(encoding="utf-8") as file:
+            cls.units = compile_faction(json.load(file))["units"]
+
+    def _builder(self, units):
+        from armybuilder.builder import ArmyAutoBuilder
+
+        return ArmyAutoBuilder(units, GAME)
+
+    def test_proposals_are_legal_and_fast_for_every_metric(self) -> None:
+        validator = ArmyRuleValidator()
+        builder = self._builder(self.units)
+
+        started = time.perf_counter()
+        for metric in ("points", "coriace", "damage"):
+            proposal = builder.build(2000, metric)
+            army = [config.to_army_unit() for config in proposal["units"]]
+
+            self.assertLessEqual(proposal["cost"], 2000)
+            self.assertEqual(validator.validate_army(army, 2000, GAME), [])
+        self.assertLess(time.perf_counter() - started, 1.0)
+
+    def test_fill_uses_every_point_when_possible(self) -> None:
+        proposal = self._builder(self.units).build(2000, "points")
+
+        self.assertEqual(proposal["cost"], 2000)
+
+    def test_fill_completes_existing_army(self) -> None:
+        builder = self._builder(self.units)
+        existing = [config.to_army_unit() for config in builder.build(1000, "points")["units"]]
+
+        proposal = builder.build(2000, "coriace", existing=existing)
+        army = existing + [config.to_army_unit() for config in proposal["units"]]
+
+        self.assertLessEqual(sum(unit["cost"] for unit in army), 2000)
+        self.assertEqual(ArmyRuleValidator().validate_army(army, 2000, GAME), [])
+
+    def test_enumerated_units_are_reduced_to_their_pareto_rows(self) -> None:
+        from armybuilder.builder import MAX_CONFIGS_PER_UNIT, ArmyAutoBuilder
+        from armybuilder.configurations import FactionConfigurations
+
+        configurations = FactionConfigurations({"units": self.units})
+        builder = ArmyAutoBuilder(self.units, GAME, configurations=configurations.unit_configs)
+
+        for unit in self.units:
+            every = configurations.unit_configs(unit)
+            kept = builder.configs[unit["name"]]
+            self.assertLessEqual(len(kept), MAX_CONFIGS_PER_UNIT)
+            self.assertEqual(min(c.cost for c in kept), min(c.cost for c in every))
+            self.assertEqual(max(c.models * c.tough for c in kept), max(c.models * c.tough for c in every))
+        self.assertEqual(builder.build(2000, "points")["cost"], 2000)
+
+    def test_matches_brute_force_on_small_faction(self) -> None:
+        units = [
+            _unit("Chef", 95, "hero", size=1, coriace=3),
+            _unit("Garde", 60, coriace=1),
+            _unit("Brute", 140, size=3, coriace=3),
+            _unit("Bête", 205, size=1, coriace=6),
+        ]
+        builder = self._builder(units)
+        configs = [config for configs in builder.configs.values() for config in configs]
+
+        best = 0
+        # 500 pts : 1 héros, 1 copie par unité, 2 unités hors héros, 200 pts max par unité.
+        for size in range(0, 4):
+            for picks in itertools.combinations_with_replacement(configs, size):
+                army = [config.to_army_unit() for config in picks]
+                cost = sum(unit["cost"] for unit in army)
+                heroes = sum(1 for unit in army if unit["type"] == "hero")
+                if cost > 500 or heroes > 1 or len(army) - heroes > 2 or any(unit["cost"] > 200 for unit in army):
+                    continue
+                if any(sum(1 for unit in army if unit["name"] == name) > 1 for name in builder.configs):
+                    continue
+                best = max(best, sum(config.models * config.tough for config in picks))
+
+        self.assertEqual(builder.build(500, "coriace")["value"], best)
+
+
+@unittest.skipUnless(NUMPY_AVAILABLE, "NumPy non installé")
+class AutoBuilderArmyUnitTests(unittest.TestCase):
+    def test_configured_unit_round_trips_through_list_and_export(self) -> None:
+        from armybuilder.army_view import ArmyUnitSummary
+        from armybuilder.configurations import UnitConfigurationSpace
+        from armybuilder.exporters import export_html
+
+        sword = {"name": "Épée", "range": "Mêlée", "attacks": 2, "armor_piercing": 0, "special_rules": []}
+        hoofs = {"name": "Sabots", "range": "Mêlée", "attacks": 3, "armor_piercing": 1, "special_rules": []}
+        unit = {
+            **_unit("Capitaine", 60, "hero", size=1, coriace=3),
+            "weapon": [sword],
+            "special_rules": ["Héros", "Coriace (3)"],
+            "upgrade_groups": [
+                {"group": "Bannière", "type": "upgrades", "options": [{"name": "Étendard", "cost": 10, "special_rules": ["Peur (1)"]}]},
+                {"group": "Monture", "type": "mount", "options": [{"name": "Destrier", "cost": 20, "mount": {"weapon": [hoofs], "special_rules": ["Rapide"], "coriace_bonus": 1}}]},
+            ],
+        }
+        space = UnitConfigurationSpace(unit)
+        config = next(c for c in space.unit_configs() if len(c.selections) == 2)
+
+        army_unit = config.to_army_unit()
+
+        self.assertEqual(army_unit["options"], {"Bannière": [unit["upgrade_groups"][0]["options"][0]]})
+        self.assertIs(army_unit["mount"], unit["upgrade_groups"][1]["options"][0])
+        self.assertEqual([weapon["name"] for weapon in army_unit["weapon"]], ["Épée"])
+        self.assertEqual(army_unit["special_rules"][:2], ["Héros", "Coriace (3)"])
+        body = ArmyUnitSummary(army_unit).body_html
+        self.assertIn("Étendard", body)
+        self.assertIn("Destrier", body)
+        html = export_html([army_unit], "Test", 1000, game=GAME)
+        for text in ("Étendard", "Peur (1)", "Destrier", "Sabots", "Rapide"):
+            self.assertIn(text, html)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+import unittest
+
+from armybuilder.history import ArmyEditLog, ArmySnapshot
+
+
+def _units(count: int) -> list[dict]:
+    return [{"name": f"Unité {index}", "cost": 10 + index} for index in range(count)]
+
+
+class ArmySnapshotTests(unittest.TestCase):
+    def test_insert_and_remove_keep_order_and_cost(self) -> None:
+        units = _units(100)
+        snapshot = ArmySnapshot.from_units(units)
+
+        inserted = snapshot.insert(40, {"name": "Nouvelle", "cost": 5})
+        removed = inserted.remove(0)
+
+        self.assertEqual(inserted[40]["name"], "Nouvelle")
+        self.assertEqual(len(inserted), 101)
+        self.assertEqual(inserted.cost, snapshot.cost + 5)
+        self.assertEqual(removed.to_list(), units[1:40] + [inserted[40]] + units[40:])
+        self.assertEqual(snapshot.to_list(), units)
+
+    def test_edits_share_untouched_chunks(self) -> None:
+        snapshot = ArmySnapshot.from_units(_units(100))
+
+        edited = snapshot.remove(99)
+
+        self.assertIs(edited._chunks[0], snapshot._chunks[0])
+        self.assertIs(edited._chunks[1], snapshot._chunks[1])
+        self.assertIsNot(edited._chunks[-1], snapshot._chunks[-1])
+
+    def test_large_chunks_are_split(self) -> None:
+        snapshot = ArmySnapshot()
+        for unit in _units(200):
+            snapshot = snapshot.insert(0, unit)
+
+        self.assertTrue(all(len(chunk) <= 2 * ArmySnapshot.CHUNK_SIZE for chunk in snapshot._chunks))
+        self.assertEqual(snapshot[0]["name"], "Unité 199")
+        self.assertEqual(snapshot.cost, sum(unit["cost"] for unit in _units(200)))
+
+    def test_remove_raises_for_invalid_index(self) -> None:
+        with self.assertRaises(IndexError):
+            ArmySnapshot.from_units(_units(2)).remove(5)
+
+
+class ArmyEditLogTests(unittest.TestCase):
+    def test_new_edit_discards_redo_branch(self) -> None:
+        log = ArmyEditLog(_units(2))
+        log.add({"name": "Héros", "cost": 100})
+        log.undo()
+
+        log.remove(0)
+
+        self.assertFalse(log.can_redo)
+        self.assertEqual([unit["name"] for unit in log.current], ["Unité 1"])
+
+    def test_history_is_bounded(self) -> None:
+        log = ArmyEditLog(max_history=3)
+        for unit in _units(10):
+            log.add(unit)
+
+        undone = 0
+        while log.undo():
+            undone += 1
+
+        self.assertEqual(undone, 3)
+        self.assertEqual(len(log.current), 7)
+
+    def test_add_many_is_a_single_edit(self) -> None:
+        log = ArmyEditLog(_units(1))
+        log.add_many(_units(3), "Complétion automatique")
+
+        self.assertEqual(len(log.current), 4)
+        self.assertEqual(log.undo_label, "Complétion automatique")
+        log.undo()
+        self.assertEqual(len(log.current), 1)
+
+    def test_labels_describe_edits(self) -> None:
+        log = ArmyEditLog()
+        log.add({"name": "Guerriers", "cost": 50})
+
+        self.assertEqual(log.undo_label, "Ajout de Guerriers")
+        log.undo()
+        self.assertEqual(log.redo_label, "Ajout de Guerriers")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,142 @@
+import sqlite3
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+from repositories.army_list_repository import SqliteArmyListRepository
+
+
+class SqliteArmyListRepositoryTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.base_dir = Path(self.temp_dir.name)
+        self.repository = SqliteArmyListRepository(self.base_dir)
+        self.army_list = [
+            {"name": "Guerriers", "cost": 120, "type": "unit"},
+            {"name": "Champion", "cost": 80, "type": "hero"},
+        ]
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def _save(self, player: str = "Simon", **overrides) -> int:
+        values = {
+            "player": player,
+            "secret": "tortue-42",
+            "game": "Age of Fantasy",
+            "faction": "Sauriens",
+            "list_name": "Liste test",
+            "points": 2000,
+            "army_list": self.army_list,
+        }
+        values.update(overrides)
+        return self.repository.save_list(**values)
+
+    def test_save_list_creates_database_in_saves_directory(self) -> None:
+        self._save()
+
+        self.assertTrue((self.base_dir / "saves" / "army_lists.sqlite3").exists())
+
+    def test_get_list_returns_payload_and_summary(self) -> None:
+        list_id = self._save()
+
+        stored = self.repository.get_list(list_id, "simon ", "tortue-42")
+
+        self.assertEqual(stored["army_list"], self.army_list)
+        self.assertEqual(stored["army_cost"], 200)
+        self.assertEqual(stored["unit_count"], 2)
+        self.assertIsNone(self.repository.get_list(list_id, "Autre joueur", "tortue-42"))
+
+    def test_save_list_updates_existing_list_when_id_given(self) -> None:
+        list_id = self._save()
+
+        updated_id = self._save(list_id=list_id, list_name="Renommée", army_list=self.army_list[:1])
+
+        self.assertEqual(updated_id, list_id)
+        self.assertEqual(self.repository.count_lists("Simon", "tortue-42"), 1)
+        stored = self.repository.get_list(list_id, "Simon", "tortue-42")
+        self.assertEqual(stored["list_name"], "Renommée")
+        self.assertEqual(stored["army_cost"], 120)
+
+    def test_list_lists_filters_and_pages(self) -> None:
+        for index in range(25):
+            self._save(list_name=f"Liste {index}", points=1000 + index * 100)
+        self._save(faction="Légions spectrales")
+        self._save(player="Autre")
+
+        first_page = self.repository.list_lists("Simon", "tortue-42", faction="Sauriens", page=1, page_size=10)
+        last_page = self.repository.list_lists("Simon", "tortue-42", faction="Sauriens", page=3, page_size=10)
+        in_range = self.repository.count_lists(
+            "Simon", "tortue-42", faction="Sauriens", min_points=2000, max_points=2500
+        )
+
+        self.assertEqual(len(first_page), 10)
+        self.assertEqual(first_page[0]["list_name"], "Liste 24")
+        self.assertEqual(len(last_page), 5)
+        self.assertNotIn("army_list", first_page[0])
+        self.assertEqual(in_range, 6)
+        self.assertEqual(self.repository.count_lists("Simon", "tortue-42"), 26)
+
+    def test_delete_list_only_removes_lists_of_the_player(self) -> None:
+        list_id = self._save()
+
+        self.assertFalse(self.repository.delete_list(list_id, "Autre", "tortue-42"))
+        self.assertTrue(self.repository.delete_list(list_id, "Simon", "tortue-42"))
+        self.assertIsNone(self.repository.get_list(list_id, "Simon", "tortue-42"))
+
+    def test_secret_code_protects_lists_of_the_same_name(self) -> None:
+        list_id = self._save()
+
+        self.assertEqual(self.repository.list_lists("simon", "mauvais"), [])
+        self.assertEqual(self.repository.count_lists("Simon", "mauvais"), 0)
+        self.assertIsNone(self.repository.get_list(list_id, "Simon", "mauvais"))
+        self.assertFalse(self.repository.delete_list(list_id, "Simon", "mauvais"))
+        self.assertEqual(self.repository.get_list(list_id, " simon", "tortue-42")["army_list"], self.army_list)
+        self.assertEqual(self._save(list_id=list_id, player="Intrus", secret="x"), list_id + 1)
+        self.assertTrue(self.repository.delete_list(list_id, "Simon", "tortue-42"))
+
+    def test_every_access_requires_player_name_and_secret(self) -> None:
+        list_id = self._save()
+
+        with self.assertRaises(ValueError):
+            self._save(player="  ")
+        with self.assertRaises(ValueError):
+            self._save(secret="")
+        with self.assertRaises(ValueError):
+            self.repository.get_list(list_id, "Simon", "")
+        with self.assertRaises(ValueError):
+            self.repository.list_lists("Simon", "")
+        with self.assertRaises(ValueError):
+            self.repository.count_lists("Simon", "")
+        with self.assertRaises(ValueError):
+            self.repository.delete_list(list_id, "Simon", "")
+
+    def test_database_uses_wal_journal(self) -> None:
+        self._save()
+
+        connection = sqlite3.connect(self.base_dir / "saves" / "army_lists.sqlite3")
+        try:
+            mode = connection.execute("PRAGMA journal_mode").fetchone()[0]
+        finally:
+            connection.close()
+        self.assertEqual(mode, "wal")
+
+    def test_concurrent_writers_do_not_lose_lists(self) -> None:
+        def writer(player: str) -> None:
+            repository = SqliteArmyListRepository(self.base_dir)
+            for index in range(20):
+                repository.save_list(player, "code", "Age of Fantasy", "Sauriens", f"L{index}", 1000, [])
+
+        threads = [threading.Thread(target=writer, args=(f"Joueur {n}",)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        for n in range(4):
+            self.assertEqual(self.repository.count_lists(f"Joueur {n}", "code"), 20)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+import unittest
+from unittest import mock
+
+from armybuilder.army_view import (
+    ArmySummaryCache,
+    ArmyUnitSummary,
+    army_page,
+    army_sections,
+    fmt_weapon_line,
+    section_header,
+)
+from armybuilder.session import SessionStateManager
+
+
+def _unit(name: str, detail: str = "unit", cost: int = 50) -> dict:
+    return {
+        "name": name,
+        "cost": cost,
+        "unit_detail": detail,
+        "quality": 4,
+        "defense": 5,
+        "size": 10,
+        "coriace": 0,
+        "weapon": [{"name": "Fusil", "range": 24, "attacks": 1, "armor_piercing": 0, "special_rules": ["Assaut"]}],
+        "options": {"g0": [{"name": "Sergent", "special_rules": ["Éclaireur"]}]},
+        "mount": {"name": "Moto", "mount": {"weapon": {"name": "Canon", "range": "12", "attacks": 2, "armor_piercing": 1}, "special_rules": ["Rapide", "Coriace(+3)"]}},
+        "special_rules": ["Vétéran"],
+    }
+
+
+class ArmyUnitSummaryTests(unittest.TestCase):
+    def test_summary_renders_every_block(self) -> None:
+        summary = ArmyUnitSummary(_unit("Gardes", "hero", 75))
+
+        self.assertEqual(summary.section, "hero")
+        self.assertEqual(summary.title, "Gardes — 75 pts")
+        self.assertIn(fmt_weapon_line(_unit("x")["weapon"][0]), summary.body_html)
+        self.assertIn('Fusil (24"/A1/PA0, Assaut)', summary.body_html)
+        self.assertIn("Sergent <span style='color:#888;'>(Éclaireur)</span>", summary.body_html)
+        self.assertIn("🐴 Moto</b> — Armes : Canon (12/A2/PA1) | Rapide", summary.body_html)
+        self.assertIn("Vétéran", summary.body_html)
+        self.assertNotIn("Coriace <b>", summary.body_html)
+
+    def test_cache_builds_each_summary_once_and_forgets_removed_units(self) -> None:
+        cache = ArmySummaryCache()
+        first, second = _unit("A"), _unit("B")
+
+        with mock.patch("armybuilder.army_view.unit_body_html", wraps=lambda unit: unit["name"]) as render:
+            summaries = cache.sync([first, second, first])
+            again = cache.sync([first, second, first])
+            cache.sync([second])
+
+        self.assertEqual(render.call_count, 2)
+        self.assertIs(summaries[0], summaries[2])
+        self.assertEqual([s.body_html for s in again], ["A", "B", "A"])
+        self.assertEqual(len(cache), 1)
+
+
+class ArmyPageTests(unittest.TestCase):
+    def test_sections_follow_display_order(self) -> None:
+        summaries = [ArmyUnitSummary(_unit(f"U{i}", detail)) for i, detail in enumerate(["unit", "titan", "hero", "unit", "autre"])]
+
+        self.assertEqual(army_sections(summaries), [("hero", 1), ("unit", 2), ("titan", 1), ("autre", 1)])
+        self.assertEqual(section_header("hero"), "🦸 Héros")
+        self.assertEqual(section_header("autre"), "• autre")
+
+    def test_page_keeps_army_indexes_and_clamps(self) -> None:
+        summaries = [ArmyUnitSummary(_unit(f"U{i}", "hero" if i % 3 == 0 else "unit")) for i in range(120)]
+
+        rows, pages = army_page(summaries, "hero", 2, 20)
+        last, _ = army_page(summaries, None, 99, 20)
+
+        self.assertEqual(pages, 2)
+        self.assertEqual([index for index, _ in rows], list(range(60, 120, 3)))
+        self.assertEqual(len(last), 20)
+        self.assertEqual(last[-1][0], 119)
+
+
+class SessionSummaryTests(unittest.TestCase):
+    def test_units_are_summarized_when_added(self) -> None:
+        session = SessionStateManager({})
+        session.initialize_defaults()
+        unit = _unit("Gardes")
+
+        session.add_unit(unit)
+        cache = session.session_state["army_summaries"]
+        session.duplicate_unit(0)
+
+        self.assertEqual(len(cache), 1)
+        summaries = session.army_summaries()
+        self.assertIs(summaries[0], summaries[1])
+        session.remove_unit(0)
+        session.remove_unit(0)
+        self.assertEqual(session.army_summaries(), [])
+        self.assertEqual(len(cache), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,7 +2,7 @@ import unittest
 
 from armybuilder.config import DEFAULT_SESSION_STATE, GAME_CONFIG
 from armybuilder.services import ArmyRuleValidator
-from armybuilder.session import SessionStateManager
+from armybuilder.session import SessionFootprintRegistry, SessionStateManager
 
 
 class ArmyRuleValidatorTests(unittest.TestCase):
@@ -88,8 +88,8 @@ class SessionStateManagerTests(unittest.TestCase):
         self.assertEqual(state["game"], "Age of Fantasy")
         self.assertEqual(state["faction"], "Humains")
         self.assertEqual(state["points"], 2000)
-        self.assertEqual(state["units"], faction_data["units"])
-        self.assertEqual(state["faction_data"], faction_data)
+        self.assertIs(state["units"], faction_data["units"])
+        self.assertNotIn("faction_data", state)
 
     def test_reset_army_clears_army_specific_state(self) -> None:
         state = {
@@ -106,14 +106,14 @@ class SessionStateManagerTests(unittest.TestCase):
 
     def test_load_qr_army_if_pending_moves_pending_payload(self) -> None:
         state = {
-            "_qr_army_list": [{"name": "Unit"}],
-            "_qr_army_cost": 250,
+            "_qr_army_list": [{"name": "Unit", "cost": 250}],
+            "_qr_army_cost": 999,
             "unit_selections": {"old": True},
         }
 
         SessionStateManager(state).load_qr_army_if_pending()
 
-        self.assertEqual(state["army_list"], [{"name": "Unit"}])
+        self.assertEqual(state["army_list"], [{"name": "Unit", "cost": 250}])
         self.assertEqual(state["army_cost"], 250)
         self.assertEqual(state["unit_selections"], {})
         self.assertNotIn("_qr_army_list", state)
@@ -128,6 +128,91 @@ class SessionStateManagerTests(unittest.TestCase):
         self.assertEqual(state["army_cost"], 125)
         self.assertEqual(state["army_list"], imported_data["army_list"])
 
+    def test_army_edits_support_undo_and_redo(self) -> None:
+        state = {}
+        manager = SessionStateManager(state)
+        manager.initialize_defaults()
+        archers = {"name": "Archers", "cost": 90}
+
+        manager.add_unit({"name": "Guerriers", "cost": 120})
+        manager.add_unit(archers)
+        manager.duplicate_unit(1)
+        manager.remove_unit(0)
+
+        self.assertEqual([u["name"] for u in state["army_list"]], ["Archers", "Archers"])
+        self.assertIs(state["army_list"][0], state["army_list"][1])
+        self.assertEqual(state["army_cost"], 180)
+
+        self.assertTrue(manager.undo())
+        self.assertEqual(state["army_cost"], 300)
+        self.assertTrue(manager.redo())
+        self.assertEqual(state["army_cost"], 180)
+        self.assertFalse(manager.redo())
+
+    def test_select_draft_evicts_superseded_drafts_and_widget_keys(self) -> None:
+        state = {}
+        manager = SessionStateManager(state)
+        manager.initialize_defaults()
+
+        first_key = manager.select_draft("Guerriers")
+        state["unit_selections"][first_key]["group_0"] = "Lance"
+        state[f"{first_key}_group_0_weapon"] = "Lance"
+        second_key = manager.select_draft("Archers")
+
+        self.assertNotEqual(first_key, second_key)
+        self.assertEqual(list(state["unit_selections"]), [second_key])
+        self.assertNotIn(f"{first_key}_group_0_weapon", state)
+        self.assertEqual(manager.select_draft("Archers"), second_key)
+
+    def test_finish_draft_starts_blank_configuration(self) -> None:
+        state = {}
+        manager = SessionStateManager(state)
+        manager.initialize_defaults()
+        draft_key = manager.select_draft("Guerriers")
+        state[f"{draft_key}_combined"] = True
+
+        manager.finish_draft()
+
+        self.assertEqual(state["unit_selections"], {})
+        self.assertNotIn(f"{draft_key}_combined", state)
+        self.assertNotEqual(manager.select_draft("Guerriers"), draft_key)
+
+    def test_footprint_excludes_shared_catalog_data(self) -> None:
+        state = {}
+        manager = SessionStateManager(state)
+        manager.initialize_defaults()
+        before = manager.footprint()
+
+        state["units"] = [{"name": f"Unité {i}", "weapon": []} for i in range(500)]
+        after = manager.footprint()
+
+        self.assertEqual(before["bytes"], after["bytes"])
+        self.assertEqual(after["drafts"], 0)
+
+    def test_footprint_is_sampled_on_edits_and_every_n_runs(self) -> None:
+        state = {}
+        manager = SessionStateManager(state)
+        manager.initialize_defaults()
+        registry = SessionFootprintRegistry()
+
+        measured = [manager.sample_footprint("s1", registry, every=3) for _ in range(4)]
+        manager.add_unit({"name": "Guerriers", "cost": 100})
+        measured.append(manager.sample_footprint("s1", registry, every=3))
+
+        self.assertEqual(measured, [True, False, False, True, True])
+        self.assertEqual(registry.summary()["sessions"], 1)
+
+    def test_footprint_registry_forgets_silent_sessions(self) -> None:
+        registry = SessionFootprintRegistry(ttl=60)
+        registry.record("ancienne", {"bytes": 10}, now=0)
+        registry.record("active", {"bytes": 30}, now=50)
+        registry.touch("active", now=100)
+
+        summary = registry.summary(now=120)
+
+        self.assertEqual((summary["sessions"], summary["total_bytes"]), (1, 30))
+        self.assertEqual(registry.summary(now=500)["sessions"], 0)
+
 
 if __name__ == "__main__":
     unittest.main()
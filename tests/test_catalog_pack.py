@@ -0,0 +1,91 @@
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from armybuilder.catalog import PackedCatalogStore
+from repositories.catalog_pack import PackedCatalog, build_pack
+from repositories.faction_repository import JsonFactionRepository
+
+
+class CatalogPackTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.base_dir = Path(self.temp_dir.name)
+        common_rules_dir = self.base_dir / "repositories" / "data" / "common-rules"
+        self.factions_dir = self.base_dir / "repositories" / "data" / "factions"
+        common_rules_dir.mkdir(parents=True)
+        self.factions_dir.mkdir(parents=True)
+        self._write(common_rules_dir / "common-rules.json", [{"title": "Rule A", "description": "Description A"}])
+        self._write(
+            self.factions_dir / "alpha.json",
+            {
+                "game": "Game One",
+                "faction": "Alpha",
+                "faction_special_rules": ["Rule A"],
+                "units": [{"name": "Unit A", "weapon": {"name": "Épée"}}, {"name": "Unit B"}],
+            },
+        )
+        self._write(self.factions_dir / "alpha_two.json", {"extends": "alpha.json", "game": "Game Two"})
+        (self.factions_dir / "broken.json").write_text("{", encoding="utf-8")
+        self.repository = JsonFactionRepository(self.base_dir)
+        self.pack_path = self.base_dir / "catalog.pack"
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def _write(self, path: Path, payload) -> None:
+        path.write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+
+    def test_pack_round_trips_the_compiled_catalog(self) -> None:
+        build_pack(self.repository, self.pack_path)
+        expected, games = JsonFactionRepository(self.base_dir).load_catalog()
+
+        pack = PackedCatalog(self.pack_path)
+
+        self.assertEqual(pack.games, games)
+        self.assertEqual(pack.faction("Game One", "Alpha"), expected["Game One"]["Alpha"])
+        self.assertEqual(pack.faction("Game Two", "Alpha")["game"], "Game Two")
+        self.assertIs(pack.faction("Game Two", "Alpha")["units"][0], pack.faction("Game One", "Alpha")["units"][0])
+        self.assertIsNone(pack.faction("Game One", "Inconnue"))
+        self.assertEqual([(error.path.name, error.line) for error in pack.errors], [("broken.json", 1)])
+
+    def test_units_are_decoded_on_demand(self) -> None:
+        build_pack(self.repository, self.pack_path)
+        pack = PackedCatalog(self.pack_path)
+        factions = pack.factions()
+
+        self.assertEqual(list(factions["Game One"]), ["Alpha"])
+        self.assertEqual(pack.decoded_count(), 0)
+        unit = pack.unit("Game One", "Alpha", "Unit B")
+        self.assertEqual(unit["name"], "Unit B")
+        self.assertEqual(pack.decoded_count(), 1)
+        self.assertIs(factions["Game One"]["Alpha"]["units"][1], unit)
+        with self.assertRaises(KeyError):
+            factions["Game One"]["Inconnue"]
+
+    def test_store_publishes_a_new_version_when_the_pack_is_rebuilt(self) -> None:
+        build_pack(self.repository, self.pack_path)
+        store = PackedCatalogStore(self.pack_path)
+        old = store.current()
+        self.assertFalse(store.refresh())
+
+        self._write(self.factions_dir / "beta.json", {"game": "Game One", "faction": "Beta"})
+        build_pack(self.repository, self.pack_path)
+        os.utime(self.pack_path, ns=(10**18, 10**18))
+        self.assertTrue(store.refresh())
+
+        self.assertEqual(sorted(store.current().factions["Game One"]), ["Alpha", "Beta"])
+        self.assertEqual(list(old.factions["Game One"]), ["Alpha"])
+        self.assertEqual(old.get_faction("Game One", "Alpha")["units"][0]["name"], "Unit A")
+
+    def test_rejects_other_files(self) -> None:
+        self.pack_path.write_bytes(b"x" * 32)
+
+        with self.assertRaises(ValueError):
+            PackedCatalog(self.pack_path)
+
+
+if __name__ == "__main__":
+    unittest.main()
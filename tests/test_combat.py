@@ -0,0 +1,91 @@
+import unittest
+
+from armybuilder.combat import NUMPY_AVAILABLE, parse_rule
+
+
+def _weapon(attacks: int = 1, ap: int = 0, rules: list[str] | None = None) -> dict:
+    return {"name": "Arme", "range": "Mêlée", "attacks": attacks, "armor_piercing": ap, "special_rules": rules or []}
+
+
+class ParseRuleTests(unittest.TestCase):
+    def test_parse_rule(self) -> None:
+        self.assertEqual(parse_rule("Mortel (3)"), ("Mortel", 3))
+        self.assertEqual(parse_rule("Perforant"), ("Perforant", None))
+        self.assertEqual(parse_rule({"name": "Explosion (6)"}), ("Explosion", 6))
+
+
+@unittest.skipUnless(NUMPY_AVAILABLE, "NumPy non installé")
+class CombatEngineTests(unittest.TestCase):
+    def _wounds(self, weapon: dict, quality: int = 4, defenses=(4,)) -> list[float]:
+        from armybuilder.combat import CombatEngine, WeaponProfiles
+
+        profiles = WeaponProfiles.from_weapons([(("U", None, None, "Arme"), weapon, quality)])
+        return [round(float(value), 4) for value in CombatEngine(defenses).expected_wounds(profiles)[0]]
+
+    def test_plain_attack(self) -> None:
+        # 3 chances sur 6 de toucher (4+), 3 chances sur 6 de ne pas bloquer (4+).
+        self.assertEqual(self._wounds(_weapon(attacks=6)), [1.5])
+
+    def test_armor_piercing_and_natural_six_block(self) -> None:
+        # PA(4) contre Déf 4+ : seul le 6 naturel bloque encore.
+        self.assertEqual(self._wounds(_weapon(attacks=6, ap=4)), [round(3 * 5 / 6, 4)])
+
+    def test_deadly_blast_and_reliable(self) -> None:
+        self.assertEqual(self._wounds(_weapon(attacks=6, rules=["Mortel (3)"])), [4.5])
+        self.assertEqual(self._wounds(_weapon(attacks=6, rules=["Explosion (3)"])), [4.5])
+        self.assertEqual(self._wounds(_weapon(attacks=6, rules=["Fiable"]), quality=6), [2.5])
+
+    def test_rending_only_improves_sixes(self) -> None:
+        plain, rending = self._wounds(_weapon(attacks=6)), self._wounds(_weapon(attacks=6, rules=["Perforant"]))
+
+        # Les 6 pour toucher (1 touche) passent de 1/2 à 5/6 de chances de blesser.
+        self.assertAlmostEqual(rending[0] - plain[0], 5 / 6 - 1 / 2, places=3)
+
+    def test_defense_dependent_rules(self) -> None:
+        smash = self._wounds(_weapon(attacks=6, rules=["Fracas"]), defenses=(4, 5))
+        reap = self._wounds(_weapon(attacks=6, rules=["Fauchage"]), defenses=(3, 4))
+
+        self.assertEqual(smash, [1.5, round(3 * 3 * 4 / 6, 4)])
+        self.assertEqual(reap, [2.0, 1.5])
+
+    def test_upgrade_efficiency_subtracts_replaced_weapons(self) -> None:
+        from armybuilder.combat import UpgradeEfficiency
+
+        faction = {
+            "units": [
+                {
+                    "name": "Guerriers",
+                    "size": 5,
+                    "quality": 4,
+                    "weapon": [dict(_weapon(attacks=1), name="Épée")],
+                    "upgrade_groups": [
+                        {
+                            "group": "Remplacement",
+                            "type": "weapon",
+                            "description": "Remplacer toutes les Épées par :",
+                            "options": [
+                                {"name": "Hallebarde", "cost": 10, "weapon": dict(_weapon(attacks=1, ap=1), name="Hallebarde"), "replaces": ["Épée"]},
+                            ],
+                        },
+                        {
+                            "group": "Bannière",
+                            "type": "upgrades",
+                            "description": "Améliorer une figurine avec :",
+                            "options": [{"name": "Bannière", "cost": 5, "special_rules": ["Aura Courage"]}],
+                        },
+                    ],
+                }
+            ]
+        }
+
+        scores = UpgradeEfficiency(faction, defenses=(4,)).for_unit("Guerriers")
+
+        self.assertEqual(len(scores), 1)
+        self.assertEqual(scores[0]["copies"], 5)
+        # Par figurine : 0,5 touche ; non bloquée 1/2 -> 2/3 avec PA(1).
+        self.assertAlmostEqual(scores[0]["wounds"], round(5 * 0.5 * (4 / 6 - 3 / 6), 3))
+        self.assertEqual(scores[0]["score"], round(scores[0]["wounds"] / 10 * 100, 2))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,187 @@
+import json
+import unittest
+import unittest.mock
+from pathlib import Path
+
+from armybuilder.combat import NUMPY_AVAILABLE
+from repositories.faction_compiler import compile_faction
+
+
+FACTION_PATH = Path(__file__).resolve().parent.parent / "repositories" / "data" / "factions" / "soeurs_benies_gf.json"
+
+
+def _weapon(name: str, attacks: int = 1, **extra) -> dict:
+    return {"name": name, "range": "Mêlée", "attacks": attacks, "armor_piercing": 0, "special_rules": [], **extra}
+
+
+def _unit(groups: list[dict], size: int = 5, unit_type: str = "unit") -> dict:
+    return {
+        "name": "Guerriers",
+        "type": unit_type,
+        "size": size,
+        "base_cost": 50,
+        "quality": 4,
+        "defense": 4,
+        "coriace": 1,
+        "weapon": [_weapon("Épée")],
+        "special_rules": [],
+        "upgrade_groups": groups,
+    }
+
+
+@unittest.skipUnless(NUMPY_AVAILABLE, "NumPy non installé")
+class UnitConfigurationSpaceTests(unittest.TestCase):
+    def _space(self, unit: dict):
+        from armybuilder.configurations import UnitConfigurationSpace
+
+        return UnitConfigurationSpace(unit)
+
+    def test_weapon_swap_and_combined_unit(self) -> None:
+        unit = _unit([
+            {"group": "Remplacement", "type": "weapon", "description": "", "options": [
+                {"name": "Hallebarde", "cost": 10, "weapon": _weapon("Hallebarde"), "replaces": ["Épée"]},
+            ]},
+        ])
+
+        space = self._space(unit)
+
+        # Épée ou Hallebarde, en unité simple ou combinée.
+        self.assertEqual(space.configurations, 4)
+        self.assertEqual(sorted(space.cost.tolist()), [50, 60, 100, 120])
+        self.assertEqual(sorted(space.models.tolist()), [5, 5, 10, 10])
+        swapped = [row for row, cost in enumerate(space.cost.tolist()) if cost == 60][0]
+        weapons = [(space.weapon_registry[index]["name"], count) for index, count, _ in space.weapons[swapped]]
+        self.assertEqual(weapons, [("Hallebarde", 5)])
+
+    def test_requires_and_unreachable_options(self) -> None:
+        unit = _unit([
+            {"group": "Arme", "type": "weapon", "description": "", "options": [
+                {"name": "Lance", "cost": 5, "weapon": _weapon("Lance"), "replaces": ["Épée"]},
+            ]},
+            {"group": "Bouclier", "type": "upgrades", "description": "", "requires_not": ["Lance"], "options": [
+                {"name": "Bouclier", "cost": 5, "special_rules": ["Bouclier"]},
+            ]},
+            {"group": "Rôle", "type": "upgrades", "description": "", "options": [
+                {"name": "Porte-lance", "cost": 5, "requires": ["Lance"]},
+                {"name": "Relique", "cost": 5, "requires": ["Inexistante"]},
+            ]},
+        ], unit_type="hero", size=1)
+
+        space = self._space(unit)
+
+        # Épée (+/- Bouclier) ou Lance (+/- Porte-lance).
+        self.assertEqual(space.configurations, 4)
+        self.assertEqual(space.unreachable, [(2, "Relique")])
+
+    def test_variable_count_budget(self) -> None:
+        unit = _unit([
+            {"group": "Remplacement", "type": "variable_weapon_count", "description": "", "options": [
+                {"name": option, "cost": cost, "weapon": _weapon(option), "replaces": ["Épée"],
+                 "max_count": {"type": "fixed", "value": 2}}
+                for option, cost in (("Fusil", 5), ("Canon", 10))
+            ]},
+        ])
+
+        space = self._space(unit)
+
+        # (Fusil, Canon) avec au plus 2 au total : 6 répartitions, x2 pour l'unité combinée.
+        self.assertEqual(space.configurations, 12)
+        solo = [cost for cost, models in zip(space.cost.tolist(), space.models.tolist()) if models == 5]
+        self.assertEqual(sorted(solo), [50, 55, 60, 60, 65, 70])
+
+    def test_equivalent_selections_are_merged_but_counted(self) -> None:
+        unit = _unit([
+            {"group": "Bannière", "type": "upgrades", "description": "", "options": [
+                {"name": "Bannière", "cost": 5, "special_rules": ["Courage"]},
+                {"name": "Musicien", "cost": 5, "special_rules": ["Rapide"]},
+            ]},
+        ], unit_type="hero", size=1)
+
+        space = self._space(unit)
+
+        self.assertEqual(space.configurations, 4)
+        self.assertEqual(len(space), 3)
+        self.assertEqual(sorted(zip(space.cost.tolist(), space.ways)), [(50, 1), (55, 2), (60, 1)])
+
+    def test_option_requires_not_is_applied(self) -> None:
+        unit = _unit([
+            {"group": "Arme", "type": "weapon", "description": "", "options": [
+                {"name": "Lance", "cost": 5, "weapon": _weapon("Lance"), "replaces": ["Épée"]},
+            ]},
+            {"group": "Bouclier", "type": "upgrades", "description": "", "options": [
+                {"name": "Bouclier", "cost": 5, "requires_not": ["Lance"]},
+                {"name": "Bannière", "cost": 10},
+            ]},
+        ], unit_type="hero", size=1)
+
+        space = self._space(unit)
+
+        # Épée : 4 sous-ensembles ; Lance : sans Bouclier, 2.
+        self.assertEqual(space.configurations, 6)
+        self.assertEqual(space.unreachable, [])
+
+    def test_upgrade_subsets_are_merged_while_built(self) -> None:
+        unit = _unit([
+            {"group": "Améliorations", "type": "upgrades", "description": "", "options": [
+                {"name": f"Option {index}", "cost": 5, "special_rules": [f"Règle {index}"]} for index in range(24)
+            ]},
+        ], unit_type="hero", size=1)
+
+        space = self._space(unit)
+
+        self.assertEqual(space.configurations, 2 ** 24)
+        self.assertEqual(len(space), 25)
+
+    def test_oversized_unit_is_not_enumerated(self) -> None:
+        from armybuilder import configurations
+
+        unit = _unit([
+            {"group": f"Groupe {index}", "type": "upgrades", "description": "", "options": [
+                {"name": f"Option {index}", "cost": 2 ** index},
+            ]}
+            for index in range(6)
+        ], unit_type="hero", size=1)
+        faction = {"units": [unit]}
+
+        with unittest.mock.patch.object(configurations, "MAX_STATES_PER_UNIT", 10):
+            result = configurations.FactionConfigurations(faction)
+
+        space = result.units["Guerriers"]
+        self.assertTrue(space.truncated)
+        self.assertEqual((len(space), space.configurations, space.unreachable), (0, 0, []))
+        self.assertEqual(result.counts(), {"Guerriers": None})
+        self.assertEqual(result.truncated(), ["Guerriers"])
+        self.assertEqual([config.cost for config in result.unit_configs(unit)], [50])
+        self.assertIn("énumération abandonnée", result.issues[0])
+
+    def test_unreachable_options_are_reported(self) -> None:
+        from armybuilder.configurations import FactionConfigurations
+
+        unit = _unit([
+            {"group": "Rôle", "type": "upgrades", "description": "", "options": [
+                {"name": "Relique", "cost": 5, "requires": ["Boucliers de combat"]},
+            ]},
+        ], unit_type="hero", size=1)
+
+        issues = FactionConfigurations({"units": [unit]}).issues
+
+        self.assertEqual(issues, ["Guerriers : Rôle — option « Relique » jamais sélectionnable"])
+
+    def test_shipped_faction_feeds_the_auto_builder(self) -> None:
+        from armybuilder.builder import ArmyAutoBuilder
+        from armybuilder.configurations import FactionConfigurations
+
+        with FACTION_PATH.open(encoding="utf-8") as file:
+            faction = compile_faction(json.load(file))
+
+        configurations = FactionConfigurations(faction)
+        builder = ArmyAutoBuilder(faction["units"], "Grimdark Future", configurations=configurations.unit_configs)
+        proposal = builder.build(1000, "points")
+
+        self.assertEqual(set(configurations.counts()), {unit["name"] for unit in faction["units"]})
+        self.assertTrue(all(count >= 1 for count in configurations.counts().values()))
+        self.assertEqual(proposal["cost"], 1000)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+import unittest
+from concurrent.futures import CancelledError, Future
+from concurrent.futures.process import BrokenProcessPool
+from unittest import mock
+
+from armybuilder.export_jobs import ExportJobQueue, content_hash
+
+
+ARMY = [
+    {
+        "name": "Guerriers",
+        "type": "unit",
+        "cost": 120,
+        "size": 10,
+        "quality": 4,
+        "defense": 4,
+        "weapon": [{"name": "Épée", "range": "Mêlée", "attacks": 1, "armor_piercing": 0, "special_rules": []}],
+        "special_rules": ["Bouclier"],
+    }
+]
+
+
+class ExportJobQueueTests(unittest.TestCase):
+    def test_inline_jobs_are_deduplicated_by_content(self) -> None:
+        queue = ExportJobQueue(workers=0)
+
+        first = queue.submit("army_html", ARMY, "Ma liste", 1000, game="Age of Fantasy", rules_dict={"Bouclier": "+1 Déf"})
+        again = queue.submit("army_html", ARMY, "Ma liste", 1000, game="Age of Fantasy", rules_dict={"Bouclier": "+1 Déf"})
+        other = queue.submit("army_html", ARMY, "Autre liste", 1000, game="Age of Fantasy")
+
+        self.assertEqual(first, again)
+        self.assertNotEqual(first, other)
+        self.assertEqual(queue.status(first), "done")
+        html = queue.result(first)
+        self.assertIn("Ma liste", html)
+        self.assertIn("Guerriers", html)
+        self.assertEqual(queue.status("inconnu"), "unknown")
+        self.assertIsNone(queue.result("inconnu"))
+
+    def test_errors_are_reported(self) -> None:
+        queue = ExportJobQueue(workers=0)
+
+        key = queue.submit("faction_html", None)
+
+        self.assertEqual(queue.status(key), "error")
+        self.assertIsNotNone(queue.error(key))
+        with self.assertRaises(ValueError):
+            queue.submit("zip", ARMY)
+
+    def test_cache_keeps_the_most_recent_results(self) -> None:
+        queue = ExportJobQueue(workers=0, cache_size=2)
+
+        keys = [queue.submit("army_html", ARMY, f"Liste {index}", 1000) for index in range(3)]
+
+        self.assertEqual([queue.status(key) for key in keys], ["unknown", "done", "done"])
+
+    def test_process_pool_renders_in_background(self) -> None:
+        queue = ExportJobQueue(workers=1)
+        self.addCleanup(queue.shutdown)
+
+        key = queue.submit("faction_html", {"faction": "Légions", "game": "Age of Fantasy", "units": []})
+
+        self.assertIn("Légions", queue.result(key, timeout=30))
+        self.assertEqual(queue.status(key), "done")
+        # Jamais de fork d'un serveur déjà multi-thread.
+        self.assertNotEqual(queue._pool._mp_context.get_start_method(), "fork")
+
+    def test_broken_pool_is_replaced_then_bypassed(self) -> None:
+        class BrokenPool:
+            created = 0
+
+            def __init__(self, *args, **kwargs) -> None:
+                BrokenPool.created += 1
+
+            def submit(self, *args, **kwargs):
+                raise BrokenProcessPool("worker tué")
+
+            def shutdown(self, *args, **kwargs) -> None:
+                pass
+
+        queue = ExportJobQueue(workers=1)
+        with mock.patch("armybuilder.export_jobs.ProcessPoolExecutor", BrokenPool):
+            key = queue.submit("army_html", ARMY, "Ma liste", 1000)
+
+        self.assertEqual(BrokenPool.created, 2)
+        self.assertIsNone(queue._pool)
+        self.assertEqual(queue.status(key), "done")
+        self.assertIn("Guerriers", queue.result(key))
+
+    def test_cancelled_jobs_are_reported_and_resubmitted(self) -> None:
+        queue = ExportJobQueue(workers=0)
+        key = content_hash("army_html", ARMY, "Ma liste", 1000)
+        cancelled = Future()
+        cancelled.cancel()
+        queue._jobs[key] = cancelled
+
+        self.assertEqual(queue.status(key), "error")
+        self.assertIsNone(queue.result(key))
+        self.assertIsInstance(queue.error(key), CancelledError)
+        self.assertEqual(queue.submit("army_html", ARMY, "Ma liste", 1000), key)
+        self.assertEqual(queue.status(key), "done")
+
+    def test_content_hash_is_order_independent_for_mappings(self) -> None:
+        self.assertEqual(content_hash("army_html", {"a": 1, "b": 2}), content_hash("army_html", {"b": 2, "a": 1}))
+        self.assertNotEqual(content_hash("army_html", {"a": 1}), content_hash("faction_html", {"a": 1}))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,187 @@
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from armybuilder.catalog import FactionCatalogStore
+from repositories.faction_repository import JsonFactionRepository
+
+
+class CountingFactionRepository(JsonFactionRepository):
+    def __init__(self, base_dir: Path) -> None:
+        super().__init__(base_dir)
+        self.parsed: list[str] = []
+
+    def _load_file(self, file_path: Path):
+        self.parsed.append(file_path.name)
+        return super()._load_file(file_path)
+
+
+class FactionCatalogStoreTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.base_dir = Path(self.temp_dir.name)
+        self.common_rules_dir = self.base_dir / "repositories" / "data" / "common-rules"
+        self.factions_dir = self.base_dir / "repositories" / "data" / "factions"
+        self.common_rules_dir.mkdir(parents=True)
+        self.factions_dir.mkdir(parents=True)
+
+        self._write(
+            self.common_rules_dir / "common-rules.json",
+            [{"title": "Rule A", "description": "Description A"}],
+        )
+        self._write(
+            self.factions_dir / "alpha.json",
+            {"game": "Game One", "faction": "Alpha", "faction_special_rules": ["Rule A"]},
+        )
+        self._write(
+            self.factions_dir / "beta.json",
+            {"game": "Game One", "faction": "Beta", "units": [{"name": "Unit Beta"}]},
+        )
+        self.repository = CountingFactionRepository(self.base_dir)
+        self.store = FactionCatalogStore(self.repository)
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def _write(self, path: Path, payload, mtime: int | None = None) -> None:
+        path.write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+        if mtime is not None:
+            os.utime(path, ns=(mtime, mtime))
+
+    def test_current_loads_initial_version(self) -> None:
+        version = self.store.current()
+
+        self.assertEqual(version.number, 1)
+        self.assertEqual(version.games, ["Game One"])
+        self.assertEqual(sorted(version.factions["Game One"]), ["Alpha", "Beta"])
+
+    def test_refresh_without_changes_keeps_version(self) -> None:
+        version = self.store.current()
+
+        self.assertFalse(self.store.refresh())
+        self.assertIs(self.store.current(), version)
+
+    def test_refresh_reparses_only_changed_file(self) -> None:
+        old_version = self.store.current()
+        self.repository.parsed.clear()
+
+        self._write(
+            self.factions_dir / "alpha.json",
+            {"game": "Game One", "faction": "Alpha", "units": [{"name": "New Unit"}]},
+            mtime=10**18,
+        )
+        self.assertTrue(self.store.refresh())
+        new_version = self.store.current()
+
+        self.assertEqual(self.repository.parsed, ["alpha.json"])
+        self.assertEqual(new_version.number, 2)
+        self.assertEqual(
+            [unit["name"] for unit in new_version.factions["Game One"]["Alpha"]["units"]], ["New Unit"]
+        )
+        self.assertEqual(old_version.factions["Game One"]["Alpha"]["units"], [])
+        self.assertIs(new_version.factions["Game One"]["Beta"], old_version.factions["Game One"]["Beta"])
+
+    def test_common_rules_change_rehydrates_without_reparsing_factions(self) -> None:
+        self.store.current()
+        self.repository.parsed.clear()
+
+        self._write(
+            self.common_rules_dir / "common-rules.json",
+            [{"title": "Rule A", "description": "Updated"}],
+            mtime=10**18,
+        )
+        self.store.refresh()
+
+        self.assertEqual(self.repository.parsed, [])
+        self.assertEqual(
+            self.store.current().factions["Game One"]["Alpha"]["faction_special_rules"],
+            [{"name": "Rule A", "description": "Updated"}],
+        )
+
+    def test_removed_file_drops_faction(self) -> None:
+        self.store.current()
+
+        (self.factions_dir / "beta.json").unlink()
+        self.store.refresh()
+
+        self.assertEqual(list(self.store.current().factions["Game One"]), ["Alpha"])
+
+    def test_broken_file_is_reported_and_keeps_last_valid_content(self) -> None:
+        self.store.current()
+
+        (self.factions_dir / "alpha.json").write_text('{"game": "Game One", "faction": "Alpha",}', encoding="utf-8")
+        (self.factions_dir / "gamma.json").write_text("{", encoding="utf-8")
+        self.assertTrue(self.store.refresh())
+        version = self.store.current()
+
+        self.assertEqual(sorted(version.factions["Game One"]), ["Alpha", "Beta"])
+        self.assertEqual([(error.path.name, error.line) for error in version.errors], [("alpha.json", 1), ("gamma.json", 1)])
+
+        self._write(self.factions_dir / "alpha.json", {"game": "Game One", "faction": "Alpha"}, mtime=10**18)
+        (self.factions_dir / "gamma.json").unlink()
+        self.store.refresh()
+
+        self.assertEqual(self.store.current().errors, ())
+
+    def test_invalid_faction_content_is_isolated(self) -> None:
+        self._write(self.factions_dir / "gamma.json", {"game": "Game One", "faction": "Gamma", "units": 3})
+
+        version = self.store.current()
+
+        self.assertEqual(sorted(version.factions["Game One"]), ["Alpha", "Beta"])
+        self.assertEqual([error.path.name for error in version.errors], ["gamma.json"])
+
+    def test_variant_follows_its_base(self) -> None:
+        self._write(self.factions_dir / "beta_two.json", {"extends": "beta.json", "game": "Game Two"})
+        version = self.store.current()
+        self.assertIs(version.factions["Game Two"]["Beta"]["units"][0], version.factions["Game One"]["Beta"]["units"][0])
+        self.repository.parsed.clear()
+
+        self._write(self.factions_dir / "beta.json", {"game": "Game One", "faction": "Beta", "units": [{"name": "New"}]}, mtime=10**18)
+        self.store.refresh()
+        self.assertEqual(self.repository.parsed, ["beta.json"])
+        self.assertEqual(self.store.current().factions["Game Two"]["Beta"]["units"][0]["name"], "New")
+
+        (self.factions_dir / "beta.json").unlink()
+        self.store.refresh()
+        version = self.store.current()
+        # Base disparue : la variante est signalée et garde son dernier contenu valide.
+        self.assertEqual(sorted(version.factions["Game One"]), ["Alpha"])
+        self.assertEqual(version.factions["Game Two"]["Beta"]["units"][0]["name"], "New")
+        self.assertEqual([error.path.name for error in version.errors], ["beta_two.json"])
+
+    def test_changed_file_failing_normalization_keeps_last_valid_content(self) -> None:
+        old_version = self.store.current()
+
+        self._write(self.factions_dir / "alpha.json", {"game": "Game One", "faction": "Alpha", "units": 3}, mtime=10**18)
+        self.assertTrue(self.store.refresh())
+        version = self.store.current()
+
+        self.assertIs(version.factions["Game One"]["Alpha"], old_version.factions["Game One"]["Alpha"])
+        self.assertEqual([error.path.name for error in version.errors], ["alpha.json"])
+
+        self._write(self.factions_dir / "alpha.json", {"game": "Game Two", "faction": "Alpha"}, mtime=2 * 10**18)
+        self.store.refresh()
+        version = self.store.current()
+
+        self.assertEqual(sorted(version.factions["Game One"]), ["Beta"])
+        self.assertIn("Alpha", version.factions["Game Two"])
+        self.assertEqual(version.errors, ())
+
+    def test_derive_caches_per_version(self) -> None:
+        version = self.store.current()
+        calls = []
+
+        def builder(v):
+            calls.append(v.number)
+            return len(v.factions["Game One"])
+
+        self.assertEqual(version.derive("count", builder), 2)
+        self.assertEqual(version.derive("count", builder), 2)
+        self.assertEqual(calls, [1])
+
+
+if __name__ == "__main__":
+    unittest.main()
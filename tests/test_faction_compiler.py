@@ -0,0 +1,166 @@
+import json
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+from repositories.faction_compiler import (
+    TEMPLATE_PATH,
+    FactionCompiler,
+    SchemaIssue,
+    apply_variant,
+    compile_faction,
+    merge_patch,
+    normalize_range,
+)
+
+
+class FactionCompilerTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.compiler = FactionCompiler()
+        with TEMPLATE_PATH.open(encoding="utf-8") as file:
+            self.template = json.load(file)
+
+    def test_template_is_valid(self) -> None:
+        self.assertEqual(self.compiler.validate(self.template), [])
+
+    def test_validate_reports_type_errors_with_json_path(self) -> None:
+        self.template["units"][0]["quality"] = "3+"
+        self.template["units"][0]["upgrade_groups"][1]["options"][0]["cost"] = "10"
+
+        issues = self.compiler.validate(self.template)
+
+        self.assertEqual(
+            [issue.path for issue in issues],
+            ["$.units[0].quality", "$.units[0].upgrade_groups[1].options[0].cost"],
+        )
+
+    def test_validate_reports_missing_fields_and_unknown_group_type(self) -> None:
+        del self.template["units"][0]["base_cost"]
+        self.template["units"][0]["upgrade_groups"][0]["type"] = "bonus"
+
+        issues = self.compiler.validate(self.template)
+
+        self.assertIn(SchemaIssue("$.units[0]", "champ obligatoire manquant : base_cost"), issues)
+        self.assertIn(
+            SchemaIssue("$.units[0].upgrade_groups[0].type", "type de groupe inconnu : 'bonus'"),
+            issues,
+        )
+
+    def test_validate_accepts_polymorphic_weapons(self) -> None:
+        unit = self.template["units"][0]
+        unit["weapon"] = unit["weapon"][0]
+        unit["upgrade_groups"][2]["options"][0]["weapon"] = [
+            {"name": "Arc", "range": 24, "attacks": 1, "armor_piercing": 0}
+        ]
+
+        self.assertEqual(self.compiler.validate(self.template), [])
+
+    def test_compile_normalizes_polymorphic_fields(self) -> None:
+        compiled = compile_faction(
+            {
+                "game": "Game",
+                "faction": "Faction",
+                "units": [
+                    {
+                        "name": "Unit",
+                        "type": "hero",
+                        "weapon": {"name": "Épée", "range": "mêlée", "attacks": 2},
+                        "upgrade_groups": [
+                            {
+                                "type": "weapon",
+                                "options": [{"name": "Arc", "cost": 5, "weapon": {"name": "Arc", "range": '24"'}}],
+                            },
+                            {
+                                "type": "mount",
+                                "options": [{"name": "Cheval", "cost": 10, "mount": {"weapon": {"name": "Sabots"}}}],
+                            },
+                        ],
+                    },
+                    {"name": "Sans groupes"},
+                ],
+            }
+        )
+
+        hero, plain = compiled["units"]
+        self.assertEqual(hero["weapon"], [{"name": "Épée", "range": "Mêlée", "attacks": 2, "special_rules": []}])
+        self.assertEqual(hero["unit_detail"], "hero")
+        self.assertEqual(hero["upgrade_groups"][0]["options"][0]["weapon"]["range"], 24)
+        self.assertIsInstance(hero["upgrade_groups"][1]["options"][0]["mount"]["weapon"], list)
+        self.assertEqual(plain["upgrade_groups"], [])
+        self.assertEqual(plain["weapon"], [])
+        self.assertEqual(plain["unit_detail"], "unit")
+
+    def test_normalize_range(self) -> None:
+        self.assertEqual(normalize_range(None), "Mêlée")
+        self.assertEqual(normalize_range("Melee"), "Mêlée")
+        self.assertEqual(normalize_range('12"'), 12)
+        self.assertEqual(normalize_range(18.0), 18)
+
+    def test_compile_file_reports_json_syntax_errors(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "broken.json"
+            path.write_text('{\n  "game": "G"\n  "faction": "F"\n}', encoding="utf-8")
+
+            compiled, issues = self.compiler.compile_file(path)
+
+        self.assertIsNone(compiled)
+        self.assertEqual(issues[0].path, "$")
+        self.assertIn("ligne 3, colonne 3", issues[0].message)
+
+    def test_merge_patch_follows_rfc_7396(self) -> None:
+        target = {"a": 1, "b": {"c": 2, "d": 3}}
+
+        self.assertEqual(merge_patch(target, {"a": None, "b": {"c": 5}, "e": [1]}), {"b": {"c": 5, "d": 3}, "e": [1]})
+        self.assertEqual(target, {"a": 1, "b": {"c": 2, "d": 3}})
+        self.assertEqual(merge_patch(target, [1]), [1])
+
+    def test_apply_variant_shares_untouched_units(self) -> None:
+        base = {"game": "AoF", "faction": "F", "units": [{"name": "A", "cost": 1}, {"name": "B"}, {"name": "C"}]}
+        variant = {
+            "extends": "f_aof.json",
+            "game": "AoF Regiments",
+            "units_patch": {"A": {"cost": 2}, "B": None},
+            "units_add": [{"name": "D"}],
+        }
+
+        materialized = apply_variant(base, variant)
+
+        self.assertEqual(materialized["game"], "AoF Regiments")
+        self.assertNotIn("extends", materialized)
+        self.assertEqual([unit["name"] for unit in materialized["units"]], ["A", "C", "D"])
+        self.assertEqual(materialized["units"][0]["cost"], 2)
+        self.assertIs(materialized["units"][1], base["units"][2])
+        self.assertEqual(base["units"][0]["cost"], 1)
+        with self.assertRaises(ValueError):
+            apply_variant(base, {"extends": "f_aof.json", "units_patch": {"Z": {}}})
+
+    def test_compile_file_resolves_variants(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            base_path = Path(temp_dir) / "f_aof.json"
+            base_path.write_text(json.dumps({"game": "AoF", "faction": "F", "units": []}), encoding="utf-8")
+            variant_path = Path(temp_dir) / "f_aofr.json"
+            variant_path.write_text(json.dumps({"extends": "f_aof.json", "game": "AoF Regiments"}), encoding="utf-8")
+            orphan_path = Path(temp_dir) / "g_aofr.json"
+            orphan_path.write_text(json.dumps({"extends": "g_aof.json"}), encoding="utf-8")
+
+            compiled, issues = self.compiler.compile_file(variant_path)
+            _, orphan_issues = self.compiler.compile_file(orphan_path)
+
+        self.assertEqual(issues, [])
+        self.assertEqual((compiled["game"], compiled["faction"]), ("AoF Regiments", "F"))
+        self.assertEqual(orphan_issues[0].path, "$.extends")
+
+    def test_shipped_factions_validate_quickly(self) -> None:
+        paths = sorted(TEMPLATE_PATH.parent.parent.glob("*.json"))
+
+        started = time.perf_counter()
+        for path in paths:
+            self.compiler.compile_file(path)
+        elapsed = time.perf_counter() - started
+
+        self.assertLess(elapsed, 1.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
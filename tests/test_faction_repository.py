@@ -115,6 +115,48 @@ class JsonFactionRepositoryTests(unittest.TestCase):
         self.assertEqual(faction["spells"], {})
         self.assertEqual(faction["units"], [])
 
+    def test_load_catalog_isolates_broken_files(self) -> None:
+        (self.factions_dir / "broken.json").write_text('{"game": "Game One",\n  "faction" "X"}', encoding="utf-8")
+        repository = JsonFactionRepository(self.base_dir)
+
+        factions_by_game, games = repository.load_catalog()
+
+        self.assertEqual(games, ["Game One", "Game Two"])
+        self.assertIn("Faction Alpha", factions_by_game["Game One"])
+        self.assertEqual(
+            [error.to_dict() for error in repository.load_errors],
+            [{"file": "broken.json", "line": 2, "column": 13, "message": "Expecting ':' delimiter"}],
+        )
+
+    def test_read_faction_files_reports_every_failure(self) -> None:
+        (self.factions_dir / "broken.json").write_text("[1, 2", encoding="utf-8")
+        repository = JsonFactionRepository(self.base_dir)
+        paths = repository.list_faction_files() + [self.factions_dir / "missing.json"]
+
+        parsed, errors = repository.read_faction_files(paths, workers=4)
+
+        self.assertEqual(len(parsed), len(paths) - 2)
+        self.assertEqual([error.path.name for error in errors], ["broken.json", "missing.json"])
+        self.assertEqual(errors[0].line, 1)
+        self.assertIsNone(errors[1].line)
+        self.assertIn("broken.json (ligne 1, colonne 6)", str(errors[0]))
+
+    def test_variant_extends_base_and_shares_its_units(self) -> None:
+        (self.factions_dir / "alpha_variant.json").write_text(
+            json.dumps({"extends": "a_faction.json", "game": "Game Two", "faction_special_rules": ["Rule B"]}),
+            encoding="utf-8",
+        )
+        repository = JsonFactionRepository(self.base_dir)
+
+        factions_by_game, _ = repository.load_catalog()
+
+        base = factions_by_game["Game One"]["Faction Alpha"]
+        variant = factions_by_game["Game Two"]["Faction Alpha"]
+        self.assertIs(variant["units"][0], base["units"][0])
+        self.assertEqual(variant["faction_special_rules"], [{"name": "Rule B", "description": "Description B"}])
+        self.assertEqual(repository.load_errors, [])
+        self.assertEqual(repository.load_faction_file(self.factions_dir / "alpha_variant.json"), variant)
+
     def test_load_catalog_raises_when_factions_directory_is_missing(self) -> None:
         repository = JsonFactionRepository(self.base_dir)
         for file_path in self.factions_dir.glob("*.json"):
@@ -0,0 +1,77 @@
+import unittest
+
+from armybuilder.export_jobs import content_hash
+from armybuilder.fingerprints import FingerprintCache, army_fingerprint, unit_fingerprint
+from armybuilder.session import SessionStateManager
+
+
+def _unit(name: str, cost: int = 50) -> dict:
+    return {
+        "name": name,
+        "cost": cost,
+        "weapon": [{"name": "Fusil", "range": 24, "attacks": 1}],
+        "special_rules": ["Vétéran", "Éclaireur"],
+    }
+
+
+class FingerprintTests(unittest.TestCase):
+    def test_unit_fingerprint_ignores_key_order_but_not_list_order(self) -> None:
+        unit = _unit("Gardes")
+        reordered = dict(reversed(list(unit.items())))
+        swapped = {**unit, "special_rules": ["Éclaireur", "Vétéran"]}
+
+        self.assertEqual(unit_fingerprint(unit), unit_fingerprint(reordered))
+        self.assertNotEqual(unit_fingerprint(unit), unit_fingerprint(swapped))
+        self.assertEqual(len(unit_fingerprint(unit)), 32)
+
+    def test_list_fingerprint_depends_on_order_and_count(self) -> None:
+        first, second = _unit("Gardes"), _unit("Motos", 80)
+
+        self.assertEqual(army_fingerprint([first, second]), army_fingerprint([_unit("Gardes"), _unit("Motos", 80)]))
+        self.assertNotEqual(army_fingerprint([first, second]), army_fingerprint([second, first]))
+        self.assertNotEqual(army_fingerprint([first]), army_fingerprint([first, first]))
+        self.assertNotEqual(army_fingerprint([]), army_fingerprint([first]))
+
+    def test_cache_hashes_each_unit_once(self) -> None:
+        cache = FingerprintCache()
+        units = [_unit(f"Unité {i}") for i in range(40)]
+        root = cache.army(units)
+
+        self.assertEqual(cache.hashed, 40)
+        self.assertEqual(root, army_fingerprint(units))
+
+        duplicated = units[:5] + [units[4]] + units[5:]
+        self.assertEqual(cache.army(duplicated), army_fingerprint(duplicated))
+        self.assertEqual(cache.hashed, 40)
+
+        edited = duplicated[:-1] + [_unit("Unité 39", 55)]
+        self.assertEqual(cache.army(edited), army_fingerprint(edited))
+        self.assertEqual(cache.hashed, 41)
+        self.assertEqual(len(cache), 40)
+
+    def test_content_hash_uses_the_canonical_encoding(self) -> None:
+        self.assertEqual(content_hash("army_html", {"b": 1, "a": 2}), content_hash("army_html", {"a": 2, "b": 1}))
+        self.assertEqual(content_hash("army_html", [1], name="x"), content_hash("army_html", (1,), name="x"))
+        self.assertNotEqual(content_hash("army_html", [1, 2]), content_hash("army_html", [2, 1]))
+
+
+class SessionFingerprintTests(unittest.TestCase):
+    def test_session_fingerprints_units_when_they_are_added(self) -> None:
+        state: dict = {}
+        manager = SessionStateManager(state)
+        manager.initialize_defaults()
+        manager.add_unit(_unit("Gardes"))
+        manager.add_unit(_unit("Motos", 80))
+
+        cache = state["army_fingerprints"]
+        self.assertEqual(cache.hashed, 2)
+
+        manager.duplicate_unit(0)
+        self.assertEqual(manager.army_fingerprint(), army_fingerprint(state["army_list"]))
+        manager.undo()
+        self.assertEqual(manager.army_fingerprint(), army_fingerprint(state["army_list"]))
+        self.assertEqual(cache.hashed, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
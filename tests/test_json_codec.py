@@ -0,0 +1,72 @@
+import io
+import json
+import unittest
+
+from repositories.json_codec import JsonCodec, available_backends
+
+
+ARMY = {
+    "game": "Age of Fantasy",
+    "faction": "Légions",
+    "army_list": [{"name": f"Guerriers {index}", "cost": 100 + index, "rules": ["Bouclier"]} for index in range(50)],
+    "army_cost": 6225,
+}
+
+
+class JsonCodecTests(unittest.TestCase):
+    def test_backends_round_trip_like_the_stdlib(self) -> None:
+        for name in available_backends():
+            with self.subTest(backend=name):
+                codec = JsonCodec(name)
+                text = codec.dumps(ARMY)
+
+                self.assertEqual(codec.loads(text), ARMY)
+                self.assertEqual(codec.loads(text.encode("utf-8")), ARMY)
+                self.assertEqual(json.loads(text), ARMY)
+                self.assertNotIn(" ", codec.dumps({"a": [1, 2]}))
+                self.assertIn("Légions", text)
+                self.assertIn("\n  ", codec.dumps(ARMY, pretty=True))
+                self.assertEqual(codec.dumps({"b": 1, "a": 2}, sort_keys=True), '{"a":2,"b":1}')
+                self.assertEqual(json.loads(codec.dumps({"n": 2**70})), {"n": 2**70})
+                self.assertEqual(codec.dumps({"d": {1}}, default=sorted), '{"d":[1]}')
+
+    def test_syntax_errors_are_stdlib_errors_with_position(self) -> None:
+        for name in available_backends():
+            with self.subTest(backend=name):
+                with self.assertRaises(json.JSONDecodeError) as raised:
+                    JsonCodec(name).loads(b'{\n  "a": 1\n  "b": 2}')
+                self.assertEqual((raised.exception.lineno, raised.exception.colno), (3, 3))
+
+    def test_unknown_backend_is_rejected(self) -> None:
+        with self.assertRaises(ValueError):
+            JsonCodec("yaml")
+
+    def test_streaming_decodes_items_across_small_chunks(self) -> None:
+        codec = JsonCodec("json")
+        payload = json.dumps(ARMY, ensure_ascii=False, indent=2).encode("utf-8")
+
+        items = list(codec.iter_array(io.BytesIO(payload), key="army_list", chunk_size=7))
+        loaded = codec.load_stream(io.BytesIO(payload), "army_list", chunk_size=5)
+
+        self.assertEqual(items, ARMY["army_list"])
+        self.assertEqual(loaded, ARMY)
+        self.assertEqual(list(codec.iter_array(io.StringIO("[1, 23, [4], {}]"), chunk_size=1)), [1, 23, [4], {}])
+        self.assertEqual(codec.load_stream(io.BytesIO(b"{}"), "army_list"), {})
+
+    def test_streaming_enforces_the_item_limit_and_syntax(self) -> None:
+        codec = JsonCodec("json")
+        payload = json.dumps(ARMY).encode("utf-8")
+
+        with self.assertRaises(ValueError) as raised:
+            codec.load_stream(io.BytesIO(payload), "army_list", max_items=10)
+        self.assertNotIsInstance(raised.exception, json.JSONDecodeError)
+        with self.assertRaises(json.JSONDecodeError):
+            codec.load_stream(io.BytesIO(b'{"army_list": [1, 2'), "army_list")
+        with self.assertRaises(json.JSONDecodeError):
+            codec.load_stream(io.BytesIO(b'[1] x'), "army_list")
+        with self.assertRaises(json.JSONDecodeError):
+            list(codec.iter_array(io.BytesIO(b"[1] 2")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+import json
+import unittest
+from pathlib import Path
+
+from armybuilder.catalog import CatalogVersion
+from armybuilder.labels import (
+    FactionLabels,
+    UnitLabels,
+    format_mount_option,
+    format_unit_option,
+    format_weapon_option,
+    weapon_profile_md,
+)
+from repositories.faction_compiler import compile_faction
+
+
+FACTION_PATH = Path(__file__).resolve().parent.parent / "repositories" / "data" / "factions" / "soeurs_benies_gf.json"
+
+
+def _weapon(name: str, attacks: int = 1, **extra) -> dict:
+    return {"name": name, "range": "Mêlée", "attacks": attacks, "armor_piercing": 0, "special_rules": [], **extra}
+
+
+UNIT = {
+    "name": "Chevaliers",
+    "type": "hero",
+    "size": 1,
+    "base_cost": 90,
+    "quality": 3,
+    "defense": 3,
+    "weapon": [_weapon("Épée"), _weapon("Arc", range=24, armor_piercing=1, special_rules=["Précision"])],
+    "special_rules": ["Héros", "Coriace(3)"],
+    "upgrade_groups": [
+        {"group": "Remplacement", "type": "weapon", "options": [
+            {"name": "Lance", "cost": 5, "weapon": _weapon("Lance", 2)},
+            {"name": "Paire", "cost": 10, "weapon": [_weapon("Hache"), _weapon("Dague")]},
+        ]},
+        {"group": "Bannière", "type": "conditional_weapon", "options": [
+            {"name": "Bannière", "cost": 15},
+        ]},
+        {"group": "Armes lourdes", "type": "variable_weapon_count", "options": [
+            {"name": "Canon", "cost": 20, "weapon": _weapon("Canon", range="30", armor_piercing=2)},
+        ]},
+        {"group": "Monture", "type": "mount", "options": [
+            {"name": "Destrier", "cost": 25, "mount": {"weapon": [_weapon("Sabots")], "coriace_bonus": 1, "special_rules": ["Rapide"]}},
+        ]},
+        {"group": "Équipement", "type": "upgrades", "options": [{"name": "Bouclier", "cost": 5}]},
+    ],
+}
+
+
+class UnitLabelsTests(unittest.TestCase):
+    def test_labels_match_the_widget_formatters(self) -> None:
+        labels = UnitLabels(UNIT)
+
+        self.assertEqual(labels.picker, format_unit_option(UNIT))
+        self.assertEqual(labels.picker, "Chevaliers [1] | Qual 3+ | Déf 3+ | 90 pts")
+        self.assertEqual(labels.default_weapon, "Épée et Arc")
+        self.assertEqual(labels.options[0], (format_weapon_option(_weapon("Lance", 2), 5), "Hache et Dague (+10 pts)"))
+        self.assertEqual(labels.options[1], ("Bannière (+15 pts)",))
+        self.assertEqual(labels.options[3], (format_mount_option(UNIT["upgrade_groups"][3]["options"][0]),))
+        self.assertEqual(labels.options[4], (None,))
+        self.assertEqual(labels.profiles[2], (f"⚔️ **Canon** — {weapon_profile_md(_weapon('Canon', range='30', armor_piercing=2))}",))
+        self.assertIn('24" | A1 | PA1 | Précision', labels.profile_html)
+        self.assertIn("Coriace(3)", labels.profile_html)
+        self.assertEqual(labels.option_index(0, "Hache et Dague (+10 pts)"), 1)
+        self.assertIsNone(labels.option_index(0, "Épée et Arc"))
+        self.assertIsNone(labels.option_index(9, "Lance"))
+
+    def test_unit_without_weapons_or_rules_has_no_profile_block(self) -> None:
+        labels = UnitLabels({"name": "Pion", "weapon": [], "special_rules": [], "upgrade_groups": []})
+
+        self.assertEqual(labels.profile_html, "")
+        self.assertIsNone(labels.default_weapon)
+
+
+class FactionLabelsTests(unittest.TestCase):
+    def test_labels_are_shared_per_catalog_version(self) -> None:
+        faction = compile_faction(json.loads(FACTION_PATH.read_text(encoding="utf-8")))
+        version = CatalogVersion(1, {faction["game"]: {faction["faction"]: faction}}, [faction["game"]])
+
+        build = lambda _version: FactionLabels(faction)
+        labels = version.derive("labels", build)
+
+        self.assertIs(version.derive("labels", build), labels)
+        self.assertEqual(len(labels), len(faction["units"]))
+        unit = faction["units"][0]
+        self.assertIs(labels.for_unit(unit), labels.for_unit(unit))
+        self.assertEqual(labels.picker(unit), format_unit_option(unit))
+        copy = dict(unit)
+        self.assertEqual(labels.for_unit(copy).picker, labels.picker(unit))
+        self.assertIsNot(labels.for_unit(copy), labels.for_unit(unit))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,37 @@
+import subprocess
+import sys
+import unittest
+
+from armybuilder.import_audit import audit_imports
+from armybuilder.lazy import is_loaded, lazy_import, module_available
+
+
+class LazyImportTests(unittest.TestCase):
+    def test_proxy_imports_on_first_use_and_stays_resident(self) -> None:
+        proxy = lazy_import("colorsys")
+
+        self.assertIs(lazy_import("colorsys"), proxy)
+        self.assertEqual(proxy.rgb_to_hsv(1.0, 0.0, 0.0), (0.0, 1.0, 1.0))
+        self.assertTrue(is_loaded(proxy))
+        self.assertIs(proxy.rgb_to_hsv, sys.modules["colorsys"].rgb_to_hsv)
+        self.assertIn("rgb_to_hsv", vars(proxy))
+
+    def test_availability_does_not_import(self) -> None:
+        self.assertFalse(module_available("module_qui_n_existe_pas"))
+        self.assertTrue(module_available("json"))
+
+    def test_package_import_does_not_load_heavy_modules(self) -> None:
+        code = "import sys, armybuilder, armybuilder.export_jobs; print(sorted(m for m in ('numpy', 'qrcode', 'PIL', 'reportlab') if m in sys.modules))"
+        output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+
+        self.assertEqual(output.strip(), "[]")
+
+    def test_audit_reports_import_costs(self) -> None:
+        rows = audit_imports(["json"])
+
+        self.assertIn("json", [row["module"] for row in rows])
+        self.assertTrue(all(row["cumulative_us"] >= row["self_us"] for row in rows))
+
+
+if __name__ == "__main__":
+    unittest.main()
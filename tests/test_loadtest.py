@@ -0,0 +1,60 @@
+import base64
+import importlib.util
+import json
+import urllib.parse
+import unittest
+import zlib
+
+from armybuilder.exporters import export_json
+from armybuilder.loadtest import STEPS, LoadTestReport, qr_payload, run_load_test
+
+
+class LoadTestReportTests(unittest.TestCase):
+    def test_percentiles_and_throughput(self) -> None:
+        report = LoadTestReport()
+        for value in range(1, 101):
+            report.record("add_unit", value / 1000)
+        report.finish_session(True)
+        report.finish_session(False)
+        report.fail("session 1 : boom")
+        report.elapsed = 2.0
+        report.rss_growth_kb = 400
+
+        data = report.to_dict()
+
+        self.assertEqual(data["steps"]["add_unit"]["p50_ms"], 51.0)
+        self.assertEqual(data["steps"]["add_unit"]["p99_ms"], 100.0)
+        self.assertEqual((data["completed"], data["errors"]), (1, 1))
+        self.assertEqual(data["sessions_per_s"], 0.5)
+        self.assertEqual(data["reruns_per_s"], 50.0)
+        self.assertEqual(data["rss_growth_kb_per_session"], 200.0)
+        self.assertNotIn("open", data["steps"])
+        self.assertIn("add_unit", report.format_text())
+
+    def test_qr_payload_decodes_like_the_app(self) -> None:
+        army = [{"name": "Guerriers", "cost": 120}]
+
+        raw = base64.urlsafe_b64decode(urllib.parse.unquote(qr_payload("Age of Fantasy", "Légions", 1000, army)).encode() + b"==")
+        data = json.loads(zlib.decompress(raw).decode())
+
+        self.assertEqual((data["game"], data["faction"], data["pts"]), ("Age of Fantasy", "Légions", 1000))
+        self.assertEqual(data["units"], [{"n": "Guerriers", "c": 120}])
+
+    def test_json_export_round_trips_the_army(self) -> None:
+        army = [{"name": "Guerriers", "cost": 120}]
+
+        data = json.loads(export_json("Age of Fantasy", "Légions", 1000, "Ost", army, 120, exported_at="2026-01-02 03:04"))
+
+        self.assertEqual(data["army_list"], army)
+        self.assertEqual((data["list_name"], data["army_cost"], data["exported_at"]), ("Ost", 120, "2026-01-02 03:04"))
+
+    @unittest.skipUnless(importlib.util.find_spec("streamlit"), "Streamlit non installé")
+    def test_small_run_drives_every_step(self) -> None:
+        report = run_load_test(sessions=2, concurrency=2)
+
+        self.assertEqual(report.errors, [])
+        self.assertEqual([step for step in STEPS if report.timings[step]], list(STEPS))
+
+
+if __name__ == "__main__":
+    unittest.main()
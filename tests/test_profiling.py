@@ -0,0 +1,76 @@
+import json
+import time
+import unittest
+
+from armybuilder.profiling import HISTOGRAM_BUCKETS, WINDOW_SIZE, Profiler
+
+
+class ProfilerTests(unittest.TestCase):
+    def test_disabled_profiler_is_a_no_op(self) -> None:
+        profiler = Profiler(enabled=False)
+
+        def work() -> int:
+            return 1
+
+        self.assertIs(profiler.profiled("work")(work), work)
+        started = time.perf_counter()
+        for _ in range(100_000):
+            with profiler.span("boucle"):
+                pass
+        self.assertLess(time.perf_counter() - started, 0.5)
+        self.assertEqual(profiler.snapshot(), [])
+
+    def test_spans_are_counted_and_bucketed(self) -> None:
+        profiler = Profiler(enabled=True)
+
+        @profiler.profiled("calcul")
+        def work(value: int) -> list[int]:
+            return list(range(value))
+
+        for _ in range(3):
+            self.assertEqual(len(work(100)), 100)
+        profiler.record("lent", 0.2)
+
+        rows = {row["span"]: row for row in profiler.snapshot()}
+
+        self.assertEqual(rows["calcul"]["count"], 3)
+        self.assertEqual(sum(rows["calcul"]["histogram"]), 3)
+        self.assertEqual(rows["lent"]["histogram"][HISTOGRAM_BUCKETS.index(0.25)], 1)
+        self.assertEqual(profiler.snapshot()[0]["span"], "lent")
+
+    def test_json_and_prometheus_exports(self) -> None:
+        profiler = Profiler(enabled=True)
+        profiler.record('arme "lourde"', 0.003, blocks=12)
+        profiler.record('arme "lourde"', 0.7)
+
+        exported = json.loads(profiler.to_json())
+        text = profiler.to_prometheus()
+
+        self.assertEqual(exported["spans"][0]["count"], 2)
+        self.assertIn('armybuilder_span_seconds_bucket{span="arme \\"lourde\\"",le="0.005"} 1', text)
+        self.assertIn('armybuilder_span_seconds_bucket{span="arme \\"lourde\\"",le="+Inf"} 2', text)
+        self.assertIn('armybuilder_span_blocks{span="arme \\"lourde\\""} 12', text)
+        self.assertIn("# TYPE armybuilder_span_blocks gauge", text)
+
+        profiler.reset()
+        self.assertEqual(profiler.snapshot(), [])
+
+    def test_exported_histogram_is_cumulative_beyond_the_window(self) -> None:
+        profiler = Profiler(enabled=True)
+        for _ in range(WINDOW_SIZE):
+            profiler.record("rerun", 0.2)
+        for _ in range(WINDOW_SIZE):
+            profiler.record("rerun", 0.002)
+
+        text = profiler.to_prometheus()
+
+        # La fenêtre ne contient plus que des mesures rapides, l'exposition compte tout depuis le démarrage.
+        self.assertEqual(profiler.snapshot()[0]["histogram"][HISTOGRAM_BUCKETS.index(0.25)], 0)
+        self.assertIn(f'armybuilder_span_seconds_bucket{{span="rerun",le="0.1"}} {WINDOW_SIZE}', text)
+        self.assertIn(f'armybuilder_span_seconds_bucket{{span="rerun",le="+Inf"}} {2 * WINDOW_SIZE}', text)
+        self.assertIn(f'armybuilder_span_seconds_count{{span="rerun"}} {2 * WINDOW_SIZE}', text)
+        self.assertIn('armybuilder_span_seconds_sum{span="rerun"} 101.000000', text)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,170 @@
+import random
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from armybuilder.labels import UnitLabels
+from armybuilder.requirements import (
+    FactionRequirements,
+    RequirementEvaluator,
+    UpgradeDependencyGraph,
+    main,
+    requirements_met,
+)
+from repositories import JsonFactionRepository
+from repositories.faction_compiler import compile_unit
+
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+
+def _weapon(name: str, **extra) -> dict:
+    return {"name": name, "range": "Mêlée", "attacks": 1, "armor_piercing": 0, "special_rules": [], **extra}
+
+
+SERGEANT = compile_unit({
+    "name": "Escouade",
+    "size": 5,
+    "base_cost": 100,
+    "weapon": [_weapon("Fusil"), _weapon("ACC")],
+    "upgrade_groups": [
+        {"group": "Arme lourde", "type": "weapon", "options": [{"name": "Lance-flammes", "cost": 5, "weapon": _weapon("Lance-flammes", tags=["Flamme"])}]},
+        {"group": "Sergent", "type": "conditional_weapon", "options": [
+            {"name": "Pistolet + Épée", "cost": 5, "replaces": ["Fusil", "ACC"], "weapon": [_weapon("Pistolet"), _weapon("Épée")]},
+        ]},
+        {"group": "Remplacement Pistolet", "type": "conditional_weapon", "requires": ["Pistolet + Épée"], "options": [
+            {"name": "Plasma", "cost": 5, "weapon": _weapon("Plasma")},
+        ]},
+        {"group": "Brûleur", "type": "upgrades", "requires": ["Flamme"], "options": [{"name": "Réservoir", "cost": 5}]},
+        {"group": "Sans ACC", "type": "upgrades", "requires_not": ["ACC"], "options": [{"name": "Grenades", "cost": 5}]},
+        {"group": "Fantôme", "type": "upgrades", "requires": ["Canon fantôme"], "options": [{"name": "Rien", "cost": 5}]},
+    ],
+})
+
+
+class UpgradeDependencyGraphTests(unittest.TestCase):
+    def test_edges_follow_provided_names(self) -> None:
+        graph = UpgradeDependencyGraph(SERGEANT, UnitLabels(SERGEANT))
+
+        self.assertEqual(graph.upstream, ((), (), (1,), (0,), (0,), ()))
+        self.assertEqual(graph.downstream[0], (3, 4))
+        self.assertEqual(graph.cycles, ())
+        self.assertEqual(graph.order, (0, 1, 5, 3, 4, 2))
+        self.assertEqual(graph.unknown, ((5, "Canon fantôme"),))
+
+    def test_cycles_are_reported(self) -> None:
+        unit = compile_unit({
+            "name": "Boucle",
+            "weapon": [],
+            "upgrade_groups": [
+                {"group": "A", "type": "conditional_weapon", "requires": ["Lame B"], "options": [{"name": "a", "cost": 1, "weapon": _weapon("Lame A")}]},
+                {"group": "B", "type": "conditional_weapon", "requires": ["Lame A"], "options": [{"name": "b", "cost": 1, "weapon": _weapon("Lame B")}]},
+                {"group": "C", "type": "conditional_weapon", "requires": ["Lame A"], "options": [{"name": "c", "cost": 1, "weapon": _weapon("Lame C")}]},
+            ],
+        })
+
+        graph = UpgradeDependencyGraph(unit, UnitLabels(unit))
+        issues = FactionRequirements({"units": [unit]}).issues
+
+        self.assertEqual(graph.cycles, ((0, 1),))
+        self.assertEqual(graph.order, ())
+        self.assertEqual(issues, ["Boucle : dépendance circulaire entre groupes (A → B)"])
+
+    def test_count_group_weapons_feed_later_count_groups(self) -> None:
+        def count_group(name: str, weapon: str, requires: list[str] | None = None) -> dict:
+            group = {"group": name, "type": "variable_weapon_count", "options": [
+                {"name": weapon, "cost": 5, "weapon": _weapon(weapon), "max_count": {"type": "fixed", "value": 1}},
+            ]}
+            return {**group, "requires": requires} if requires else group
+
+        unit = compile_unit({"name": "Marcheur", "weapon": [_weapon("Poing")], "upgrade_groups": [
+            count_group("Bras", "Frappe"),
+            count_group("Arme de Frappe", "Lame", ["Frappe"]),
+        ]})
+        reversed_unit = compile_unit({**unit, "upgrade_groups": list(reversed(unit["upgrade_groups"]))})
+
+        self.assertEqual(UpgradeDependencyGraph(unit, UnitLabels(unit)).upstream, ((), (0,)))
+        self.assertEqual(UpgradeDependencyGraph(unit, UnitLabels(unit)).unknown, ())
+        self.assertEqual(UpgradeDependencyGraph(reversed_unit, UnitLabels(reversed_unit)).unknown, ((0, "Frappe"),))
+
+    def test_shipped_count_group_requirements_are_not_reported(self) -> None:
+        factions_by_game, _ = JsonFactionRepository(BASE_DIR).load_catalog()
+
+        factions = factions_by_game["Grimdark Future"]
+        issues = FactionRequirements(factions["Frères de Bataille"]).issues
+
+        # Frappe (Marcheurs) et ACC lourde viennent d'un groupe à compteur précédent.
+        self.assertEqual(FactionRequirements(factions["Sœurs Bénies"]).issues, [])
+        # Seule vraie incohérence : « Boucliers de combat » (pluriel) n'est porté par aucune figurine.
+        self.assertEqual(len(issues), 1)
+        self.assertIn("requiert « Boucliers de combat »", issues[0])
+
+
+class RequirementTests(unittest.TestCase):
+    def test_sergeant_combo_counts_under_its_own_name(self) -> None:
+        labels = UnitLabels(SERGEANT)
+        selections = {"group_1": labels.options[1][0]}
+
+        self.assertTrue(requirements_met(SERGEANT, labels, selections, ["Pistolet + Épée"]))
+        self.assertTrue(requirements_met(SERGEANT, labels, selections, ["Épée"]))
+        self.assertFalse(requirements_met(SERGEANT, labels, {"group_1": "Aucune amélioration"}, ["Pistolet + Épée"]))
+
+    def test_weapon_group_replaces_base_weapons(self) -> None:
+        labels = UnitLabels(SERGEANT)
+
+        self.assertTrue(requirements_met(SERGEANT, labels, {}, ["ACC"]))
+        self.assertTrue(requirements_met(SERGEANT, labels, {"group_0": labels.default_weapon}, ["ACC"]))
+        self.assertFalse(requirements_met(SERGEANT, labels, {"group_0": labels.options[0][0]}, ["ACC"]))
+        self.assertTrue(requirements_met(SERGEANT, labels, {"group_0": labels.options[0][0]}, ["Flamme"]))
+
+    def test_evaluator_only_reevaluates_downstream_groups(self) -> None:
+        labels = UnitLabels(SERGEANT)
+        evaluator = RequirementEvaluator(SERGEANT, labels, UpgradeDependencyGraph(SERGEANT, labels))
+        selections = {"group_0": labels.default_weapon, "group_1": "Aucune amélioration"}
+
+        self.assertFalse(evaluator.met(2, ["Pistolet + Épée"], selections))
+        self.assertFalse(evaluator.met(3, ["Flamme"], selections))
+        self.assertEqual(evaluator.evaluations, 2)
+
+        selections["group_1"] = labels.options[1][0]
+        self.assertTrue(evaluator.met(2, ["Pistolet + Épée"], selections))
+        self.assertFalse(evaluator.met(3, ["Flamme"], selections))
+        self.assertEqual(evaluator.evaluations, 3)
+
+    def test_evaluator_matches_direct_checks_on_every_faction(self) -> None:
+        factions_by_game, games = JsonFactionRepository(BASE_DIR).load_catalog()
+        rng = random.Random(7)
+        mismatches = []
+        for game in games:
+            for faction_data in factions_by_game[game].values():
+                requirements = FactionRequirements(faction_data)
+                for unit in faction_data["units"]:
+                    labels = UnitLabels(unit)
+                    evaluator = RequirementEvaluator(unit, labels, requirements.for_unit(unit, labels))
+                    groups = unit["upgrade_groups"]
+                    for _ in range(10):
+                        selections = {}
+                        for g_idx, group in enumerate(groups):
+                            choices = [label for label in labels.options[g_idx] if label is not None]
+                            if group["type"] == "weapon" and labels.default_weapon is not None:
+                                choices.append(labels.default_weapon)
+                            if choices and rng.random() < 0.7:
+                                selections[f"group_{g_idx}"] = rng.choice(choices + ["Aucune amélioration"])
+                        for g_idx, group in enumerate(groups):
+                            names = [group.get("requires", []), *[[name] for name in group.get("requires_not", [])]]
+                            names += [option.get("requires", []) for option in group["options"]]
+                            for requires in names:
+                                if evaluator.met(g_idx, requires, selections) != requirements_met(unit, labels, selections, requires):
+                                    mismatches.append((unit["name"], g_idx, requires, dict(selections)))
+        self.assertEqual(mismatches, [])
+
+    def test_cli_reports_shipped_data_issues(self) -> None:
+        with mock.patch("builtins.print") as printed:
+            status = main([str(BASE_DIR)])
+
+        self.assertEqual(status, 1)
+        self.assertIn("incohérence(s)", printed.call_args_list[-1].args[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
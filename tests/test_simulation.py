@@ -0,0 +1,102 @@
+import unittest
+
+from armybuilder.combat import NUMPY_AVAILABLE
+
+
+def _unit(name: str, size: int = 5, quality: int = 4, defense: int = 4, weapon: dict | None = None, **extra) -> dict:
+    weapon = weapon or {"name": "Épée", "range": "Mêlée", "attacks": 2, "armor_piercing": 0, "special_rules": []}
+    return {"name": name, "type": "unit", "size": size, "quality": quality, "defense": defense, "weapon": [weapon], **extra}
+
+
+class ArmyUnitProfileTests(unittest.TestCase):
+    def test_profile_counts_configured_weapons_and_mount(self) -> None:
+        from armybuilder.simulation import UnitProfile
+        from armybuilder.weapon_counts import WeaponCountAllocator
+
+        catalog_unit = {"name": "Chevaliers", "size": 10, "weapon": [{"name": "Épée", "range": "Mêlée", "attacks": 1, "armor_piercing": 0, "special_rules": []}]}
+        group = {"type": "variable_weapon_count", "options": [{
+            "name": "Marteau", "cost": 5, "replaces": ["Épée"], "max_count": {"type": "fixed", "value": 1},
+            "weapon": {"name": "Marteau", "range": "Mêlée", "attacks": 2, "armor_piercing": 1, "special_rules": []},
+        }]}
+        allocator = WeaponCountAllocator(catalog_unit, group, list(catalog_unit["weapon"]), [1])
+        allocator.choose(0, 1)
+        lance = {"name": "Lance lourde", "range": "Mêlée", "attacks": 3, "armor_piercing": 2, "special_rules": [], "_upgraded": True}
+        # Forme écrite par le configurateur (app.py, bouton « Ajouter à l'armée »)
+        army_unit = {
+            "name": "Chevaliers", "type": "unit", "size": 10, "quality": 4, "defense": 4, "coriace": 0,
+            "weapon": allocator.weapons() + [lance], "options": {}, "special_rules": [],
+            "mount": {"name": "Destrier", "cost": 10, "mount": {"weapon": [{"name": "Sabots", "attacks": 2, "special_rules": []}], "special_rules": [], "coriace_bonus": 0}},
+        }
+
+        profile = UnitProfile.from_unit(army_unit)
+
+        self.assertEqual(
+            [(weapon.name, weapon.attacks) for weapon in profile.weapons],
+            [("Épée", 9), ("Marteau", 2), ("Lance lourde", 3), ("Sabots", 2)],
+        )
+
+
+@unittest.skipUnless(NUMPY_AVAILABLE, "NumPy non installé")
+class BattleSimulatorTests(unittest.TestCase):
+    def test_profile_reads_tough_and_model_count(self) -> None:
+        from armybuilder.simulation import UnitProfile
+
+        hero = UnitProfile.from_unit(_unit("Héros", size=3, type="hero", special_rules=["Coriace (6)", "Héros"]))
+        squad = UnitProfile.from_unit(_unit("Escouade", size=10, coriace=3))
+
+        self.assertEqual((hero.models, hero.tough, hero.wounds), (1, 6, 6))
+        self.assertEqual((squad.models, squad.tough), (10, 3))
+        self.assertEqual(squad.weapons[0].attacks, 20)
+
+    def test_mean_matches_expected_value(self) -> None:
+        from armybuilder.simulation import BattleSimulator, UnitProfile
+
+        attacker = UnitProfile.from_unit(_unit("A", size=10))
+        target = UnitProfile.from_unit(_unit("B", size=20))
+
+        distribution = BattleSimulator(seed=7).simulate(attacker, target, samples=200_000)
+
+        # 20 attaques, touche 4+ et blessure 4+ : 5 blessures attendues.
+        self.assertAlmostEqual(distribution.mean, 5.0, delta=0.05)
+        self.assertAlmostEqual(float(distribution.histogram.sum()), 1.0)
+        self.assertLessEqual(distribution.percentiles[5], distribution.percentiles[95])
+
+    def test_deadly_does_not_exceed_model_tough_and_kills_are_capped(self) -> None:
+        from armybuilder.simulation import BattleSimulator, UnitProfile
+
+        weapon = {"name": "Fuseur", "range": 12, "attacks": 6, "armor_piercing": 4, "special_rules": ["Mortel (6)"]}
+        attacker = UnitProfile.from_unit(_unit("A", size=1, quality=2, weapon=weapon))
+        target = UnitProfile.from_unit(_unit("B", size=2, defense=6))
+
+        distribution = BattleSimulator(seed=1).simulate(attacker, target, samples=10_000)
+
+        self.assertEqual(len(distribution.histogram), 3)
+        self.assertGreater(distribution.kill_chance, 0.9)
+        self.assertEqual(distribution.at_least(0), 1.0)
+
+    def test_same_seed_gives_same_distribution(self) -> None:
+        from armybuilder.simulation import BattleSimulator, UnitProfile
+
+        attacker = UnitProfile.from_unit(_unit("A"))
+        target = UnitProfile.from_unit(_unit("B", regeneration=True, special_rules=["Régénération"]))
+
+        first = BattleSimulator(seed=3).simulate(attacker, target, samples=5_000).to_dict()
+        second = BattleSimulator(seed=3).simulate(attacker, target, samples=5_000).to_dict()
+
+        self.assertEqual(first, second)
+
+    def test_matchup_pool_and_inline_agree(self) -> None:
+        from armybuilder.simulation import simulate_matchup
+
+        army = [_unit("A1"), _unit("A2", size=3)]
+        opponents = [_unit("B1"), _unit("B2", defense=2)]
+
+        inline = simulate_matchup(army, opponents, samples=2_000, seed=5, workers=0)
+        pooled = simulate_matchup(army, opponents, samples=2_000, seed=5, workers=2)
+
+        self.assertEqual([[cell["target"] for cell in row] for row in inline], [["B1", "B2"], ["B1", "B2"]])
+        self.assertEqual(inline, pooled)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+import unittest
+
+from armybuilder.search import SearchQuery, UnitSearchIndex, fold
+
+
+FACTIONS = {
+    "Game One": {
+        "Alpha": {
+            "units": [
+                {
+                    "name": "Chevalier à l'Épée",
+                    "unit_detail": "hero",
+                    "quality": 3,
+                    "defense": 2,
+                    "base_cost": 120,
+                    "special_rules": ["Héros", "Coriace (3)"],
+                    "weapon": [{"name": "Épée lourde", "range": "Mêlée", "attacks": 3, "armor_piercing": 2}],
+                    "upgrade_groups": [],
+                },
+                {
+                    "name": "Éclaireurs",
+                    "unit_detail": "unit",
+                    "quality": 4,
+                    "defense": 5,
+                    "base_cost": 60,
+                    "special_rules": ["Éclaireur"],
+                    "weapon": [{"name": "Arc", "range": 24, "attacks": 1, "armor_piercing": 0}],
+                    "upgrade_groups": [
+                        {
+                            "type": "weapon",
+                            "options": [
+                                {
+                                    "name": "Arbalète",
+                                    "cost": 5,
+                                    "weapon": {"name": "Arbalète", "range": 30, "attacks": 1, "armor_piercing": 1},
+                                }
+                            ],
+                        }
+                    ],
+                },
+            ]
+        },
+        "Beta": {
+            "units": [
+                {
+                    "name": "Épéistes",
+                    "unit_detail": "unit",
+                    "quality": 4,
+                    "defense": 4,
+                    "base_cost": 90,
+                    "special_rules": [],
+                    "weapon": [{"name": "Épée", "range": "Mêlée", "attacks": 1, "armor_piercing": 1}],
+                    "upgrade_groups": [],
+                }
+            ]
+        },
+    }
+}
+
+
+class UnitSearchIndexTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.index = UnitSearchIndex(FACTIONS)
+
+    def _names(self, results) -> list[str]:
+        return [result.name for result in results]
+
+    def test_fold_removes_accents_and_ligatures(self) -> None:
+        self.assertEqual(fold("Épée"), "epee")
+        self.assertEqual(fold("Sœurs Bénies"), "soeurs benies")
+
+    def test_search_is_accent_insensitive_prefix_across_factions(self) -> None:
+        results = self.index.search("epe")
+
+        self.assertEqual(self._names(results), ["Chevalier à l'Épée", "Épéistes"])
+        self.assertEqual([result.faction for result in results], ["Alpha", "Beta"])
+
+    def test_search_by_rule_ignores_rule_parameters(self) -> None:
+        self.assertEqual(self._names(self.index.search("regle:eclaireur")), ["Éclaireurs"])
+        self.assertEqual(self._names(self.index.search("regle:coriace")), ["Chevalier à l'Épée"])
+
+    def test_search_includes_option_weapons(self) -> None:
+        self.assertEqual(self._names(self.index.search("arme:arbalete")), ["Éclaireurs"])
+
+    def test_numeric_filters(self) -> None:
+        self.assertEqual(self._names(self.index.search("pa>=2")), ["Chevalier à l'Épée"])
+        self.assertEqual(self._names(self.index.search("portee>24")), ["Éclaireurs"])
+        self.assertEqual(self._names(self.index.search("pa>=1 def<=4")), ["Chevalier à l'Épée", "Épéistes"])
+
+    def test_scope_and_unit_detail_filters(self) -> None:
+        self.assertEqual(
+            self._names(self.index.search("", game="Game One", faction="Alpha", unit_details=["unit"])),
+            ["Éclaireurs"],
+        )
+        self.assertEqual(len(self.index.search("")), 3)
+
+    def test_name_matches_rank_first(self) -> None:
+        results = self.index.search("eclaireur")
+
+        self.assertEqual(self._names(results), ["Éclaireurs"])
+        self.assertEqual(self._names(self.index.search("epee", faction=None, limit=1)), ["Chevalier à l'Épée"])
+
+    def test_parse_query(self) -> None:
+        query = SearchQuery.parse("Épée règle:Éclaireur PA>=2")
+
+        self.assertEqual(query.terms, ["epee"])
+        self.assertEqual(query.field_terms, {"rule": ["eclaireur"]})
+        self.assertEqual(query.filters, [("weapon_ap", ">=", 2.0)])
+
+
+if __name__ == "__main__":
+    unittest.main()
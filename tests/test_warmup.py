@@ -0,0 +1,132 @@
+import json
+import tempfile
+import threading
+import unittest
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+from armybuilder.catalog import CatalogVersion
+from armybuilder.export_jobs import ExportJobQueue
+from armybuilder.warmup import FACTION_PRODUCTS, CatalogWarmup
+
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+FACTION = {"game": "Grimdark Future", "faction": "Test", "units": [], "faction_special_rules": [], "spells": {}}
+
+
+class FakeCatalog:
+    def __init__(self, gate: threading.Event | None = None, failing: str | None = None) -> None:
+        self.version = CatalogVersion(3, {"Grimdark Future": {"Test": FACTION}}, ["Grimdark Future"])
+        self.gate = gate
+        self.failing = failing
+        self.calls: list[tuple[str, ...]] = []
+
+    def current_version(self) -> CatalogVersion:
+        if self.gate is not None:
+            self.gate.wait(5)
+        if self.failing == "catalog":
+            raise OSError("dossier des factions illisible")
+        return self.version
+
+    def load_generic_rules(self) -> dict:
+        self.calls.append(("generic_rules",))
+        return {}
+
+    def search_index(self, version: CatalogVersion) -> None:
+        self.calls.append(("search_index",))
+
+    def export_key(self, kind: str, game: str, faction: str, version: CatalogVersion) -> str:
+        return f"{kind}:{game}:{faction}:{version.number}"
+
+    def __getattr__(self, name: str):
+        if name not in FACTION_PRODUCTS:
+            raise AttributeError(name)
+
+        def build(game: str, faction: str, version: CatalogVersion) -> None:
+            if name == self.failing:
+                raise RuntimeError("NumPy absent")
+            self.calls.append((name, game, faction))
+
+        return build
+
+
+class CatalogWarmupTests(unittest.TestCase):
+    def test_run_builds_every_cache_and_writes_health_file(self) -> None:
+        catalog = FakeCatalog()
+        jobs = ExportJobQueue(workers=0)
+        with tempfile.TemporaryDirectory() as tmp:
+            health_path = Path(tmp) / "health" / "warmup.json"
+            warmup = CatalogWarmup(catalog, BASE_DIR, export_jobs=jobs, health_path=health_path)
+
+            warmup.run()
+            health = json.loads(health_path.read_text(encoding="utf-8"))
+
+        self.assertTrue(warmup.ready.is_set())
+        self.assertEqual([call[0] for call in catalog.calls], ["generic_rules", "search_index", *FACTION_PRODUCTS])
+        self.assertEqual(jobs.status("faction_html:Grimdark Future:Test:3"), "done")
+        self.assertEqual(health["status"], "ready")
+        self.assertTrue(health["ready"])
+        self.assertEqual(health["catalog_version"], 3)
+        self.assertEqual(
+            set(health["steps_ms"]),
+            {"catalog", "generic_rules", "search_index", *FACTION_PRODUCTS, "faction_sheets", "covers"},
+        )
+        self.assertEqual(health["errors"], [])
+
+    def test_failing_step_is_reported_and_others_still_run(self) -> None:
+        catalog = FakeCatalog(failing="upgrade_efficiency")
+        warmup = CatalogWarmup(catalog, BASE_DIR, export_jobs=ExportJobQueue(workers=0))
+
+        warmup.run()
+
+        self.assertTrue(warmup.ready.is_set())
+        self.assertEqual(warmup.errors, ["upgrade_efficiency : NumPy absent"])
+        self.assertIn(("auto_builder", "Grimdark Future", "Test"), catalog.calls)
+
+    def test_catalog_failure_is_never_ready(self) -> None:
+        warmup = CatalogWarmup(FakeCatalog(failing="catalog"), BASE_DIR, export_jobs=ExportJobQueue(workers=0))
+
+        warmup.run()
+
+        self.assertFalse(warmup.wait(0))
+        self.assertTrue(warmup.finished.is_set())
+        self.assertEqual(warmup.health()["status"], "failed")
+        self.assertEqual(warmup.errors, ["catalog : dossier des factions illisible"])
+
+    def test_busy_health_port_is_reported(self) -> None:
+        first = CatalogWarmup(FakeCatalog(), BASE_DIR, export_jobs=ExportJobQueue(workers=0))
+        second = CatalogWarmup(FakeCatalog(), BASE_DIR, export_jobs=ExportJobQueue(workers=0))
+        server = first.serve_health(0)
+        try:
+            self.assertIsNone(second.serve_health(server.server_address[1]))
+            self.assertEqual(len(second.errors), 1)
+            self.assertIn(f"port {server.server_address[1]} indisponible", second.errors[0])
+        finally:
+            first.shutdown()
+
+    def test_health_endpoint_answers_503_until_warm(self) -> None:
+        gate = threading.Event()
+        warmup = CatalogWarmup(FakeCatalog(gate), BASE_DIR, export_jobs=ExportJobQueue(workers=0))
+        server = warmup.serve_health(0)
+        url = f"http://127.0.0.1:{server.server_address[1]}/health"
+        try:
+            self.assertTrue(warmup.start(health_port=0))
+            self.assertFalse(warmup.start(health_port=0))
+            with self.assertRaises(urllib.error.HTTPError) as raised:
+                urllib.request.urlopen(url, timeout=5)
+            self.assertEqual(raised.exception.code, 503)
+            self.assertEqual(json.loads(raised.exception.read())["status"], "warming")
+
+            gate.set()
+            self.assertTrue(warmup.wait(5))
+            with urllib.request.urlopen(url, timeout=5) as response:
+                self.assertEqual(response.status, 200)
+                self.assertTrue(json.loads(response.read())["ready"])
+        finally:
+            gate.set()
+            warmup.shutdown()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,171 @@
+import copy
+import random
+import unittest
+from pathlib import Path
+
+from armybuilder.weapon_counts import WeaponCountAllocator, weapon_count
+from repositories import JsonFactionRepository
+
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+
+def _reference(unit, group, weapons, counts, pick):
+    """The configurator's former inline computation, kept verbatim as the behavior to match."""
+    session = dict(enumerate(counts))
+    _first_opt = group.get("options", [{}])[0] if group.get("options") else {}
+    _mc_cfg_g = _first_opt.get("max_count", {})
+    _mc_type_g = _mc_cfg_g.get("type", "size_based") if isinstance(_mc_cfg_g, dict) else "size_based"
+    if _mc_type_g == "fixed":
+        _group_budget = _mc_cfg_g.get("value", 1)
+    elif _mc_type_g == "count_in_weapons":
+        _wn_g = _mc_cfg_g.get("weapon_name", "")
+        _base_weapon_names = [w.get("name") for w in unit.get("weapon", []) if isinstance(w, dict)]
+        def _weapon_count(w, unit_size):
+            if "_count" in w:
+                return w["_count"]
+            if "count" in w:
+                return w["count"]
+            if w.get("name") in _base_weapon_names:
+                return unit_size
+            return 1
+        _group_budget = sum(_weapon_count(w, unit.get("size", 1)) for w in weapons if isinstance(w, dict) and w.get("name") == _wn_g)
+    elif _mc_type_g == "size_based":
+        _group_budget = min(_mc_cfg_g.get("value", unit.get("size", 1)), unit.get("size", 1))
+    else:
+        _group_budget = unit.get("size", 1)
+    _group_budget = max(_group_budget, 0)
+    bounds = []
+    for oi, option in enumerate(group.get("options", [])):
+        mc_cfg = option.get("max_count", {})
+        mc_type = mc_cfg.get("type", "size_based") if isinstance(mc_cfg, dict) else "size_based"
+        if mc_type == "fixed":
+            mc = mc_cfg.get("value", 1)
+        elif mc_type == "size_based":
+            mc = min(mc_cfg.get("value", unit.get("size", 1)), unit.get("size", 1))
+        elif mc_type == "count_in_weapons":
+            wn = mc_cfg.get("weapon_name", "")
+            _base_wnames = [w.get("name") for w in unit.get("weapon", []) if isinstance(w, dict)]
+            def _wcount(w, sz):
+                if "_count" in w: return w["_count"]
+                if "count" in w: return w["count"]
+                return sz if w.get("name") in _base_wnames else 1
+            mc = sum(_wcount(w, unit.get("size", 1)) for w in weapons if isinstance(w, dict) and w.get("name") == wn)
+        else:
+            mc = unit.get("size", 1)
+        mc = max(mc, 0)
+        _others_used = sum(value for key, value in session.items() if key != oi)
+        _mc_interdep = max(min(mc, _group_budget - _others_used), 0)
+        prev = min(session[oi], _mc_interdep)
+        max_value = max(_mc_interdep, option.get("min_count", 0))
+        bounds.append((_mc_interdep, max_value, prev))
+        cnt = pick(option.get("min_count", 0), max_value, prev)
+        session[oi] = cnt
+        if cnt > 0:
+            fw = copy.deepcopy(weapons)
+            nw = option["weapon"]
+            opt_replaces = option.get("replaces", [])
+            if opt_replaces:
+                remaining = cnt
+                new_fw = []
+                _base_w_names_vwc = [bw.get("name") for bw in unit.get("weapon", []) if isinstance(bw, dict)]
+                _unit_sz_vwc = unit.get("size", 1)
+                for w in fw:
+                    if not isinstance(w, dict): new_fw.append(w); continue
+                    if w.get("name") in opt_replaces and remaining > 0:
+                        if "_count" not in w and "count" not in w and w.get("name") in _base_w_names_vwc:
+                            w_count = _unit_sz_vwc
+                        else:
+                            w_count = w.get("_count", w.get("count", 1))
+                        if w_count > remaining:
+                            wc = w.copy()
+                            if "_count" in w: wc["_count"] = w_count - remaining
+                            elif "count" in w: wc["count"] = w_count - remaining
+                            else: wc["_count"] = w_count - remaining
+                            new_fw.append(wc)
+                            remaining = 0
+                        else:
+                            remaining -= w_count
+                    else:
+                        new_fw.append(w)
+                fw = new_fw
+            if isinstance(nw, dict): fw.append({**nw, "_count": cnt, "_replaces": opt_replaces, "_upgraded": True})
+            elif isinstance(nw, list): fw.extend({**w2, "_count": cnt, "_replaces": opt_replaces, "_upgraded": True} for w2 in nw)
+            weapons = fw
+    return bounds, weapons
+
+
+def _allocate(unit, group, weapons, counts, pick):
+    allocator = WeaponCountAllocator(unit, group, weapons, counts)
+    bounds = []
+    for oi in range(len(group["options"])):
+        b = allocator.bounds(oi)
+        bounds.append((b.limit, b.max_value, b.value))
+        allocator.choose(oi, pick(b.min_value, b.max_value, b.value))
+    return bounds, allocator.weapons()
+
+
+class WeaponCountAllocatorTests(unittest.TestCase):
+    def test_budget_is_shared_and_replacements_decrement(self) -> None:
+        unit = {"name": "Escouade", "size": 5, "weapon": [{"name": "Fusil"}, {"name": "ACC"}]}
+        group = {"type": "variable_weapon_count", "options": [
+            {"name": "Plasma", "cost": 5, "replaces": ["Fusil"], "weapon": {"name": "Plasma"},
+             "max_count": {"type": "count_in_weapons", "weapon_name": "Fusil"}},
+            {"name": "Fuseur", "cost": 5, "replaces": ["Fusil"], "weapon": {"name": "Fuseur"},
+             "max_count": {"type": "count_in_weapons", "weapon_name": "Fusil"}},
+        ]}
+        base = list(unit["weapon"])
+        allocator = WeaponCountAllocator(unit, group, base, [2, 4])
+
+        self.assertEqual(allocator.budget, 5)
+        self.assertEqual(allocator.bounds(0).limit, 1)
+        allocator.choose(0, 1)
+        self.assertEqual(allocator.copies("Fusil"), 4)
+        self.assertEqual(allocator.bounds(1).limit, 4)
+        allocator.choose(1, 3)
+
+        self.assertEqual(allocator.weapons(), [
+            {"name": "Fusil", "_count": 1},
+            {"name": "ACC"},
+            {"name": "Plasma", "_count": 1, "_replaces": ["Fusil"], "_upgraded": True},
+            {"name": "Fuseur", "_count": 3, "_replaces": ["Fusil"], "_upgraded": True},
+        ])
+        self.assertIs(allocator.weapons()[1], base[1])
+        self.assertEqual(base, [{"name": "Fusil"}, {"name": "ACC"}])
+
+    def test_weapon_count_prefers_explicit_counts(self) -> None:
+        self.assertEqual(weapon_count({"name": "A", "_count": 2, "count": 9}, 5, {"A"}), 2)
+        self.assertEqual(weapon_count({"name": "A", "count": 3}, 5, {"A"}), 3)
+        self.assertEqual(weapon_count({"name": "A"}, 5, {"A"}), 5)
+        self.assertEqual(weapon_count({"name": "B"}, 5, {"A"}), 1)
+
+    def test_matches_former_computation_on_every_faction(self) -> None:
+        factions_by_game, games = JsonFactionRepository(BASE_DIR).load_catalog()
+        rng = random.Random(11)
+        groups = [
+            (unit, group)
+            for game in games for faction_data in factions_by_game[game].values()
+            for unit in faction_data["units"] for group in unit["upgrade_groups"]
+            if group["type"] == "variable_weapon_count"
+        ]
+        self.assertGreater(len(groups), 20)
+        mismatches = []
+        for unit, group in groups:
+            for trial in range(25):
+                counts = [rng.randint(0, unit.get("size", 1)) for _ in group["options"]]
+                seed = rng.random()
+                if trial % 2:
+                    pick = lambda low, high, value: value
+                else:
+                    picker = random.Random(seed)
+                    pick = lambda low, high, value: picker.randint(low, high)
+                expected = _reference(unit, group, copy.deepcopy(unit["weapon"]), counts, pick)
+                if not trial % 2:
+                    picker.seed(seed)
+                if _allocate(unit, group, list(unit["weapon"]), counts, pick) != expected:
+                    mismatches.append((unit["name"], group["group"], counts))
+        self.assertEqual(mismatches, [])
+
+
+if __name__ == "__main__":
+    unittest.main()